@@ -0,0 +1,109 @@
+# backend/api/analysis_jobs.py
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional
+import asyncio
+
+from models.analysis_request import CodeAnalysisRequest
+from service.analysis_jobs import get_analysis_job_manager
+from service.progress_bus import get_progress_bus
+from service.analysis_runner import get_pipeline_metrics
+from api.file_analysis import format_job_event, job_options
+
+router = APIRouter(
+    prefix="/analyze/jobs",
+    tags=["analysis-jobs"]
+)
+
+
+def _get_job_or_404(job_id: str):
+    job = get_analysis_job_manager().store.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job
+
+
+@router.post("")
+async def submit_analysis_job(request: CodeAnalysisRequest):
+    """분석 작업을 대기열에 등록하고 작업 정보를 반환합니다. (진행 상황은 /events 로 구독)"""
+    options = job_options(request)
+    job = await asyncio.to_thread(
+        get_analysis_job_manager().submit, request.project_root_path, request.selected_paths, request.priority, options
+    )
+    return {"status": "success", "job": job}
+
+
+@router.get("")
+async def list_analysis_jobs(
+    status: Optional[str] = Query(None, description="상태 필터 (queued, running, completed, failed, cancelled, interrupted)"),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    jobs = await asyncio.to_thread(get_analysis_job_manager().store.list_jobs, status, limit)
+    return {"status": "success", "jobs": jobs}
+
+
+@router.get("/progress-bus/stats")
+async def get_progress_bus_stats():
+    """진행 이벤트 버스의 발행/합쳐짐/전달/버림 건수를 반환합니다."""
+    return {"status": "success", "stats": get_progress_bus().stats()}
+
+
+@router.get("/{job_id}")
+async def get_analysis_job(job_id: str):
+    job = await asyncio.to_thread(_get_job_or_404, job_id)
+    return {"status": "success", "job": job}
+
+
+@router.get("/{job_id}/pipeline")
+async def get_analysis_job_pipeline(job_id: str):
+    """
+    분석 파이프라인의 단계별 처리량, 큐 길이, 가동률, 역압 대기 시간을 반환합니다.
+    실행 중이면 현재 값을, 끝난 작업이면 요약에 저장된 최종 값을 반환합니다.
+    """
+    job = await asyncio.to_thread(_get_job_or_404, job_id)
+    metrics = get_pipeline_metrics(job_id)
+    live = metrics is not None
+    if not live:
+        metrics = (job.get("summary") or {}).get("pipeline")
+    return {"status": "success", "job_status": job["status"], "live": live, "pipeline": metrics}
+
+
+@router.get("/{job_id}/events")
+async def stream_analysis_job_events(
+    job_id: str,
+    request: Request,
+    after: int = Query(0, ge=0, description="이 순번 이후의 이벤트부터 전송 (재연결용)")
+):
+    """
+    작업 진행 이벤트를 SSE로 스트리밍합니다. 이미 기록된 이벤트를 먼저 재생하므로 언제든 다시 연결할 수 있습니다.
+    브라우저 EventSource가 자동 재연결 시 보내는 Last-Event-ID 헤더도 지원합니다.
+    """
+    await asyncio.to_thread(_get_job_or_404, job_id)
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        after = max(after, int(last_event_id))
+
+    async def event_generator() -> AsyncIterator[str]:
+        async for item in get_analysis_job_manager().stream_events(job_id, after):
+            yield format_job_event(item)
+
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_analysis_job(job_id: str):
+    """작업을 취소합니다. 실행 중인 작업은 현재 파일 처리가 끝나는 시점에 중단됩니다."""
+    await asyncio.to_thread(_get_job_or_404, job_id)
+    job = await asyncio.to_thread(get_analysis_job_manager().cancel, job_id)
+    return {"status": "success", "job": job}
+
+
+@router.post("/{job_id}/resume")
+async def resume_analysis_job(job_id: str):
+    """실패/취소/중단된 작업을 마지막 체크포인트부터 다시 실행합니다."""
+    job = await asyncio.to_thread(_get_job_or_404, job_id)
+    if job["status"] not in ("failed", "cancelled", "interrupted"):
+        raise HTTPException(status_code=409, detail=f"Job '{job_id}' is {job['status']} and cannot be resumed")
+    job = await asyncio.to_thread(get_analysis_job_manager().resume, job_id)
+    return {"status": "success", "job": job}
@@ -1,142 +1,69 @@
 # backend/api/analysis.py
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
-from typing import Dict, Any, Generator
+from typing import AsyncIterator, Dict, Any
 from pathlib import Path
-import os
+import asyncio
 import json
-import asyncio # 비동기 작업을 위한 임포트
 import logging
 
-# 서비스 임포트
-from service.file_name_preprocessor import get_code_files_for_analysis
-from service.code_parser import parse_code_with_tree_sitter, detect_language_from_filename
 # 모델 임포트
 from models.analysis_request import CodeAnalysisRequest # 기존 모델 사용
-# DB 인제스터 임포트
-from db.ingestor_python import ingest_code_graph_data
-# 임베딩 파이프라인 임포트
-from service.ai_data_pipeline import run_embedding_pipeline
+# 백그라운드 분석 작업 관리자
+from service.analysis_jobs import get_analysis_job_manager
+from service.analysis_estimator import estimate_analysis
 
 router = APIRouter(
     prefix="/analyze"
 )
 logger = logging.getLogger(__name__)
 
-@router.post("/analyze-selected-code-stream")
-async def analyze_selected_code_stream_endpoint(request: CodeAnalysisRequest):
-    """
-    프론트엔드로부터 선택된 파일 및 디렉토리 경로를 받아 코드 분석을 수행하고,
-    진행 상황을 Server-Sent Events (SSE) 스트림으로 반환합니다.
-    """
-    project_root = Path(request.project_root_path)
-
-    # 비동기 제너레이터 함수 정의
-    async def event_generator() -> Generator[str, None, None]:
-        files_to_analyze = []
-        try:
-            # 1. 파일 시스템 스캔 서비스 호출: 분석 대상 파일 목록을 얻습니다.
-            yield f"data: {json.dumps({'status': 'info', 'message': '파일 시스템 스캔 중...', 'progress': 0})}\n\n"
-            files_to_analyze = get_code_files_for_analysis(project_root, request.selected_paths)
-
-            if not files_to_analyze:
-                yield f"data: {json.dumps({'status': 'error', 'message': '분석할 유효한 코드 파일이 선택되지 않았습니다.', 'progress': 0})}\n\n"
-                return
-
-            total_files = len(files_to_analyze)
-            analyzed_count = 0
-            analysis_summary_details = []
-
-            # 2. 각 파일에 대해 코드 파싱 및 분석 수행
-            for file_path in files_to_analyze:
-                try:
-                    yield f"data: {json.dumps({'status': 'in_progress', 'stage': '파일 분석', 'detail': f'{analyzed_count + 1}/{total_files} 파일 처리 중', 'progress': (analyzed_count / total_files) * 100})}\n\n"
-                    
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        code_content = f.read()
-                    
-                    language = detect_language_from_filename(str(file_path))
-                    
-                    parsed_data = None
-                    if language:
-                        parsed_data = parse_code_with_tree_sitter(code_content, language, file_path)
-                        
-                        if parsed_data:
-                            # DB 저장
-                            ingest_code_graph_data(
-                                parsed_data["extracted_entities"],
-                                parsed_data["extracted_relationships"]
-                            )
-
-                            detail = {
-                                "file_path": str(file_path.relative_to(project_root)),
-                                "status": "success",
-                                "language": language,
-                                "extracted_entities_count": len(parsed_data.get("extracted_entities", [])),
-                                "extracted_relationships_count": len(parsed_data.get("extracted_relationships", []))
-                            }
-                        else:
-                            detail = {
-                                "file_path": str(file_path.relative_to(project_root)),
-                                "status": "failed_parsing",
-                                "reason": f"No parser available or parsing failed for language: {language}"
-                            }
-                    else:
-                        detail = {
-                            "file_path": str(file_path.relative_to(project_root)),
-                            "status": "skipped",
-                            "reason": "Unknown or unsupported file type for parsing"
-                        }
-                    
-                    analysis_summary_details.append(detail)
 
-                except Exception as e:
-                    error_detail = {
-                        "file_path": str(file_path.relative_to(project_root)),
-                        "status": "error",
-                        "message": str(e)
-                    }
-                    analysis_summary_details.append(error_detail)
-                    logger.error(f"Error processing file {file_path}: {e}")
-                
-                finally:
-                    analyzed_count += 1
-                    # 이전에 메시지를 보냈으므로 여기서는 추가 진행률 메시지를 보내지 않습니다.
-                    pass
+def job_options(request: CodeAnalysisRequest) -> Dict[str, Any]:
+    """요청에서 작업 옵션을 만듭니다. (변경 분석 리비전)"""
+    if request.head_revision and not request.base_revision:
+        raise HTTPException(status_code=400, detail="head_revision requires base_revision")
+    if not request.base_revision:
+        return {}
+    return {"base_revision": request.base_revision, "head_revision": request.head_revision}
 
-            # 모든 파일 분석 완료 후 최종 요약 전송
-            file_analysis_progress = 100
-            final_summary = {
-                "total_files_for_analysis": total_files,
-                "analyzed_files_details": analysis_summary_details
-            }
-            yield f"data: {json.dumps({'status': 'in_progress', 'analysis_summary': final_summary, 'progress': file_analysis_progress})}\n\n"
 
-            # 3. 임베딩 파이프라인 실행
-            yield f"data: {json.dumps({'status': 'in_progress', 'analysis_summary': '코드 임베딩 생성 시작...', 'progress': 0})}\n\n"
+def format_job_event(item) -> str:
+    """작업 진행 이벤트를 SSE 메시지로 변환합니다. id에 이벤트 순번을 넣어 재연결 시 이어 받을 수 있게 합니다."""
+    return f"id: {item['seq']}\ndata: {json.dumps(item['event'], ensure_ascii=False)}\n\n"
 
-            # 비동기 콜백 함수 정의 (yield를 사용하여 프론트엔드에 메시지 전달)
-            def embedding_progress_callback(message: Dict[str, Any]):
-                # 임베딩 진행 상태 메시지에도 progress 키가 있는지 확인하여 전송
-                if 'progress' not in message:
-                    message['progress'] = file_analysis_progress
-                yield f"data: {json.dumps(message)}\n\n"
 
-            # 동기 함수인 run_embedding_pipeline을 별도의 스레드에서 실행
-            await asyncio.to_thread(
-                run_embedding_pipeline, 
-                embedding_progress_callback, 
-                project_root_path=request.project_root_path
-            )
+@router.post("/analyze-selected-code-stream")
+async def analyze_selected_code_stream_endpoint(request: CodeAnalysisRequest):
+    """
+    프론트엔드로부터 선택된 파일 및 디렉토리 경로를 받아 코드 분석 작업을 등록하고,
+    진행 상황을 Server-Sent Events (SSE) 스트림으로 반환합니다.
+    분석은 백그라운드 작업으로 실행되므로 연결이 끊겨도 계속 진행되며,
+    첫 이벤트의 job_id로 /analyze/jobs/{job_id}/events 에 다시 연결할 수 있습니다.
+    base_revision(과 head_revision)을 주면 두 리비전 사이에서 바뀐 파일만 다시 분석해 그래프에 반영합니다.
+    """
+    manager = get_analysis_job_manager()
+    job = manager.submit(request.project_root_path, request.selected_paths, request.priority, job_options(request))
+    logger.info(f"Analysis job submitted: {job['job_id']}")
 
-            yield f"data: {json.dumps({'status': 'completed', 'analysis_summary': '임베딩 생성 완료.', 'progress': 100})}\n\n"
+    async def event_generator() -> AsyncIterator[str]:
+        async for item in manager.stream_events(job["job_id"]):
+            yield format_job_event(item)
 
+    return StreamingResponse(event_generator(), media_type="text/event-stream")
 
-        except HTTPException as he:
-            yield f"data: {json.dumps({'status': 'error', 'message': he.detail, 'progress': 0})}\n\n"
-        except Exception as e:
-            logger.error(f"Unexpected error in analysis stream: {e}", exc_info=True)
-            yield f"data: {json.dumps({'status': 'error', 'message': f'서버 내부 오류: {e}', 'progress': 0})}\n\n"
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+@router.post("/estimate")
+async def estimate_analysis_endpoint(request: CodeAnalysisRequest):
+    """
+    분석을 실행하지 않고(dry-run) 같은 요청의 비용을 추정합니다.
+    언어별 파일 수/크기, 예상 엔티티/관계/임베딩 수와 이 머신에서 측정된 단계별 처리량 기반의 예상 소요 시간을 반환합니다.
+    """
+    project_root = Path(request.project_root_path)
+    if not project_root.is_dir():
+        raise HTTPException(status_code=404, detail=f"Project path not found: {request.project_root_path}")
+    estimate = await asyncio.to_thread(
+        estimate_analysis, project_root, request.selected_paths, get_analysis_job_manager().store
+    )
+    return {"status": "success", "estimate": estimate}
@@ -1,11 +1,25 @@
 # backend/api/scan.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from pathlib import Path
+from typing import Any, Dict, Union
+import asyncio
+import gzip
+import json
+import os
 
 # models와 services에서 필요한 것들 임포트
-from schemas.file_node import DirectoryScanRequest, FileNode
-from service.file_scanner import scan_directory_recursive
-from schemas.scan_response import ProjectScanResponse
+from schemas.file_node import DirectoryScanRequest, ExpandDirectoryRequest
+from service.file_scanner import scan_directory_flat, flat_to_tree, get_directory_listing_cache
+from schemas.scan_response import ProjectScanResponse, ProjectScanFlatResponse, DirectoryExpandResponse
+
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 표준 json 사용
+    orjson = None
+
+# 이 크기(바이트) 이상의 응답은 클라이언트가 지원하면 gzip으로 압축합니다.
+SCAN_GZIP_MIN_BYTES = int(os.getenv("SCAN_GZIP_MIN_BYTES", "1024"))
+SCAN_GZIP_LEVEL = int(os.getenv("SCAN_GZIP_LEVEL", "5"))
 
 # APIRouter 인스턴스 생성
 router = APIRouter(
@@ -13,10 +27,30 @@ router = APIRouter(
     # tags=["scan"], # OpenAPI(Swagger UI) 문서에 표시될 태그
 )
 
-@router.post("/scan-project-path", response_model=ProjectScanResponse)
-async def scan_project_path(request: DirectoryScanRequest):
+
+def _json_response(payload: Dict[str, Any], request: Request) -> Response:
+    """
+    응답 모델 검증 없이 딕셔너리를 바로 JSON으로 직렬화합니다. (큰 트리에서 Pydantic 재검증 비용을 피하기 위함)
+    클라이언트가 gzip을 지원하고 응답이 충분히 크면 압축해서 보냅니다.
+    """
+    if orjson is not None:
+        body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    headers = {"Vary": "Accept-Encoding"}
+    if len(body) >= SCAN_GZIP_MIN_BYTES and "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzip.compress(body, compresslevel=SCAN_GZIP_LEVEL)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.post("/scan-project-path", response_model=Union[ProjectScanResponse, ProjectScanFlatResponse])
+async def scan_project_path(request: DirectoryScanRequest, http_request: Request):
     """
     클라이언트로부터 받은 프로젝트 경로를 스캔하여 디렉토리 구조를 반환
+    encoding='flat'이면 중첩 트리 대신 부모 인덱스 배열(file_tree)로 반환합니다.
+    max_depth를 주면 그 깊이까지만 반환하고, 펼치지 않은 디렉토리에는 child_count/has_children만 채웁니다.
     """
     root_path = Path(request.project_path)
 
@@ -26,14 +60,50 @@ async def scan_project_path(request: DirectoryScanRequest):
         raise HTTPException(status_code=400, detail=f"Provided path is not a directory: {request.project_path}")
 
     # print(f"Scanning project path: {root_path.resolve()}")
-    scanned_tree = scan_directory_recursive(root_path, root_path)
-    # print(f'scanned tree : {scanned_tree}')
+    # 스캔은 블로킹 작업이므로 이벤트 루프를 막지 않도록 별도 스레드에서 실행합니다.
+    flat_tree = await asyncio.to_thread(scan_directory_flat, root_path, max_depth=request.max_depth)
+
+    payload: Dict[str, Any] = {
+        "project_root_absolute_path": str(root_path.resolve()),
+        "message": "Project scanned successfully."
+    }
+    if request.encoding == "flat":
+        payload["file_tree"] = flat_tree
+    else:
+        payload["file_structure"] = await asyncio.to_thread(flat_to_tree, flat_tree)
+    return await asyncio.to_thread(_json_response, payload, http_request)
+
+
+@router.post("/scan-project-path/expand", response_model=DirectoryExpandResponse)
+async def expand_directory(request: ExpandDirectoryRequest, http_request: Request):
+    """
+    지연 로딩 중인 트리에서 하위 디렉토리 하나를 depth 깊이만큼 스캔해 반환합니다.
+    노드 경로는 프로젝트 루트 기준이므로 기존 트리의 해당 노드에 그대로 붙일 수 있습니다.
+    (기본 제외 디렉토리도 명시적으로 펼칠 수 있습니다)
+    """
+    root_path = Path(request.project_path)
+    if not root_path.is_dir():
+        raise HTTPException(status_code=404, detail=f"Project path not found: {request.project_path}")
+
+    root_resolved = root_path.resolve()
+    target_path = (root_path / request.sub_path).resolve()
+    if target_path != root_resolved and root_resolved not in target_path.parents:
+        raise HTTPException(status_code=400, detail=f"Path is outside the project: {request.sub_path}")
+    if not target_path.is_dir():
+        raise HTTPException(status_code=404, detail=f"Directory not found: {request.sub_path}")
+
+    sub_path = str(target_path.relative_to(root_resolved))
+    flat_tree = await asyncio.to_thread(scan_directory_flat, target_path, max_depth=request.depth)
+
+    payload: Dict[str, Any] = {"sub_path": sub_path}
+    if request.encoding == "flat":
+        payload["file_tree"] = flat_tree
+    else:
+        payload["file_structure"] = await asyncio.to_thread(flat_to_tree, flat_tree, sub_path)
+    return await asyncio.to_thread(_json_response, payload, http_request)
 
-    if not scanned_tree:
-        raise HTTPException(status_code=500, detail="Failed to scan directory.")
 
-    return ProjectScanResponse(
-        file_structure=scanned_tree, 
-        project_root_absolute_path=str(root_path.resolve()), 
-        message="Project scanned successfully."
-    )
\ No newline at end of file
+@router.get("/scan-project-path/cache/stats")
+async def get_scan_cache_stats():
+    """지연 로딩에 사용하는 디렉토리 목록 캐시의 크기와 적중률을 반환합니다."""
+    return {"status": "success", "stats": get_directory_listing_cache().stats()}
@@ -1,77 +1,215 @@
 # backend/api/graph.py
 
-from fastapi import APIRouter, HTTPException
-from typing import Dict, List, Any, Optional
-from db.driver_neo4j import run_cypher_query
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Any, Optional, Iterator, Literal
+import asyncio
+import json
+from db.driver_neo4j import run_cypher_query, run_cypher_query_async, stream_cypher_query
+from db.graph_stats import read_graph_stats, read_file_entity_counts, recompute_graph_stats, GRAPH_STATS_LABEL
+from service.graph_lod_service import get_subgraph
+from service.graph_snapshot import get_graph_snapshot, rebuild_graph_snapshot
+from service.call_path_service import find_call_paths, describe_paths, resolve_endpoints, DEFAULT_PATH_REL_TYPES
+from db.graph_generation import get_graph_generation
+from db.graph_compaction import compact_graph
+from service.blob_store import get_blob_store
+from service.graph_read_cache import get_graph_read_cache, node_details_dependencies, NODE_DETAILS
 
 router = APIRouter(
     tags=["graph"]
 )
 
-def get_all_graph_data() -> Dict[str, Any]:
+# 그래프 내보내기 시 한 페이지에 담을 수 있는 최대 항목 수
+MAX_GRAPH_PAGE_SIZE = 5000
+
+# 속성 선택(include/exclude)을 DB 쪽에서 적용하여, 제외된 속성(예: raw_text)은 전송되지 않도록 합니다.
+_PROPERTY_PAIRS = "[k IN keys({var}) WHERE ($include IS NULL OR k IN $include) AND NOT k IN $exclude | [k, {var}[k]]]"
+
+# 페이지 조회는 레이블별 n.id 인덱스를 순서대로 읽으므로 페이지마다 전체 그래프를 훑지 않습니다.
+# ({{label}}은 조회 시 레이블 이름으로 채웁니다)
+_NODES_PAGE_QUERY = f"""
+    MATCH (n:`{{label}}`)
+    WHERE n.id > $after
+    RETURN
+        id(n) as internal_id,
+        n.id as id,
+        labels(n) as labels,
+        {_PROPERTY_PAIRS.format(var="n")} as property_pairs
+    ORDER BY n.id
+    LIMIT $limit
+"""
+
+_SOURCE_IDS_PAGE_QUERY = """
+    MATCH (n:`{label}`)
+    WHERE n.id > $after
+    RETURN n.id as id
+    ORDER BY n.id
+    LIMIT $limit
+"""
+
+_RELATIONSHIPS_PAGE_QUERY = f"""
+    UNWIND $source_ids AS source_id
+    MATCH (source:`{{label}}` {{{{id: source_id}}}})-[r]->(target)
+    RETURN
+        id(r) as internal_id,
+        source.id as source_id,
+        target.id as target_id,
+        type(r) as type,
+        {_PROPERTY_PAIRS.format(var="r")} as property_pairs
+"""
+
+_NODES_STREAM_QUERY = f"""
+    MATCH (n)
+    WHERE NOT n:{GRAPH_STATS_LABEL}
+    RETURN
+        id(n) as internal_id,
+        n.id as id,
+        labels(n) as labels,
+        {_PROPERTY_PAIRS.format(var="n")} as property_pairs
+"""
+
+_RELATIONSHIPS_STREAM_QUERY = f"""
+    MATCH (source)-[r]->(target)
+    RETURN
+        id(r) as internal_id,
+        source.id as source_id,
+        target.id as target_id,
+        type(r) as type,
+        {_PROPERTY_PAIRS.format(var="r")} as property_pairs
+"""
+
+
+def _parse_property_list(value: Optional[str]) -> Optional[List[str]]:
+    """콤마로 구분된 속성 목록 문자열을 리스트로 변환합니다. 비어 있으면 None."""
+    if value is None:
+        return None
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    return items or None
+
+
+def _format_node(record: Dict[str, Any]) -> Dict[str, Any]:
+    node_properties = dict(record.get('property_pairs') or [])
+
+    # 코드 텍스트가 있는 경우 code_text 필드로 설정
+    # (ai_modules/data_pipeline.py의 42번째 줄에서 사용)
+    if 'name' in node_properties:
+        # 함수나 클래스의 경우 이름을 code_text로 사용
+        node_properties['code_text'] = node_properties['name']
+
+    return {
+        'id': record.get('id'),
+        'internal_id': record.get('internal_id'),
+        'labels': record.get('labels', []),
+        'properties': node_properties
+    }
+
+
+def _format_relationship(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'internal_id': record.get('internal_id'),
+        'source_id': record.get('source_id'),
+        'target_id': record.get('target_id'),
+        'type': record.get('type'),
+        'properties': dict(record.get('property_pairs') or [])
+    }
+
+
+def _export_labels() -> List[str]:
+    """
+    페이지 조회 대상 레이블 목록 (정렬됨).
+    레이블별 id 인덱스는 노드를 쓰는 경로에서 만들어 두므로(db/graph_indexes.py) 여기서는 읽기만 합니다.
+    """
+    records = run_cypher_query("CALL db.labels() YIELD label RETURN label", write=False)
+    return sorted(record["label"] for record in records if record["label"] != GRAPH_STATS_LABEL)
+
+
+def get_graph_page(section: str, cursor: Optional[str] = None, limit: int = 1000,
+                   include: Optional[List[str]] = None, exclude: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    노드 또는 관계를 (레이블, n.id) 순서의 커서 방식으로 한 페이지씩 조회합니다.
+    레이블별 id 인덱스에서 커서 다음 위치부터 읽으므로 페이지 하나의 비용이 그래프 크기와 무관합니다.
+
+    Args:
+        section: 'nodes' 또는 'relationships'
+        cursor: 이전 페이지의 next_cursor ("레이블:마지막 id", 처음 요청 시 None)
+        limit: 페이지 크기. 관계는 시작 노드 수 기준 (시작 노드 limit개의 나가는 관계 전체)
+        include: 반환할 속성 이름 목록 (None이면 전체)
+        exclude: 제외할 속성 이름 목록
+
+    Returns:
+        Dict: {section: [...], 'next_cursor': 다음 커서 또는 None}
+    """
+    start_label, after = cursor.split(":", 1) if cursor else ("", "")
+    parameters = {'include': include, 'exclude': exclude or []}
+    items: List[Dict[str, Any]] = []
+    scanned = 0
+    next_cursor = None
+    for label in _export_labels():
+        if label < start_label:
+            continue
+        label_after = after if label == start_label else ""
+        remaining = limit - scanned
+        if section == "nodes":
+            records = run_cypher_query(_NODES_PAGE_QUERY.format(label=label), parameters={
+                **parameters, 'after': label_after, 'limit': remaining,
+            }, write=False)
+            items.extend(_format_node(record) for record in records)
+            page_ids = [record['id'] for record in records]
+        else:
+            page_ids = [record['id'] for record in run_cypher_query(_SOURCE_IDS_PAGE_QUERY.format(label=label), parameters={
+                'after': label_after, 'limit': remaining,
+            }, write=False)]
+            if page_ids:
+                records = run_cypher_query(_RELATIONSHIPS_PAGE_QUERY.format(label=label), parameters={
+                    **parameters, 'source_ids': page_ids,
+                }, write=False)
+                items.extend(_format_relationship(record) for record in records)
+        scanned += len(page_ids)
+        if scanned >= limit:
+            next_cursor = f"{label}:{page_ids[-1]}"
+            break
+    return {section: items, 'next_cursor': next_cursor}
+
+
+def iter_graph_data(include: Optional[List[str]] = None, exclude: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    전체 그래프를 노드 -> 관계 순서로 한 건씩 내보내는 제너레이터입니다.
+    Neo4j 결과를 레코드 단위로 소비하므로 그래프 크기와 무관하게 서버 메모리가 일정합니다.
+    각 항목에는 'kind' ('node' | 'relationship' | 'summary') 필드가 포함됩니다.
+    """
+    parameters = {'include': include, 'exclude': exclude or []}
+    total_nodes = 0
+    for record in stream_cypher_query(_NODES_STREAM_QUERY, parameters=parameters):
+        total_nodes += 1
+        yield {'kind': 'node', **_format_node(record)}
+
+    total_relationships = 0
+    for record in stream_cypher_query(_RELATIONSHIPS_STREAM_QUERY, parameters=parameters):
+        total_relationships += 1
+        yield {'kind': 'relationship', **_format_relationship(record)}
+
+    yield {'kind': 'summary', 'total_nodes': total_nodes, 'total_relationships': total_relationships}
+
+
+def get_all_graph_data(include: Optional[List[str]] = None, exclude: Optional[List[str]] = None) -> Dict[str, Any]:
     """
     Neo4j 데이터베이스에서 모든 노드와 관계를 조회하여 그래프 데이터를 반환합니다.
     ai_modules/data_pipeline.py에서 사용할 수 있는 형태로 구조화합니다.
+    결과 전체를 메모리에 올리므로 작은 그래프에서만 사용하고, 큰 그래프는 iter_graph_data를 사용하세요.
     
     Returns:
         Dict: {'nodes': [...], 'relationships': [...]} 형태의 그래프 데이터
     """
     try:
-        # 1. 모든 노드 조회
-        nodes_query = """
-            MATCH (n)
-            RETURN 
-                id(n) as internal_id,
-                n.id as id,
-                labels(n) as labels,
-                properties(n) as properties
-        """
-        nodes_result = run_cypher_query(nodes_query, write=False)
-        
-        # 2. 모든 관계 조회
-        relationships_query = """
-            MATCH (source)-[r]->(target)
-            RETURN 
-                id(r) as internal_id,
-                source.id as source_id,
-                target.id as target_id,
-                type(r) as type,
-                properties(r) as properties
-        """
-        relationships_result = run_cypher_query(relationships_query, write=False)
-        
-        # 3. 노드 데이터 포맷팅
         formatted_nodes = []
-        for node in nodes_result:
-            # 노드의 모든 속성을 properties에 포함
-            node_properties = node.get('properties', {})
-            
-            # 코드 텍스트가 있는 경우 code_text 필드로 설정
-            # (ai_modules/data_pipeline.py의 42번째 줄에서 사용)
-            if 'name' in node_properties:
-                # 함수나 클래스의 경우 이름을 code_text로 사용
-                node_properties['code_text'] = node_properties['name']
-            
-            formatted_node = {
-                'id': node.get('id'),
-                'internal_id': node.get('internal_id'),
-                'labels': node.get('labels', []),
-                'properties': node_properties
-            }
-            formatted_nodes.append(formatted_node)
-        
-        # 4. 관계 데이터 포맷팅
         formatted_relationships = []
-        for rel in relationships_result:
-            formatted_rel = {
-                'internal_id': rel.get('internal_id'),
-                'source_id': rel.get('source_id'),
-                'target_id': rel.get('target_id'),
-                'type': rel.get('type'),
-                'properties': rel.get('properties', {})
-            }
-            formatted_relationships.append(formatted_rel)
-        
+        for item in iter_graph_data(include, exclude):
+            kind = item.pop('kind')
+            if kind == 'node':
+                formatted_nodes.append(item)
+            elif kind == 'relationship':
+                formatted_relationships.append(item)
+
         return {
             'nodes': formatted_nodes,
             'relationships': formatted_relationships,
@@ -86,64 +224,120 @@ def get_all_graph_data() -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve graph data: {str(e)}")
 
 @router.get("/graph")
-async def get_graph_data():
+async def get_graph_data(
+    section: Optional[Literal["nodes", "relationships"]] = Query(None, description="페이지 조회 대상 (생략 시 전체 그래프)"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor 값 (페이지 조회 시, 처음 요청 시 생략)"),
+    limit: int = Query(1000, ge=1, le=MAX_GRAPH_PAGE_SIZE, description="페이지 크기"),
+    properties: Optional[str] = Query(None, description="반환할 속성 목록 (콤마 구분, 생략 시 전체)"),
+    exclude_properties: Optional[str] = Query(None, description="제외할 속성 목록 (콤마 구분, 예: raw_text)"),
+):
     """
     Neo4j 데이터베이스에서 전체 그래프 데이터를 조회하여 반환합니다.
     ai_modules/data_pipeline.py에서 호출하는 엔드포인트입니다.
+    응답 전체를 메모리에 만들므로 큰 그래프는 /graph/stream (NDJSON)이나 페이지 조회를 사용하세요.
+
+    section을 지정하면 노드 또는 관계를 커서 기반 페이지 단위로 반환합니다.
+    next_cursor가 None이 될 때까지 cursor를 넘겨 반복 호출하면 전체 그래프를 얻을 수 있습니다.
     
     Returns:
-        Dict: 노드와 관계가 포함된 그래프 데이터
+        Dict: 노드와 관계가 포함된 그래프 데이터, 또는 한 페이지와 next_cursor
     """
+    include = _parse_property_list(properties)
+    exclude = _parse_property_list(exclude_properties)
     try:
-        graph_data = get_all_graph_data()
+        if section is None:
+            data = await asyncio.to_thread(get_all_graph_data, include, exclude)
+        else:
+            data = await asyncio.to_thread(get_graph_page, section, cursor, limit, include, exclude)
         return {
             "status": "success",
             "message": "Graph data retrieved successfully",
-            "data": graph_data
+            "data": data
         }
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+@router.get("/graph/stream")
+async def stream_graph_data(
+    properties: Optional[str] = Query(None, description="반환할 속성 목록 (콤마 구분, 생략 시 전체)"),
+    exclude_properties: Optional[str] = Query(None, description="제외할 속성 목록 (콤마 구분, 예: raw_text)"),
+):
+    """
+    전체 그래프를 NDJSON(한 줄에 JSON 객체 하나) 스트림으로 반환합니다.
+    노드, 관계, 마지막 요약 순서로 전송되며 각 줄의 'kind' 필드로 구분합니다.
+    """
+    include = _parse_property_list(properties)
+    exclude = _parse_property_list(exclude_properties)
+
+    def ndjson_lines():
+        try:
+            for item in iter_graph_data(include, exclude):
+                yield json.dumps(item, ensure_ascii=False, default=str) + "\n"
+        except Exception as e:
+            print(f"Error streaming graph data: {e}")
+            yield json.dumps({'kind': 'error', 'message': str(e)}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
 @router.get("/graph/summary")
-async def get_graph_summary():
+async def get_graph_summary(
+    include_files: bool = Query(False, description="파일별 엔티티 수 포함 여부"),
+):
     """
     그래프 데이터의 요약 정보를 반환합니다.
+    인제스트/삭제 시 함께 갱신되는 카운터를 읽으므로 그래프 전체를 스캔하지 않습니다.
     
     Returns:
         Dict: 노드 수, 관계 수, 노드 타입별 통계 등
     """
     try:
-        # 노드 타입별 카운트
-        node_types_query = """
-            MATCH (n)
-            RETURN labels(n) as labels, count(n) as count
-        """
-        node_types_result = run_cypher_query(node_types_query, write=False)
-        
-        # 관계 타입별 카운트  
-        rel_types_query = """
-            MATCH ()-[r]->()
-            RETURN type(r) as type, count(r) as count
-        """
-        rel_types_result = run_cypher_query(rel_types_query, write=False)
+        summary = await asyncio.to_thread(read_graph_stats)
+        if include_files:
+            summary["file_entity_counts"] = await asyncio.to_thread(read_file_entity_counts)
         
         return {
             "status": "success",
-            "summary": {
-                "node_types": node_types_result,
-                "relationship_types": rel_types_result
-            }
+            "summary": summary
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get graph summary: {str(e)}")
 
+@router.post("/graph/summary/recompute")
+async def recompute_graph_summary():
+    """
+    (관리자용) 그래프 전체를 스캔하여 통계 카운터를 다시 계산합니다.
+    기존 카운터와 실제 값의 차이(drift)를 함께 반환합니다.
+    """
+    try:
+        result = await asyncio.to_thread(recompute_graph_stats)
+        return {
+            "status": "success",
+            "drift": result["drift"],
+            "summary": result["stats"]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to recompute graph summary: {str(e)}")
+
+@router.post("/graph/compact")
+async def compact_graph_endpoint(project_root_path: str = Query(..., description="압축할 프로젝트의 루트 경로")):
+    """
+    (관리자용) 프로젝트 안에서 이름이 같은 Module / ImportedName / ExternalCallTarget 노드를 하나로 합치고,
+    제거된 노드/관계 수를 반환합니다. 분석 직후 자동으로 실행되며, 필요 시 수동으로 다시 실행할 수 있습니다.
+    """
+    try:
+        report = await asyncio.to_thread(compact_graph, project_root_path)
+        return {"status": "success", **report}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to compact graph: {str(e)}")
+
 @router.get("/graph/nodes/{node_id}")
 async def get_node_details(node_id: str):
     """
     특정 노드의 상세 정보를 조회합니다.
+    결과는 그래프 읽기 캐시에 보관되며, 노드나 이웃 노드가 바뀌면(그래프 세대 변경 범위) 다시 조회합니다.
     
     Args:
         node_id: 조회할 노드의 ID
@@ -167,17 +361,146 @@ async def get_node_details(node_id: str):
                 }) as connections
         """
         
-        result = run_cypher_query(query, parameters={'node_id': node_id}, write=False)
-        
-        if not result:
+        async def load():
+            result = await run_cypher_query_async(query, parameters={'node_id': node_id}, write=False)
+            return result[0] if result else None
+
+        details = await get_graph_read_cache().get_or_load_async(NODE_DETAILS, node_id, load, node_details_dependencies)
+        if details is None:
             raise HTTPException(status_code=404, detail=f"Node with ID '{node_id}' not found")
             
         return {
             "status": "success",
-            "data": result[0]
+            "data": details
         }
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get node details: {str(e)}")
+
+
+@router.get("/graph/nodes/{node_id}/code")
+async def get_node_code(node_id: str):
+    """
+    노드의 코드 텍스트를 blob 저장소에서 꺼내 반환합니다.
+    그래프에는 (content_hash, byte_start, byte_end) 참조만 저장되므로, 코드가 필요할 때만 이 엔드포인트로 조회합니다.
+    """
+    records = await run_cypher_query_async(
+        """
+        MATCH (n {id: $node_id})
+        RETURN n.file_path AS file_path, n.content_hash AS content_hash,
+               n.byte_start AS byte_start, n.byte_end AS byte_end
+        """,
+        {"node_id": node_id},
+        False
+    )
+    if not records:
+        raise HTTPException(status_code=404, detail=f"Node with ID '{node_id}' not found")
+
+    record = records[0]
+    code = await asyncio.to_thread(get_blob_store().materialize, record)
+    if code is None:
+        raise HTTPException(status_code=404, detail=f"No code available for node '{node_id}'")
+    return {"status": "success", "node_id": node_id, "file_path": record["file_path"], "code": code}
+
+
+@router.get("/graph/subgraph")
+async def get_graph_subgraph(
+    seed: str = Query(..., description="시작점: 엔티티 ID, 파일 경로, 디렉토리 경로 또는 그룹 키"),
+    depth: int = Query(1, ge=0, le=5, description="확장할 홉 수"),
+    node_budget: int = Query(200, ge=1, le=5000, description="반환할 최대 노드 수"),
+    level: Literal["directory", "file", "entity"] = Query("file", description="상세 수준 (LOD)"),
+):
+    """
+    seed 주변의 서브그래프를 지정한 상세 수준으로 반환합니다.
+    directory/file 수준에서는 함수, 클래스 등이 소속 파일(또는 디렉토리)로 합쳐지고 관계는 유형별 개수로 집계됩니다.
+    각 노드의 drilldown 값을 seed/level로 다시 요청하면 한 단계 더 자세한 그래프를 얻을 수 있습니다.
+    """
+    try:
+        subgraph = await asyncio.to_thread(get_subgraph, seed, depth, node_budget, level)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get subgraph: {str(e)}")
+
+    if subgraph is None:
+        raise HTTPException(status_code=404, detail=f"Seed '{seed}' not found at level '{level}'")
+
+    return {
+        "status": "success",
+        "data": subgraph
+    }
+
+@router.get("/graph/cache")
+async def get_graph_read_cache_stats():
+    """노드 상세/코드 컨텍스트 캐시의 종류별 적중률, 평균 적재 시간, 절약한 시간(ms)을 반환합니다."""
+    return {"status": "success", "data": get_graph_read_cache().stats()}
+
+@router.post("/graph/cache/clear")
+async def clear_graph_read_cache(reset_stats: bool = Query(False, description="집계된 적중률/절약 시간도 초기화")):
+    """노드 상세/코드 컨텍스트 캐시를 비웁니다."""
+    cache = get_graph_read_cache()
+    await asyncio.to_thread(cache.clear)
+    if reset_stats:
+        cache.reset_stats()
+    return {"status": "success"}
+
+@router.get("/graph/snapshot")
+async def get_graph_snapshot_status():
+    """인메모리 그래프 스냅샷의 상태(크기, 세대, 최신 여부)를 반환합니다."""
+    snapshot = get_graph_snapshot()
+    if snapshot is None:
+        return {"status": "success", "data": None}
+    stats = snapshot.stats()
+    stats["is_stale"] = snapshot.generation != get_graph_generation()
+    return {"status": "success", "data": stats}
+
+@router.post("/graph/snapshot/rebuild")
+async def rebuild_graph_snapshot_endpoint():
+    """Neo4j에서 그래프를 다시 읽어 인메모리 스냅샷을 새로 만들고 교체합니다."""
+    try:
+        snapshot = await asyncio.to_thread(rebuild_graph_snapshot)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to rebuild graph snapshot: {str(e)}")
+    return {"status": "success", "data": snapshot.stats()}
+
+@router.get("/graph/call-path")
+async def get_call_path(
+    source: str = Query(..., description="시작 노드 ID 또는 함수/클래스 이름"),
+    target: str = Query(..., description="도착 노드 ID 또는 함수/클래스 이름"),
+    k: int = Query(3, ge=1, le=20, description="반환할 최대 경로 수 (최단 경로 + 대안 경로)"),
+    max_depth: int = Query(8, ge=1, le=30, description="경로의 최대 길이 (간선 수)"),
+    rel_types: Optional[str] = Query(None, description="탐색할 관계 유형 (콤마 구분, 기본: CALLS,IMPORTS_MODULE,IMPORTS_NAME)"),
+    time_budget_ms: int = Query(500, ge=1, le=10000, description="탐색 시간 예산 (밀리초)"),
+    max_visited: int = Query(200000, ge=1, description="방문 노드 수 예산"),
+):
+    """
+    "함수 A가 어떻게 함수 B에 도달하는가"에 대한 호출/임포트 경로를 반환합니다.
+    인메모리 그래프 스냅샷 위에서 양방향 BFS로 탐색하며, 예산을 넘으면 찾은 경로까지만 partial로 반환합니다.
+    """
+    try:
+        snapshot = await asyncio.to_thread(get_graph_snapshot, True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load graph snapshot: {str(e)}")
+
+    sources = resolve_endpoints(snapshot, source)
+    if not sources:
+        raise HTTPException(status_code=404, detail=f"Source '{source}' not found")
+    targets = resolve_endpoints(snapshot, target)
+    if not targets:
+        raise HTTPException(status_code=404, detail=f"Target '{target}' not found")
+
+    path_rel_types = _parse_property_list(rel_types) or list(DEFAULT_PATH_REL_TYPES)
+    result = await asyncio.to_thread(
+        find_call_paths, snapshot, sources, targets, path_rel_types,
+        k, max_depth, time_budget_ms, max_visited
+    )
+    return {
+        "status": "success",
+        "data": {
+            "search_status": result["status"],
+            "reason": result["reason"],
+            "paths": describe_paths(snapshot, result["paths"], path_rel_types),
+            "stats": result["stats"],
+            "snapshot_stale": snapshot.generation != get_graph_generation(),
+        }
+    }
@@ -0,0 +1,138 @@
+# backend/api/query_metrics.py
+
+import html
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Query
+from fastapi.responses import HTMLResponse, PlainTextResponse
+
+from db.query_metrics import get_query_metrics, LATENCY_BUCKETS_MS
+
+router = APIRouter(
+    prefix="/debug/cypher",
+    tags=["debug"]
+)
+
+_SORT_KEYS = Literal["total_ms", "count", "avg_ms", "p95_ms", "max_ms", "rows", "payload_bytes", "slow", "errors"]
+
+
+def _prometheus_text(snapshot) -> str:
+    """템플릿 ID를 레이블로 하는 Prometheus 텍스트 형식 (템플릿 원문은 /debug/cypher/metrics JSON에서 확인)"""
+    lines = [
+        "# HELP cypher_query_duration_ms Cypher query latency per statement template",
+        "# TYPE cypher_query_duration_ms histogram",
+    ]
+    for item in snapshot["templates"]:
+        label = f'template="{item["template_id"]}"'
+        cumulative = 0
+        for bound, count in zip(list(LATENCY_BUCKETS_MS) + ["+Inf"], item["histogram"].values()):
+            cumulative += count
+            lines.append(f'cypher_query_duration_ms_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f"cypher_query_duration_ms_sum{{{label}}} {item['total_ms']}")
+        lines.append(f"cypher_query_duration_ms_count{{{label}}} {item['count']}")
+    for name, key, help_text in (
+        ("cypher_query_rows_total", "rows", "Rows returned per statement template"),
+        ("cypher_query_payload_bytes_total", "payload_bytes", "Estimated result bytes per statement template"),
+        ("cypher_query_errors_total", "errors", "Failed executions per statement template"),
+        ("cypher_query_slow_total", "slow", "Executions over the slow query threshold per statement template"),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for item in snapshot["templates"]:
+            lines.append(f'{name}{{template="{item["template_id"]}"}} {item[key]}')
+    return "\n".join(lines) + "\n"
+
+
+@router.get("/metrics")
+async def get_cypher_metrics(
+    sort_by: _SORT_KEYS = Query("total_ms", description="정렬 기준 (내림차순)"),
+    limit: Optional[int] = Query(None, ge=1, description="반환할 템플릿 수"),
+    format: Literal["json", "prometheus"] = Query("json", description="응답 형식"),
+):
+    """Cypher 문장 템플릿별 지연 시간 히스토그램, 행 수, 결과 크기를 반환합니다."""
+    snapshot = get_query_metrics().snapshot(sort_by, limit)
+    if format == "prometheus":
+        return PlainTextResponse(_prometheus_text(snapshot), media_type="text/plain; version=0.0.4")
+    return {"status": "success", "metrics": snapshot}
+
+
+@router.get("/slow")
+async def get_slow_cypher_queries(limit: Optional[int] = Query(50, ge=1, description="반환할 항목 수")):
+    """최근 느린 쿼리 목록 (파라미터는 형태만, 표본으로 뽑힌 경우 PROFILE 실행 계획 포함)"""
+    return {"status": "success", "slow_queries": get_query_metrics().slow_queries(limit)}
+
+
+@router.post("/reset")
+async def reset_cypher_metrics():
+    """수집된 지표와 느린 쿼리 목록을 비웁니다."""
+    get_query_metrics().reset()
+    return {"status": "success"}
+
+
+def _plan_html(plan) -> str:
+    if not plan:
+        return ""
+    children = "".join(_plan_html(child) for child in plan["children"])
+    return (f"<li>{html.escape(str(plan['operator']))} rows={plan['rows']} db_hits={plan['db_hits']} "
+            f"<code>{html.escape(str(plan['details'] or ''))}</code><ul>{children}</ul></li>")
+
+
+def _profile_html(profile) -> str:
+    if not profile:
+        return ""
+    if "error" in profile:
+        return html.escape(profile["error"])
+    return f"db_hits={profile['total_db_hits']}<ul>{_plan_html(profile['plan'])}</ul>"
+
+
+@router.get("", response_class=HTMLResponse)
+async def cypher_debug_page(
+    sort_by: _SORT_KEYS = Query("total_ms", description="정렬 기준 (내림차순)"),
+):
+    """쿼리 지표와 느린 쿼리를 보는 간단한 디버그 페이지"""
+    metrics = get_query_metrics()
+    snapshot = metrics.snapshot(sort_by)
+    template_rows = "".join(
+        "<tr>"
+        f"<td>{item['template_id']}</td><td>{item['count']}</td><td>{item['errors']}</td><td>{item['slow']}</td>"
+        f"<td>{item['total_ms']}</td><td>{item['avg_ms']}</td><td>{item['p50_ms']}</td><td>{item['p95_ms']}</td>"
+        f"<td>{item['p99_ms']}</td><td>{item['max_ms']}</td><td>{item['avg_rows']}</td><td>{item['payload_bytes']}</td>"
+        f"<td><code>{html.escape(item['template'][:400])}</code></td>"
+        "</tr>"
+        for item in snapshot["templates"]
+    )
+    slow_rows = "".join(
+        "<tr>"
+        f"<td>{entry['template_id']}</td><td>{entry['elapsed_ms']}</td><td>{entry['rows']}</td>"
+        f"<td>{entry['payload_bytes']}</td><td><code>{html.escape(str(entry['parameter_shape']))}</code></td>"
+        f"<td>{html.escape(entry['error'] or '')}</td>"
+        f"<td>{_profile_html(entry['profile'])}</td>"
+        "</tr>"
+        for entry in metrics.slow_queries(50)
+    )
+    sort_links = " ".join(f'<a href="?sort_by={key}">{key}</a>' for key in _SORT_KEYS.__args__)
+    page = f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Cypher query metrics</title>
+<style>
+body {{ font-family: sans-serif; font-size: 13px; }}
+table {{ border-collapse: collapse; margin-bottom: 24px; }}
+td, th {{ border: 1px solid #ccc; padding: 3px 6px; vertical-align: top; }}
+code {{ white-space: pre-wrap; font-size: 12px; }}
+</style></head>
+<body>
+<h2>Cypher query metrics</h2>
+<p>queries {snapshot['total_queries']}, total {snapshot['total_ms']} ms, slow threshold {snapshot['slow_query_ms']} ms,
+PROFILE sample rate {snapshot['profile_sample_rate']} | sort: {sort_links} |
+<a href="/debug/cypher/metrics?format=prometheus">prometheus</a></p>
+<table>
+<tr><th>id</th><th>count</th><th>errors</th><th>slow</th><th>total ms</th><th>avg ms</th><th>p50</th><th>p95</th>
+<th>p99</th><th>max ms</th><th>avg rows</th><th>payload bytes</th><th>template</th></tr>
+{template_rows}
+</table>
+<h3>Slow queries (latest 50)</h3>
+<table>
+<tr><th>id</th><th>ms</th><th>rows</th><th>bytes</th><th>parameter shape</th><th>error</th><th>profile</th></tr>
+{slow_rows}
+</table>
+</body></html>"""
+    return HTMLResponse(page)
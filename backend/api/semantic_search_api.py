@@ -6,18 +6,22 @@ from pydantic import BaseModel
 from typing import List, Dict, Any
 from service import semantic_search_service
 from service import llm_service
+from service.answer_cache import get_answer_cache
+from db.graph_generation import get_graph_generation
 import logging
 
 # Pydantic을 사용한 요청 데이터 모델 정의
 class SearchRequest(BaseModel):
     query: str
     top_k: int = 5
+    use_cache: bool = True  # 유사 질문에 대한 캐시된 답변 사용 여부
 
 # 새로운 Pydantic 응답 데이터 모델 정의
 # LLM 답변과 함께 추론 근거가 될 노드 정보를 담습니다.
 class SearchResponse(BaseModel):
     text: str
     evidence: List[Dict[str, Any]]
+    cached: bool = False  # 답변 캐시에서 가져온 답변인지 여부
 
 # APIRouter 인스턴스 생성
 router = APIRouter()
@@ -53,7 +57,7 @@ async def semantic_search_endpoint(request: SearchRequest):
     logger.info(f"Received query: '{request.query}' with top_k={request.top_k}")
     
     try:
-        results_with_ids = semantic_search_service.search(request.query, top_k=request.top_k)
+        results_with_ids, query_embedding = semantic_search_service.search_with_query_embedding(request.query, top_k=request.top_k)
         logger.info(f"Found {len(results_with_ids)} similar node IDs from CodeBERT.")
     except Exception as e:
         logger.error(f"Failed to perform semantic search: {e}")
@@ -66,6 +70,18 @@ async def semantic_search_endpoint(request: SearchRequest):
         
     # 2. 찾은 노드 ID로 Neo4j에서 실제 코드 컨텍스트(노드 + 릴레이션)를 가져옵니다.
     node_ids = [result["node_id"] for result in results_with_ids]
+
+    # 같은 근거 노드 집합 + 같은 그래프 세대에서 유사한 질문이 있었다면 저장된 답변을 반환합니다.
+    graph_generation = get_graph_generation()
+    if request.use_cache and query_embedding is not None:
+        try:
+            cached_answer = get_answer_cache().lookup(query_embedding, node_ids, graph_generation)
+        except Exception as e:
+            logger.error(f"Failed to read answer cache: {e}")
+            cached_answer = None
+        if cached_answer:
+            return SearchResponse(text=cached_answer["answer"], evidence=cached_answer["evidence"], cached=True)
+
     try:
         # 변경된 함수 호출: get_code_snippets_from_neo4j -> get_rich_code_contexts_from_neo4j
         code_contexts_from_db = semantic_search_service.get_rich_code_contexts_from_neo4j(node_ids)
@@ -81,8 +97,16 @@ async def semantic_search_endpoint(request: SearchRequest):
         return SearchResponse(text="유사한 코드는 찾았으나, 해당 코드를 추출하는 데 실패했습니다. 데이터베이스를 확인해주세요.", evidence=[])
         
     # generate_natural_language_response 함수도 새로운 데이터 구조를 처리하도록 수정해야 합니다.
-    final_response_text = llm_service.generate_natural_language_response(request.query, code_contexts_from_db)
-    
+    final_response_text, is_success = llm_service.generate_natural_language_response_with_status(request.query, code_contexts_from_db)
+
+    # 정상적으로 생성된 답변만 캐시에 저장합니다. (오류 안내 메시지는 저장하지 않음)
+    if request.use_cache and is_success and query_embedding is not None:
+        try:
+            get_answer_cache().store(request.query, query_embedding, node_ids, graph_generation,
+                                     final_response_text, code_contexts_from_db)
+        except Exception as e:
+            logger.error(f"Failed to store answer cache: {e}")
+
     # 4. LLM 답변과 노드 정보를 합쳐 새로운 모델로 반환합니다.
     return SearchResponse(text=final_response_text, evidence=code_contexts_from_db)
 
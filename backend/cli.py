@@ -0,0 +1,136 @@
+# backend/cli.py
+"""
+서버 없이 코드베이스를 분석하는 명령줄 도구. (backend 디렉토리에서 실행)
+
+    # 분석 결과를 결과물 디렉토리로 저장 (Neo4j 불필요, 빌드 머신에서 야간 색인 등)
+    python cli.py analyze /path/to/repo -o artifacts/repo --workers 8 [--embed]
+
+    # 결과물을 Neo4j와 임베딩 파일에 적재 (증분/소규모)
+    python cli.py load artifacts/repo [--replace]
+
+    # 큰 저장소의 최초 적재: neo4j-admin import용 CSV로 변환 → 출력된 명령으로 가져오기(서버 중지 상태) → 서버 시작 후 마무리
+    python cli.py export-csv artifacts/repo -o import/repo
+    python cli.py finalize-import import/repo
+    # 또는 실행 중인 서버에 LOAD CSV로 가져오기 (CSV가 서버 import 디렉토리에 있어야 함)
+    python cli.py load-csv import/repo
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+
+def _print_progress(message: str):
+    print(message, flush=True)
+
+
+def _analyze(args: argparse.Namespace) -> int:
+    from service.headless_analyzer import analyze_to_artifact, HEADLESS_WORKERS
+
+    manifest = analyze_to_artifact(
+        args.project_root, args.paths or ["."], args.output,
+        workers=args.workers or HEADLESS_WORKERS, embed=args.embed, progress=_print_progress
+    )
+    print(json.dumps({
+        "artifact": args.output,
+        "format": manifest["format"],
+        "counts": manifest["counts"],
+        "stage_seconds": manifest["stage_seconds"],
+    }, ensure_ascii=False, indent=2))
+    return 0
+
+
+def _load(args: argparse.Namespace) -> int:
+    from db.artifact_loader import load_graph_artifact, ARTIFACT_LOAD_BATCH_ROWS
+    from db.driver_neo4j import Neo4jConnector
+
+    try:
+        result = load_graph_artifact(
+            args.artifact, replace=args.replace, batch_rows=args.batch_rows or ARTIFACT_LOAD_BATCH_ROWS,
+            load_vectors=not args.skip_embeddings, progress=_print_progress
+        )
+    finally:
+        Neo4jConnector.close_driver()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+def _export_csv(args: argparse.Namespace) -> int:
+    from db.bulk_import import export_import_csv
+
+    result = export_import_csv(args.artifact, args.output, database=args.database, progress=_print_progress)
+    print(json.dumps({"counts": result["counts"], "elapsed_seconds": result["elapsed_seconds"]}, ensure_ascii=False, indent=2))
+    print("\nneo4j-admin 명령 (Neo4j 서버를 멈춘 상태에서 실행한 뒤 서버를 시작하고 finalize-import를 실행하세요):")
+    print(result["neo4j_admin_command"])
+    return 0
+
+
+def _load_csv(args: argparse.Namespace) -> int:
+    from db.bulk_import import load_csv_import, NEO4J_IMPORT_URL_PREFIX
+    from db.driver_neo4j import Neo4jConnector
+
+    try:
+        result = load_csv_import(args.csv_dir, url_prefix=args.url_prefix or NEO4J_IMPORT_URL_PREFIX,
+                                 load_vectors=not args.skip_embeddings, progress=_print_progress)
+    finally:
+        Neo4jConnector.close_driver()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+def _finalize_import(args: argparse.Namespace) -> int:
+    from db.bulk_import import finalize_admin_import
+    from db.driver_neo4j import Neo4jConnector
+
+    try:
+        result = finalize_admin_import(args.csv_dir, load_vectors=not args.skip_embeddings)
+    finally:
+        Neo4jConnector.close_driver()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Codebase analyzer command line tool")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    analyze = subparsers.add_parser("analyze", help="프로젝트를 분석해 그래프 결과물로 저장합니다.")
+    analyze.add_argument("project_root", help="분석할 프로젝트 루트 경로")
+    analyze.add_argument("-o", "--output", required=True, help="결과물 디렉토리")
+    analyze.add_argument("-p", "--paths", nargs="*", help="분석할 하위 경로 (프로젝트 루트 기준, 기본값: 전체)")
+    analyze.add_argument("-w", "--workers", type=int, default=0, help="파싱 프로세스 수 (기본값: HEADLESS_ANALYSIS_WORKERS 또는 CPU 수)")
+    analyze.add_argument("--embed", action="store_true", help="임베딩도 계산해 결과물에 포함")
+    analyze.set_defaults(handler=_analyze)
+
+    load = subparsers.add_parser("load", help="그래프 결과물을 Neo4j와 임베딩 파일에 적재합니다.")
+    load.add_argument("artifact", help="결과물 디렉토리")
+    load.add_argument("--replace", action="store_true", help="같은 프로젝트의 기존 노드를 먼저 삭제")
+    load.add_argument("--batch-rows", type=int, default=0, help="한 트랜잭션으로 적재할 행 수")
+    load.add_argument("--skip-embeddings", action="store_true", help="임베딩은 적재하지 않음")
+    load.set_defaults(handler=_load)
+
+    export_csv = subparsers.add_parser("export-csv", help="그래프 결과물을 neo4j-admin database import용 CSV로 변환합니다.")
+    export_csv.add_argument("artifact", help="결과물 디렉토리")
+    export_csv.add_argument("-o", "--output", required=True, help="CSV 출력 디렉토리")
+    export_csv.add_argument("--database", default="neo4j", help="가져올 데이터베이스 이름 (neo4j-admin 명령에 사용)")
+    export_csv.set_defaults(handler=_export_csv)
+
+    load_csv = subparsers.add_parser("load-csv", help="export-csv 결과를 실행 중인 서버에 LOAD CSV로 가져옵니다.")
+    load_csv.add_argument("csv_dir", help="export-csv 출력 디렉토리")
+    load_csv.add_argument("--url-prefix", help="서버가 CSV를 읽을 URL 접두사 (기본값: NEO4J_IMPORT_URL_PREFIX)")
+    load_csv.add_argument("--skip-embeddings", action="store_true", help="임베딩은 적재하지 않음")
+    load_csv.set_defaults(handler=_load_csv)
+
+    finalize = subparsers.add_parser("finalize-import", help="neo4j-admin 가져오기 후 인덱스 생성과 blob/임베딩 적재를 마무리합니다.")
+    finalize.add_argument("csv_dir", help="export-csv 출력 디렉토리")
+    finalize.add_argument("--skip-embeddings", action="store_true", help="임베딩은 적재하지 않음")
+    finalize.set_defaults(handler=_finalize_import)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
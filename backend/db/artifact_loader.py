@@ -0,0 +1,152 @@
+# backend/db/artifact_loader.py
+
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Callable, Iterable, Optional
+
+from db.driver_neo4j import open_session, run_cypher_query
+from db.graph_generation import bump_graph_generation
+from db.graph_stats import apply_graph_stats_delta, ensure_graph_stats_schema
+from db.graph_compaction import COMPACTABLE_LABELS
+from db.graph_delta import apply_file_graph_delta
+from db.graph_indexes import FILE_SCOPED_LABELS, ensure_graph_indexes
+from db.ingestor_python import write_graph_rows, entity_labels
+from service.graph_artifact import (read_artifact_manifest, iter_artifact_rows, read_artifact_embeddings,
+                                    ENTITIES, RELATIONSHIPS, BLOB_DIR)
+from service.blob_store import get_blob_store
+from service.embedding_store import load_embeddings, save_embeddings
+
+# 한 트랜잭션으로 적재할 행 수 (트랜잭션 안에서는 INGEST_BATCH_SIZE 단위의 UNWIND로 나눠 실행됩니다)
+ARTIFACT_LOAD_BATCH_ROWS = int(os.getenv("ARTIFACT_LOAD_BATCH_ROWS", "20000"))
+# 기존 프로젝트 그래프를 지울 때 한 트랜잭션으로 삭제할 노드 수
+ARTIFACT_REPLACE_BATCH_NODES = int(os.getenv("ARTIFACT_REPLACE_BATCH_NODES", "5000"))
+
+
+def _delete_project_graph(project_root: str, report: Callable[[str], None]) -> Dict[str, Any]:
+    """
+    프로젝트 하위 파일에서 추출된 노드를 배치 단위로 삭제하고, 그로 인해 연결이 모두 끊긴 공유 노드도 삭제합니다.
+
+    Returns:
+        Dict: {'deleted_nodes': {레이블: 수}, 'deleted_relationships': {유형: 수}, 'deleted_ids': [삭제된 노드 ID]}
+    """
+    prefix = os.path.join(project_root, "")
+    deleted = {"deleted_nodes": {}, "deleted_relationships": {}}
+    deleted_ids: List[str] = []
+
+    def delete_matching(label: str, condition: str, parameters: Dict[str, Any]):
+        while True:
+            records = run_cypher_query(
+                f"MATCH (n:{label}) WHERE {condition} RETURN n.id AS id LIMIT $limit",
+                parameters={**parameters, "limit": ARTIFACT_REPLACE_BATCH_NODES}, write=False
+            )
+            if not records:
+                return
+            result = apply_file_graph_delta([{"id": record["id"], "label": label} for record in records], [], [], [])
+            for key in deleted:
+                for name, count in result[key].items():
+                    deleted[key][name] = deleted[key].get(name, 0) + count
+            deleted_ids.extend(record["id"] for record in records)
+            report(f"기존 {label} 노드 {len(records)}개 삭제")
+
+    for label in FILE_SCOPED_LABELS:
+        delete_matching(label, "n.file_path STARTS WITH $prefix", {"prefix": prefix})
+    for label in COMPACTABLE_LABELS:
+        delete_matching(label, "NOT EXISTS { (n)--() }", {})
+    deleted["deleted_ids"] = deleted_ids
+    return deleted
+
+
+def load_artifact_sidecars(artifact_dir: str, load_vectors: bool = True, deleted_ids: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    결과물의 그래프 외 데이터를 적재합니다. (그래프를 어떤 방식으로 가져왔는지와 무관)
+    코드 blob은 blob 저장소에 없는 것만 복사하고, 임베딩 행렬은 임베딩 파일에 합칩니다. (deleted_ids의 임베딩은 제거)
+
+    Returns:
+        Dict: {'blobs_copied', 'embeddings'}
+    """
+    artifact_path = Path(artifact_dir)
+    result = {"blobs_copied": get_blob_store().import_from(str(artifact_path / BLOB_DIR)), "embeddings": 0}
+
+    deleted_ids = list(deleted_ids)
+    artifact_embeddings = read_artifact_embeddings(artifact_path) if load_vectors else None
+    if artifact_embeddings is not None or deleted_ids:
+        embeddings_with_ids = load_embeddings()
+        for node_id in deleted_ids:
+            embeddings_with_ids.pop(node_id, None)
+        if artifact_embeddings is not None:
+            ids, matrix = artifact_embeddings
+            # 행렬 전체를 한 번에 리스트로 바꾸지 않도록 나눠서 변환합니다.
+            for row_start in range(0, len(ids), ARTIFACT_LOAD_BATCH_ROWS):
+                rows = matrix[row_start:row_start + ARTIFACT_LOAD_BATCH_ROWS].tolist()
+                embeddings_with_ids.update(zip(ids[row_start:row_start + ARTIFACT_LOAD_BATCH_ROWS], rows))
+            result["embeddings"] = len(ids)
+        save_embeddings(embeddings_with_ids)
+    return result
+
+
+def load_graph_artifact(artifact_dir: str, replace: bool = False, batch_rows: int = ARTIFACT_LOAD_BATCH_ROWS,
+                        load_vectors: bool = True, progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    오프라인 분석 결과물(service/graph_artifact.py)을 Neo4j와 임베딩 파일에 적재합니다.
+
+    결과물은 호출 해석과 공유 노드 ID 부여가 끝난 상태이므로, 엔티티 → 관계 순으로 큰 트랜잭션 단위로 쓰기만 합니다.
+    관계는 엔티티를 적재하며 모은 {ID: 레이블}로 양 끝 노드를 레이블별 id 인덱스로 찾습니다.
+
+    Args:
+        replace: True면 먼저 같은 프로젝트의 기존 노드를 삭제합니다. (추출 노드 ID는 분석할 때마다 새로 만들어지므로,
+                 같은 프로젝트를 다시 적재할 때 중복을 막으려면 필요합니다)
+        batch_rows: 한 트랜잭션으로 적재할 행 수
+        load_vectors: 임베딩 행렬이 있으면 임베딩 파일에 합칩니다.
+
+    Returns:
+        Dict: 적재 보고
+    """
+    report = progress or (lambda message: None)
+    started = time.perf_counter()
+    artifact_path = Path(artifact_dir)
+    manifest = read_artifact_manifest(artifact_path)
+    ensure_graph_stats_schema()
+    ensure_graph_indexes()
+    result: Dict[str, Any] = {"project_root": manifest["project_root"], "created_nodes": {}, "created_relationships": {}}
+    deleted_ids: List[str] = []
+    if replace:
+        deleted = _delete_project_graph(manifest["project_root"], report)
+        deleted_ids = deleted.pop("deleted_ids")
+        result["replaced"] = deleted
+
+    def _write(tx, entities, relationships, known_labels=None):
+        label_deltas, rel_deltas = write_graph_rows(tx, entities, relationships, known_labels)
+        apply_graph_stats_delta(tx, label_deltas, rel_deltas)
+        return label_deltas, rel_deltas
+
+    def _add(total: Dict[str, int], deltas: Dict[str, int]):
+        for name, count in deltas.items():
+            total[name] = total.get(name, 0) + count
+
+    try:
+        labels_by_id: Dict[str, str] = {}
+        loaded = 0
+        with open_session() as session:
+            for batch in iter_artifact_rows(artifact_path, ENTITIES, batch_rows):
+                # 결과물에 있는 레이블은 읽으면서 알게 되므로 배치마다 확인합니다. (이미 만든 인덱스는 건너뜀)
+                ensure_graph_indexes(entity_labels(batch))
+                label_deltas, _ = session.execute_write(_write, batch, [])
+                _add(result["created_nodes"], label_deltas)
+                labels_by_id.update((entity["id"], entity["type"]) for entity in batch)
+                loaded += len(batch)
+                report(f"노드 {loaded}/{manifest['counts'][ENTITIES]} 적재")
+
+            loaded = 0
+            for batch in iter_artifact_rows(artifact_path, RELATIONSHIPS, batch_rows):
+                _, rel_deltas = session.execute_write(_write, [], batch, labels_by_id)
+                _add(result["created_relationships"], rel_deltas)
+                loaded += len(batch)
+                report(f"관계 {loaded}/{manifest['counts'][RELATIONSHIPS]} 적재")
+    finally:
+        bump_graph_generation("artifact_load")
+
+    result.update(load_artifact_sidecars(artifact_path, load_vectors, deleted_ids))
+    result["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    report(f"적재 완료 ({result['elapsed_seconds']}s)")
+    return result
@@ -0,0 +1,297 @@
+# backend/db/bulk_import.py
+
+import os
+import csv
+import json
+import shlex
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+from db.driver_neo4j import open_session, retry_on_transient
+from db.graph_generation import bump_graph_generation
+from db.graph_stats import GRAPH_STATS_LABEL, ensure_graph_stats_schema, recompute_graph_stats
+from db.graph_indexes import ensure_graph_indexes
+from db.artifact_loader import load_artifact_sidecars
+from service.graph_artifact import read_artifact_manifest, iter_artifact_rows, ENTITIES, RELATIONSHIPS
+
+# 최초 적재용 대량 가져오기.
+# 트랜잭션 MERGE(db/ingestor_python.py, db/artifact_loader.py)는 증분 반영용으로 그대로 두고,
+# 큰 저장소를 처음 적재할 때는 결과물을 CSV로 바꿔 neo4j-admin database import(오프라인, 가장 빠름) 또는
+# LOAD CSV(실행 중인 서버)로 가져옵니다.
+
+# 결과물을 읽을 때 한 번에 읽을 행 수
+BULK_EXPORT_READ_ROWS = int(os.getenv("BULK_EXPORT_READ_ROWS", "50000"))
+# LOAD CSV의 CALL { } IN TRANSACTIONS 단위
+BULK_LOAD_CSV_TX_ROWS = int(os.getenv("BULK_LOAD_CSV_TX_ROWS", "10000"))
+# Neo4j 서버가 CSV를 읽을 위치. 기본값은 서버의 import 디렉토리 (CSV 디렉토리를 그 안에 두거나 마운트해야 합니다)
+NEO4J_IMPORT_URL_PREFIX = os.getenv("NEO4J_IMPORT_URL_PREFIX", "file:///")
+NEO4J_ADMIN_COMMAND = os.getenv("NEO4J_ADMIN_COMMAND", "neo4j-admin")
+
+IMPORT_MANIFEST_FILE = "import_manifest.json"
+GRAPH_STATS_FILE = "graph_stats.csv"
+
+# 노드 CSV 헤더 (neo4j-admin 형식: 이름:타입, ID 컬럼은 :ID). 레이블은 파일 단위로 지정합니다.
+NODE_HEADER = (
+    ("id", "ID"), ("name", None), ("file_path", None), ("start_line", "long"), ("end_line", "long"),
+    ("content_hash", None), ("byte_start", "long"), ("byte_end", "long"), ("entity_count", "long"),
+    ("class_name", None),
+)
+_UNKNOWN_LABEL = "Any"
+
+
+def _header(columns) -> List[str]:
+    return [f"{name}:{type_name}" if type_name else name for name, type_name in columns]
+
+
+def _property_type(type_names: set) -> Optional[str]:
+    """관계 속성 값의 파이썬 타입 집합으로 CSV 컬럼 타입을 정합니다. (문자열은 타입 표기 없음)"""
+    type_names = type_names - {"NoneType"}
+    if type_names and type_names <= {"bool"}:
+        return "boolean"
+    if type_names and type_names <= {"int"}:
+        return "long"
+    if type_names and type_names <= {"int", "float"}:
+        return "double"
+    return None
+
+
+def _cell(value: Any) -> Any:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def export_import_csv(artifact_dir: str, output_dir: str, database: str = "neo4j",
+                      progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    그래프 결과물(service/graph_artifact.py)을 neo4j-admin database import 형식의 CSV로 변환합니다.
+
+    - 노드: 레이블별 nodes_{레이블}.csv (첫 줄이 헤더)
+    - 관계: (유형, 시작 레이블, 끝 레이블)별 rels_{유형}_{시작}_{끝}.csv. LOAD CSV에서도 레이블로 id 인덱스를 쓰기 위해 나눕니다.
+      같은 (시작, 끝, 유형) 관계는 트랜잭션 적재의 MERGE처럼 하나만 남깁니다. (먼저 나온 행의 속성 사용)
+    - GraphStats 카운터 노드: graph_stats.csv (가져온 뒤 카운터를 다시 계산하지 않아도 되도록)
+
+    결과물은 엔티티 1회, 관계 2회(속성 타입 확인, 쓰기) 스트리밍으로 읽으며, 메모리에는 노드 {ID: 레이블}과 관계 키만 둡니다.
+
+    Returns:
+        Dict: import_manifest.json 내용 (파일 목록, 행 수, neo4j-admin 명령)
+    """
+    report = progress or (lambda message: None)
+    started = time.perf_counter()
+    manifest = read_artifact_manifest(artifact_dir)
+    output = Path(output_dir).absolute()
+    output.mkdir(parents=True, exist_ok=True)
+
+    open_files = []
+
+    def open_writer(path: Path, header: List[str]):
+        f = open(path, "w", encoding="utf-8", newline="")
+        open_files.append(f)
+        writer = csv.writer(f)
+        writer.writerow(header)
+        return writer
+
+    node_files: Dict[str, Dict[str, Any]] = {}
+    rel_files: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    try:
+        # 1. 노드
+        labels_by_id: Dict[str, str] = {}
+        for batch in iter_artifact_rows(artifact_dir, ENTITIES, BULK_EXPORT_READ_ROWS):
+            for entity in batch:
+                label = entity.get("type") or "Entity"
+                if entity["id"] in labels_by_id:
+                    continue
+                labels_by_id[entity["id"]] = label
+                target = node_files.get(label)
+                if target is None:
+                    path = output / f"nodes_{label}.csv"
+                    target = node_files[label] = {"label": label, "file": str(path), "rows": 0,
+                                                  "writer": open_writer(path, _header(NODE_HEADER))}
+                target["writer"].writerow([_cell(entity.get(name)) for name, _ in NODE_HEADER])
+                target["rows"] += 1
+            report(f"노드 {len(labels_by_id)}개 변환")
+
+        # 2. 관계 속성 타입 확인
+        property_types: Dict[str, Dict[str, set]] = {}
+        for batch in iter_artifact_rows(artifact_dir, RELATIONSHIPS, BULK_EXPORT_READ_ROWS):
+            for rel in batch:
+                types = property_types.setdefault(rel.get("type") or "RELATED_TO", {})
+                for key, value in rel["properties"].items():
+                    types.setdefault(key, set()).add(type(value).__name__)
+        rel_columns = {
+            rel_type: [(key, _property_type(type_names)) for key, type_names in sorted(types.items())]
+            for rel_type, types in property_types.items()
+        }
+
+        # 3. 관계
+        seen = set()
+        skipped_duplicates = 0
+        for batch in iter_artifact_rows(artifact_dir, RELATIONSHIPS, BULK_EXPORT_READ_ROWS):
+            for rel in batch:
+                rel_type = rel.get("type") or "RELATED_TO"
+                key = (rel["source_id"], rel["target_id"], rel_type)
+                if key in seen:
+                    skipped_duplicates += 1
+                    continue
+                seen.add(key)
+                group = (rel_type, labels_by_id.get(rel["source_id"], _UNKNOWN_LABEL),
+                         labels_by_id.get(rel["target_id"], _UNKNOWN_LABEL))
+                target = rel_files.get(group)
+                if target is None:
+                    path = output / f"rels_{group[0]}_{group[1]}_{group[2]}.csv"
+                    header = [":START_ID", ":END_ID"] + _header(rel_columns[rel_type])
+                    target = rel_files[group] = {"type": group[0], "start_label": group[1], "end_label": group[2],
+                                                 "file": str(path), "rows": 0, "writer": open_writer(path, header)}
+                properties = rel["properties"]
+                target["writer"].writerow(
+                    [rel["source_id"], rel["target_id"]] + [_cell(properties.get(name)) for name, _ in rel_columns[rel_type]]
+                )
+                target["rows"] += 1
+            report(f"관계 {len(seen)}개 변환")
+    finally:
+        for f in open_files:
+            f.close()
+
+    # 4. 그래프 통계 카운터
+    label_counts: Dict[str, int] = {}
+    for target in node_files.values():
+        label_counts[target["label"]] = label_counts.get(target["label"], 0) + target["rows"]
+    rel_counts: Dict[str, int] = {}
+    for target in rel_files.values():
+        rel_counts[target["type"]] = rel_counts.get(target["type"], 0) + target["rows"]
+    stats_path = output / GRAPH_STATS_FILE
+    with open(stats_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["stat_key", "kind", "name", "count:long"])
+        for name, count in sorted(label_counts.items()):
+            writer.writerow([f"label:{name}", "label", name, count])
+        for name, count in sorted(rel_counts.items()):
+            writer.writerow([f"rel:{name}", "rel", name, count])
+
+    nodes = [{k: v for k, v in target.items() if k != "writer"} for target in node_files.values()]
+    relationships = [{k: v for k, v in target.items() if k != "writer"} for target in rel_files.values()]
+    command = [NEO4J_ADMIN_COMMAND, "database", "import", "full", database,
+               "--overwrite-destination=true", "--skip-bad-relationships=true"]
+    command += [f"--nodes={item['label']}={item['file']}" for item in nodes]
+    command.append(f"--nodes={GRAPH_STATS_LABEL}={stats_path}")
+    command += [f"--relationships={item['type']}={item['file']}" for item in relationships]
+
+    import_manifest = {
+        "artifact": str(Path(artifact_dir).absolute()),
+        "project_root": manifest["project_root"],
+        "nodes": nodes,
+        "relationships": relationships,
+        "graph_stats_file": str(stats_path),
+        "counts": {"nodes": label_counts, "relationships": rel_counts, "skipped_duplicate_relationships": skipped_duplicates},
+        "neo4j_admin_command": " ".join(shlex.quote(part) for part in command),
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+    }
+    (output / IMPORT_MANIFEST_FILE).write_text(json.dumps(import_manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    return import_manifest
+
+
+def read_import_manifest(csv_dir: str) -> Dict[str, Any]:
+    path = Path(csv_dir) / IMPORT_MANIFEST_FILE
+    if not path.is_file():
+        raise FileNotFoundError(f"Not a bulk import directory (missing {IMPORT_MANIFEST_FILE}): {csv_dir}")
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _converted_properties(columns: List[str]) -> str:
+    """CSV 헤더로 LOAD CSV 행을 속성 맵으로 바꾸는 Cypher 식을 만듭니다. (타입 표기에 맞게 변환)"""
+    converters = {"long": "toInteger", "double": "toFloat", "boolean": "toBoolean"}
+    parts = []
+    for column in columns:
+        name, _, type_name = column.partition(":")
+        if not name or type_name == "ID":
+            continue
+        value = f"row.`{column}`"
+        if type_name in converters:
+            value = f"{converters[type_name]}({value})"
+        parts.append(f"`{name}`: {value}")
+    return "{" + ", ".join(parts) + "}"
+
+
+def _csv_header(path: str) -> List[str]:
+    with open(path, encoding="utf-8", newline="") as f:
+        return next(csv.reader(f))
+
+
+def load_csv_import(csv_dir: str, url_prefix: str = NEO4J_IMPORT_URL_PREFIX, tx_rows: int = BULK_LOAD_CSV_TX_ROWS,
+                    load_vectors: bool = True, progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    export_import_csv로 만든 CSV를 실행 중인 서버에 LOAD CSV로 가져옵니다. (neo4j-admin을 쓸 수 없을 때)
+    서버가 {url_prefix}{파일 이름}으로 CSV를 읽을 수 있어야 합니다. (기본값: 서버 import 디렉토리의 파일)
+    파라미터 전송 없이 서버가 파일을 직접 읽고, CALL { } IN TRANSACTIONS로 나눠 커밋합니다.
+    MERGE로 적재하므로 다시 실행해도 중복이 생기지 않으며, 끝나면 그래프 통계 카운터를 다시 계산합니다.
+    코드 blob과 임베딩은 원본 결과물에서 적재합니다. (load_artifact_sidecars)
+
+    Returns:
+        Dict: {'nodes': {레이블: 행 수}, 'relationships': {유형: 행 수}, 'blobs_copied', 'embeddings', 'elapsed_seconds'}
+    """
+    report = progress or (lambda message: None)
+    started = time.perf_counter()
+    import_manifest = read_import_manifest(csv_dir)
+    ensure_graph_stats_schema()
+    ensure_graph_indexes(item["label"] for item in import_manifest["nodes"])
+    def url(path: str) -> str:
+        return f"{url_prefix}{Path(path).name}"
+
+    result: Dict[str, Any] = {"nodes": {}, "relationships": {}}
+    try:
+        # IN TRANSACTIONS는 자동 커밋 트랜잭션에서만 실행할 수 있으므로 session.run을 사용합니다.
+        # 관리 트랜잭션의 자동 재시도가 없으므로 일시적 오류면 파일 단위로 다시 실행합니다. (MERGE라 다시 실행해도 안전)
+        with open_session() as session:
+            for item in import_manifest["nodes"]:
+                properties = _converted_properties(_csv_header(item["file"]))
+                retry_on_transient(lambda query, parameters: session.run(query, parameters).consume(), f"""
+                    LOAD CSV WITH HEADERS FROM $url AS row
+                    CALL {{
+                        WITH row
+                        MERGE (n:{item['label']} {{id: row.`id:ID`}})
+                        SET n += {properties}
+                    }} IN TRANSACTIONS OF $tx_rows ROWS
+                """, {"url": url(item["file"]), "tx_rows": tx_rows})
+                result["nodes"][item["label"]] = result["nodes"].get(item["label"], 0) + item["rows"]
+                report(f"{item['label']} 노드 {item['rows']}개 적재")
+
+            for item in import_manifest["relationships"]:
+                properties = _converted_properties(_csv_header(item["file"]))
+                start = "" if item["start_label"] == _UNKNOWN_LABEL else f":{item['start_label']}"
+                end = "" if item["end_label"] == _UNKNOWN_LABEL else f":{item['end_label']}"
+                retry_on_transient(lambda query, parameters: session.run(query, parameters).consume(), f"""
+                    LOAD CSV WITH HEADERS FROM $url AS row
+                    CALL {{
+                        WITH row
+                        MATCH (source{start} {{id: row.`:START_ID`}}), (target{end} {{id: row.`:END_ID`}})
+                        MERGE (source)-[r:{item['type']}]->(target)
+                        SET r += {properties}
+                    }} IN TRANSACTIONS OF $tx_rows ROWS
+                """, {"url": url(item["file"]), "tx_rows": tx_rows})
+                result["relationships"][item["type"]] = result["relationships"].get(item["type"], 0) + item["rows"]
+                report(f"{item['type']} 관계 {item['rows']}개 적재 ({item['start_label']} -> {item['end_label']})")
+    finally:
+        bump_graph_generation("bulk_load_csv")
+
+    # 행 단위 증감을 세지 않았으므로 카운터는 전체를 다시 계산합니다. (최초 적재이므로 한 번의 전체 스캔)
+    recompute_graph_stats()
+    result.update(load_artifact_sidecars(import_manifest["artifact"], load_vectors))
+    result["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def finalize_admin_import(csv_dir: str, load_vectors: bool = True) -> Dict[str, Any]:
+    """
+    neo4j-admin database import로 가져온 뒤(서버 시작 후) 한 번 실행합니다.
+    가져오기는 인덱스/제약 조건을 만들지 않으므로 만들고, 코드 blob과 임베딩을 적재한 뒤
+    세대 번호를 올려 이전 캐시/스냅샷을 무효화합니다.
+    """
+    import_manifest = read_import_manifest(csv_dir)
+    ensure_graph_stats_schema()
+    ensure_graph_indexes(item["label"] for item in import_manifest["nodes"])
+    result = load_artifact_sidecars(import_manifest["artifact"], load_vectors)
+    result["graph_generation"] = bump_graph_generation("bulk_import")
+    return result
@@ -1,41 +1,273 @@
-from neo4j import GraphDatabase
+# backend/db/driver_neo4j.py
+"""
+Neo4j 접근 계층
+
+- Neo4jConnector / AsyncNeo4jConnector: 프로세스당 하나의 드라이버(연결 풀)를 스레드 안전하게 만들어 공유합니다.
+- run_cypher_query / stream_cypher_query: 단일 쿼리 실행 (결과 전체 / 레코드 단위 스트리밍)
+- run_in_transaction: 여러 쿼리를 하나의 관리 트랜잭션으로 실행 (일시적 오류 시 드라이버가 백오프 후 재시도)
+- graph_transaction: 명시적 트랜잭션 (with 블록이 정상 종료되면 커밋, 예외 시 롤백)
+- *_async: 비동기 엔드포인트용 (이벤트 루프를 막지 않음)
+
+위 함수로 실행한 쿼리는 템플릿별 지연 시간/행 수/결과 크기가 기록됩니다. (db/query_metrics.py)
+
+쓰기 세션이 끝나면 북마크를 모아 두고 이후 세션에 넘겨, 클러스터에서도 방금 쓴 내용을 읽을 수 있게 합니다. (NEO4J_CAUSAL_BOOKMARKS)
+"""
 import os
+import random
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+
+from neo4j import GraphDatabase, AsyncGraphDatabase, Bookmarks, READ_ACCESS, WRITE_ACCESS
+
+from db.query_metrics import get_query_metrics, estimate_size, CYPHER_METRICS_ENABLED
+
+# 연결 풀 최대 크기 (동시에 Neo4j를 쓰는 스레드/요청 수보다 크게)
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+# 풀에서 연결을 얻을 때까지 기다리는 최대 시간(초), 넘으면 오류
+NEO4J_POOL_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_POOL_ACQUISITION_TIMEOUT", "60"))
+# 새 연결을 맺을 때의 제한 시간(초)
+NEO4J_CONNECTION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_TIMEOUT", "30"))
+# 연결을 재사용할 최대 시간(초), 방화벽/LB가 오래된 연결을 끊는 환경이면 줄이세요.
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+# 관리 트랜잭션(run_in_transaction)이 일시적 오류로 재시도하는 최대 시간(초)
+NEO4J_MAX_TRANSACTION_RETRY_TIME = float(os.getenv("NEO4J_MAX_TRANSACTION_RETRY_TIME", "30"))
+# 자동 커밋 쿼리(스트리밍, CALL {} IN TRANSACTIONS 등)의 재시도 횟수와 백오프(초, 시도마다 2배, 지터 포함)
+NEO4J_RETRY_ATTEMPTS = int(os.getenv("NEO4J_RETRY_ATTEMPTS", "4"))
+NEO4J_RETRY_BACKOFF_SECONDS = float(os.getenv("NEO4J_RETRY_BACKOFF_SECONDS", "0.5"))
+NEO4J_RETRY_MAX_BACKOFF_SECONDS = float(os.getenv("NEO4J_RETRY_MAX_BACKOFF_SECONDS", "8"))
+# 사용할 데이터베이스 이름 (비우면 서버 기본 데이터베이스, 지정하면 홈 데이터베이스 조회 왕복이 줄어듭니다)
+NEO4J_DATABASE = os.getenv("NEO4J_DATABASE") or None
+# 쓰기 후 북마크를 다음 세션에 넘겨 읽기가 최신 쓰기를 보도록 할지 여부
+NEO4J_CAUSAL_BOOKMARKS = os.getenv("NEO4J_CAUSAL_BOOKMARKS", "true").lower() == "true"
+
+
+def _connection_settings():
+    uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+    username = os.getenv("NEO4J_USERNAME", "neo4j")
+    password = os.getenv("NEO4J_PASSWORD", "qwerqwer")
+    config = {
+        "max_connection_pool_size": NEO4J_MAX_POOL_SIZE,
+        "connection_acquisition_timeout": NEO4J_POOL_ACQUISITION_TIMEOUT,
+        "connection_timeout": NEO4J_CONNECTION_TIMEOUT,
+        "max_connection_lifetime": NEO4J_MAX_CONNECTION_LIFETIME,
+        "max_transaction_retry_time": NEO4J_MAX_TRANSACTION_RETRY_TIME,
+    }
+    return uri, (username, password), config
+
 
 class Neo4jConnector:
     _driver = None
+    # 여러 스레드가 동시에 처음 get_driver를 호출해도 드라이버는 하나만 만들어집니다.
+    _lock = threading.RLock()
 
     def __init__(self):
-        if Neo4jConnector._driver is not None:
-            return
+        with Neo4jConnector._lock:
+            if Neo4jConnector._driver is not None:
+                return
 
-        uri = os.getenv("NEO4J_URI", "bolt://localhost:7687")
-        username = os.getenv("NEO4J_USERNAME", "neo4j")
-        password = os.getenv("NEO4J_PASSWORD", "qwerqwer")
-
-        try:
-            Neo4jConnector._driver = GraphDatabase.driver(uri, auth=(username, password))
-            Neo4jConnector._driver.verify_connectivity()
-            print("Neo4j connection established successfully.")
-        except Exception as e:
-            print(f"Error connecting to Neo4j: {e}")
-            Neo4jConnector._driver = None
-            raise
+            uri, auth, config = _connection_settings()
+            try:
+                driver = GraphDatabase.driver(uri, auth=auth, **config)
+                driver.verify_connectivity()
+                Neo4jConnector._driver = driver
+                print(f"Neo4j connection established successfully. (pool size {NEO4J_MAX_POOL_SIZE})")
+            except Exception as e:
+                print(f"Error connecting to Neo4j: {e}")
+                Neo4jConnector._driver = None
+                raise
 
     @classmethod
     def get_driver(cls):
-        if cls._driver is None:
-            cls()
-        return cls._driver
+        driver = cls._driver
+        if driver is None:
+            with cls._lock:
+                if cls._driver is None:
+                    cls()
+                driver = cls._driver
+        return driver
 
     @classmethod
     def close_driver(cls):
-        if cls._driver:
-            cls._driver.close()
-            print("Neo4j connection closed.")
-            cls._driver = None
-            
-            
-def run_cypher_query(query, parameters=None, write=True):
+        with cls._lock:
+            if cls._driver:
+                cls._driver.close()
+                print("Neo4j connection closed.")
+                cls._driver = None
+
+
+class AsyncNeo4jConnector:
+    """
+    비동기 엔드포인트용 드라이버. 연결 풀 설정은 Neo4jConnector와 같습니다.
+    비동기 드라이버는 처음 사용한 이벤트 루프에 묶이므로, 서버의 이벤트 루프 안에서만 사용하세요.
+    """
+    _driver = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_driver(cls):
+        driver = cls._driver
+        if driver is None:
+            with cls._lock:
+                if cls._driver is None:
+                    uri, auth, config = _connection_settings()
+                    cls._driver = AsyncGraphDatabase.driver(uri, auth=auth, **config)
+                driver = cls._driver
+        return driver
+
+    @classmethod
+    async def close_driver(cls):
+        with cls._lock:
+            driver, cls._driver = cls._driver, None
+        if driver:
+            await driver.close()
+            print("Neo4j async connection closed.")
+
+
+class _CausalBookmarks:
+    """
+    쓰기 세션이 끝날 때 받은 북마크를 모아 두는 저장소 (드라이버의 BookmarkManager와 같은 규칙)
+    세션을 시작할 때 받은 북마크는 그 세션이 끝나며 받은 북마크로 대체됩니다. 동기/비동기 세션이 함께 사용합니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = frozenset()
+
+    def current(self) -> Bookmarks:
+        with self._lock:
+            return Bookmarks.from_raw_values(self._values)
+
+    def update(self, previous: Bookmarks, new: Bookmarks):
+        if not new.raw_values:
+            return
+        with self._lock:
+            self._values = (self._values - previous.raw_values) | new.raw_values
+
+
+_causal_bookmarks = _CausalBookmarks()
+
+
+def _session_config(write: bool, bookmarks=None, fetch_size=None):
+    config = {"default_access_mode": WRITE_ACCESS if write else READ_ACCESS}
+    if NEO4J_DATABASE:
+        config["database"] = NEO4J_DATABASE
+    if bookmarks is not None:
+        config["bookmarks"] = bookmarks if isinstance(bookmarks, Bookmarks) else Bookmarks.from_raw_values(bookmarks)
+    elif NEO4J_CAUSAL_BOOKMARKS:
+        config["bookmarks"] = _causal_bookmarks.current()
+    if fetch_size:
+        config["fetch_size"] = fetch_size
+    return config
+
+
+def _is_retryable(error: Exception) -> bool:
+    # neo4j 5 드라이버의 Neo4jError/DriverError는 재시도해도 되는 오류(TransientError, 연결 끊김 등)인지 알려줍니다.
+    is_retryable = getattr(error, "is_retryable", None)
+    return bool(is_retryable and is_retryable())
+
+
+def _backoff_seconds(attempt: int) -> float:
+    delay = min(NEO4J_RETRY_BACKOFF_SECONDS * (2 ** attempt), NEO4J_RETRY_MAX_BACKOFF_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def retry_on_transient(work, *args, attempts: int = NEO4J_RETRY_ATTEMPTS, **kwargs):
+    """
+    work(*args, **kwargs)를 실행하고, 일시적 오류면 지수 백오프 후 다시 실행합니다.
+    관리 트랜잭션 밖에서 실행하는 작업(자동 커밋 쿼리 등)에 사용하며, work는 다시 실행해도 안전해야 합니다.
+    """
+    for attempt in range(attempts):
+        try:
+            return work(*args, **kwargs)
+        except Exception as e:
+            if attempt == attempts - 1 or not _is_retryable(e):
+                raise
+            delay = _backoff_seconds(attempt)
+            print(f"Transient Neo4j error, retrying in {delay:.2f}s ({attempt + 1}/{attempts - 1}): {e}")
+            time.sleep(delay)
+
+
+@contextmanager
+def open_session(write: bool = True, bookmarks=None, fetch_size=None):
+    """
+    공유 드라이버에서 세션을 엽니다. 쓰기 세션이 끝나면 북마크를 기록합니다.
+
+    Args:
+        bookmarks: 이 세션이 기다릴 북마크 (생략 시 NEO4J_CAUSAL_BOOKMARKS에 따라 최근 쓰기의 북마크)
+        fetch_size: 스트리밍 시 서버에서 한 번에 가져올 레코드 수
+    """
+    driver = Neo4jConnector.get_driver()
+    if not driver:
+        raise ConnectionError("Neo4j driver not initialized. Please check your connection settings.")
+
+    config = _session_config(write, bookmarks, fetch_size)
+    with driver.session(**config) as session:
+        yield session
+    if write:
+        _causal_bookmarks.update(config.get("bookmarks") or Bookmarks(), session.last_bookmarks())
+
+
+def _execute(work, args, kwargs, write: bool, bookmarks):
+    with open_session(write, bookmarks) as session:
+        if write:
+            return session.execute_write(work, *args, **kwargs)
+        return session.execute_read(work, *args, **kwargs)
+
+
+def _transaction_name(work) -> str:
+    return f"tx:{getattr(work, '__module__', '')}.{getattr(work, '__qualname__', repr(work))}"
+
+
+def _profile_plan(query, parameters):
+    """느린 읽기 쿼리의 PROFILE 실행 계획 (db/query_metrics.py가 표본으로 뽑았을 때 호출)"""
+    with open_session(False) as session:
+        return session.run(f"PROFILE {query}", parameters).consume().profile
+
+
+def _record_query(query, parameters, write, started, rows=None, payload_bytes=None, error=None):
+    get_query_metrics().record(
+        query, (time.perf_counter() - started) * 1000, rows=rows, payload_bytes=payload_bytes,
+        parameters=parameters, error=error,
+        profile=None if write else (lambda: _profile_plan(query, parameters))
+    )
+
+
+def run_in_transaction(work, *args, write: bool = True, bookmarks=None, **kwargs):
+    """
+    work(tx, *args, **kwargs)를 하나의 관리 트랜잭션으로 실행하고 반환값을 돌려줍니다.
+    일시적 오류(교착, 리더 변경, 연결 끊김 등)가 나면 드라이버가 백오프하며 NEO4J_MAX_TRANSACTION_RETRY_TIME까지 재시도하므로,
+    work는 다시 실행해도 같은 결과가 되도록 작성하고 트랜잭션 밖의 상태를 바꾸지 않아야 합니다.
+    소요 시간은 "tx:<work 이름>" 템플릿으로 기록됩니다.
+    """
+    if not CYPHER_METRICS_ENABLED:
+        return _execute(work, args, kwargs, write, bookmarks)
+    started = time.perf_counter()
+    try:
+        result = _execute(work, args, kwargs, write, bookmarks)
+    except Exception as e:
+        get_query_metrics().record(_transaction_name(work), (time.perf_counter() - started) * 1000, error=e)
+        raise
+    get_query_metrics().record(_transaction_name(work), (time.perf_counter() - started) * 1000)
+    return result
+
+
+@contextmanager
+def graph_transaction(write: bool = True, bookmarks=None, timeout=None):
+    """
+    명시적 트랜잭션. with 블록 안의 여러 쿼리가 하나의 트랜잭션으로 커밋되고, 예외가 나면 롤백됩니다.
+    블록 안의 애플리케이션 코드까지 다시 실행할 수 없으므로 자동 재시도는 하지 않습니다. (재시도가 필요하면 run_in_transaction)
+
+        with graph_transaction() as tx:
+            tx.run("...", ...)
+            tx.run("...", ...)
+    """
+    with open_session(write, bookmarks) as session:
+        with session.begin_transaction(timeout=timeout) as tx:
+            yield tx
+
+
+def run_cypher_query(query, parameters=None, write=True, bookmarks=None):
     """
     Neo4j 데이터베이스에 Cypher 쿼리를 실행합니다.
 
@@ -43,6 +275,7 @@ def run_cypher_query(query, parameters=None, write=True):
         query (str): 실행할 Cypher 쿼리 문자열.
         parameters (dict, optional): 쿼리에 전달할 파라미터 딕셔너리. 기본값은 None.
         write (bool, optional): 쿼리가 데이터를 변경하는 쓰기 작업이면 True, 읽기 작업이면 False. 기본값은 True.
+        bookmarks (optional): 이 쿼리 전에 반영되어 있어야 하는 북마크. 기본값은 최근 쓰기의 북마크.
 
     Returns:
         list: 쿼리 결과의 레코드 리스트 (딕셔너리 형태).
@@ -51,22 +284,139 @@ def run_cypher_query(query, parameters=None, write=True):
         ConnectionError: Neo4j 드라이버가 초기화되지 않았을 때 발생.
         Exception: Cypher 쿼리 실행 중 오류 발생 시 발생.
     """
-    driver = Neo4jConnector.get_driver()
-    if not driver:
-        raise ConnectionError("Neo4j driver not initialized. Please check your connection settings.")
+    started = time.perf_counter()
+    try:
+        records = _execute(lambda tx: tx.run(query, parameters).data(), (), {}, write, bookmarks)
+    except Exception as e:
+        if CYPHER_METRICS_ENABLED:
+            _record_query(query, parameters, write, started, error=e)
+        print(f"Error executing Cypher query: {e}")
+        raise
+    if CYPHER_METRICS_ENABLED:
+        _record_query(query, parameters, write, started, len(records), estimate_size(records))
+    return records
+
+
+def stream_cypher_query(query, parameters=None, write=False, fetch_size=1000, bookmarks=None):
+    """
+    Cypher 쿼리 결과를 레코드 단위로 스트리밍하는 제너레이터입니다.
+    run_cypher_query와 달리 전체 결과를 리스트로 만들지 않으므로,
+    결과가 매우 큰 쿼리(전체 그래프 내보내기 등)에서도 메모리 사용량이 일정하게 유지됩니다.
+    첫 레코드를 받기 전에 일시적 오류가 나면 백오프 후 다시 실행합니다. (이미 보낸 레코드는 되돌릴 수 없으므로 그 뒤로는 재시도하지 않음)
+
+    Args:
+        query (str): 실행할 Cypher 쿼리 문자열.
+        parameters (dict, optional): 쿼리에 전달할 파라미터 딕셔너리.
+        write (bool, optional): 쓰기 쿼리 여부. 기본값은 False.
+        fetch_size (int, optional): 서버에서 한 번에 가져올 레코드 수.
+
+    Yields:
+        dict: 레코드 하나를 딕셔너리로 변환한 값.
+    """
+    # 기록되는 시간은 소비하는 쪽의 처리 시간을 포함한, 스트림을 다 읽을 때까지의 시간입니다.
+    started = time.perf_counter()
+    rows, payload_bytes, error = 0, 0, None
+    try:
+        for attempt in range(NEO4J_RETRY_ATTEMPTS):
+            try:
+                with open_session(write, bookmarks, fetch_size) as session:
+                    for record in session.run(query, parameters):
+                        data = record.data()
+                        rows += 1
+                        if CYPHER_METRICS_ENABLED:
+                            payload_bytes += estimate_size(data)
+                        yield data
+                return
+            except Exception as e:
+                if rows or attempt == NEO4J_RETRY_ATTEMPTS - 1 or not _is_retryable(e):
+                    print(f"Error streaming Cypher query: {e}")
+                    error = e
+                    raise
+                time.sleep(_backoff_seconds(attempt))
+    finally:
+        if CYPHER_METRICS_ENABLED:
+            _record_query(query, parameters, write, started, rows, payload_bytes, error)
+
+
+@asynccontextmanager
+async def open_async_session(write: bool = True, bookmarks=None, fetch_size=None):
+    """open_session의 비동기 버전"""
+    config = _session_config(write, bookmarks, fetch_size)
+    async with AsyncNeo4jConnector.get_driver().session(**config) as session:
+        yield session
+    if write:
+        _causal_bookmarks.update(config.get("bookmarks") or Bookmarks(), await session.last_bookmarks())
+
+
+async def _execute_async(work, args, kwargs, write: bool, bookmarks):
+    async with open_async_session(write, bookmarks) as session:
+        if write:
+            return await session.execute_write(work, *args, **kwargs)
+        return await session.execute_read(work, *args, **kwargs)
+
+
+async def run_in_transaction_async(work, *args, write: bool = True, bookmarks=None, **kwargs):
+    """run_in_transaction의 비동기 버전. work는 async def work(tx, ...) 형태여야 합니다."""
+    if not CYPHER_METRICS_ENABLED:
+        return await _execute_async(work, args, kwargs, write, bookmarks)
+    started = time.perf_counter()
+    try:
+        result = await _execute_async(work, args, kwargs, write, bookmarks)
+    except Exception as e:
+        get_query_metrics().record(_transaction_name(work), (time.perf_counter() - started) * 1000, error=e)
+        raise
+    get_query_metrics().record(_transaction_name(work), (time.perf_counter() - started) * 1000)
+    return result
+
+
+@asynccontextmanager
+async def async_graph_transaction(write: bool = True, bookmarks=None, timeout=None):
+    """graph_transaction의 비동기 버전"""
+    async with open_async_session(write, bookmarks) as session:
+        async with await session.begin_transaction(timeout=timeout) as tx:
+            yield tx
+
+
+async def run_cypher_query_async(query, parameters=None, write=True, bookmarks=None):
+    """run_cypher_query의 비동기 버전. 이벤트 루프를 막지 않으므로 async 엔드포인트에서 직접 호출할 수 있습니다."""
+    async def _work(tx):
+        result = await tx.run(query, parameters)
+        return await result.data()
+
+    started = time.perf_counter()
+    try:
+        records = await _execute_async(_work, (), {}, write, bookmarks)
+    except Exception as e:
+        if CYPHER_METRICS_ENABLED:
+            _record_query(query, parameters, write, started, error=e)
+        print(f"Error executing Cypher query: {e}")
+        raise
+    if CYPHER_METRICS_ENABLED:
+        _record_query(query, parameters, write, started, len(records), estimate_size(records))
+    return records
+
+
+async def stream_cypher_query_async(query, parameters=None, write=False, fetch_size=1000, bookmarks=None):
+    """stream_cypher_query의 비동기 버전 (async for로 레코드를 하나씩 받습니다)"""
+    started = time.perf_counter()
+    rows, payload_bytes, error = 0, 0, None
+    try:
+        async with open_async_session(write, bookmarks, fetch_size) as session:
+            result = await session.run(query, parameters)
+            async for record in result:
+                data = record.data()
+                rows += 1
+                if CYPHER_METRICS_ENABLED:
+                    payload_bytes += estimate_size(data)
+                yield data
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        if CYPHER_METRICS_ENABLED:
+            _record_query(query, parameters, write, started, rows, payload_bytes, error)
+
 
-    with driver.session() as session:
-        try:
-            if write:
-                result = session.execute_write(lambda tx: tx.run(query, parameters).data())
-            else:
-                result = session.execute_read(lambda tx: tx.run(query, parameters).data())
-            return result
-        except Exception as e:
-            print(f"Error executing Cypher query: {e}")
-            raise
-        
-        
 def get_all_nodes_with_enriched_text():
     """
     Neo4j에서 모든 노드를 가져오고, 관계 정보를 포함하여 텍스트를 보강합니다.
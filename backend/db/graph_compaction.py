@@ -0,0 +1,152 @@
+# backend/db/graph_compaction.py
+
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Any
+
+from db.driver_neo4j import run_cypher_query, run_in_transaction
+from db.graph_generation import bump_graph_generation
+from db.graph_stats import apply_graph_stats_delta, ensure_graph_stats_schema
+from db.graph_indexes import ensure_id_indexes
+
+# 파일마다 따로 생성되어 중복되기 쉬운 노드 레이블 (이름만으로 같은 대상을 가리킴)
+COMPACTABLE_LABELS = ("Module", "ImportedName", "ExternalCallTarget")
+
+# 한 트랜잭션에서 제거할 최대 중복 노드 수
+COMPACTION_BATCH_SIZE = int(os.getenv("GRAPH_COMPACTION_BATCH_SIZE", "1000"))
+
+# 분석 후 중복 노드를 자동으로 압축할지 여부
+COMPACT_AFTER_INGEST = os.getenv("GRAPH_COMPACT_AFTER_INGEST", "true").lower() == "true"
+
+def _find_duplicate_groups(label: str, project_root: str) -> List[Dict[str, Any]]:
+    """
+    프로젝트 범위 안에서 같은 이름을 가진 노드 그룹을 찾고, 그룹마다 남길 노드(keep)와 지울 노드(drop)를 정합니다.
+    프로젝트 범위: project_root 속성이 같거나, 프로젝트 하위 파일의 엔티티가 참조하는 노드.
+    이미 공유 노드로 표시된(project_root 속성이 있는) 노드가 있으면 그것을 남깁니다.
+    """
+    records = run_cypher_query(f"""
+        MATCH (n:{label})
+        WHERE n.project_root = $project_root
+           OR (n.project_root IS NULL
+               AND EXISTS {{ MATCH (src)-->(n) WHERE src.file_path STARTS WITH $prefix }})
+        WITH n.name AS name, collect({{id: n.id, tagged: n.project_root IS NOT NULL}}) AS members
+        WHERE size(members) > 1
+        RETURN name, members
+    """, parameters={"project_root": project_root, "prefix": os.path.join(project_root, "")}, write=False)
+
+    groups = []
+    for record in records:
+        members = sorted(record["members"], key=lambda m: (not m["tagged"], m["id"]))
+        groups.append({
+            "keep": members[0]["id"],
+            "drop": [m["id"] for m in members[1:]]
+        })
+    return groups
+
+
+def _batches(groups: List[Dict[str, Any]], size: int):
+    """제거할 노드 수 합계가 size를 넘지 않도록 그룹을 묶습니다. (큰 그룹 하나는 단독 배치)"""
+    batch, batch_nodes = [], 0
+    for group in groups:
+        if batch and batch_nodes + len(group["drop"]) > size:
+            yield batch
+            batch, batch_nodes = [], 0
+        batch.append(group)
+        batch_nodes += len(group["drop"])
+    if batch:
+        yield batch
+
+
+def _compact_batch(tx, label: str, rows: List[Dict[str, Any]], project_root: str) -> Dict[str, int]:
+    """한 배치의 중복 노드 관계를 남길 노드로 옮기고 중복 노드를 삭제합니다. 관계 유형별 증감량을 반환합니다."""
+    count_query = f"""
+        UNWIND $rows AS row
+        MATCH (n:{label})
+        WHERE n.id = row.keep OR n.id IN row.drop
+        MATCH (n)-[r]-()
+        RETURN type(r) AS type, count(DISTINCT r) AS count
+    """
+    before = {r["type"]: r["count"] for r in tx.run(count_query, {"rows": rows})}
+
+    for rel_type in before:
+        # 들어오는 관계: (src)-[r]->(dup)  =>  (src)-[r]->(keep)
+        tx.run(f"""
+            UNWIND $rows AS row
+            MATCH (keep:{label} {{id: row.keep}})
+            UNWIND row.drop AS drop_id
+            MATCH (src)-[r:{rel_type}]->(dup:{label} {{id: drop_id}})
+            MERGE (src)-[nr:{rel_type}]->(keep)
+            ON CREATE SET nr = properties(r)
+            DELETE r
+        """, {"rows": rows}).consume()
+        # 나가는 관계: (dup)-[r]->(dst)  =>  (keep)-[r]->(dst)
+        tx.run(f"""
+            UNWIND $rows AS row
+            MATCH (keep:{label} {{id: row.keep}})
+            UNWIND row.drop AS drop_id
+            MATCH (dup:{label} {{id: drop_id}})-[r:{rel_type}]->(dst)
+            MERGE (keep)-[nr:{rel_type}]->(dst)
+            ON CREATE SET nr = properties(r)
+            DELETE r
+        """, {"rows": rows}).consume()
+
+    tx.run(f"""
+        UNWIND $rows AS row
+        MATCH (dup:{label})
+        WHERE dup.id IN row.drop
+        DETACH DELETE dup
+    """, {"rows": rows}).consume()
+    tx.run(f"""
+        UNWIND $rows AS row
+        MATCH (keep:{label} {{id: row.keep}})
+        SET keep.project_root = $project_root
+    """, {"rows": rows, "project_root": project_root}).consume()
+
+    after = {r["type"]: r["count"] for r in tx.run(count_query, {"rows": rows})}
+    rel_deltas = {rel_type: after.get(rel_type, 0) - count for rel_type, count in before.items()}
+    dropped = sum(len(row["drop"]) for row in rows)
+    apply_graph_stats_delta(tx, {label: -dropped}, rel_deltas)
+    return rel_deltas
+
+
+def compact_graph(project_root: str, labels=COMPACTABLE_LABELS, batch_size: int = COMPACTION_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    프로젝트 안에서 (레이블, 이름)이 같은 Module / ImportedName / ExternalCallTarget 노드를 하나로 합칩니다.
+    중복 노드의 관계는 남길 노드로 옮기며(같은 관계가 이미 있으면 하나로 합침), 배치 단위 트랜잭션으로 처리합니다.
+    여러 번 실행해도 결과가 같습니다.
+
+    Args:
+        project_root: 분석한 프로젝트의 루트 경로 (합칠 범위)
+        labels: 대상 레이블 목록
+        batch_size: 한 트랜잭션에서 제거할 최대 중복 노드 수
+
+    Returns:
+        Dict: {'labels': {레이블: {'groups', 'nodes_removed'}}, 'nodes_removed', 'relationships_removed', 'elapsed_ms'}
+    """
+    started = time.perf_counter()
+    project_root = str(Path(project_root))  # 분석 시 사용한 경로 표기와 맞춥니다. (끝의 '/' 제거 등)
+    ensure_graph_stats_schema()
+    # 중복 노드 재연결 시 id 조회가 전체 스캔이 되지 않도록
+    ensure_id_indexes(COMPACTABLE_LABELS)
+    report: Dict[str, Any] = {"labels": {}, "nodes_removed": 0, "relationships_removed": 0}
+    try:
+        for label in labels:
+            groups = _find_duplicate_groups(label, project_root)
+            nodes_removed = 0
+            for batch in _batches(groups, batch_size):
+                rel_deltas = run_in_transaction(_compact_batch, label, batch, project_root)
+                nodes_removed += sum(len(group["drop"]) for group in batch)
+                report["relationships_removed"] -= sum(rel_deltas.values())
+            report["labels"][label] = {"groups": len(groups), "nodes_removed": nodes_removed}
+            report["nodes_removed"] += nodes_removed
+            print(f"✅ {label} 노드 압축 완료: {len(groups)}개 그룹, {nodes_removed}개 노드 제거")
+    except Exception as e:
+        print(f"❌ 그래프 압축 중 오류 발생: {e}")
+        raise
+    finally:
+        if report["nodes_removed"]:
+            bump_graph_generation("compact")
+
+    report["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return report
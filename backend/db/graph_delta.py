@@ -0,0 +1,311 @@
+# backend/db/graph_delta.py
+
+import os
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+from db.driver_neo4j import run_cypher_query, run_in_transaction
+from db.graph_generation import bump_graph_generation
+from db.graph_stats import apply_graph_stats_delta, ensure_graph_stats_schema
+from db.graph_compaction import COMPACTABLE_LABELS
+from db.graph_indexes import FILE_SCOPED_LABELS, ensure_graph_indexes
+from db.ingestor_python import write_graph_rows, entity_labels
+
+def _union_match(labels: Iterable[str], key: str, param: str) -> str:
+    """레이블마다 인덱스로 노드를 찾는 UNION 하위 쿼리를 만듭니다. (결과 변수는 n)"""
+    return "\n        UNION\n".join(
+        f"        UNWIND ${param} AS value MATCH (n:{label} {{{key}: value}}) RETURN n"
+        for label in labels
+    )
+
+
+def load_file_nodes(file_paths: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    파일별로 그래프에 저장된 노드와, 그 노드가 가리키는 공유 노드(Module / ImportedName / ExternalCallTarget)를 조회합니다.
+
+    Returns:
+        Dict: {file_path: [{'id', 'label', 'name', 'start_line', 'shared_ids'}, ...]}
+    """
+    if not file_paths:
+        return {}
+    ensure_graph_indexes()
+    shared_condition = " OR ".join(f"shared:{label}" for label in COMPACTABLE_LABELS)
+    records = run_cypher_query(f"""
+        CALL {{
+{_union_match(FILE_SCOPED_LABELS, "file_path", "file_paths")}
+        }}
+        OPTIONAL MATCH (n)-->(shared)
+        WHERE {shared_condition}
+        RETURN n.file_path AS file_path, n.id AS id, labels(n)[0] AS label, n.name AS name,
+               n.start_line AS start_line, collect(DISTINCT shared.id) AS shared_ids
+    """, parameters={"file_paths": list(file_paths)}, write=False)
+
+    nodes_by_file: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        nodes_by_file.setdefault(record["file_path"], []).append({
+            "id": record["id"], "label": record["label"], "name": record["name"],
+            "start_line": record["start_line"], "shared_ids": record["shared_ids"],
+        })
+    return nodes_by_file
+
+
+def find_shared_node_ids(names_by_label: Dict[str, Iterable[str]], project_root: str) -> Dict[Tuple[str, str], str]:
+    """
+    프로젝트 범위에 이미 있는 공유 노드(Module / ImportedName / ExternalCallTarget)의 ID를 (레이블, 이름)으로 찾습니다.
+    범위 판단은 그래프 압축과 같습니다. (project_root 속성이 같거나, 프로젝트 하위 파일의 노드가 참조하는 노드)
+    여러 개면 압축 시 남기는 노드와 같은 것(project_root가 있는 것, 그다음 작은 ID)을 고릅니다.
+    """
+    ensure_graph_indexes()
+    prefix = os.path.join(project_root, "")
+    found: Dict[Tuple[str, str], str] = {}
+    for label, names in names_by_label.items():
+        names = sorted(set(names))
+        if label not in COMPACTABLE_LABELS or not names:
+            continue
+        records = run_cypher_query(f"""
+            UNWIND $names AS name
+            MATCH (n:{label} {{name: name}})
+            WHERE n.project_root = $project_root
+               OR (n.project_root IS NULL
+                   AND EXISTS {{ MATCH (src)-->(n) WHERE src.file_path STARTS WITH $prefix }})
+            RETURN name, collect({{id: n.id, tagged: n.project_root IS NOT NULL}}) AS members
+        """, parameters={"names": names, "project_root": project_root, "prefix": prefix}, write=False)
+        for record in records:
+            members = sorted(record["members"], key=lambda m: (not m["tagged"], m["id"]))
+            found[(label, record["name"])] = members[0]["id"]
+    return found
+
+
+def load_symbol_entities(names: Iterable[str], project_root: str, exclude_paths: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    교차 파일 호출 해석에 필요한 심볼만 그래프에서 읽습니다. (호출된 이름과 같은 이름의 Function / Class)
+    변경된 파일의 노드는 새로 추출한 결과를 사용하므로 제외합니다.
+
+    Returns:
+        Dict: {file_path: [{'id', 'type', 'name', 'class_name'}, ...]}
+    """
+    names = sorted(set(names))
+    if not names:
+        return {}
+    ensure_graph_indexes()
+    records = run_cypher_query("""
+        CALL {
+            UNWIND $names AS value MATCH (n:Function {name: value}) RETURN n
+            UNION
+            UNWIND $names AS value MATCH (n:Class {name: value}) RETURN n
+        }
+        WITH n
+        WHERE n.file_path STARTS WITH $prefix AND NOT n.file_path IN $exclude_paths
+        RETURN n.file_path AS file_path, n.id AS id, labels(n)[0] AS type, n.name AS name, n.class_name AS class_name
+    """, parameters={"names": names, "prefix": os.path.join(project_root, ""),
+                     "exclude_paths": list(exclude_paths)}, write=False)
+    entities_by_file: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        entities_by_file.setdefault(record["file_path"], []).append(
+            {"id": record["id"], "type": record["type"], "name": record["name"], "class_name": record["class_name"]}
+        )
+    return entities_by_file
+
+
+def find_dependent_files(removed_nodes: List[Dict[str, str]], moved_paths: List[str], new_symbol_names: Iterable[str],
+                         project_root: str, exclude_paths: Iterable[str]) -> List[str]:
+    """
+    변경된 파일 때문에 호출(CALLS) 해석 결과가 달라질 수 있는 다른 파일을 찾습니다.
+
+    - 삭제될 정의(removed_nodes)를 호출하는 파일: 호출 대상이 외부 노드로 바뀌어야 합니다.
+    - 경로가 바뀐(이름 변경/삭제된) 파일의 정의를 호출하는 파일: 모듈 경로가 바뀌었으므로 다시 해석해야 합니다.
+    - 새로 정의된 이름과 같은 ExternalCallTarget을 호출하는 파일: 새 정의로 연결될 수 있습니다.
+    """
+    ensure_graph_indexes()
+    removed_by_label: Dict[str, List[str]] = {}
+    for node in removed_nodes:
+        if node["label"] in FILE_SCOPED_LABELS:
+            removed_by_label.setdefault(node["label"], []).append(node["id"])
+
+    subqueries = []
+    parameters: Dict[str, Any] = {
+        "prefix": os.path.join(project_root, ""),
+        "exclude_paths": list(exclude_paths),
+        "moved_paths": list(moved_paths),
+        "names": sorted(set(new_symbol_names)),
+    }
+    for label, ids in removed_by_label.items():
+        parameters[f"removed_{label}"] = ids
+        subqueries.append(f"UNWIND $removed_{label} AS value MATCH (caller)-[:CALLS]->(:{label} {{id: value}}) RETURN caller")
+    if moved_paths:
+        for label in FILE_SCOPED_LABELS:
+            subqueries.append(f"UNWIND $moved_paths AS value MATCH (caller)-[:CALLS]->(:{label} {{file_path: value}}) RETURN caller")
+    if parameters["names"]:
+        subqueries.append("UNWIND $names AS value MATCH (caller)-[:CALLS]->(:ExternalCallTarget {name: value}) RETURN caller")
+    if not subqueries:
+        return []
+
+    union = "\n            UNION\n            ".join(subqueries)
+    records = run_cypher_query(f"""
+        CALL {{
+            {union}
+        }}
+        WITH caller
+        WHERE caller.file_path STARTS WITH $prefix AND NOT caller.file_path IN $exclude_paths
+        RETURN DISTINCT caller.file_path AS file_path
+    """, parameters=parameters, write=False)
+    return sorted(record["file_path"] for record in records)
+
+
+def apply_file_graph_delta(removed_nodes: List[Dict[str, str]], rewired_nodes: List[Dict[str, str]],
+                           extracted_entities: list, extracted_relationships: list,
+                           shared_candidate_ids: Iterable[str] = (),
+                           known_labels: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    파일 단위 변경분을 한 트랜잭션으로 적용하고, 같은 트랜잭션 안에서 그래프 통계 카운터를 맞춥니다.
+
+    1. removed_nodes(새 추출 결과에 없는 기존 노드)를 관계와 함께 삭제합니다.
+    2. rewired_nodes(ID를 이어받는 기존 노드)의 나가는 관계를 지웁니다. (다른 파일에서 들어오는 관계는 유지)
+    3. 새 추출 결과를 MERGE로 저장합니다. 이어받은 노드는 속성(경로, 줄 번호, 코드 참조)만 갱신됩니다.
+    4. 더 이상 연결된 관계가 없는 공유 노드(shared_candidate_ids)를 삭제합니다.
+    적용 후 바뀐 파일과 노드(관계가 생기거나 없어진 이웃 포함)를 범위로 그래프 세대를 올려, 범위 밖의 캐시 항목은 유지됩니다.
+
+    Args:
+        removed_nodes / rewired_nodes: [{'id', 'label'}, ...]
+        known_labels: 관계가 가리키는 배치 밖 노드의 {ID: 레이블} (write_graph_rows 참고)
+
+    Returns:
+        Dict: {'deleted_nodes': {레이블: 수}, 'deleted_relationships': {유형: 수}, 'created_nodes': {레이블: 수},
+               'created_relationships': {유형: 수}, 'neighbor_ids': [삭제된 노드와 연결되어 있던 노드 ID]}
+    """
+    ensure_graph_indexes(entity_labels(extracted_entities))
+
+    def _ids_by_label(nodes: List[Dict[str, str]]) -> Dict[str, List[str]]:
+        grouped: Dict[str, List[str]] = {}
+        for node in nodes:
+            grouped.setdefault(node["label"], []).append(node["id"])
+        return grouped
+
+    removed_by_label = _ids_by_label(removed_nodes)
+    rewired_by_label = _ids_by_label(rewired_nodes)
+    shared_candidate_ids = list(shared_candidate_ids)
+    # 세대 번호를 올릴 때 넘길 변경 범위 (트랜잭션이 성공했을 때만 채워짐)
+    changed_scope: Dict[str, set] = {}
+
+    def _nodes_subquery(grouped: Dict[str, List[str]], prefix: str) -> Tuple[str, Dict[str, Any]]:
+        parameters = {f"{prefix}_{label}": ids for label, ids in grouped.items()}
+        union = "\n            UNION\n            ".join(
+            f"UNWIND ${prefix}_{label} AS value MATCH (n:{label} {{id: value}}) RETURN n" for label in grouped
+        )
+        return union, parameters
+
+    def _apply(tx):
+        label_deltas: Dict[str, int] = {}
+        rel_deltas: Dict[str, int] = {}
+        deleted_nodes: Dict[str, int] = {}
+        deleted_relationships: Dict[str, int] = {}
+        neighbor_ids: List[str] = []
+
+        def count_deleted_relationships(records):
+            for record in records:
+                deleted_relationships[record["type"]] = deleted_relationships.get(record["type"], 0) + record["count"]
+                rel_deltas[record["type"]] = rel_deltas.get(record["type"], 0) - record["count"]
+
+        # 1. 삭제할 노드: 관계 수와 이웃 노드를 먼저 세고 DETACH DELETE
+        if removed_by_label:
+            union, parameters = _nodes_subquery(removed_by_label, "removed")
+            count_deleted_relationships(tx.run(f"""
+                CALL {{
+            {union}
+                }}
+                MATCH (n)-[r]-()
+                WITH DISTINCT r
+                RETURN type(r) AS type, count(r) AS count
+            """, parameters))
+            removed_ids = {node["id"] for node in removed_nodes}
+            neighbor_ids = [
+                record["id"] for record in tx.run(f"""
+                    CALL {{
+            {union}
+                    }}
+                    MATCH (n)--(m)
+                    WHERE m.id IS NOT NULL
+                    RETURN DISTINCT m.id AS id
+                """, parameters)
+                if record["id"] not in removed_ids
+            ]
+            for record in tx.run(f"""
+                CALL {{
+            {union}
+                }}
+                WITH n, labels(n)[0] AS label
+                DETACH DELETE n
+                RETURN label, count(*) AS count
+            """, parameters):
+                deleted_nodes[record["label"]] = deleted_nodes.get(record["label"], 0) + record["count"]
+                label_deltas[record["label"]] = label_deltas.get(record["label"], 0) - record["count"]
+
+        # 2. 이어받는 노드의 나가는 관계 삭제 (새 추출 결과로 다시 만들어짐)
+        if rewired_by_label:
+            union, parameters = _nodes_subquery(rewired_by_label, "rewired")
+            records = list(tx.run(f"""
+                CALL {{
+            {union}
+                }}
+                MATCH (n)-[r]->(m)
+                WITH r, type(r) AS type, m.id AS target_id
+                DELETE r
+                RETURN type, count(*) AS count, collect(DISTINCT target_id) AS target_ids
+            """, parameters))
+            count_deleted_relationships(records)
+            rewired_target_ids = {target_id for record in records for target_id in record["target_ids"] if target_id}
+        else:
+            rewired_target_ids = set()
+
+        # 3. 새 추출 결과 저장
+        created_nodes, created_relationships = write_graph_rows(
+            tx, extracted_entities, extracted_relationships, known_labels
+        )
+        for label, count in created_nodes.items():
+            label_deltas[label] = label_deltas.get(label, 0) + count
+        for rel_type, count in created_relationships.items():
+            rel_deltas[rel_type] = rel_deltas.get(rel_type, 0) + count
+
+        # 4. 고립된 공유 노드 정리
+        if shared_candidate_ids:
+            union = "\n            UNION\n            ".join(
+                f"UNWIND $shared_ids AS value MATCH (n:{label} {{id: value}}) RETURN n" for label in COMPACTABLE_LABELS
+            )
+            for record in tx.run(f"""
+                CALL {{
+            {union}
+                }}
+                WITH n
+                WHERE NOT (n)--()
+                WITH n, labels(n)[0] AS label
+                DELETE n
+                RETURN label, count(*) AS count
+            """, {"shared_ids": shared_candidate_ids}):
+                deleted_nodes[record["label"]] = deleted_nodes.get(record["label"], 0) + record["count"]
+                label_deltas[record["label"]] = label_deltas.get(record["label"], 0) - record["count"]
+
+        apply_graph_stats_delta(tx, label_deltas, rel_deltas)
+        changed_scope["node_ids"] = (
+            {node["id"] for node in removed_nodes + rewired_nodes}
+            | set(neighbor_ids) | rewired_target_ids | set(shared_candidate_ids)
+            | {entity["id"] for entity in extracted_entities}
+            | {rel[key] for rel in extracted_relationships for key in ("source_id", "target_id")}
+        )
+        changed_scope["files"] = {
+            node["file_path"] for node in removed_nodes + rewired_nodes + list(extracted_entities) if node.get("file_path")
+        }
+        return {
+            "deleted_nodes": deleted_nodes,
+            "deleted_relationships": deleted_relationships,
+            "created_nodes": created_nodes,
+            "created_relationships": created_relationships,
+            "neighbor_ids": neighbor_ids,
+        }
+
+    try:
+        ensure_graph_stats_schema()
+        return run_in_transaction(_apply)
+    except Exception as e:
+        print(f"❌ 파일 변경분 적용 중 오류 발생: {e}")
+        raise
+    finally:
+        bump_graph_generation("diff", changed_scope.get("files"), changed_scope.get("node_ids"))
@@ -0,0 +1,154 @@
+# backend/db/graph_generation.py
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import FrozenSet, Iterable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# 그래프 세대(generation) 번호를 저장하는 로컬 파일 경로
+# 그래프 데이터가 바뀔 때마다(인제스트 등) 번호가 1씩 증가하며,
+# 그래프 상태에 의존하는 캐시들은 이 번호가 바뀌면 기존 항목을 무효로 취급합니다.
+# 서버와 CLI(load, load-csv, finalize-import 등)가 같은 파일을 공유하므로 파일이 세대 번호의 기준입니다.
+GRAPH_GENERATION_FILE = os.getenv("GRAPH_GENERATION_FILE", "graph_generation.json")
+# 세대별 변경 범위를 기억할 최근 세대 수 (이보다 오래된 세대에서 만든 캐시 항목은 무효로 취급)
+GRAPH_CHANGE_LOG_SIZE = int(os.getenv("GRAPH_CHANGE_LOG_SIZE", "256"))
+
+_lock = threading.Lock()
+_generation = None
+# 마지막으로 읽은 세대 파일의 (mtime_ns, inode, 크기) - 다른 프로세스가 파일을 바꾸면 달라짐
+_file_signature = None
+# 이 프로세스에서 올린 세대의 (세대 번호, 바뀐 파일 경로, 바뀐 노드 ID) - 범위를 모르는 변경은 (세대 번호, None, None)
+# 다른 프로세스가 올린 세대는 여기 기록되지 않으므로 graph_changes_since에서 범위를 모르는 변경으로 취급됩니다.
+_change_log = deque(maxlen=GRAPH_CHANGE_LOG_SIZE)
+
+
+def _stat_signature():
+    try:
+        stat = os.stat(GRAPH_GENERATION_FILE)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_ino, stat.st_size
+
+
+def _load_generation() -> int:
+    try:
+        with open(GRAPH_GENERATION_FILE, "r", encoding="utf-8") as f:
+            return int(json.load(f).get("generation", 0))
+    except FileNotFoundError:
+        return 0
+    except Exception as e:
+        print(f"Warning: Could not read graph generation file {GRAPH_GENERATION_FILE}: {e}")
+        return 0
+
+
+def _refresh_generation() -> int:
+    """세대 파일이 마지막으로 읽은 뒤 바뀌었으면 다시 읽습니다. (_lock을 잡은 상태에서 호출)"""
+    global _generation, _file_signature
+    signature = _stat_signature()
+    if _generation is None or signature != _file_signature:
+        _file_signature = signature
+        _generation = _load_generation()
+    return _generation
+
+
+@contextmanager
+def _file_lock():
+    """세대 파일의 읽기-증가-쓰기를 프로세스 간에 직렬화하는 잠금 (잠금을 지원하지 않는 환경에서는 프로세스 내 잠금만 사용)"""
+    try:
+        lock_file = open(f"{GRAPH_GENERATION_FILE}.lock", "a+b")
+    except Exception as e:
+        print(f"Warning: Could not open graph generation lock file: {e}")
+        yield
+        return
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        yield
+    finally:
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            lock_file.close()
+
+
+def get_graph_generation() -> int:
+    """현재 그래프 세대 번호를 반환합니다. (다른 프로세스가 올린 세대도 파일 변경 시각으로 감지)"""
+    with _lock:
+        return _refresh_generation()
+
+
+def bump_graph_generation(reason: str = "", changed_files: Optional[Iterable[str]] = None,
+                          changed_node_ids: Optional[Iterable[str]] = None) -> int:
+    """
+    그래프 세대 번호를 1 증가시키고 로컬 파일에 저장합니다.
+    그래프 데이터를 변경하는 모든 경로(인제스트, 삭제 등)에서 호출해야 합니다.
+    파일 잠금 안에서 파일의 현재 값을 다시 읽어 증가시키므로, 여러 프로세스가 올려도 번호가 되돌아가지 않습니다.
+
+    Args:
+        changed_files, changed_node_ids: 변경 범위를 정확히 알 때(증분 적용 등) 넘기면, 범위를 아는 캐시는
+            이 범위에 걸리지 않는 항목을 계속 사용할 수 있습니다. (graph_changes_since 참고)
+            변경된 노드와 관계의 양 끝 노드, 관계가 사라진 이웃 노드가 모두 changed_node_ids에 포함되어야 합니다.
+            생략하면 그래프 전체가 바뀐 것으로 취급합니다.
+
+    Returns:
+        int: 증가된 새 세대 번호
+    """
+    global _generation, _file_signature
+    with _lock, _file_lock():
+        # 캐시된 값이 아니라 파일의 현재 값을 기준으로 증가 (다른 프로세스의 증가를 덮어쓰지 않도록)
+        _generation = max(_load_generation(), _generation or 0) + 1
+        if changed_files is None and changed_node_ids is None:
+            _change_log.append((_generation, None, None))
+        else:
+            _change_log.append((_generation, frozenset(changed_files or ()), frozenset(changed_node_ids or ())))
+        try:
+            tmp_path = f"{GRAPH_GENERATION_FILE}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"generation": _generation, "updated_at": time.time(), "reason": reason}, f)
+            os.replace(tmp_path, GRAPH_GENERATION_FILE)
+        except Exception as e:
+            print(f"Warning: Could not persist graph generation {_generation}: {e}")
+        _file_signature = _stat_signature()
+        return _generation
+
+
+def graph_changes_since(generation: int) -> Optional[Tuple[FrozenSet[str], FrozenSet[str]]]:
+    """
+    generation 이후 이 프로세스에서 일어난 변경의 (파일 경로, 노드 ID) 합집합을 반환합니다.
+    범위를 모르는 변경이 있었거나, 다른 프로세스가 세대를 올렸거나, 변경 기록이 남아 있지 않으면 None (전체 무효화)
+    """
+    with _lock:
+        current = _refresh_generation()
+        if generation == current:
+            return frozenset(), frozenset()
+        if generation > current:
+            return None
+        changes = [change for change in _change_log if change[0] > generation]
+    if len(changes) != current - generation:
+        return None
+    files, node_ids = set(), set()
+    for _, changed_files, changed_node_ids in changes:
+        if changed_files is None:
+            return None
+        files.update(changed_files)
+        node_ids.update(changed_node_ids)
+    return frozenset(files), frozenset(node_ids)
@@ -0,0 +1,59 @@
+# backend/db/graph_indexes.py
+
+import threading
+from typing import Iterable, Tuple
+
+from db.driver_neo4j import run_cypher_query
+
+# 파일에서 추출되어 file_path 속성을 가지는 노드 레이블
+FILE_SCOPED_LABELS = ("File", "Function", "Class", "Variable")
+# 교차 파일 호출 해석과 의존 파일 탐색에서 이름으로 조회하는 레이블
+_NAME_LOOKUP_LABELS = ("Function", "Class", "ExternalCallTarget")
+
+# 이 프로세스에서 이미 생성을 확인한 (레이블, 속성) 인덱스
+_ensured = set()
+_lock = threading.Lock()
+
+
+def _index_name(label: str, property_name: str) -> str:
+    # 레이블의 대소문자를 그대로 두어, 대소문자만 다른 두 레이블이 같은 인덱스 이름을 쓰지 않도록 합니다.
+    return f"{label}_{property_name}"
+
+
+def ensure_property_indexes(label_properties: Iterable[Tuple[str, str]]):
+    """
+    (레이블, 속성) 범위 인덱스를 (프로세스당 1회) 생성합니다. 스키마 변경이므로 쓰기 경로에서만 호출하세요.
+    같은 스키마의 인덱스가 다른 이름으로 이미 있으면 IF NOT EXISTS에 의해 아무 일도 하지 않습니다.
+    """
+    with _lock:
+        for label, property_name in label_properties:
+            if not label or (label, property_name) in _ensured:
+                continue
+            run_cypher_query(
+                f"CREATE INDEX `{_index_name(label, property_name)}` IF NOT EXISTS "
+                f"FOR (n:`{label}`) ON (n.`{property_name}`)",
+                write=True
+            )
+            _ensured.add((label, property_name))
+
+
+def ensure_id_indexes(labels: Iterable[str]):
+    """레이블별 id 인덱스를 생성합니다. (관계 연결, 페이지 단위 내보내기 등 id 조회가 전체 스캔이 되지 않도록)"""
+    ensure_property_indexes((label, "id") for label in labels)
+
+
+def ensure_graph_indexes(labels: Iterable[str] = ()):
+    """
+    변경분 적용 쿼리가 전체 노드를 훑지 않도록 레이블별 file_path / id / name 인덱스를 (최초 1회) 생성합니다.
+    (레이블 없는 MATCH는 인덱스를 쓰지 못하므로, 변경분 적용 쿼리는 모두 레이블별 하위 쿼리로 나눠 조회합니다)
+    그래프에 노드를 쓰는 경로(인제스트, 변경분 적용, 결과물/CSV 적재)에서 쓰려는 레이블을 labels로 넘기면
+    그 레이블의 id 인덱스도 만들어, 읽기 경로(/graph 페이지 조회 등)는 인덱스를 만들지 않고 읽기만 합니다.
+    """
+    # 순환 임포트를 피하기 위해 실행 시점에 임포트합니다. (graph_compaction이 이 모듈을 사용)
+    from db.graph_compaction import COMPACTABLE_LABELS
+
+    ensure_property_indexes(
+        [(label, "file_path") for label in FILE_SCOPED_LABELS]
+        + [(label, "id") for label in FILE_SCOPED_LABELS + COMPACTABLE_LABELS + tuple(labels)]
+        + [(label, "name") for label in _NAME_LOOKUP_LABELS]
+    )
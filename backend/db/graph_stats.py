@@ -0,0 +1,139 @@
+# backend/db/graph_stats.py
+
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+from db.driver_neo4j import run_cypher_query, run_in_transaction
+
+# 그래프 통계 카운터 노드의 레이블
+# (:GraphStats {stat_key: 'label:Function', kind: 'label', name: 'Function', count: 10}) 형태로 저장됩니다.
+# 코드 엔티티가 아니므로 id 속성을 갖지 않으며, 그래프 내보내기/통계 집계에서 제외됩니다.
+GRAPH_STATS_LABEL = "GraphStats"
+
+_constraint_ready = False
+
+
+def ensure_graph_stats_schema():
+    """카운터 노드의 중복 생성을 막기 위한 유니크 제약 조건을 (최초 1회) 생성합니다."""
+    global _constraint_ready
+    if _constraint_ready:
+        return
+    run_cypher_query(
+        f"CREATE CONSTRAINT graph_stats_key IF NOT EXISTS "
+        f"FOR (c:{GRAPH_STATS_LABEL}) REQUIRE c.stat_key IS UNIQUE",
+        write=True
+    )
+    _constraint_ready = True
+
+
+def _delta_rows(label_deltas: Dict[str, int], rel_deltas: Dict[str, int]) -> List[Dict[str, Any]]:
+    rows = [{"stat_key": f"label:{name}", "kind": "label", "name": name, "delta": delta}
+            for name, delta in label_deltas.items() if delta]
+    rows += [{"stat_key": f"rel:{name}", "kind": "rel", "name": name, "delta": delta}
+             for name, delta in rel_deltas.items() if delta]
+    return rows
+
+
+def apply_graph_stats_delta(tx, label_deltas: Dict[str, int], rel_deltas: Dict[str, int]):
+    """
+    주어진 트랜잭션 안에서 레이블/관계 유형별 카운터를 증감합니다.
+    데이터 변경과 같은 트랜잭션에서 호출해야 카운터가 실제 그래프와 어긋나지 않습니다.
+
+    Args:
+        tx: Neo4j 트랜잭션 객체
+        label_deltas: {레이블: 증감량}
+        rel_deltas: {관계 유형: 증감량}
+    """
+    rows = _delta_rows(label_deltas, rel_deltas)
+    if not rows:
+        return
+    tx.run(f"""
+        UNWIND $rows AS row
+        MERGE (c:{GRAPH_STATS_LABEL} {{stat_key: row.stat_key}})
+        ON CREATE SET c.kind = row.kind, c.name = row.name, c.count = 0
+        SET c.count = c.count + row.delta
+    """, {"rows": rows}).consume()
+
+
+def read_graph_stats() -> Dict[str, Any]:
+    """
+    유지 중인 카운터를 읽어 레이블/관계 유형별 개수를 반환합니다.
+    카운터 노드 수는 레이블/관계 유형 수에 비례하므로 그래프 크기와 무관하게 빠릅니다.
+    """
+    ensure_graph_stats_schema()
+    records = run_cypher_query(f"""
+        MATCH (c:{GRAPH_STATS_LABEL})
+        WHERE c.count > 0
+        RETURN c.kind AS kind, c.name AS name, c.count AS count
+        ORDER BY kind, name
+    """, write=False)
+
+    node_types = [{"labels": [r["name"]], "count": r["count"]} for r in records if r["kind"] == "label"]
+    relationship_types = [{"type": r["name"], "count": r["count"]} for r in records if r["kind"] == "rel"]
+    return {"node_types": node_types, "relationship_types": relationship_types}
+
+
+def read_file_entity_counts(file_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """File 노드에 저장된 파일별 엔티티 수를 반환합니다. file_path를 주면 해당 파일만 조회합니다."""
+    records = run_cypher_query("""
+        MATCH (f:File)
+        WHERE $file_path IS NULL OR f.file_path = $file_path
+        RETURN f.file_path AS file_path, coalesce(f.entity_count, 0) AS entity_count
+        ORDER BY file_path
+    """, parameters={"file_path": file_path}, write=False)
+    return records
+
+
+def recompute_graph_stats() -> Dict[str, Any]:
+    """
+    전체 그래프를 스캔하여 카운터를 다시 계산하고, 기존 카운터와의 차이(drift)를 보고합니다.
+    관리자용 점검 작업이며 그래프 크기에 비례하는 시간이 걸립니다.
+
+    Returns:
+        Dict: {'drift': {'labels': {...}, 'relationships': {...}}, 'stats': 재계산된 통계}
+    """
+    ensure_graph_stats_schema()
+
+    label_records = run_cypher_query(f"""
+        MATCH (n)
+        WHERE NOT n:{GRAPH_STATS_LABEL}
+        RETURN labels(n)[0] AS label, count(n) AS count
+    """, write=False)
+    rel_records = run_cypher_query("""
+        MATCH ()-[r]->()
+        RETURN type(r) AS type, count(r) AS count
+    """, write=False)
+
+    actual_labels = Counter({r["label"]: r["count"] for r in label_records if r["label"]})
+    actual_rels = Counter({r["type"]: r["count"] for r in rel_records})
+
+    current = read_graph_stats()
+    counted_labels = Counter({item["labels"][0]: item["count"] for item in current["node_types"]})
+    counted_rels = Counter({item["type"]: item["count"] for item in current["relationship_types"]})
+
+    label_drift = {name: actual_labels[name] - counted_labels[name]
+                   for name in set(actual_labels) | set(counted_labels)
+                   if actual_labels[name] != counted_labels[name]}
+    rel_drift = {name: actual_rels[name] - counted_rels[name]
+                 for name in set(actual_rels) | set(counted_rels)
+                 if actual_rels[name] != counted_rels[name]}
+
+    def _rewrite(tx):
+        tx.run(f"MATCH (c:{GRAPH_STATS_LABEL}) DETACH DELETE c").consume()
+        apply_graph_stats_delta(tx, dict(actual_labels), dict(actual_rels))
+        # 파일별 엔티티 수도 다시 계산합니다.
+        tx.run("MATCH (f:File) SET f.entity_count = 0").consume()
+        tx.run(f"""
+            MATCH (e)
+            WHERE e.file_path IS NOT NULL AND NOT e:File AND NOT e:{GRAPH_STATS_LABEL}
+            WITH e.file_path AS file_path, count(e) AS entity_count
+            MATCH (f:File {{file_path: file_path}})
+            SET f.entity_count = entity_count
+        """).consume()
+
+    run_in_transaction(_rewrite)
+
+    return {
+        "drift": {"labels": label_drift, "relationships": rel_drift},
+        "stats": read_graph_stats()
+    }
@@ -1,95 +1,241 @@
 # backend/service/db/neo4j_ingester.py
 
 import uuid # 각 엔티티에 고유한 ID를 부여하기 위해 사용
-from db.driver_neo4j import run_cypher_query # DB 쿼리 실행 유틸리티 임포트
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+from db.driver_neo4j import run_in_transaction # DB 드라이버 임포트
+from db.graph_generation import bump_graph_generation # 그래프 변경 시 캐시 무효화를 위한 세대 번호
+from db.graph_stats import apply_graph_stats_delta, ensure_graph_stats_schema, GRAPH_STATS_LABEL # 그래프 통계 카운터
+from db.graph_indexes import ensure_graph_indexes # 레이블별 id 인덱스 (관계 연결, 페이지 단위 내보내기)
+
+# 한 번의 UNWIND 쿼리로 삽입할 최대 행 수
+INGEST_BATCH_SIZE = 500
+
+
+def _node_label(entity: Dict[str, Any]) -> str:
+    # 노드의 레이블은 엔티티의 'type' 값으로 동적으로 설정합니다 (예: 'Function', 'Class').
+    node_label = entity.get('type', 'UnknownEntity')
+    if not node_label.isalpha() or node_label == GRAPH_STATS_LABEL: # 레이블은 알파벳 문자만 포함해야 함
+        node_label = "Entity" # 유효하지 않은 레이블은 기본값으로 대체
+    return node_label
+
+
+def entity_labels(extracted_entities: list) -> set:
+    """엔티티들이 저장될 노드 레이블 집합 (인덱스를 미리 만들 때 사용)"""
+    return {_node_label(entity) for entity in extracted_entities}
+
+
+def _relationship_type(rel: Dict[str, Any]) -> str:
+    # 관계의 타입은 관계 딕셔너리의 'type' 값으로 동적으로 설정합니다 (예: 'CALLS', 'IMPORTS').
+    rel_type = rel.get('type', 'UNKNOWN_RELATIONSHIP')
+    if not rel_type.isalpha(): # 관계 타입도 알파벳 문자만 포함해야 함
+        rel_type = "RELATED_TO" # 유효하지 않은 타입은 기본값으로 대체
+    return rel_type
+
+
+def _chunks(rows: List[Any], size: int):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _group_entity_rows(extracted_entities: list) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    엔티티를 레이블별 UNWIND 행으로 묶습니다.
+    같은 ID가 여러 번 나오면 마지막 값만 남깁니다. (개별 MERGE를 순서대로 실행한 것과 같은 결과)
+    """
+    # 파일별 엔티티 수 (File 노드에 entity_count로 저장)
+    file_entity_counts: Dict[str, int] = {}
+    for entity in extracted_entities:
+        if entity.get('type') != 'File' and entity.get('file_path'):
+            file_entity_counts[entity['file_path']] = file_entity_counts.get(entity['file_path'], 0) + 1
+
+    rows_by_label: Dict[str, "OrderedDict[str, Dict[str, Any]]"] = {}
+    for entity in extracted_entities:
+        # 모든 엔티티에는 고유한 ID가 있어야 합니다.
+        # 만약 엔티티 데이터에 이미 'id'가 없다면 새로 생성합니다.
+        if 'id' not in entity or entity['id'] is None:
+            entity['id'] = str(uuid.uuid4()) # UUID를 사용하여 고유 ID 생성
+
+        # None 값은 Cypher에서 속성 제거로 처리되므로, 없는 속성은 설정되지 않습니다.
+        properties = {
+            'name': entity.get('name'),
+            'file_path': entity.get('file_path'),
+            'start_line': entity.get('start_line'),
+            'end_line': entity.get('end_line'),
+            # 메서드가 정의된 클래스 이름 (교차 파일 호출 해석에서 모듈 최상위 함수와 구분)
+            'class_name': entity.get('class_name'),
+            # 코드 텍스트 대신 blob 저장소 참조만 저장합니다. (service/blob_store.py)
+            'content_hash': entity.get('content_hash'),
+            'byte_start': entity.get('byte_start'),
+            'byte_end': entity.get('byte_end')
+        }
+        if entity.get('type') == 'File':
+            # 엔티티를 나눠 저장하는 경우(결과물 적재 등)에는 미리 센 값을 사용합니다.
+            properties['entity_count'] = entity.get('entity_count', file_entity_counts.get(entity.get('file_path'), 0))
+
+        rows = rows_by_label.setdefault(_node_label(entity), OrderedDict())
+        rows.pop(entity['id'], None)
+        rows[entity['id']] = {'id': entity['id'], 'properties': properties}
+    return {label: list(rows.values()) for label, rows in rows_by_label.items()}
+
+
+def _group_relationship_rows(extracted_relationships: list) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    관계를 유형별 UNWIND 행으로 묶습니다.
+    같은 (source, target, 유형) 관계는 MERGE 시 하나로 합쳐지므로 미리 합치고, 속성은 순서대로 덮어씁니다.
+    """
+    rows_by_type: Dict[str, "OrderedDict[tuple, Dict[str, Any]]"] = {}
+    for rel in extracted_relationships:
+        rel_type = _relationship_type(rel)
+        key = (rel['source_id'], rel['target_id'])
+        rows = rows_by_type.setdefault(rel_type, OrderedDict())
+        if key not in rows:
+            rows[key] = {'source_id': rel['source_id'], 'target_id': rel['target_id'], 'properties': {}}
+        # 'properties' 키가 딕셔너리 형태로 제공되면 그대로 사용합니다.
+        rows[key]['properties'].update(rel.get('properties', {}))
+    return {rel_type: list(rows.values()) for rel_type, rows in rows_by_type.items()}
+
+
+def write_graph_rows(tx, extracted_entities: list, extracted_relationships: list,
+                     known_labels: Optional[Dict[str, str]] = None) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """
+    엔티티/관계를 레이블/관계 유형별로 묶어 주어진 트랜잭션 안에서 UNWIND 배치로 삽입(MERGE)합니다.
+    통계 카운터는 갱신하지 않고, 새로 생긴 노드/관계 수만 반환합니다. (호출자가 같은 트랜잭션의 다른 변경과 함께 반영)
+    관계 양 끝 노드의 레이블을 알면(같은 배치의 엔티티 또는 known_labels) 레이블을 붙여 조회하므로 id 인덱스를 사용할 수 있습니다.
+
+    Args:
+        known_labels: 배치 밖에 있는 노드의 {ID: 레이블}
+
+    Returns:
+        Tuple: ({레이블: 생성된 노드 수}, {관계 유형: 생성된 관계 수})
+    """
+    entity_rows = _group_entity_rows(extracted_entities)
+    relationship_rows = _group_relationship_rows(extracted_relationships)
+    # known_labels는 매우 클 수 있으므로(대량 적재) 복사하지 않고 배치의 레이블을 먼저 찾습니다.
+    known_labels = known_labels or {}
+    batch_labels = {row['id']: node_label for node_label, rows in entity_rows.items() for row in rows}
+    label_deltas: Dict[str, int] = {}
+    rel_deltas: Dict[str, int] = {}
+
+    # 1. 엔티티 (노드) 삽입 또는 업데이트
+    # MERGE를 사용하여 엔티티의 'id'를 기준으로 이미 존재하는 노드는 업데이트하고,
+    # 존재하지 않는 노드는 새로 생성합니다. 새로 생성된 노드 수는 통계 카운터에 반영합니다.
+    for node_label, rows in entity_rows.items():
+        for batch in _chunks(rows, INGEST_BATCH_SIZE):
+            record = tx.run(f"""
+                UNWIND $rows AS row
+                OPTIONAL MATCH (existing:{node_label} {{ id: row.id }})
+                WITH row, existing IS NULL AS created
+                MERGE (n:{node_label} {{ id: row.id }})
+                SET n += row.properties
+                RETURN sum(CASE WHEN created THEN 1 ELSE 0 END) AS created_count
+            """, {'rows': batch}).single()
+            label_deltas[node_label] = label_deltas.get(node_label, 0) + record['created_count']
+
+    # 2. 관계 (엣지) 삽입
+    # 관계는 항상 존재하는 두 노드 사이에 생성됩니다.
+    # MATCH를 사용하여 관계를 연결할 source 노드와 target 노드를 찾습니다.
+    # MERGE를 사용하여 관계가 이미 존재하면 찾고, 없으면 새로 생성합니다.
+    for rel_type, all_rows in relationship_rows.items():
+        rows_by_endpoint_labels: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for row in all_rows:
+            source_label = batch_labels.get(row['source_id']) or known_labels.get(row['source_id'])
+            target_label = batch_labels.get(row['target_id']) or known_labels.get(row['target_id'])
+            key = (f":{source_label}" if source_label else "", f":{target_label}" if target_label else "")
+            rows_by_endpoint_labels.setdefault(key, []).append(row)
+        for (source_label, target_label), rows in rows_by_endpoint_labels.items():
+            for batch in _chunks(rows, INGEST_BATCH_SIZE):
+                record = tx.run(f"""
+                    UNWIND $rows AS row
+                    MATCH (source{source_label} {{ id: row.source_id }}), (target{target_label} {{ id: row.target_id }})
+                    OPTIONAL MATCH (source)-[existing:{rel_type}]->(target)
+                    WITH source, target, row, count(existing) = 0 AS created
+                    MERGE (source)-[r:{rel_type}]->(target)
+                    SET r += row.properties
+                    RETURN sum(CASE WHEN created THEN 1 ELSE 0 END) AS created_count
+                """, {'rows': batch}).single()
+                rel_deltas[rel_type] = rel_deltas.get(rel_type, 0) + record['created_count']
+
+    return label_deltas, rel_deltas
+
 
 def ingest_code_graph_data(extracted_entities: list, extracted_relationships: list):
     """
     추출된 엔티티와 관계 정보를 Neo4j 데이터베이스에 삽입합니다.
-    엔티티에 'code_snippet' 속성을 추가하여 저장합니다.
+    코드 텍스트는 저장하지 않고, blob 저장소 참조(content_hash, byte_start, byte_end)만 저장합니다.
+    레이블/관계 유형별로 묶어 UNWIND 배치로 삽입하며, 같은 트랜잭션 안에서 그래프 통계 카운터도 갱신합니다.
 
     Args:
         extracted_entities (list): 각 엔티티를 나타내는 딕셔너리 리스트.
                                    각 딕셔너리는 'type', 'name', 'file_path', 'start_line', 'end_line',
-                                   'code_snippet' 등의 키를 포함해야 합니다.
+                                   'content_hash', 'byte_start', 'byte_end' 등의 키를 포함해야 합니다.
         extracted_relationships (list): 각 관계를 나타내는 딕셔너리 리스트.
                                         각 딕셔너리는 'source_id', 'target_id', 'type'
                                         키를 포함해야 하며, 선택적으로 'properties' 키를 포함할 수 있습니다.
     """
     print(f"\n--- Neo4j 데이터 삽입 시작 ({len(extracted_entities)} 엔티티, {len(extracted_relationships)} 관계) ---")
 
+    def _ingest(tx):
+        label_deltas, rel_deltas = write_graph_rows(tx, extracted_entities, extracted_relationships)
+        apply_graph_stats_delta(tx, label_deltas, rel_deltas)
+
     try:
-        # 1. 엔티티 (노드) 삽입 또는 업데이트
-        # MERGE를 사용하여 엔티티의 'id'를 기준으로 이미 존재하는 노드는 업데이트하고,
-        # 존재하지 않는 노드는 새로 생성합니다.
-        for entity in extracted_entities:
-            # 모든 엔티티에는 고유한 ID가 있어야 합니다.
-            # 만약 엔티티 데이터에 이미 'id'가 없다면 새로 생성합니다.
-            if 'id' not in entity or entity['id'] is None:
-                entity['id'] = str(uuid.uuid4()) # UUID를 사용하여 고유 ID 생성
-
-            # 노드의 레이블은 엔티티의 'type' 값으로 동적으로 설정합니다 (예: 'Function', 'Class').
-            node_label = entity.get('type', 'UnknownEntity')
-            if not node_label.isalpha(): # 레이블은 알파벳 문자만 포함해야 함
-                node_label = "Entity" # 유효하지 않은 레이블은 기본값으로 대체
-
-            # ON CREATE SET: 노드가 새로 생성될 때 설정될 속성
-            # ON MATCH SET: 노드가 이미 존재하여 매치될 때 업데이트될 속성
-            query = f"""
-                MERGE (n:{node_label} {{ id: $id }})
-                ON CREATE SET
-                    n.name = $name,
-                    n.file_path = $file_path,
-                    n.start_line = $start_line,
-                    n.end_line = $end_line,
-                    n.code_snippet = $code_snippet
-                ON MATCH SET
-                    n.name = $name,
-                    n.file_path = $file_path,
-                    n.start_line = $start_line,
-                    n.end_line = $end_line,
-                    n.code_snippet = $code_snippet
-            """
-            # None 값은 Cypher에서 무시되므로, 없는 속성은 설정되지 않습니다.
-            run_cypher_query(query, parameters={
-                'id': entity['id'],
-                'name': entity.get('name'),
-                'file_path': entity.get('file_path'),
-                'start_line': entity.get('start_line'),
-                'end_line': entity.get('end_line'),
-                'code_snippet': entity.get('code_snippet')
-            }, write=True)
+        ensure_graph_stats_schema()
+        # 스키마 변경은 쓰기 트랜잭션 안에서 할 수 없으므로 삽입 전에 만듭니다.
+        ensure_graph_indexes(entity_labels(extracted_entities))
+        run_in_transaction(_ingest)
         print(f"✅ {len(extracted_entities)}개 엔티티(노드) 삽입/업데이트 완료.")
-
-        # 2. 관계 (엣지) 삽입
-        # 관계는 항상 존재하는 두 노드 사이에 생성됩니다.
-        # MATCH를 사용하여 관계를 연결할 source 노드와 target 노드를 찾습니다.
-        # MERGE를 사용하여 관계가 이미 존재하면 찾고, 없으면 새로 생성합니다.
-        for rel in extracted_relationships:
-            # 관계의 타입은 관계 딕셔너리의 'type' 값으로 동적으로 설정합니다 (예: 'CALLS', 'IMPORTS').
-            rel_type = rel.get('type', 'UNKNOWN_RELATIONSHIP')
-            if not rel_type.isalpha(): # 관계 타입도 알파벳 문자만 포함해야 함
-                rel_type = "RELATED_TO" # 유효하지 않은 타입은 기본값으로 대체
-
-            # 관계에 추가될 속성들을 처리합니다.
-            # 'properties' 키가 딕셔너리 형태로 제공되면 그대로 사용합니다.
-            rel_properties = rel.get('properties', {})
-
-            query = f"""
-                MATCH (source {{ id: $source_id }}), (target {{ id: $target_id }})
-                MERGE (source)-[r:{rel_type}]->(target)
-                ON CREATE SET r += $properties
-                ON MATCH SET r += $properties
-            """
-            run_cypher_query(query, parameters={
-                'source_id': rel['source_id'],
-                'target_id': rel['target_id'],
-                'properties': rel_properties # 관계에 대한 추가 속성
-            }, write=True)
         print(f"✅ {len(extracted_relationships)}개 관계(엣지) 삽입 완료.")
 
     except Exception as e:
         print(f"❌ Neo4j 데이터 삽입 중 오류 발생: {e}")
         raise # 오류 발생 시 상위 호출자에게 예외를 다시 발생시킵니다.
+    finally:
+        # 일부만 삽입되었더라도 그래프가 바뀌었을 수 있으므로 항상 세대 번호를 올립니다.
+        bump_graph_generation("ingest")
 
     print("--- Neo4j 데이터 삽입 완료 ---")
+
+
+def delete_file_graph_data(file_path: str) -> Dict[str, Any]:
+    """
+    특정 파일에서 추출된 모든 노드(File 노드 포함)와 연결된 관계를 삭제하고,
+    같은 트랜잭션 안에서 그래프 통계 카운터를 차감합니다.
+
+    Args:
+        file_path (str): 삭제할 파일의 경로 (노드의 file_path 속성과 동일해야 함)
+
+    Returns:
+        Dict: {'deleted_nodes': {레이블: 개수}, 'deleted_relationships': {유형: 개수}}
+    """
+    def _delete(tx):
+        label_counts = {
+            record['label']: record['count'] for record in tx.run("""
+                MATCH (n {file_path: $file_path})
+                RETURN labels(n)[0] AS label, count(n) AS count
+            """, {'file_path': file_path})
+        }
+        rel_counts = {
+            record['type']: record['count'] for record in tx.run("""
+                MATCH (n {file_path: $file_path})-[r]-()
+                RETURN type(r) AS type, count(DISTINCT r) AS count
+            """, {'file_path': file_path})
+        }
+        tx.run("MATCH (n {file_path: $file_path}) DETACH DELETE n", {'file_path': file_path}).consume()
+        apply_graph_stats_delta(
+            tx,
+            {label: -count for label, count in label_counts.items()},
+            {rel_type: -count for rel_type, count in rel_counts.items()}
+        )
+        return {'deleted_nodes': label_counts, 'deleted_relationships': rel_counts}
+
+    try:
+        ensure_graph_stats_schema()
+        result = run_in_transaction(_delete)
+        print(f"✅ 파일 그래프 데이터 삭제 완료: {file_path} {result}")
+        return result
+    except Exception as e:
+        print(f"❌ 파일 그래프 데이터 삭제 중 오류 발생: {e}")
+        raise
+    finally:
+        bump_graph_generation("delete")
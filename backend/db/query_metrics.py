@@ -0,0 +1,278 @@
+# backend/db/query_metrics.py
+"""
+Cypher 쿼리 계측
+
+db/driver_neo4j.py의 쿼리 실행 함수가 쿼리마다 record()를 호출해 문장 템플릿별로
+지연 시간 히스토그램, 반환 행 수, 결과 크기(추정 바이트)를 프로세스 메모리에 모읍니다.
+
+- 템플릿 키: 공백을 정리한 쿼리 문자열 (값은 파라미터로 전달되므로 같은 문장은 같은 키)
+  여러 쿼리를 묶은 트랜잭션(run_in_transaction)은 "tx:<작업 함수 이름>"으로 기록합니다.
+- 느린 쿼리: CYPHER_SLOW_QUERY_MS 이상이면 로그에 남기고 최근 목록에 보관합니다. 파라미터 값은 남기지 않고 형태만 남깁니다.
+- PROFILE: CYPHER_PROFILE_SAMPLE_RATE 확률로, 느린 읽기 쿼리를 백그라운드에서 PROFILE로 다시 실행해 실행 계획을 붙입니다.
+"""
+
+import hashlib
+import logging
+import os
+import random
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 계측 사용 여부 (끄면 record()가 아무 것도 하지 않습니다)
+CYPHER_METRICS_ENABLED = os.getenv("CYPHER_METRICS_ENABLED", "true").lower() == "true"
+# 이 시간(ms) 이상 걸린 쿼리를 느린 쿼리로 기록합니다.
+CYPHER_SLOW_QUERY_MS = float(os.getenv("CYPHER_SLOW_QUERY_MS", "500"))
+# 보관할 최근 느린 쿼리 수
+CYPHER_SLOW_QUERY_LOG_SIZE = int(os.getenv("CYPHER_SLOW_QUERY_LOG_SIZE", "200"))
+# 느린 읽기 쿼리를 PROFILE로 다시 실행할 확률 (0이면 사용 안 함). PROFILE은 쿼리를 실제로 한 번 더 실행합니다.
+CYPHER_PROFILE_SAMPLE_RATE = float(os.getenv("CYPHER_PROFILE_SAMPLE_RATE", "0"))
+# 같은 템플릿을 다시 PROFILE하기 전 최소 간격(초)
+CYPHER_PROFILE_MIN_INTERVAL_SECONDS = float(os.getenv("CYPHER_PROFILE_MIN_INTERVAL_SECONDS", "300"))
+# 템플릿 수 상한 (쿼리 문자열에 값을 직접 넣는 코드가 있어도 메모리가 계속 늘지 않도록)
+CYPHER_METRICS_MAX_TEMPLATES = int(os.getenv("CYPHER_METRICS_MAX_TEMPLATES", "500"))
+
+# 지연 시간 히스토그램 구간 상한(ms). 마지막 구간은 그보다 큰 값 전체입니다.
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+_OVERFLOW_TEMPLATE = "(other)"
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_template(query: str) -> str:
+    return _WHITESPACE.sub(" ", query).strip()
+
+
+def template_id(template: str) -> str:
+    return hashlib.sha1(template.encode("utf-8")).hexdigest()[:12]
+
+
+def estimate_size(value: Any) -> int:
+    """결과 값을 JSON으로 보냈을 때의 대략적인 바이트 수 (직렬화하지 않고 추정)"""
+    if value is None or isinstance(value, bool):
+        return 4
+    if isinstance(value, (int, float)):
+        return 8
+    if isinstance(value, str):
+        return len(value) + 2
+    if isinstance(value, dict):
+        return 2 + sum(len(str(key)) + 4 + estimate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return 2 + sum(estimate_size(item) + 1 for item in value)
+    return len(str(value))
+
+
+def parameter_shape(value: Any, depth: int = 0) -> Any:
+    """파라미터 값 대신 형태만 남깁니다. 예: {'ids': 'list[120] of str', 'limit': 'int'}"""
+    if isinstance(value, dict):
+        if depth >= 2:
+            return f"dict[{len(value)}]"
+        return {str(key): parameter_shape(item, depth + 1) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return "list[0]"
+        first = parameter_shape(value[0], depth + 1)
+        return f"list[{len(value)}] of {first if isinstance(first, str) else 'dict'}"
+    if isinstance(value, str):
+        return f"str({len(value)})"
+    return type(value).__name__
+
+
+def _summarize_plan(plan: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not plan:
+        return None
+    args = plan.get("args") or {}
+    return {
+        "operator": plan.get("operatorType"),
+        "details": args.get("Details"),
+        "rows": plan.get("rows", args.get("Rows")),
+        "db_hits": plan.get("dbHits", args.get("DbHits")),
+        "children": [_summarize_plan(child) for child in plan.get("children") or []],
+    }
+
+
+def _total_db_hits(plan: Optional[Dict[str, Any]]) -> int:
+    if not plan:
+        return 0
+    return (plan.get("db_hits") or 0) + sum(_total_db_hits(child) for child in plan["children"])
+
+
+class _TemplateStats:
+    __slots__ = ("template", "count", "errors", "total_ms", "max_ms", "buckets",
+                 "rows", "max_rows", "payload_bytes", "max_payload_bytes", "slow", "last_profiled_at")
+
+    def __init__(self, template: str):
+        self.template = template
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.rows = 0
+        self.max_rows = 0
+        self.payload_bytes = 0
+        self.max_payload_bytes = 0
+        self.slow = 0
+        self.last_profiled_at = 0.0
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """히스토그램 구간 상한으로 추정한 백분위 지연 시간(ms)"""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                return float(LATENCY_BUCKETS_MS[index]) if index < len(LATENCY_BUCKETS_MS) else round(self.max_ms, 3)
+        return round(self.max_ms, 3)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "template_id": template_id(self.template),
+            "template": self.template,
+            "count": self.count,
+            "errors": self.errors,
+            "slow": self.slow,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "rows": self.rows,
+            "avg_rows": round(self.rows / self.count, 1) if self.count else None,
+            "max_rows": self.max_rows,
+            "payload_bytes": self.payload_bytes,
+            "max_payload_bytes": self.max_payload_bytes,
+            "histogram": dict(zip([f"le_{bound}" for bound in LATENCY_BUCKETS_MS] + ["le_inf"], self.buckets)),
+        }
+
+
+class CypherQueryMetrics:
+    """템플릿별 쿼리 지표와 최근 느린 쿼리 목록 (스레드 안전)"""
+
+    def __init__(self, slow_query_ms: float = CYPHER_SLOW_QUERY_MS,
+                 profile_sample_rate: float = CYPHER_PROFILE_SAMPLE_RATE,
+                 slow_log_size: int = CYPHER_SLOW_QUERY_LOG_SIZE,
+                 max_templates: int = CYPHER_METRICS_MAX_TEMPLATES):
+        self.slow_query_ms = slow_query_ms
+        self.profile_sample_rate = profile_sample_rate
+        self.max_templates = max_templates
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _TemplateStats] = {}
+        self._slow: Deque[Dict[str, Any]] = deque(maxlen=slow_log_size)
+        self._started_at = time.time()
+
+    def record(self, query: str, elapsed_ms: float, rows: Optional[int] = None, payload_bytes: Optional[int] = None,
+               parameters: Optional[Dict[str, Any]] = None, error: Optional[BaseException] = None,
+               profile: Optional[Callable[[], Optional[Dict[str, Any]]]] = None):
+        """
+        쿼리 한 번의 실행 결과를 기록합니다.
+
+        Args:
+            query: 쿼리 문자열 또는 "tx:<이름>"
+            profile: 느린 쿼리로 PROFILE 표본에 뽑혔을 때 호출할 함수 (PROFILE 실행 계획 dict를 반환, 읽기 쿼리만 전달)
+        """
+        template = normalize_template(query)
+        with self._lock:
+            stats = self._stats.get(template)
+            if stats is None:
+                if len(self._stats) >= self.max_templates:
+                    template = _OVERFLOW_TEMPLATE
+                    stats = self._stats.get(template)
+                if stats is None:
+                    stats = self._stats[template] = _TemplateStats(template)
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.buckets[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+            if error is not None:
+                stats.errors += 1
+            if rows is not None:
+                stats.rows += rows
+                stats.max_rows = max(stats.max_rows, rows)
+            if payload_bytes is not None:
+                stats.payload_bytes += payload_bytes
+                stats.max_payload_bytes = max(stats.max_payload_bytes, payload_bytes)
+
+            if elapsed_ms < self.slow_query_ms:
+                return
+            stats.slow += 1
+            entry = {
+                "at": time.time(),
+                "template_id": template_id(template),
+                "template": template,
+                "elapsed_ms": round(elapsed_ms, 3),
+                "rows": rows,
+                "payload_bytes": payload_bytes,
+                "parameter_shape": parameter_shape(parameters or {}),
+                "error": repr(error) if error is not None else None,
+                "profile": None,
+            }
+            self._slow.append(entry)
+            now = time.monotonic()
+            sample = (profile is not None and error is None and self.profile_sample_rate > 0
+                      and random.random() < self.profile_sample_rate
+                      and now - stats.last_profiled_at >= CYPHER_PROFILE_MIN_INTERVAL_SECONDS)
+            if sample:
+                stats.last_profiled_at = now
+
+        logger.warning("Slow Cypher query (%.1fms, rows=%s, bytes=%s) [%s] params=%s: %s",
+                       elapsed_ms, rows, payload_bytes, entry["template_id"], entry["parameter_shape"], template[:500])
+        if sample:
+            # PROFILE은 쿼리를 한 번 더 실행하므로 호출한 요청을 기다리게 하지 않도록 백그라운드에서 실행합니다.
+            threading.Thread(target=self._capture_profile, args=(entry, profile), daemon=True).start()
+
+    def _capture_profile(self, entry: Dict[str, Any], profile: Callable[[], Optional[Dict[str, Any]]]):
+        try:
+            plan = _summarize_plan(profile())
+            entry["profile"] = {"total_db_hits": _total_db_hits(plan), "plan": plan}
+        except Exception as e:
+            entry["profile"] = {"error": repr(e)}
+            logger.error(f"Failed to profile slow Cypher query [{entry['template_id']}]: {e}")
+
+    def snapshot(self, sort_by: str = "total_ms", limit: Optional[int] = None) -> Dict[str, Any]:
+        """템플릿별 지표를 sort_by 내림차순으로 반환합니다."""
+        with self._lock:
+            templates = [stats.to_dict() for stats in self._stats.values()]
+        templates.sort(key=lambda item: item.get(sort_by) or 0, reverse=True)
+        return {
+            "since": self._started_at,
+            "slow_query_ms": self.slow_query_ms,
+            "profile_sample_rate": self.profile_sample_rate,
+            "latency_buckets_ms": list(LATENCY_BUCKETS_MS),
+            "total_queries": sum(item["count"] for item in templates),
+            "total_ms": round(sum(item["total_ms"] for item in templates), 3),
+            "templates": templates[:limit] if limit else templates,
+        }
+
+    def slow_queries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """최근 느린 쿼리 (최신순)"""
+        with self._lock:
+            entries = list(self._slow)
+        entries.reverse()
+        return entries[:limit] if limit else entries
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
+            self._started_at = time.time()
+
+
+_query_metrics: Optional[CypherQueryMetrics] = None
+_query_metrics_lock = threading.Lock()
+
+
+def get_query_metrics() -> CypherQueryMetrics:
+    """프로세스 전역 쿼리 지표 인스턴스를 반환합니다."""
+    global _query_metrics
+    with _query_metrics_lock:
+        if _query_metrics is None:
+            _query_metrics = CypherQueryMetrics()
+        return _query_metrics
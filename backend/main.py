@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api import file_scan
@@ -5,8 +6,23 @@ from api import file_analysis
 from api import semantic_search_api
 from api import code_interpretation
 from api import graph
+from api import analysis_jobs
+from api import query_metrics
+from service.analysis_jobs import get_analysis_job_manager
+from db.driver_neo4j import AsyncNeo4jConnector
 
-app = FastAPI(lifespan=semantic_search_api.lifespan)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with semantic_search_api.lifespan(app):
+        # 분석 작업 스케줄러 시작 (이전 실행에서 중단된 작업은 체크포인트부터 이어서 실행)
+        get_analysis_job_manager().start()
+        yield
+        get_analysis_job_manager().shutdown()
+        await AsyncNeo4jConnector.close_driver()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",
@@ -25,9 +41,11 @@ app.add_middleware(
 # --- 라우터 포함 ---
 app.include_router(file_scan.router)
 app.include_router(file_analysis.router)
+app.include_router(analysis_jobs.router)
 app.include_router(semantic_search_api.router)
 app.include_router(graph.router)
 app.include_router(code_interpretation.router)
+app.include_router(query_metrics.router)
 
 @app.get("/")
 async def read_root():
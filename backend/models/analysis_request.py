@@ -1,6 +1,10 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 class CodeAnalysisRequest(BaseModel):
     project_root_path: str
-    selected_paths: List[str]
\ No newline at end of file
+    selected_paths: List[str]
+    priority: int = 0  # 분석 작업 우선순위 (클수록 먼저 실행)
+    # 지정하면 두 리비전 사이에서 바뀐 파일만 다시 분석합니다. (head가 없으면 base와 작업 트리를 비교)
+    base_revision: Optional[str] = None
+    head_revision: Optional[str] = None
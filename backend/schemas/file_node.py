@@ -5,6 +5,15 @@ from pydantic import BaseModel, Field
 class DirectoryScanRequest(BaseModel):
     """프론트엔드로부터 받을 프로젝트 루트 경로 요청 모델"""
     project_path: str = Field(..., description="분석할 프로젝트의 로컬 절대 경로")
+    encoding: Literal["tree", "flat"] = Field("tree", description="응답 형식: 중첩 트리(tree) 또는 부모 인덱스 배열(flat)")
+    max_depth: Optional[int] = Field(None, ge=0, description="지정하면 이 깊이까지만 스캔 (지연 로딩, 나머지는 /scan-project-path/expand로 펼침)")
+
+class ExpandDirectoryRequest(BaseModel):
+    """지연 로딩 중인 트리에서 하위 디렉토리 하나를 펼치는 요청 모델"""
+    project_path: str = Field(..., description="프로젝트의 로컬 절대 경로")
+    sub_path: str = Field(..., description="펼칠 디렉토리의 프로젝트 기준 상대 경로")
+    depth: int = Field(1, ge=1, description="펼칠 깊이")
+    encoding: Literal["tree", "flat"] = Field("tree", description="응답 형식: 중첩 트리(tree) 또는 부모 인덱스 배열(flat)")
 
 class FileNode(BaseModel):
     """파일/디렉토리 구조의 단일 노드 모델"""
@@ -13,6 +22,9 @@ class FileNode(BaseModel):
     path: str = Field(..., description="루트 경로로부터의 상대 경로")
     children: Optional[List['FileNode']] = Field(None, description="디렉토리인 경우 하위 노드 목록")
     is_excluded_by_default: bool = Field(False, description="기본 제외 대상인지 여부 (예: node_modules)")
+    # 지연 로딩(max_depth) 응답에서만 채워집니다. 펼치지 않은 디렉토리는 children이 None입니다.
+    child_count: Optional[int] = Field(None, description="디렉토리의 직속 항목 수")
+    has_children: Optional[bool] = Field(None, description="디렉토리에 하위 항목이 있는지 여부")
 
 # Pydantic v2에서 재귀 모델 정의 시 필요
 FileNode.model_rebuild()
\ No newline at end of file
@@ -1,9 +1,34 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Literal # 필요한 타입 임포트
+from typing import Dict, List, Optional, Literal # 필요한 타입 임포트
 from .file_node import FileNode
 
 class ProjectScanResponse(BaseModel):
     """프로젝트 스캔 API의 전체 응답 모델"""
     file_structure: FileNode = Field(..., description="스캔된 프로젝트의 디렉토리/파일 트리 구조 (최상위 노드)")
     project_root_absolute_path: str = Field(..., description="스캔된 프로젝트의 실제 절대 경로")
-    message: str = Field("Project scanned successfully.", description="스캔 결과 메시지")
\ No newline at end of file
+    message: str = Field("Project scanned successfully.", description="스캔 결과 메시지")
+
+class FlatFileTree(BaseModel):
+    """
+    평탄화된 디렉토리 트리. i번째 노드는 name[i], parent[i], is_dir[i], excluded[i]로 표현되며 0번이 루트입니다.
+    경로는 부모 인덱스를 따라 이름을 이어 붙여 복원합니다.
+    """
+    name: List[str] = Field(..., description="노드 이름")
+    parent: List[int] = Field(..., description="부모 노드 인덱스 (루트는 -1)")
+    is_dir: List[int] = Field(..., description="디렉토리 여부 (1/0)")
+    excluded: List[int] = Field(..., description="기본 제외 대상 여부 (1/0)")
+    errors: Dict[int, str] = Field(default_factory=dict, description="읽지 못한 디렉토리 인덱스와 사유")
+    child_count: Optional[List[Optional[int]]] = Field(None, description="(지연 로딩) 디렉토리의 직속 항목 수, 파일은 null")
+    loaded: Optional[List[int]] = Field(None, description="(지연 로딩) 자식 노드가 포함되었는지 여부 (1/0)")
+
+class ProjectScanFlatResponse(BaseModel):
+    """encoding='flat' 요청 시의 프로젝트 스캔 응답 모델"""
+    file_tree: FlatFileTree = Field(..., description="부모 인덱스 배열로 표현한 디렉토리/파일 트리")
+    project_root_absolute_path: str = Field(..., description="스캔된 프로젝트의 실제 절대 경로")
+    message: str = Field("Project scanned successfully.", description="스캔 결과 메시지")
+
+class DirectoryExpandResponse(BaseModel):
+    """하위 디렉토리 펼치기 응답 모델 (file_structure 또는 file_tree 중 하나)"""
+    file_structure: Optional[FileNode] = Field(None, description="펼친 디렉토리를 루트로 하는 트리 (경로는 프로젝트 기준)")
+    file_tree: Optional[FlatFileTree] = Field(None, description="encoding='flat'일 때의 평탄화된 트리")
+    sub_path: str = Field(..., description="펼친 디렉토리의 프로젝트 기준 상대 경로")
@@ -1,13 +1,12 @@
 # app/services/ai_data_pipeline.py
 
 import torch
-import pickle
-import os
 import logging
 import inspect
 from typing import List, Dict, Any, Callable, Optional
 from transformers import AutoTokenizer, AutoModel
 from db.driver_neo4j import run_cypher_query
+from service.embedding_store import EMBEDDING_DATA_PATH, load_embeddings, save_embeddings
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +14,42 @@ MODEL_NAME = "microsoft/CodeBERT-base"
 tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
 model = AutoModel.from_pretrained(MODEL_NAME)
 
+# 임베딩 배치 크기
+EMBEDDING_BATCH_SIZE = 32
+
+_ENRICHED_NODE_RETURN = """
+    OPTIONAL MATCH (n)-[r]-(m)
+    RETURN
+        n.id AS id,
+        properties(n) AS properties,
+        COLLECT(DISTINCT {rel_type: type(r), neighbor_name: m.name}) AS relationships
+"""
+
+def _build_enriched_text(properties: Dict[str, Any], relationships: List[Dict[str, Any]]) -> str:
+    """노드 속성과 이웃 관계로 임베딩용 텍스트를 만듭니다."""
+    base_text = properties.get('code_text', properties.get('name', ''))
+
+    rel_texts = []
+    if relationships:
+        for rel in relationships:
+            rel_type = rel['rel_type']
+            neighbor_name = rel.get('neighbor_name')
+            if neighbor_name:
+                rel_texts.append(f"이것은 '{neighbor_name}'와 '{rel_type}' 관계를 가지고 있습니다.")
+
+    return f"{base_text} {' '.join(rel_texts)}" if rel_texts else base_text
+
+def _records_to_nodes(results) -> List[Dict[str, str]]:
+    nodes_list = []
+    for record in results:
+        full_text = _build_enriched_text(record['properties'], record['relationships'])
+        if full_text:
+            nodes_list.append({
+                "id": record['id'],
+                "text": full_text
+            })
+    return nodes_list
+
 def get_all_nodes_with_enriched_text():
     """
     Neo4j에서 모든 노드를 가져오고, 관계 정보를 포함하여 텍스트를 보강합니다.
@@ -23,103 +58,184 @@ def get_all_nodes_with_enriched_text():
     cypher_query = """
     MATCH (n)
     WHERE n.id IS NOT NULL
-    OPTIONAL MATCH (n)-[r]-(m)
-    RETURN
-        n.id AS id,
-        properties(n) AS properties,
-        COLLECT(DISTINCT {rel_type: type(r), neighbor_name: m.name}) AS relationships
-    """
+    """ + _ENRICHED_NODE_RETURN
 
     print("임베딩을 위해 Neo4j에서 노드와 관계를 가져오는 중...")
     try:
         results = run_cypher_query(cypher_query, write=False)
         # print(f'Debug | ai_data_pipeline results >>>>> {results}')
-        nodes_list = []
-        for record in results:
-            node_id = record['id']
-            properties = record['properties']
-            relationships = record['relationships']
-
-            base_text = properties.get('code_text', properties.get('name', ''))
-
-            rel_texts = []
-            if relationships:
-                for rel in relationships:
-                    rel_type = rel['rel_type']
-                    neighbor_name = rel.get('neighbor_name')
-                    if neighbor_name:
-                        rel_texts.append(f"이것은 '{neighbor_name}'와 '{rel_type}' 관계를 가지고 있습니다.")
-
-            full_text = f"{base_text} {' '.join(rel_texts)}" if rel_texts else base_text
-
-            if full_text:
-                nodes_list.append({
-                    "id": node_id,
-                    "text": full_text
-                })
-
+        nodes_list = _records_to_nodes(results)
         print(f"AI 데이터 파이프라인을 위해 {len(nodes_list)}개의 노드를 가져왔습니다.")
         return nodes_list
     except Exception as e:
         print(f"Neo4j에서 노드 데이터를 가져오는 중 오류 발생: {e}")
         return None
 
+def get_enriched_texts_for_nodes(node_ids: List[str]) -> List[Dict[str, str]]:
+    """지정한 노드들만 관계 정보로 보강한 텍스트를 가져옵니다. (분석 파이프라인의 임베딩 단계에서 사용)"""
+    if not node_ids:
+        return []
+    cypher_query = """
+    MATCH (n)
+    WHERE n.id IN $ids
+    """ + _ENRICHED_NODE_RETURN
+    results = run_cypher_query(cypher_query, {"ids": list(node_ids)}, write=False)
+    return _records_to_nodes(results)
+
+def build_enriched_texts(entities: List[Dict[str, Any]], relationships: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """
+    그래프를 거치지 않고 추출 결과(엔티티/관계)만으로 보강 텍스트를 만듭니다. (오프라인 분석 결과물 생성에 사용)
+    관계는 방향과 무관하게 양 끝 노드 모두에 반영되므로, Neo4j에서 가져온 보강 텍스트와 같은 내용이 됩니다.
+    """
+    names_by_id = {entity["id"]: entity.get("name") for entity in entities}
+    neighbors: Dict[str, Dict[tuple, Dict[str, Any]]] = {}
+    for rel in relationships:
+        for node_id, neighbor_id in ((rel["source_id"], rel["target_id"]), (rel["target_id"], rel["source_id"])):
+            item = {"rel_type": rel.get("type"), "neighbor_name": names_by_id.get(neighbor_id)}
+            neighbors.setdefault(node_id, {})[(item["rel_type"], item["neighbor_name"])] = item
+    nodes_list = []
+    for entity in entities:
+        full_text = _build_enriched_text(entity, list(neighbors.get(entity["id"], {}).values()))
+        if full_text:
+            nodes_list.append({"id": entity["id"], "text": full_text})
+    return nodes_list
+
+def get_all_node_ids() -> List[str]:
+    results = run_cypher_query("MATCH (n) WHERE n.id IS NOT NULL RETURN n.id AS id", write=False)
+    return [record['id'] for record in results]
+
+def embed_texts(nodes: List[Dict[str, str]], batch_callback: Optional[Callable[[int], None]] = None) -> Dict[str, List[float]]:
+    """
+    {'id', 'text'} 목록을 배치 단위로 임베딩합니다.
+
+    Args:
+        nodes: 임베딩할 노드 목록
+        batch_callback: 배치마다 지금까지 처리한 노드 수를 받아 호출할 함수
+    """
+    embeddings_with_ids = {}
+    for i in range(0, len(nodes), EMBEDDING_BATCH_SIZE):
+        batch_nodes = nodes[i:i + EMBEDDING_BATCH_SIZE]
+        batch_texts = [node['text'] for node in batch_nodes]
+        batch_ids = [node['id'] for node in batch_nodes]
+
+        inputs = tokenizer(batch_texts, padding=True, truncation=True, return_tensors="pt")
+        with torch.no_grad():
+            batch_embeddings = model(**inputs).pooler_output
+
+        for j in range(len(batch_ids)):
+            embeddings_with_ids[batch_ids[j]] = batch_embeddings[j].tolist()
+
+        if batch_callback is not None:
+            batch_callback(min(len(nodes), i + EMBEDDING_BATCH_SIZE))
+    return embeddings_with_ids
+
+def embed_nodes(node_ids: List[str]) -> Dict[str, List[float]]:
+    """지정한 노드들의 보강 텍스트를 가져와 임베딩합니다."""
+    return embed_texts(get_enriched_texts_for_nodes(node_ids))
+
+def run_incremental_embedding(precomputed: Dict[str, List[float]], refresh_ids: Optional[set] = None,
+                              progress_callback: Optional[Callable] = None) -> Dict[str, int]:
+    """
+    분석 파이프라인에서 미리 계산한 임베딩을 이어받아 나머지 노드만 임베딩하고 파일로 저장합니다.
+    그래프에 없는 노드의 임베딩은 버리고, refresh_ids(이후 관계가 바뀐 노드)는 다시 계산합니다.
+
+    Returns:
+        Dict: {'reused', 'embedded', 'total'}
+    """
+    report_progress = _make_progress_reporter(progress_callback)
+    refresh_ids = refresh_ids or set()
+    all_ids = get_all_node_ids()
+    embeddings_with_ids = {
+        node_id: precomputed[node_id]
+        for node_id in all_ids
+        if node_id in precomputed and node_id not in refresh_ids
+    }
+    missing_ids = [node_id for node_id in all_ids if node_id not in embeddings_with_ids]
+    reused = len(embeddings_with_ids)
+
+    nodes = []
+    for i in range(0, len(missing_ids), 1000):
+        nodes.extend(get_enriched_texts_for_nodes(missing_ids[i:i + 1000]))
+
+    def on_batch(done: int):
+        percent_completed = done / len(nodes) * 100
+        report_progress(percent_completed, f"임베딩 진행 중: {int(percent_completed)}% (재사용 {reused}개)")
+
+    embeddings_with_ids.update(embed_texts(nodes, on_batch))
+    save_embeddings(embeddings_with_ids)
+
+    logger.info(f"임베딩 파일 '{EMBEDDING_DATA_PATH}'에 {len(embeddings_with_ids)}개 노드의 임베딩 저장 완료. (재사용 {reused}개)")
+    report_progress(100, "임베딩 파이프라인 완료.")
+    return {"reused": reused, "embedded": len(embeddings_with_ids) - reused, "total": len(embeddings_with_ids)}
+
+def apply_embedding_delta(removed_ids: set, refresh_ids: set,
+                          progress_callback: Optional[Callable] = None) -> Dict[str, int]:
+    """
+    기존 임베딩 파일에 변경분만 반영합니다. (변경된 파일만 분석하는 경우)
+    removed_ids의 임베딩은 버리고, refresh_ids(새로 생기거나 내용/관계가 바뀐 노드)만 다시 계산합니다.
+    그래프 전체 노드 목록을 읽지 않으므로 임베딩 계산량은 변경 크기에 비례합니다.
+
+    Returns:
+        Dict: {'removed', 'embedded', 'total'}
+    """
+    report_progress = _make_progress_reporter(progress_callback)
+    embeddings_with_ids = load_embeddings()
+    removed = 0
+    for node_id in removed_ids:
+        if embeddings_with_ids.pop(node_id, None) is not None:
+            removed += 1
+
+    refresh_list = sorted(refresh_ids - removed_ids)
+    nodes = []
+    for i in range(0, len(refresh_list), 1000):
+        nodes.extend(get_enriched_texts_for_nodes(refresh_list[i:i + 1000]))
+
+    def on_batch(done: int):
+        percent_completed = done / len(nodes) * 100
+        report_progress(percent_completed, f"변경된 노드 임베딩 중: {int(percent_completed)}%")
+
+    embedded = embed_texts(nodes, on_batch)
+    embeddings_with_ids.update(embedded)
+    save_embeddings(embeddings_with_ids)
+
+    logger.info(f"임베딩 변경분 반영 완료: {removed}개 삭제, {len(embedded)}개 갱신, 전체 {len(embeddings_with_ids)}개")
+    report_progress(100, "임베딩 변경분 반영 완료.")
+    return {"removed": removed, "embedded": len(embedded), "total": len(embeddings_with_ids)}
+
+def _make_progress_reporter(progress_callback: Optional[Callable]) -> Callable[[float, str], None]:
+    """
+    콜백의 인자 개수(진행률만 / 진행률+메시지)를 한 번만 확인해, 항상 (진행률, 메시지)로 호출할 수 있는 함수를 만듭니다.
+    (배치마다 inspect.signature를 호출하지 않기 위함)
+    """
+    if progress_callback is None:
+        return lambda percent, message: None
+    if len(inspect.signature(progress_callback).parameters) == 2:
+        return progress_callback
+    return lambda percent, message: progress_callback(percent)
+
 def run_embedding_pipeline(progress_callback: Optional[Callable] = None, project_root_path: str = "."):
     logger.info("임베딩 파이프라인 실행 시작...")
+    report_progress = _make_progress_reporter(progress_callback)
     try:
         nodes = get_all_nodes_with_enriched_text()
 
         if not nodes:
             logger.warning("가져올 노드가 없습니다. 임베딩 파이프라인을 건너뜁니다.")
-            if progress_callback:
-                callback_args = inspect.signature(progress_callback).parameters
-                if len(callback_args) == 2:
-                    progress_callback(100, "임베딩 파이프라인 완료 (노드 없음).")
-                else:
-                    progress_callback(100)
+            report_progress(100, "임베딩 파이프라인 완료 (노드 없음).")
             return
 
         total = len(nodes)
-        embeddings_with_ids = {}
-        batch_size = 32
-
-        for i in range(0, total, batch_size):
-            batch_nodes = nodes[i:i + batch_size]
-            batch_texts = [node['text'] for node in batch_nodes]
-            batch_ids = [node['id'] for node in batch_nodes]
-
-            inputs = tokenizer(batch_texts, padding=True, truncation=True, return_tensors="pt")
-            with torch.no_grad():
-                batch_embeddings = model(**inputs).pooler_output
-
-            for j in range(len(batch_ids)):
-                embeddings_with_ids[batch_ids[j]] = batch_embeddings[j].tolist()
-
-            percent_completed = min(100, (i + batch_size) / total * 100)
 
-            if progress_callback:
-                callback_args = inspect.signature(progress_callback).parameters
-                if len(callback_args) == 2:
-                    progress_callback(percent_completed, f"임베딩 진행 중: {int(percent_completed)}%")
-                else:
-                    progress_callback(percent_completed)
+        def on_batch(done: int):
+            percent_completed = min(100, done / total * 100)
+            report_progress(percent_completed, f"임베딩 진행 중: {int(percent_completed)}%")
 
-        with open("embedding_data.pkl", "wb") as f:
-            pickle.dump(embeddings_with_ids, f)
+        embeddings_with_ids = embed_texts(nodes, on_batch)
+        save_embeddings(embeddings_with_ids)
 
-        logger.info(f"임베딩 파일 'embedding_data.pkl'에 {len(embeddings_with_ids)}개 노드의 임베딩 저장 완료.")
-        if progress_callback:
-            callback_args = inspect.signature(progress_callback).parameters
-            if len(callback_args) == 2:
-                progress_callback(100, "임베딩 파이프라인 완료.")
-            else:
-                progress_callback(100)
+        logger.info(f"임베딩 파일 '{EMBEDDING_DATA_PATH}'에 {len(embeddings_with_ids)}개 노드의 임베딩 저장 완료.")
+        report_progress(100, "임베딩 파이프라인 완료.")
 
     except Exception as e:
         logger.error(f"임베딩 파이프라인 실행 중 오류 발생: {e}", exc_info=True)
-        if progress_callback:
-            callback_args = inspect.signature(progress_callback).parameters
-            if len(callback_args) == 2:
-                progress_callback(100, f"오류 발생: {str(e)}")
-            else:
-                progress_callback(100)
+        report_progress(100, f"오류 발생: {str(e)}")
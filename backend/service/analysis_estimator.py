@@ -0,0 +1,222 @@
+# app/services/analysis_estimator.py
+
+import os
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from service.file_name_preprocessor import get_code_files_for_analysis
+from service.code_parser import parse_code_with_tree_sitter, detect_language_from_filename
+from service.source_reader import open_source
+from service.file_triage import SKIP, DOWNRANK
+from service.analysis_jobs import AnalysisJobStore, COMPLETED
+
+logger = logging.getLogger(__name__)
+
+# 실제로 파싱해 볼 표본 파일 수 (언어별 파일 수에 비례해 나누고, 언어마다 최소 1개)
+ESTIMATE_SAMPLE_FILES = int(os.getenv("ESTIMATE_SAMPLE_FILES", "20"))
+# 처리량을 가져올 최근 완료 작업 수
+ESTIMATE_HISTORY_JOBS = int(os.getenv("ESTIMATE_HISTORY_JOBS", "5"))
+
+# 이 머신에서 완료된 작업이 없을 때 사용하는 기본 처리량
+DEFAULT_PIPELINE_FILES_PER_SEC = {
+    "ingest": float(os.getenv("ESTIMATE_DEFAULT_INGEST_FILES_PER_SEC", "20")),
+    "embed": float(os.getenv("ESTIMATE_DEFAULT_EMBED_FILES_PER_SEC", "5")),
+}
+# 파이프라인 이후 embed 단계는 스트리밍 임베딩(파이프라인의 embed 단계)이 처리하지 못한 노드만 다시 임베딩하므로
+# 기본값이 없습니다. (기본값을 두면 파이프라인 embed와 이중으로 계산됨) 완료된 작업이 있으면 측정값을 사용합니다.
+DEFAULT_SECONDS_PER_ENTITY = {
+    "resolve": float(os.getenv("ESTIMATE_DEFAULT_RESOLVE_SEC_PER_ENTITY", "0.00002")),
+    "compact": float(os.getenv("ESTIMATE_DEFAULT_COMPACT_SEC_PER_ENTITY", "0.0002")),
+    "index": float(os.getenv("ESTIMATE_DEFAULT_INDEX_SEC_PER_ENTITY", "0.0002")),
+}
+# 파이프라인 이후에 순서대로 실행되는 단계
+_POST_PIPELINE_STAGES = ("resolve", "compact", "embed", "index")
+
+
+def _pick_sample(files_by_language: Dict[str, List[Path]], sample_size: int) -> List[Path]:
+    """언어별 파일 수에 비례해 표본을 고릅니다. 목록 전체에 고르게 퍼지도록 일정 간격으로 뽑습니다."""
+    total = sum(len(files) for files in files_by_language.values())
+    sample = []
+    for files in files_by_language.values():
+        count = max(1, round(sample_size * len(files) / total)) if total else 0
+        count = min(count, len(files))
+        step = len(files) / count if count else 0
+        sample.extend(files[int(i * step)] for i in range(count))
+    return sample
+
+
+def _measure_sample(sample: List[Path]) -> Dict[str, Any]:
+    """표본 파일을 실제로 파싱해 언어별 바이트당 엔티티/관계 수와 파싱 처리량을 측정합니다."""
+    per_language: Dict[str, Dict[str, float]] = {}
+    parse_seconds = 0.0
+    parsed_files = 0
+    for file_path in sample:
+        language = detect_language_from_filename(str(file_path))
+        try:
+            size = os.stat(file_path).st_size
+            started = time.perf_counter()
+            with open_source(file_path) as source:
+                parsed_data = parse_code_with_tree_sitter(source, language, file_path)
+            elapsed = time.perf_counter() - started
+        except Exception as e:
+            logger.warning(f"Failed to parse sample file {file_path}: {e}")
+            continue
+        if not parsed_data:
+            continue
+        parse_seconds += elapsed
+        parsed_files += 1
+        stats = per_language.setdefault(language, {"files": 0, "bytes": 0, "entities": 0, "relationships": 0})
+        stats["files"] += 1
+        stats["bytes"] += size
+        stats["entities"] += len(parsed_data.get("extracted_entities", []))
+        stats["relationships"] += len(parsed_data.get("extracted_relationships", []))
+    return {"per_language": per_language, "parse_seconds": parse_seconds, "parsed_files": parsed_files}
+
+
+def _measured_throughput(store: Optional[AnalysisJobStore]) -> Dict[str, Any]:
+    """
+    최근 완료된 분석 작업의 요약(파이프라인 단계별 처리량, 단계별 소요 시간)에서 이 머신의 처리량을 구합니다.
+
+    Returns:
+        Dict: {'pipeline_files_per_sec': {단계: 파일/초}, 'seconds_per_entity': {단계: 초}, 'source': {단계: 'measured' | 'default'}, 'jobs': 참고한 작업 수}
+    """
+    pipeline_samples: Dict[str, List[float]] = {}
+    per_entity_samples: Dict[str, List[float]] = {}
+    jobs_used = 0
+    if store is not None:
+        for job in store.list_jobs(COMPLETED, ESTIMATE_HISTORY_JOBS):
+            summary = job.get("summary") or {}
+            if summary.get("mode") == "diff":
+                continue  # 변경 분석은 단계 구성과 처리량이 달라 참고하지 않습니다.
+            pipeline = summary.get("pipeline")
+            stage_seconds = summary.get("stage_seconds")
+            if not pipeline and not stage_seconds:
+                continue
+            jobs_used += 1
+            for stage in (pipeline or {}).get("stages", []):
+                # 처리량은 앞 단계를 기다린 시간까지 포함하므로, 사용률로 나눠 그 단계 자체의 처리 능력을 구합니다.
+                if stage.get("throughput_per_sec") and stage.get("utilization"):
+                    capacity = stage["throughput_per_sec"] / stage["utilization"]
+                    pipeline_samples.setdefault(stage["stage"], []).append(capacity)
+            entities = sum(detail.get("extracted_entities_count", 0) for detail in summary.get("analyzed_files_details", []))
+            if entities and stage_seconds:
+                for stage in _POST_PIPELINE_STAGES:
+                    if stage in stage_seconds:
+                        per_entity_samples.setdefault(stage, []).append(stage_seconds[stage] / entities)
+
+    source: Dict[str, str] = {}
+    pipeline_files_per_sec = {}
+    for stage, default in DEFAULT_PIPELINE_FILES_PER_SEC.items():
+        values = pipeline_samples.get(stage)
+        pipeline_files_per_sec[stage] = sum(values) / len(values) if values else default
+        source[f"pipeline.{stage}"] = "measured" if values else "default"
+    seconds_per_entity = {}
+    for stage in _POST_PIPELINE_STAGES:
+        values = per_entity_samples.get(stage)
+        if values:
+            seconds_per_entity[stage] = sum(values) / len(values)
+            source[stage] = "measured"
+        elif stage in DEFAULT_SECONDS_PER_ENTITY:
+            seconds_per_entity[stage] = DEFAULT_SECONDS_PER_ENTITY[stage]
+            source[stage] = "default"
+    return {"pipeline_files_per_sec": pipeline_files_per_sec, "seconds_per_entity": seconds_per_entity,
+            "source": source, "jobs": jobs_used}
+
+
+def estimate_analysis(project_root: Path, selected_paths: List[str],
+                      store: Optional[AnalysisJobStore] = None,
+                      sample_size: int = ESTIMATE_SAMPLE_FILES) -> Dict[str, Any]:
+    """
+    분석을 실행하지 않고 비용을 추정합니다. (dry-run)
+
+    1. 실제 분석과 같은 파일 선택/선별을 거쳐 대상 파일 목록을 만들고, stat만으로 언어별 파일 수와 크기를 셉니다.
+    2. 작은 표본을 실제로 파싱해 언어별 바이트당 엔티티/관계 수와 파싱 처리량을 측정합니다.
+       (코드 blob은 내용 주소 기반이므로 표본 파싱 중 저장되어도 이후 분석에서 그대로 재사용됩니다)
+    3. 최근 완료된 작업에서 측정된 단계별 처리량으로 소요 시간을 예상합니다.
+       파이프라인 단계는 동시에 실행되므로 가장 느린 단계가, 이후 단계는 합이 소요 시간이 됩니다.
+    """
+    started = time.perf_counter()
+    triage_decisions: List[Dict[str, Any]] = []
+    files = get_code_files_for_analysis(project_root, selected_paths, triage_decisions=triage_decisions)
+
+    files_by_language: Dict[str, List[Path]] = {}
+    languages: Dict[str, Dict[str, int]] = {}
+    total_bytes = 0
+    for file_path in files:
+        language = detect_language_from_filename(str(file_path)) or "unknown"
+        try:
+            size = os.stat(file_path).st_size
+        except OSError:
+            continue
+        files_by_language.setdefault(language, []).append(file_path)
+        stats = languages.setdefault(language, {"files": 0, "bytes": 0})
+        stats["files"] += 1
+        stats["bytes"] += size
+        total_bytes += size
+    scan_seconds = time.perf_counter() - started
+
+    measured = _measure_sample(_pick_sample(files_by_language, sample_size))
+    sample_stats = measured["per_language"]
+    sample_bytes = sum(stats["bytes"] for stats in sample_stats.values())
+    overall_entity_rate = (sum(stats["entities"] for stats in sample_stats.values()) / sample_bytes) if sample_bytes else 0.0
+    overall_edge_rate = (sum(stats["relationships"] for stats in sample_stats.values()) / sample_bytes) if sample_bytes else 0.0
+
+    estimated_entities = 0.0
+    estimated_relationships = 0.0
+    for language, stats in languages.items():
+        sampled = sample_stats.get(language)
+        entity_rate = sampled["entities"] / sampled["bytes"] if sampled and sampled["bytes"] else overall_entity_rate
+        edge_rate = sampled["relationships"] / sampled["bytes"] if sampled and sampled["bytes"] else overall_edge_rate
+        stats["estimated_entities"] = round(stats["bytes"] * entity_rate)
+        stats["estimated_relationships"] = round(stats["bytes"] * edge_rate)
+        estimated_entities += stats["bytes"] * entity_rate
+        estimated_relationships += stats["bytes"] * edge_rate
+
+    # 처리량 (파이프라인 단계는 파일/초, 이후 단계는 엔티티당 초)
+    throughput = _measured_throughput(store)
+    parse_files_per_sec = measured["parsed_files"] / measured["parse_seconds"] if measured["parse_seconds"] else None
+    pipeline_rates = {"parse": parse_files_per_sec, **throughput["pipeline_files_per_sec"]}
+    file_count = len(files)
+    pipeline_stage_seconds = {
+        stage: (file_count / rate if rate else 0.0) for stage, rate in pipeline_rates.items()
+    }
+    pipeline_seconds = max(pipeline_stage_seconds.values()) if pipeline_stage_seconds else 0.0
+    post_stage_seconds = {
+        stage: estimated_entities * seconds for stage, seconds in throughput["seconds_per_entity"].items()
+    }
+    projected_seconds = scan_seconds + pipeline_seconds + sum(post_stage_seconds.values())
+
+    return {
+        "total_files": file_count,
+        "total_bytes": total_bytes,
+        "languages": languages,
+        "triage": {
+            "skipped": sum(1 for decision in triage_decisions if decision["action"] == SKIP),
+            "downranked": sum(1 for decision in triage_decisions if decision["action"] == DOWNRANK),
+        },
+        "estimated_entities": round(estimated_entities),
+        "estimated_relationships": round(estimated_relationships),
+        # 모든 노드가 임베딩됩니다.
+        "estimated_embeddings": round(estimated_entities),
+        "sample": {
+            "files": measured["parsed_files"],
+            "bytes": sample_bytes,
+            "parse_seconds": round(measured["parse_seconds"], 3),
+        },
+        "throughput": {
+            "pipeline_files_per_sec": {stage: round(rate, 3) if rate else None for stage, rate in pipeline_rates.items()},
+            "seconds_per_entity": throughput["seconds_per_entity"],
+            "source": {"parse": "measured", **throughput["source"]},
+            "history_jobs": throughput["jobs"],
+        },
+        "projected_seconds": {
+            "scan": round(scan_seconds, 3),
+            "pipeline": round(pipeline_seconds, 3),
+            "pipeline_bottleneck": max(pipeline_stage_seconds, key=pipeline_stage_seconds.get) if pipeline_stage_seconds else None,
+            **{stage: round(seconds, 3) for stage, seconds in post_stage_seconds.items()},
+            "total": round(projected_seconds, 3),
+        },
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
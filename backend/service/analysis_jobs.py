@@ -0,0 +1,446 @@
+# app/services/analysis_jobs.py
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from typing import Dict, List, Any, Optional, AsyncIterator
+
+from service.progress_bus import get_progress_bus
+
+logger = logging.getLogger(__name__)
+
+# 분석 작업 상태를 저장할 로컬 SQLite 파일 경로
+ANALYSIS_JOB_DB_PATH = os.getenv("ANALYSIS_JOB_DB_PATH", "analysis_jobs.sqlite3")
+# 동시에 실행할 수 있는 최대 분석 작업 수 (서버 전체)
+ANALYSIS_MAX_CONCURRENT_JOBS = int(os.getenv("ANALYSIS_MAX_CONCURRENT_JOBS", "1"))
+# 서버 시작 시 중단된(실행 중이던) 작업을 자동으로 이어서 실행할지 여부
+ANALYSIS_JOBS_AUTO_RESUME = os.getenv("ANALYSIS_JOBS_AUTO_RESUME", "true").lower() == "true"
+# 같은 단계의 진행률 이벤트를 SQLite에 기록하는 최소 간격(초). (재연결 시 재생용이므로 모든 진행률을 남길 필요는 없음)
+ANALYSIS_EVENT_PERSIST_INTERVAL = float(os.getenv("ANALYSIS_EVENT_PERSIST_INTERVAL", "1.0"))
+# 진행 이벤트 스트림이 새 이벤트 없이 기다릴 때 작업 상태를 확인하는 주기(초)
+ANALYSIS_STATUS_CHECK_INTERVAL = float(os.getenv("ANALYSIS_STATUS_CHECK_INTERVAL", "15"))
+
+# 작업 상태
+QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED, INTERRUPTED = (
+    "queued", "running", "completed", "failed", "cancelled", "interrupted"
+)
+TERMINAL_STATUSES = (COMPLETED, FAILED, CANCELLED)
+RESUMABLE_STATUSES = (FAILED, CANCELLED, INTERRUPTED)
+# 스트림을 끝내는 이벤트 상태
+TERMINAL_EVENT_STATUSES = ("completed", "error", "cancelled")
+
+
+class AnalysisCancelled(Exception):
+    """작업 취소 요청으로 분석이 중단되었을 때 발생합니다."""
+
+
+class AnalysisJobStore:
+    """
+    분석 작업, 파일 단위 체크포인트, 진행 이벤트를 로컬 SQLite 파일에 저장합니다.
+    서버가 재시작되어도 작업 상태와 체크포인트가 남아 있으므로 중단된 지점부터 이어서 실행할 수 있습니다.
+    """
+
+    def __init__(self, db_path: str = ANALYSIS_JOB_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                project_root TEXT NOT NULL,
+                selected_paths TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                stage TEXT,
+                total_files INTEGER NOT NULL DEFAULT 0,
+                processed_files INTEGER NOT NULL DEFAULT 0,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                summary TEXT,
+                options TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS job_files (
+                job_id TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                detail TEXT,
+                payload BLOB,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (job_id, file_path)
+            );
+            CREATE TABLE IF NOT EXISTS job_events (
+                job_id TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                event TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (job_id, seq)
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status);
+        """)
+        # 이전 버전에서 만든 DB에는 options 컬럼이 없습니다.
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "options" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN options TEXT")
+        self._conn.commit()
+
+    # --- 작업 ---
+
+    def create_job(self, project_root: str, selected_paths: List[str], priority: int = 0,
+                   options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, project_root, selected_paths, priority, status, options, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, project_root, json.dumps(selected_paths), priority, QUEUED,
+                 json.dumps(options) if options else None, time.time())
+            )
+            self._conn.commit()
+        return self.get_job(job_id)
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._job_row(row) if row else None
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE ? IS NULL OR status = ? ORDER BY created_at DESC LIMIT ?",
+                (status, status, limit)
+            ).fetchall()
+        return [self._job_row(row) for row in rows]
+
+    def update_job(self, job_id: str, **fields):
+        if "summary" in fields and fields["summary"] is not None:
+            fields["summary"] = json.dumps(fields["summary"], ensure_ascii=False)
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {columns} WHERE job_id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def mark_interrupted_jobs(self) -> List[str]:
+        """서버가 죽으면서 실행 중 상태로 남은 작업을 interrupted로 바꾸고 ID 목록을 반환합니다."""
+        with self._lock:
+            rows = self._conn.execute("SELECT job_id FROM jobs WHERE status = ?", (RUNNING,)).fetchall()
+            self._conn.execute("UPDATE jobs SET status = ? WHERE status = ?", (INTERRUPTED, RUNNING))
+            self._conn.commit()
+        return [row["job_id"] for row in rows]
+
+    @staticmethod
+    def _job_row(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["selected_paths"] = json.loads(job["selected_paths"])
+        job["summary"] = json.loads(job["summary"]) if job["summary"] else None
+        job["options"] = json.loads(job["options"]) if job.get("options") else {}
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    # --- 파일 단위 체크포인트 ---
+
+    def save_checkpoint(self, job_id: str, file_path: str, stage: str,
+                        detail: Optional[Dict[str, Any]] = None, payload: Optional[Dict[str, Any]] = None):
+        """
+        파일 하나의 처리 결과를 저장합니다.
+        payload(추출된 엔티티/관계)를 주면 압축해서 저장하고, 주지 않으면 기존 payload를 유지합니다.
+        """
+        blob = zlib.compress(json.dumps(payload).encode("utf-8")) if payload is not None else None
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO job_files (job_id, file_path, stage, detail, payload, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (job_id, file_path) DO UPDATE SET
+                    stage = excluded.stage,
+                    detail = COALESCE(excluded.detail, job_files.detail),
+                    payload = COALESCE(excluded.payload, job_files.payload),
+                    updated_at = excluded.updated_at
+            """, (job_id, file_path, stage, json.dumps(detail, ensure_ascii=False) if detail is not None else None,
+                  blob, time.time()))
+            self._conn.commit()
+
+    def load_checkpoints(self, job_id: str) -> Dict[str, Dict[str, Any]]:
+        """{파일 경로: {'stage', 'detail', 'payload'}} 형태로 체크포인트를 반환합니다."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT file_path, stage, detail, payload FROM job_files WHERE job_id = ?", (job_id,)
+            ).fetchall()
+        return {
+            row["file_path"]: {
+                "stage": row["stage"],
+                "detail": json.loads(row["detail"]) if row["detail"] else None,
+                "payload": json.loads(zlib.decompress(row["payload"])) if row["payload"] else None
+            }
+            for row in rows
+        }
+
+    def clear_checkpoint_payloads(self, job_id: str):
+        """작업이 끝나면 더 이상 필요 없는 추출 결과를 지워 저장 공간을 돌려받습니다."""
+        with self._lock:
+            self._conn.execute("UPDATE job_files SET payload = NULL WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+
+    # --- 진행 이벤트 ---
+
+    def last_event_seq(self, job_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM job_events WHERE job_id = ?", (job_id,)).fetchone()
+        return row[0]
+
+    def append_event(self, job_id: str, event: Dict[str, Any], seq: Optional[int] = None) -> int:
+        """이벤트를 기록합니다. seq를 주지 않으면 마지막 순번 다음 번호를 사용합니다."""
+        with self._lock:
+            if seq is None:
+                row = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM job_events WHERE job_id = ?", (job_id,)).fetchone()
+                seq = row[0] + 1
+            self._conn.execute(
+                "INSERT INTO job_events (job_id, seq, event, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, seq, json.dumps(event, ensure_ascii=False), time.time())
+            )
+            self._conn.commit()
+        return seq
+
+    def events_after(self, job_id: str, after_seq: int = 0, limit: int = 500) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, event FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (job_id, after_seq, limit)
+            ).fetchall()
+        return [{"seq": row["seq"], "event": json.loads(row["event"])} for row in rows]
+
+
+class AnalysisJobManager:
+    """
+    분석 작업 스케줄러.
+    - 우선순위(priority가 클수록 먼저)와 제출 순서로 대기열을 관리합니다.
+    - 서버 전체에서 동시에 실행되는 작업 수를 max_concurrent로 제한합니다.
+    - 작업은 HTTP 요청과 무관한 백그라운드 스레드에서 실행되므로, 클라이언트 연결이 끊겨도 계속 진행됩니다.
+    """
+
+    def __init__(self, store: AnalysisJobStore, max_concurrent: int = ANALYSIS_MAX_CONCURRENT_JOBS):
+        self.store = store
+        self.max_concurrent = max(1, max_concurrent)
+        self._queue: List[tuple] = []
+        self._order = itertools.count()
+        self._running: Dict[str, threading.Event] = {}
+        self._cond = threading.Condition()
+        self._dispatcher: Optional[threading.Thread] = None
+        self._stopping = False
+        # 작업별 마지막 이벤트 순번과 진행률 이벤트 기록 시각
+        self._event_lock = threading.Lock()
+        self._event_seqs: Dict[str, int] = {}
+        self._last_persisted: Dict[tuple, float] = {}
+
+    def start(self, auto_resume: bool = ANALYSIS_JOBS_AUTO_RESUME):
+        """디스패처 스레드를 시작하고, 이전 실행에서 남은 작업을 대기열에 다시 넣습니다."""
+        with self._cond:
+            if self._dispatcher is not None:
+                return
+            self._stopping = False
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name="analysis-job-dispatcher", daemon=True)
+            self._dispatcher.start()
+
+        interrupted = self.store.mark_interrupted_jobs()
+        if interrupted:
+            logger.info(f"중단된 분석 작업 {len(interrupted)}개 발견: {interrupted}")
+        pending = self.store.list_jobs(status=QUEUED, limit=10000)
+        if auto_resume:
+            pending += [self.store.get_job(job_id) for job_id in interrupted]
+        for job in sorted(pending, key=lambda j: j["created_at"]):
+            self.store.update_job(job["job_id"], status=QUEUED)
+            self._enqueue(job)
+
+    def shutdown(self):
+        """새 작업 배정을 멈추고 실행 중인 작업에 중단을 요청합니다. (다음 시작 시 이어서 실행됨)"""
+        with self._cond:
+            self._stopping = True
+            for cancel_event in self._running.values():
+                cancel_event.set()
+            self._cond.notify_all()
+
+    def _enqueue(self, job: Dict[str, Any]):
+        with self._cond:
+            heapq.heappush(self._queue, (-job["priority"], next(self._order), job["job_id"]))
+            self._cond.notify_all()
+
+    def submit(self, project_root: str, selected_paths: List[str], priority: int = 0,
+               options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Args:
+            options: 작업 옵션 (base_revision이 있으면 두 리비전 사이에서 바뀐 파일만 분석합니다)
+        """
+        job = self.store.create_job(project_root, selected_paths, priority, options)
+        self.record_event(job["job_id"], {"status": "queued", "job_id": job["job_id"], "progress": 0})
+        self._enqueue(job)
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.store.get_job(job_id)
+        if job is None or job["status"] in TERMINAL_STATUSES:
+            return job
+        with self._cond:
+            cancel_event = self._running.get(job_id)
+            if cancel_event is not None:
+                # 실행 중인 작업은 다음 파일/단계 경계에서 중단됩니다.
+                self.store.update_job(job_id, cancel_requested=1)
+                cancel_event.set()
+            else:
+                self._queue = [item for item in self._queue if item[2] != job_id]
+                heapq.heapify(self._queue)
+                self.record_event(job_id, {"status": "cancelled", "message": "작업이 취소되었습니다.", "progress": 0})
+                self.store.update_job(job_id, status=CANCELLED, finished_at=time.time())
+        return self.store.get_job(job_id)
+
+    def resume(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """실패/취소/중단된 작업을 체크포인트부터 다시 실행하도록 대기열에 넣습니다."""
+        job = self.store.get_job(job_id)
+        if job is None or job["status"] not in RESUMABLE_STATUSES:
+            return job
+        self.store.update_job(job_id, status=QUEUED, cancel_requested=0, error=None, finished_at=None)
+        self.record_event(job_id, {"status": "queued", "job_id": job_id, "message": "작업을 이어서 실행합니다.", "progress": 0})
+        self._enqueue(self.store.get_job(job_id))
+        return self.store.get_job(job_id)
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                while not self._stopping and (not self._queue or len(self._running) >= self.max_concurrent):
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                _, _, job_id = heapq.heappop(self._queue)
+                job = self.store.get_job(job_id)
+                if job is None or job["status"] != QUEUED:
+                    continue
+                cancel_event = threading.Event()
+                self._running[job_id] = cancel_event
+            threading.Thread(target=self._run_job, args=(job, cancel_event), name=f"analysis-job-{job_id[:8]}", daemon=True).start()
+
+    def _run_job(self, job: Dict[str, Any], cancel_event: threading.Event):
+        # 순환 임포트를 피하기 위해 실행 시점에 임포트합니다.
+        from service.analysis_runner import run_analysis_job
+        from service.diff_analysis import run_diff_analysis_job
+
+        job_id = job["job_id"]
+        self.store.update_job(job_id, status=RUNNING, started_at=time.time())
+
+        def emit(event: Dict[str, Any]):
+            self.record_event(job_id, event)
+
+        try:
+            run = run_diff_analysis_job if job["options"].get("base_revision") else run_analysis_job
+            summary = run(job, self.store, emit, cancel_event.is_set)
+            self.store.update_job(job_id, status=COMPLETED, stage="done", summary=summary, finished_at=time.time())
+            self.store.clear_checkpoint_payloads(job_id)
+        except AnalysisCancelled:
+            if self._stopping:
+                # 서버 종료로 멈춘 작업은 다음 시작 시 이어서 실행합니다.
+                self.store.update_job(job_id, status=INTERRUPTED)
+            else:
+                emit({"status": "cancelled", "message": "작업이 취소되었습니다.", "progress": 0})
+                self.store.update_job(job_id, status=CANCELLED, finished_at=time.time())
+        except Exception as e:
+            logger.error(f"분석 작업 실패 ({job_id}): {e}", exc_info=True)
+            emit({"status": "error", "message": f"서버 내부 오류: {e}", "progress": 0})
+            self.store.update_job(job_id, status=FAILED, error=str(e), finished_at=time.time())
+        finally:
+            with self._cond:
+                self._running.pop(job_id, None)
+                self._cond.notify_all()
+            with self._event_lock:
+                self._event_seqs.pop(job_id, None)
+                for key in [key for key in self._last_persisted if key[0] == job_id]:
+                    self._last_persisted.pop(key, None)
+
+    def record_event(self, job_id: str, event: Dict[str, Any]):
+        """
+        진행 이벤트에 순번을 붙여 기록하고 진행 이벤트 버스로 발행합니다. (어느 스레드에서나 호출 가능)
+        같은 단계의 진행률 이벤트(status=in_progress + stage)는 버스에서 합쳐지고,
+        SQLite에는 ANALYSIS_EVENT_PERSIST_INTERVAL마다 한 번만 기록됩니다. 그 밖의 이벤트는 모두 기록됩니다.
+        """
+        coalesce_key = event.get("stage") if event.get("status") == "in_progress" else None
+        now = time.monotonic()
+        with self._event_lock:
+            if job_id not in self._event_seqs:
+                self._event_seqs[job_id] = self.store.last_event_seq(job_id)
+            self._event_seqs[job_id] += 1
+            seq = self._event_seqs[job_id]
+            persist = True
+            if coalesce_key is not None:
+                last = self._last_persisted.get((job_id, coalesce_key))
+                persist = last is None or now - last >= ANALYSIS_EVENT_PERSIST_INTERVAL
+                if persist:
+                    self._last_persisted[(job_id, coalesce_key)] = now
+            # 순번을 정한 잠금 안에서 기록하고 발행해야 SQLite와 버스 모두에 순번 순서대로 들어갑니다.
+            # (잠금 밖에서 하면 N+1이 N보다 먼저 기록/발행되어, 재연결한 클라이언트가 N을 after_seq 이하로 보고 버릴 수 있음)
+            # 버스 발행은 기록(commit)이 끝난 뒤에 하므로, 버스로 받은 이벤트는 항상 재생으로도 다시 읽을 수 있습니다.
+            if persist:
+                self.store.append_event(job_id, event, seq)
+            get_progress_bus().publish(job_id, {"seq": seq, "event": event}, coalesce_key)
+
+    async def stream_events(self, job_id: str, after_seq: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        작업의 진행 이벤트를 after_seq 이후부터 순서대로 내보냅니다.
+        SQLite에 기록된 이벤트를 먼저 재생한 뒤, 진행 이벤트 버스로 들어오는 새 이벤트를 전달하며,
+        작업이 끝나면 종료합니다. 클라이언트는 마지막으로 받은 seq를 넘겨 언제든 다시 연결할 수 있습니다.
+        """
+        bus = get_progress_bus()
+        # 재생하는 동안 발생한 이벤트를 놓치지 않도록 먼저 구독합니다.
+        queue = bus.subscribe(job_id)
+        try:
+            while True:
+                events = await asyncio.to_thread(self.store.events_after, job_id, after_seq)
+                if not events:
+                    break
+                for item in events:
+                    after_seq = item["seq"]
+                    yield item
+                    if item["event"].get("status") in TERMINAL_EVENT_STATUSES:
+                        return
+
+            job = await asyncio.to_thread(self.store.get_job, job_id)
+            if job is None or job["status"] in TERMINAL_STATUSES:
+                return
+
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=ANALYSIS_STATUS_CHECK_INTERVAL)
+                except asyncio.TimeoutError:
+                    job = await asyncio.to_thread(self.store.get_job, job_id)
+                    if job is None or job["status"] in TERMINAL_STATUSES:
+                        for item in await asyncio.to_thread(self.store.events_after, job_id, after_seq):
+                            yield item
+                        return
+                    continue
+                if item["seq"] <= after_seq:
+                    continue  # 재생 단계에서 이미 보낸 이벤트
+                after_seq = item["seq"]
+                yield item
+                if item["event"].get("status") in TERMINAL_EVENT_STATUSES:
+                    return
+        finally:
+            bus.unsubscribe(job_id, queue)
+
+
+_job_manager: Optional[AnalysisJobManager] = None
+_job_manager_lock = threading.Lock()
+
+
+def get_analysis_job_manager() -> AnalysisJobManager:
+    global _job_manager
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = AnalysisJobManager(AnalysisJobStore())
+    return _job_manager
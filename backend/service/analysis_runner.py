@@ -0,0 +1,401 @@
+# app/services/analysis_runner.py
+
+import os
+import threading
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Callable, Optional
+
+from service.file_name_preprocessor import get_code_files_for_analysis
+from service.file_triage import SKIP, DOWNRANK
+from service.code_parser import parse_code_with_tree_sitter, detect_language_from_filename
+from service.source_reader import open_source, MMAP_THRESHOLD_BYTES
+from service.symbol_resolver import resolve_cross_file_calls, split_deferred_calls
+from service.staged_pipeline import StagedPipeline, PipelineStage, PipelineStopped
+from service.analysis_jobs import AnalysisJobStore, AnalysisCancelled
+from db.ingestor_python import ingest_code_graph_data
+
+logger = logging.getLogger(__name__)
+
+# 분석 단계 (작업의 stage 컬럼에 기록되며, 재개 시 이미 끝난 단계는 건너뜁니다)
+STAGES = ("scan", "pipeline", "resolve", "compact", "embed", "index", "done")
+
+# 파일 체크포인트 단계
+FILE_PARSED = "parsed"
+FILE_INGESTED = "ingested"
+
+# 파이프라인 단계별 워커 수와 큐 크기 (읽기 → 파싱/추출 → 배치 저장 → 임베딩)
+ANALYSIS_READ_WORKERS = int(os.getenv("ANALYSIS_READ_WORKERS", "4"))
+ANALYSIS_PARSE_WORKERS = int(os.getenv("ANALYSIS_PARSE_WORKERS", "2"))
+ANALYSIS_PIPELINE_QUEUE_SIZE = int(os.getenv("ANALYSIS_PIPELINE_QUEUE_SIZE", "32"))
+# 한 트랜잭션으로 저장할 파일 수
+ANALYSIS_INGEST_BATCH_FILES = int(os.getenv("ANALYSIS_INGEST_BATCH_FILES", "16"))
+# 한 번에 임베딩할 파일 수 (저장된 파일의 노드를 모아서 임베딩)
+ANALYSIS_EMBED_BATCH_FILES = int(os.getenv("ANALYSIS_EMBED_BATCH_FILES", "8"))
+# 파이프라인 진행 이벤트 간격(초)
+ANALYSIS_PIPELINE_PROGRESS_INTERVAL = float(os.getenv("ANALYSIS_PIPELINE_PROGRESS_INTERVAL", "1.0"))
+
+# 실행 중인 작업의 파이프라인 (단계별 처리량/큐 길이 조회용)
+_active_pipelines: Dict[str, StagedPipeline] = {}
+_active_pipelines_lock = threading.Lock()
+
+
+def get_pipeline_metrics(job_id: str) -> Optional[Dict[str, Any]]:
+    """실행 중인 작업의 파이프라인 지표를 반환합니다. 파이프라인 단계가 아니면 None."""
+    with _active_pipelines_lock:
+        pipeline = _active_pipelines.get(job_id)
+    return pipeline.metrics() if pipeline is not None else None
+
+
+def _stage_done(job: Dict[str, Any], stage: str) -> bool:
+    """이전 실행에서 이 단계를 이미 마쳤는지 확인합니다. (job['stage']는 마지막으로 시작한 단계)"""
+    current = job.get("stage")
+    return current in STAGES and STAGES.index(stage) < STAGES.index(current)
+
+
+def run_analysis_job(
+    job: Dict[str, Any],
+    store: AnalysisJobStore,
+    emit: Callable[[Dict[str, Any]], None],
+    is_cancelled: Callable[[], bool],
+) -> Dict[str, Any]:
+    """
+    분석 작업 하나를 실행합니다. (백그라운드 스레드에서 호출됨)
+
+    스캔 후 읽기 → 파싱/추출 → 배치 저장 → 임베딩을 크기 제한 큐로 연결해 동시에 실행합니다.
+    파일 간 호출(CALLS) 관계만은 모든 파일을 파싱한 뒤 해석해 저장하고, 이후 압축 → 남은 임베딩 → 인덱스 구축 순으로 진행합니다.
+    파일 단위 체크포인트가 있으면 이미 파싱/저장한 파일은 다시 처리하지 않습니다.
+
+    Args:
+        job: 작업 정보 (AnalysisJobStore.get_job 결과)
+        store: 체크포인트/상태 저장소
+        emit: 진행 이벤트를 내보내는 함수 (SSE 메시지와 같은 형태의 딕셔너리)
+        is_cancelled: 취소 요청 여부를 반환하는 함수
+
+    Returns:
+        Dict: 분석 요약 (analysis_summary)
+    """
+    # 오래 걸리는 모델 로드를 작업 실행 시점까지 미룹니다.
+    from db.graph_compaction import compact_graph, COMPACT_AFTER_INGEST
+    from service.ai_data_pipeline import embed_nodes, run_incremental_embedding
+    from service.graph_lod_service import warm_lod_cache
+    from service.graph_snapshot import rebuild_graph_snapshot
+
+    job_id = job["job_id"]
+    project_root = Path(job["project_root"])
+
+    def check_cancelled():
+        if is_cancelled():
+            raise AnalysisCancelled()
+
+    # 단계별 소요 시간 (요약에 저장되어 분석 비용 추정에 사용됩니다)
+    stage_seconds: Dict[str, float] = {}
+    current_stage = {"name": None, "started": 0.0}
+
+    def finish_stage():
+        if current_stage["name"] is not None:
+            stage_seconds[current_stage["name"]] = round(time.perf_counter() - current_stage["started"], 3)
+
+    def enter_stage(stage: str):
+        check_cancelled()
+        finish_stage()
+        current_stage["name"], current_stage["started"] = stage, time.perf_counter()
+        store.update_job(job_id, stage=stage)
+
+    # 1. 파일 시스템 스캔 서비스 호출: 분석 대상 파일 목록을 얻습니다.
+    enter_stage("scan")
+    emit({'status': 'info', 'message': '파일 시스템 스캔 중...', 'progress': 0})
+    # 파싱 전 선별: 건너뛴 파일과 우선순위를 낮춘 파일은 사유와 함께 요약에 남깁니다.
+    triage_decisions: List[Dict[str, Any]] = []
+    files_to_analyze = get_code_files_for_analysis(project_root, job["selected_paths"], triage_decisions=triage_decisions)
+    if not files_to_analyze:
+        raise ValueError("분석할 유효한 코드 파일이 선택되지 않았습니다.")
+    triage_by_path = {decision["file_path"]: decision for decision in triage_decisions}
+
+    total_files = len(files_to_analyze)
+    store.update_job(job_id, total_files=total_files)
+    checkpoints = store.load_checkpoints(job_id)
+    if checkpoints:
+        emit({'status': 'info', 'message': f'체크포인트에서 재개: {len(checkpoints)}개 파일 처리 완료', 'progress': 0})
+
+    # 2. 파일별 파이프라인: 읽기 → 파싱/추출 → 배치 저장 → 임베딩
+    enter_stage("pipeline")
+    stream_embeddings = not _stage_done(job, "embed")
+    results_lock = threading.Lock()
+    details_by_order: Dict[int, Dict[str, Any]] = {}
+    parsed_by_order: Dict[int, Dict[str, Any]] = {}
+    streamed_embeddings: Dict[str, List[float]] = {}
+
+    def discover():
+        for order, file_path in enumerate(files_to_analyze):
+            yield {
+                "order": order,
+                "file_path": file_path,
+                "relative_path": str(file_path.relative_to(project_root)),
+                "checkpoint": checkpoints.get(str(file_path)),
+            }
+
+    def read_file(work: Dict[str, Any]):
+        # 체크포인트가 있는 파일은 다시 읽지 않습니다. 큰 파일은 파싱 단계에서 mmap으로 엽니다.
+        checkpoint = work["checkpoint"]
+        if checkpoint and checkpoint["payload"] is not None:
+            return [work]
+        work["language"] = detect_language_from_filename(str(work["file_path"]))
+        try:
+            if work["language"] and work["file_path"].stat().st_size < MMAP_THRESHOLD_BYTES:
+                work["source"] = work["file_path"].read_bytes()
+        except OSError as e:
+            work["error"] = str(e)
+        return [work]
+
+    def parse_file(work: Dict[str, Any]):
+        file_path = work["file_path"]
+        relative_path = work["relative_path"]
+        checkpoint = work["checkpoint"]
+        if checkpoint and checkpoint["payload"] is not None:
+            work["detail"] = checkpoint["detail"]
+            work["payload"] = checkpoint["payload"]
+            return [work]
+
+        payload = None
+        language = work.get("language")
+        try:
+            if work.get("error"):
+                raise OSError(work["error"])
+            if language:
+                # 파일을 바이트로 한 번만 읽어(큰 파일은 mmap) 파서와 추출기가 같은 버퍼를 사용합니다.
+                source = work.pop("source", None)
+                if source is not None:
+                    parsed_data = parse_code_with_tree_sitter(source, language, file_path)
+                else:
+                    with open_source(file_path) as source:
+                        parsed_data = parse_code_with_tree_sitter(source, language, file_path)
+                if parsed_data:
+                    detail = {
+                        "file_path": relative_path,
+                        "status": "success",
+                        "language": language,
+                        "extracted_entities_count": len(parsed_data.get("extracted_entities", [])),
+                        "extracted_relationships_count": len(parsed_data.get("extracted_relationships", []))
+                    }
+                    payload = {
+                        "extracted_entities": parsed_data["extracted_entities"],
+                        "extracted_relationships": parsed_data["extracted_relationships"]
+                    }
+                    store.save_checkpoint(job_id, str(file_path), FILE_PARSED, detail, payload)
+                else:
+                    detail = {
+                        "file_path": relative_path,
+                        "status": "failed_parsing",
+                        "reason": f"No parser available or parsing failed for language: {language}"
+                    }
+            else:
+                detail = {
+                    "file_path": relative_path,
+                    "status": "skipped",
+                    "reason": "Unknown or unsupported file type for parsing"
+                }
+        except Exception as e:
+            detail = {"file_path": relative_path, "status": "error", "message": str(e)}
+            logger.error(f"Error processing file {file_path}: {e}")
+
+        work["detail"] = detail
+        work["payload"] = payload
+        return [work]
+
+    def ingest_files(batch: List[Dict[str, Any]]):
+        # 해석 전 CALLS 관계(파일별 ExternalCallTarget)는 떼어 두고 나머지만 바로 저장합니다.
+        pending = []
+        for work in batch:
+            payload = work["payload"]
+            if payload is None:
+                continue
+            entities, relationships, deferred_indices = split_deferred_calls(
+                payload["extracted_entities"], payload["extracted_relationships"]
+            )
+            parsed = {
+                "file_path": work["file_path"],
+                "extracted_entities": payload["extracted_entities"],
+                "extracted_relationships": payload["extracted_relationships"],
+                "deferred_indices": deferred_indices,
+                "node_ids": [entity["id"] for entity in entities],
+                "detail": work["detail"],
+            }
+            with results_lock:
+                parsed_by_order[work["order"]] = parsed
+            checkpoint = work["checkpoint"]
+            if not (checkpoint and checkpoint["stage"] == FILE_INGESTED):
+                pending.append((work, parsed, entities, relationships))
+
+        if pending:
+            try:
+                ingest_code_graph_data(
+                    [entity for _, _, entities, _ in pending for entity in entities],
+                    [rel for _, _, _, relationships in pending for rel in relationships]
+                )
+                failed_orders = set()
+            except Exception as e:
+                # 배치 저장이 실패하면 파일 단위로 다시 시도해 실패한 파일만 골라냅니다.
+                logger.warning(f"Batch ingest failed, retrying per file: {e}")
+                failed_orders = set()
+                for work, parsed, entities, relationships in pending:
+                    try:
+                        ingest_code_graph_data(entities, relationships)
+                    except Exception as file_error:
+                        parsed["detail"]["status"] = "error"
+                        parsed["detail"]["message"] = str(file_error)
+                        logger.error(f"Error ingesting file {work['file_path']}: {file_error}")
+                        failed_orders.add(work["order"])
+            for work, _, _, _ in pending:
+                if work["order"] not in failed_orders:
+                    store.save_checkpoint(job_id, str(work["file_path"]), FILE_INGESTED)
+
+        with results_lock:
+            for work in batch:
+                details_by_order[work["order"]] = work["detail"]
+            processed = len(details_by_order)
+        store.update_job(job_id, processed_files=processed)
+
+        if not stream_embeddings:
+            return None
+        return [
+            parsed_by_order[work["order"]]["node_ids"]
+            for work in batch
+            if work["order"] in parsed_by_order and parsed_by_order[work["order"]]["detail"].get("status") == "success"
+        ]
+
+    def embed_files(batch: List[List[str]]):
+        try:
+            embeddings = embed_nodes([node_id for node_ids in batch for node_id in node_ids])
+        except Exception as e:
+            # 여기서 임베딩하지 못한 노드는 마지막 임베딩 단계에서 다시 계산합니다.
+            logger.warning(f"Streaming embedding failed: {e}")
+            return None
+        with results_lock:
+            streamed_embeddings.update(embeddings)
+        return None
+
+    stages = [
+        PipelineStage("read", read_file, workers=ANALYSIS_READ_WORKERS, queue_size=ANALYSIS_PIPELINE_QUEUE_SIZE),
+        PipelineStage("parse", parse_file, workers=ANALYSIS_PARSE_WORKERS, queue_size=ANALYSIS_PIPELINE_QUEUE_SIZE),
+        PipelineStage("ingest", ingest_files, workers=1, queue_size=ANALYSIS_PIPELINE_QUEUE_SIZE,
+                      batch_size=ANALYSIS_INGEST_BATCH_FILES),
+    ]
+    if stream_embeddings:
+        stages.append(PipelineStage("embed", embed_files, workers=1, queue_size=ANALYSIS_PIPELINE_QUEUE_SIZE,
+                                    batch_size=ANALYSIS_EMBED_BATCH_FILES))
+    pipeline = StagedPipeline(stages, should_stop=is_cancelled)
+
+    def pipeline_progress(metrics: Dict[str, Any]):
+        ingested = stages[2].processed
+        emit({'status': 'in_progress', 'stage': '파일 분석', 'detail': f'{ingested}/{total_files} 파일 처리 중',
+              'progress': (ingested / total_files) * 100, 'pipeline': metrics})
+
+    with _active_pipelines_lock:
+        _active_pipelines[job_id] = pipeline
+    try:
+        pipeline.run(discover(), on_progress=pipeline_progress, progress_interval=ANALYSIS_PIPELINE_PROGRESS_INTERVAL)
+    except PipelineStopped:
+        raise AnalysisCancelled()
+    finally:
+        with _active_pipelines_lock:
+            _active_pipelines.pop(job_id, None)
+    pipeline_metrics = pipeline.metrics()
+
+    analysis_summary_details = [details_by_order[order] for order in sorted(details_by_order)]
+    for detail in analysis_summary_details:
+        decision = triage_by_path.get(detail.get("file_path"))
+        if decision is not None:
+            detail["triage"] = {"action": decision["action"], "reasons": decision["reasons"]}
+    for decision in triage_decisions:
+        if decision["action"] == SKIP:
+            analysis_summary_details.append({
+                "file_path": decision["file_path"],
+                "status": "skipped",
+                "reason": "; ".join(decision["reasons"]),
+                "triage": {"action": decision["action"], "reasons": decision["reasons"], "size_bytes": decision["size_bytes"]}
+            })
+    parsed_files = [parsed_by_order[order] for order in sorted(parsed_by_order)]
+
+    # 3. 프로젝트 전역 심볼 테이블로 파일 간 호출(CALLS)을 해석하고, 미뤄 둔 관계를 저장합니다.
+    # 체크포인트에는 해석 전 결과가 저장되어 있고 해석은 결정적이므로, 재개 시에도 같은 결과가 나옵니다.
+    enter_stage("resolve")
+    emit({'status': 'in_progress', 'stage': '심볼 해석', 'detail': '파일 간 호출 관계 해석 중', 'progress': 100})
+    resolution_stats = resolve_cross_file_calls(parsed_files, str(project_root))
+    # 관계가 새로 생긴 노드는 스트리밍 중 계산한 임베딩을 다시 계산합니다.
+    touched_ids = set()
+    for batch_start in range(0, len(parsed_files), ANALYSIS_INGEST_BATCH_FILES):
+        check_cancelled()
+        entities = []
+        relationships = []
+        for parsed in parsed_files[batch_start:batch_start + ANALYSIS_INGEST_BATCH_FILES]:
+            entities.extend(e for e in parsed["extracted_entities"] if e.get("type") == "ExternalCallTarget")
+            relationships.extend(parsed["extracted_relationships"][i] for i in parsed["deferred_indices"])
+        touched_ids.update(rel["source_id"] for rel in relationships)
+        touched_ids.update(rel["target_id"] for rel in relationships)
+        if not relationships and not entities:
+            continue
+        try:
+            ingest_code_graph_data(entities, relationships)
+        except Exception as e:
+            logger.error(f"Error ingesting resolved calls: {e}")
+
+    # 4. 파일마다 따로 생긴 중복 노드를 프로젝트 단위로 합칩니다. (실패해도 분석 결과에는 영향 없음)
+    compaction_report = None
+    if COMPACT_AFTER_INGEST and parsed_files and not _stage_done(job, "compact"):
+        enter_stage("compact")
+        emit({'status': 'in_progress', 'stage': '그래프 압축', 'detail': '중복 노드 병합 중', 'progress': 100})
+        try:
+            compaction_report = compact_graph(str(project_root))
+        except Exception as e:
+            logger.warning(f"Failed to compact graph: {e}")
+
+    # 모든 파일 분석 완료 후 최종 요약 전송
+    file_analysis_progress = 100
+    final_summary = {
+        "total_files_for_analysis": total_files,
+        "analyzed_files_details": analysis_summary_details,
+        "symbol_resolution": resolution_stats,
+        "compaction": compaction_report,
+        "pipeline": pipeline_metrics,
+        "triage": {
+            "skipped": sum(1 for decision in triage_decisions if decision["action"] == SKIP),
+            "downranked": sum(1 for decision in triage_decisions if decision["action"] == DOWNRANK)
+        }
+    }
+    emit({'status': 'in_progress', 'analysis_summary': final_summary, 'progress': file_analysis_progress})
+
+    # 5. 파이프라인에서 계산하지 못한 노드(공유 외부 노드, 관계가 바뀐 노드 등)만 임베딩합니다.
+    if not _stage_done(job, "embed"):
+        enter_stage("embed")
+        emit({'status': 'in_progress', 'analysis_summary': '코드 임베딩 생성 시작...', 'progress': 0})
+
+        def embedding_progress_callback(percent: float, message: str):
+            emit({'status': 'in_progress', 'stage': '임베딩', 'detail': message, 'progress': percent})
+
+        try:
+            final_summary["embedding"] = run_incremental_embedding(streamed_embeddings, touched_ids, embedding_progress_callback)
+        except Exception as e:
+            logger.error(f"임베딩 파이프라인 실행 중 오류 발생: {e}", exc_info=True)
+            embedding_progress_callback(100, f"오류 발생: {str(e)}")
+
+    # 6. 탐색용 그래프 스냅샷과 시각화용 집계 그래프를 미리 계산해 둡니다. (실패해도 분석 결과에는 영향 없음)
+    enter_stage("index")
+    emit({'status': 'in_progress', 'stage': '인덱스 구축', 'detail': '그래프 스냅샷 생성 중', 'progress': 0})
+    try:
+        rebuild_graph_snapshot()
+    except Exception as e:
+        logger.warning(f"Failed to rebuild graph snapshot: {e}")
+    emit({'status': 'in_progress', 'stage': '인덱스 구축', 'detail': '집계 그래프 생성 중', 'progress': 50})
+    try:
+        warm_lod_cache()
+    except Exception as e:
+        logger.warning(f"Failed to warm LOD cache: {e}")
+    emit({'status': 'in_progress', 'stage': '인덱스 구축', 'detail': '인덱스 구축 완료', 'progress': 100})
+
+    finish_stage()
+    final_summary["stage_seconds"] = stage_seconds
+
+    emit({'status': 'completed', 'analysis_summary': '임베딩 생성 완료.', 'progress': 100})
+    return final_summary
@@ -0,0 +1,170 @@
+# app/services/answer_cache.py
+
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import List, Dict, Any, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# 답변 캐시를 저장할 로컬 SQLite 파일 경로
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", "answer_cache.sqlite3")
+# 쿼리 임베딩 간 코사인 유사도가 이 값 이상이면 같은 질문으로 간주합니다.
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.97"))
+# 캐시에 보관할 최대 답변 수 (초과 시 가장 오래 사용되지 않은 항목부터 제거)
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+
+
+def _evidence_key(node_ids: Sequence[str]) -> str:
+    """근거 노드 ID 집합을 순서와 무관한 고정 길이 키로 변환합니다."""
+    joined = "\n".join(sorted(set(node_ids)))
+    return hashlib.sha1(joined.encode("utf-8")).hexdigest()
+
+
+def _to_vector(embedding: Sequence[float]) -> array:
+    return array("f", (float(v) for v in embedding))
+
+
+def _norm(vector: Sequence[float]) -> float:
+    return math.sqrt(sum(v * v for v in vector))
+
+
+class SemanticAnswerCache:
+    """
+    쿼리 임베딩 유사도 기반의 LLM 답변 캐시.
+
+    키는 (그래프 세대, 근거 노드 ID 집합, 쿼리 임베딩)이며,
+    같은 세대 + 같은 근거 집합 안에서 임베딩 유사도가 임계값 이상인 질문을 같은 질문으로 봅니다.
+    항목은 로컬 SQLite 파일에 저장되어 서버 재시작 후에도 유지됩니다.
+    """
+
+    def __init__(self, db_path: str = ANSWER_CACHE_PATH,
+                 similarity_threshold: float = ANSWER_CACHE_SIMILARITY,
+                 max_entries: int = ANSWER_CACHE_MAX_ENTRIES):
+        self.db_path = db_path
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                generation INTEGER NOT NULL,
+                evidence_key TEXT NOT NULL,
+                query TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                embedding_norm REAL NOT NULL,
+                answer TEXT NOT NULL,
+                evidence TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_answers_lookup ON answers (generation, evidence_key)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_answers_access ON answers (last_access)")
+        self._conn.commit()
+
+    def lookup(self, query_embedding: Sequence[float], evidence_node_ids: Sequence[str],
+               generation: int) -> Optional[Dict[str, Any]]:
+        """
+        같은 그래프 세대 / 같은 근거 노드 집합으로 저장된 답변 중 가장 유사한 질문의 답변을 찾습니다.
+
+        Returns:
+            Optional[Dict]: {'query', 'answer', 'evidence', 'similarity'} 또는 None
+        """
+        query_vector = _to_vector(query_embedding)
+        query_norm = _norm(query_vector)
+        if query_norm == 0:
+            return None
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, query, embedding, embedding_norm, answer, evidence FROM answers "
+                "WHERE generation = ? AND evidence_key = ?",
+                (generation, _evidence_key(evidence_node_ids)),
+            ).fetchall()
+
+            best = None
+            for row_id, query, blob, norm, answer, evidence in rows:
+                stored = array("f")
+                stored.frombytes(blob)
+                if len(stored) != len(query_vector) or norm == 0:
+                    continue
+                similarity = sum(a * b for a, b in zip(query_vector, stored)) / (query_norm * norm)
+                if similarity >= self.similarity_threshold and (best is None or similarity > best[1]):
+                    best = (row_id, similarity, query, answer, evidence)
+
+            if best is None:
+                return None
+
+            row_id, similarity, query, answer, evidence = best
+            self._conn.execute(
+                "UPDATE answers SET last_access = ?, hits = hits + 1 WHERE id = ?",
+                (time.time(), row_id),
+            )
+            self._conn.commit()
+
+        logger.info(f"답변 캐시 적중 (유사도 {similarity:.4f}): '{query}'")
+        return {
+            "query": query,
+            "answer": answer,
+            "evidence": json.loads(evidence),
+            "similarity": similarity,
+        }
+
+    def store(self, query: str, query_embedding: Sequence[float], evidence_node_ids: Sequence[str],
+              generation: int, answer: str, evidence: List[Dict[str, Any]]) -> None:
+        """답변을 저장하고, 이전 세대 항목과 최대 개수를 초과한 오래된 항목을 정리합니다."""
+        vector = _to_vector(query_embedding)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO answers (generation, evidence_key, query, embedding, embedding_norm, "
+                "answer, evidence, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (generation, _evidence_key(evidence_node_ids), query, vector.tobytes(), _norm(vector),
+                 answer, json.dumps(evidence, ensure_ascii=False, default=str), now, now),
+            )
+            # 그래프가 바뀐 이전 세대의 답변은 다시 사용될 수 없으므로 제거합니다.
+            self._conn.execute("DELETE FROM answers WHERE generation < ?", (generation,))
+            self._conn.execute(
+                "DELETE FROM answers WHERE id IN ("
+                "SELECT id FROM answers ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM answers")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, hits = self._conn.execute(
+                "SELECT count(*), coalesce(sum(hits), 0) FROM answers"
+            ).fetchone()
+        return {"entries": entries, "total_hits": hits, "max_entries": self.max_entries,
+                "similarity_threshold": self.similarity_threshold}
+
+
+_answer_cache: Optional[SemanticAnswerCache] = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> SemanticAnswerCache:
+    """프로세스 전역 답변 캐시 인스턴스를 반환합니다."""
+    global _answer_cache
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            _answer_cache = SemanticAnswerCache()
+        return _answer_cache
@@ -0,0 +1,156 @@
+# app/services/blob_store.py
+
+import os
+import zlib
+import shutil
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstandard가 없으면 표준 라이브러리 zlib으로 압축합니다.
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", "code_blobs")
+# 압축 해제된 파일 내용을 메모리에 보관할 개수 (스니펫 조회 시 같은 파일을 반복해서 풀지 않도록)
+BLOB_CACHE_SIZE = int(os.getenv("BLOB_CACHE_SIZE", "64"))
+
+_ZSTD_SUFFIX = ".zst"
+_ZLIB_SUFFIX = ".zz"
+
+
+def content_hash(content: bytes) -> str:
+    """파일 내용의 해시 (blob 키)"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def make_code_ref(file_hash: str, start_byte: int, end_byte: int) -> Dict[str, Any]:
+    """노드/관계에 raw_text 대신 저장할 코드 위치 참조 속성을 만듭니다."""
+    return {"content_hash": file_hash, "byte_start": start_byte, "byte_end": end_byte}
+
+
+class CodeBlobStore:
+    """
+    파일 내용을 해시 기준으로 한 번만 압축 저장하는 로컬 blob 저장소.
+    노드와 관계는 (content_hash, byte_start, byte_end)만 가지고 있고, 코드 텍스트는 필요할 때 여기서 잘라 씁니다.
+    저장 위치: {BLOB_STORE_DIR}/{해시 앞 2자리}/{해시}.zst (zstandard가 없으면 .zz)
+    """
+
+    def __init__(self, root_dir: str = BLOB_STORE_DIR, cache_size: int = BLOB_CACHE_SIZE):
+        self.root = Path(root_dir)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, file_hash: str, suffix: str) -> Path:
+        return self.root / file_hash[:2] / f"{file_hash}{suffix}"
+
+    def _remember(self, file_hash: str, content: bytes):
+        with self._lock:
+            self._cache[file_hash] = content
+            self._cache.move_to_end(file_hash)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def put(self, content: bytes) -> str:
+        """내용을 저장하고 해시를 반환합니다. 같은 내용이 이미 있으면 다시 쓰지 않습니다."""
+        file_hash = content_hash(content)
+        if self.exists(file_hash):
+            return file_hash
+
+        if zstandard is not None:
+            data, suffix = zstandard.ZstdCompressor(level=3).compress(content), _ZSTD_SUFFIX
+        else:
+            data, suffix = zlib.compress(content, 6), _ZLIB_SUFFIX
+        path = self._path(file_hash, suffix)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 동시에 같은 blob을 쓰더라도 깨진 파일이 보이지 않도록 임시 파일에 쓴 뒤 교체합니다.
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return file_hash
+
+    def import_from(self, source_root: str) -> int:
+        """다른 blob 저장소 디렉토리(분석 결과물 등)에서 이 저장소에 없는 blob만 복사하고, 복사한 개수를 반환합니다."""
+        copied = 0
+        for source in Path(source_root).glob("*/*"):
+            if source.suffix not in (_ZSTD_SUFFIX, _ZLIB_SUFFIX) or self.exists(source.stem):
+                continue
+            target = self._path(source.stem, source.suffix)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, target)
+            copied += 1
+        return copied
+
+    def exists(self, file_hash: str) -> bool:
+        return self._path(file_hash, _ZSTD_SUFFIX).exists() or self._path(file_hash, _ZLIB_SUFFIX).exists()
+
+    def get(self, file_hash: str) -> Optional[bytes]:
+        """해시에 해당하는 전체 내용을 반환합니다. 없으면 None."""
+        with self._lock:
+            cached = self._cache.get(file_hash)
+            if cached is not None:
+                self._cache.move_to_end(file_hash)
+                return cached
+
+        zstd_path = self._path(file_hash, _ZSTD_SUFFIX)
+        zlib_path = self._path(file_hash, _ZLIB_SUFFIX)
+        try:
+            if zstd_path.exists():
+                if zstandard is None:
+                    logger.error(f"zstandard 모듈이 없어 blob을 읽을 수 없습니다: {zstd_path}")
+                    return None
+                content = zstandard.ZstdDecompressor().decompress(zstd_path.read_bytes())
+            elif zlib_path.exists():
+                content = zlib.decompress(zlib_path.read_bytes())
+            else:
+                return None
+        except Exception as e:
+            logger.error(f"blob을 읽는 중 오류 발생 ({file_hash}): {e}")
+            return None
+
+        self._remember(file_hash, content)
+        return content
+
+    def read_text(self, file_hash: str, byte_start: int, byte_end: int) -> Optional[str]:
+        """blob의 바이트 구간을 텍스트로 반환합니다."""
+        content = self.get(file_hash)
+        if content is None:
+            return None
+        return content[byte_start:byte_end].decode("utf-8", errors="ignore")
+
+    def materialize(self, item: Dict[str, Any]) -> Optional[str]:
+        """content_hash / byte_start / byte_end 속성을 가진 노드 또는 관계의 코드 텍스트를 만듭니다."""
+        if not item or item.get("content_hash") is None or item.get("byte_start") is None or item.get("byte_end") is None:
+            return None
+        return self.read_text(item["content_hash"], item["byte_start"], item["byte_end"])
+
+
+_blob_store: Optional[CodeBlobStore] = None
+_blob_store_lock = threading.Lock()
+
+
+def get_blob_store() -> CodeBlobStore:
+    global _blob_store
+    if _blob_store is None:
+        with _blob_store_lock:
+            if _blob_store is None:
+                _blob_store = CodeBlobStore()
+    return _blob_store
+
+
+def configure_blob_store(root_dir: str) -> CodeBlobStore:
+    """전역 blob 저장소의 위치를 바꿉니다. (오프라인 분석에서 추출 결과와 함께 blob을 결과물 디렉토리에 저장하기 위함)"""
+    global _blob_store
+    with _blob_store_lock:
+        _blob_store = CodeBlobStore(root_dir)
+    return _blob_store
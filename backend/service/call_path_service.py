@@ -0,0 +1,185 @@
+# app/services/call_path_service.py
+
+import time
+import logging
+from typing import Dict, List, Any, Optional, Iterable, Iterator
+
+from service.graph_snapshot import GraphSnapshot
+
+logger = logging.getLogger(__name__)
+
+# 호출 경로 탐색에 기본으로 사용할 관계 유형
+DEFAULT_PATH_REL_TYPES = ("CALLS", "IMPORTS_MODULE", "IMPORTS_NAME")
+
+# 경로 끝점으로 이름 검색 시 후보가 될 노드 레이블
+_ENDPOINT_LABELS = ("Function", "Class", "File", "ExternalCallTarget", "Module", "ImportedName")
+
+
+def resolve_endpoints(snapshot: GraphSnapshot, value: str) -> List[int]:
+    """노드 ID 또는 이름(함수/클래스 등)을 스냅샷 노드 인덱스 목록으로 변환합니다."""
+    idx = snapshot.index(value)
+    if idx is not None:
+        return [idx]
+    candidates: List[int] = []
+    for label in _ENDPOINT_LABELS:
+        candidates.extend(snapshot.find_nodes(label=label, name=value))
+    return candidates
+
+
+def _chains(parents: Dict[int, List[int]], node: int, limit: int) -> Iterator[List[int]]:
+    """parents 그래프를 따라 node에서 시작점(부모 없음)까지의 체인을 최대 limit개 생성합니다."""
+    produced = 0
+    stack = [(node, [node])]
+    while stack and produced < limit:
+        current, chain = stack.pop()
+        current_parents = parents.get(current) or []
+        if not current_parents:
+            produced += 1
+            yield chain
+            continue
+        for parent in current_parents:
+            stack.append((parent, chain + [parent]))
+
+
+def _edge_type(snapshot: GraphSnapshot, source: int, target: int, rel_types: Iterable[str]) -> Optional[str]:
+    for rel_type in rel_types:
+        if target in snapshot.neighbors(source, [rel_type], "out").tolist():
+            return rel_type
+    return None
+
+
+def find_call_paths(
+    snapshot: GraphSnapshot,
+    sources: List[int],
+    targets: List[int],
+    rel_types: Iterable[str] = DEFAULT_PATH_REL_TYPES,
+    k: int = 3,
+    max_depth: int = 8,
+    time_budget_ms: int = 500,
+    max_visited: int = 200000,
+) -> Dict[str, Any]:
+    """
+    sources에서 targets까지의 최단 경로(및 차선 경로)를 양방향 BFS로 찾습니다.
+
+    순방향(나가는 간선)과 역방향(들어오는 간선) 탐색을 번갈아 한 레벨씩 확장하며,
+    두 탐색이 만나는 노드에서 경로를 조립합니다. k개를 찾거나 max_depth에 도달하면 종료합니다.
+    시간/방문 노드 예산을 넘으면 그때까지 찾은 경로를 partial 상태로 반환합니다.
+
+    Returns:
+        Dict: {'status': 'complete' | 'partial', 'reason', 'paths': [[노드 인덱스, ...], ...], 'stats': {...}}
+    """
+    rel_types = list(rel_types)
+    started = time.perf_counter()
+    deadline = started + time_budget_ms / 1000.0
+
+    fwd_dist: Dict[int, int] = {s: 0 for s in sources}
+    fwd_parents: Dict[int, List[int]] = {s: [] for s in sources}
+    bwd_dist: Dict[int, int] = {t: 0 for t in targets}
+    bwd_parents: Dict[int, List[int]] = {t: [] for t in targets}
+    fwd_frontier = list(fwd_dist.keys())
+    bwd_frontier = list(bwd_dist.keys())
+    fwd_depth = bwd_depth = 0
+
+    paths: List[List[int]] = []
+    seen_paths = set()
+
+    def collect(meeting: int):
+        for head in _chains(fwd_parents, meeting, k):
+            for tail in _chains(bwd_parents, meeting, k):
+                path = list(reversed(head)) + tail[1:]
+                key = tuple(path)
+                if key in seen_paths or len(set(path)) != len(path) or len(path) - 1 > max_depth:
+                    continue
+                seen_paths.add(key)
+                paths.append(path)
+                if len(paths) >= k:
+                    return
+
+    for meeting in set(sources) & set(targets):
+        collect(meeting)
+
+    status, reason = "complete", None
+    while len(paths) < k:
+        if fwd_depth + bwd_depth >= max_depth:
+            reason = "max_depth"
+            break
+        if not fwd_frontier and not bwd_frontier:
+            reason = "exhausted"
+            break
+
+        # 더 작은 프론티어 쪽을 확장합니다. (한쪽이 비었으면 다른 쪽)
+        expand_forward = bool(fwd_frontier) and (not bwd_frontier or len(fwd_frontier) <= len(bwd_frontier))
+        if expand_forward:
+            frontier, dist, parents, other_dist, direction = fwd_frontier, fwd_dist, fwd_parents, bwd_dist, "out"
+            fwd_depth += 1
+            depth = fwd_depth
+        else:
+            frontier, dist, parents, other_dist, direction = bwd_frontier, bwd_dist, bwd_parents, fwd_dist, "in"
+            bwd_depth += 1
+            depth = bwd_depth
+
+        next_frontier = []
+        meetings = []
+        budget_hit = None
+        for node in frontier:
+            if time.perf_counter() > deadline:
+                budget_hit = "time_budget"
+                break
+            for neighbor in snapshot.neighbors(node, rel_types, direction).tolist():
+                known = dist.get(neighbor)
+                if known is None:
+                    if len(fwd_dist) + len(bwd_dist) >= max_visited:
+                        budget_hit = "visited_budget"
+                        break
+                    dist[neighbor] = depth
+                    parents[neighbor] = [node]
+                    next_frontier.append(neighbor)
+                    if neighbor in other_dist:
+                        meetings.append(neighbor)
+                elif known == depth and node not in parents[neighbor]:
+                    # 같은 길이의 다른 최단 경로 (대안 경로 후보)
+                    parents[neighbor].append(node)
+            if budget_hit:
+                break
+
+        if expand_forward:
+            fwd_frontier = next_frontier
+        else:
+            bwd_frontier = next_frontier
+
+        for meeting in sorted(meetings, key=lambda m: fwd_dist[m] + bwd_dist[m]):
+            collect(meeting)
+            if len(paths) >= k:
+                break
+
+        if budget_hit:
+            status, reason = "partial", budget_hit
+            break
+
+    paths.sort(key=len)
+    return {
+        "status": status,
+        "reason": reason,
+        "paths": paths[:k],
+        "stats": {
+            "visited_forward": len(fwd_dist),
+            "visited_backward": len(bwd_dist),
+            "forward_depth": fwd_depth,
+            "backward_depth": bwd_depth,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        },
+    }
+
+
+def describe_paths(snapshot: GraphSnapshot, paths: List[List[int]], rel_types: Iterable[str]) -> List[Dict[str, Any]]:
+    """노드 인덱스 경로를 API 응답용 노드/관계 정보로 변환합니다."""
+    rel_types = list(rel_types)
+    described = []
+    for path in paths:
+        nodes = [snapshot.node(idx) for idx in path]
+        edges = [
+            {"source": snapshot.node_ids[u], "target": snapshot.node_ids[v], "type": _edge_type(snapshot, u, v, rel_types)}
+            for u, v in zip(path, path[1:])
+        ]
+        described.append({"length": len(path) - 1, "nodes": nodes, "edges": edges})
+    return described
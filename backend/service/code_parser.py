@@ -1,12 +1,14 @@
 # backend/services/code_parser.py
 
 import os
-from typing import Dict, List, Any, Optional
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple, Union
 from tree_sitter import Language, Parser
 from tree_sitter_language_pack import get_language
 import traceback
 
 from service.extractors.python_extractor import extract_python_entities_and_relationships
+from service.source_reader import SourceBuffer, open_source
 
 try:
     # 예시로 Python과 JavaScript만 로드. 필요에 따라 더 추가하세요.
@@ -62,9 +64,11 @@ def detect_language_from_filename(file_path: str) -> Optional[str]:
     return _EXT_TO_LANGUAGE_MAP.get(ext)
 
 
-def parse_code_with_tree_sitter(code_content: str, language: str, file_path:str) -> Optional[Dict[str, Any]]:
+def parse_code_with_tree_sitter(code_content: Union[str, SourceBuffer], language: str, file_path:str) -> Optional[Dict[str, Any]]:
     """
     주어진 코드 내용을 Tree-sitter로 파싱하여 AST 정보를 반환합니다.
+    code_content는 파일에서 읽은 바이트 버퍼(bytes 또는 mmap, service/source_reader.open_source)를 그대로 받는 것이 기본이며,
+    문자열을 주면 UTF-8로 인코딩해서 사용합니다.
     반환되는 AST 정보는 JSON 직렬화를 위해 단순화된 형태입니다.
     이 함수에서 지식 그래프 노드와 엣지로 변환하기 위한 데이터를 추출합니다.
     """
@@ -74,17 +78,19 @@ def parse_code_with_tree_sitter(code_content: str, language: str, file_path:str)
 
     parser = Parser(language=_LANGUAGES[language]) 
 
-    tree = parser.parse(bytes(code_content, "utf8"))
+    # 바이트 버퍼는 복사/재인코딩 없이 그대로 파서에 넘깁니다.
+    source_bytes = code_content.encode("utf8") if isinstance(code_content, str) else code_content
+    tree = parser.parse(source_bytes)
     # -----------------tree object debug start-----------------
     if tree is None:
-        print(f"DEBUG: Parsing returned None for {language} file. Content length: {len(code_content)}")
+        print(f"DEBUG: Parsing returned None for {language} file. Content length: {len(source_bytes)}")
         return FileNotFoundError
 
     if not tree.root_node:
-        print(f"DEBUG: Parsing successful but root_node is None for {language} file. Content length: {len(code_content)}")
+        print(f"DEBUG: Parsing successful but root_node is None for {language} file. Content length: {len(source_bytes)}")
         return None
     
-    print(f"DEBUG: Successfully parsed {language} file. Root node type: {tree.root_node.type}, Text length: {len(tree.root_node.text)}")
+    print(f"DEBUG: Successfully parsed {language} file. Root node type: {tree.root_node.type}, Text length: {tree.root_node.end_byte}")
      # -----------------tree object debug end-----------------
     # s_exp_representation = tree.root_node.sexp()
     # print(f"DEBUG: S-Expression for {language} file (first 500 chars):\n{s_exp_representation[:500]}...")
@@ -96,7 +102,9 @@ def parse_code_with_tree_sitter(code_content: str, language: str, file_path:str)
         node_info = {
             "id": node_id,
             "type": node.type,
-            "text": node.text.decode('utf8', errors='ignore'),
+            # 노드마다 텍스트를 복사하면 (깊이 x 파일 크기)만큼 메모리를 쓰므로 바이트 구간만 기록합니다.
+            "start_byte": node.start_byte,
+            "end_byte": node.end_byte,
             "start_point": {"row": node.start_point[0], "column": node.start_point[1]},
             "end_point": {"row": node.end_point[0], "column": node.end_point[1]},
             "is_named": node.is_named,
@@ -123,7 +131,7 @@ def parse_code_with_tree_sitter(code_content: str, language: str, file_path:str)
 
     if language == 'python':
         extracted_entities, extracted_relationships = \
-            extract_python_entities_and_relationships(tree, _LANGUAGES[language],file_path)
+            extract_python_entities_and_relationships(tree, _LANGUAGES[language], file_path, source_bytes)
             # extract_python_entities_and_relationships(parsed_nodes, nodes_map)
     # TODO: elif language == 'javascript':
     #           extracted_entities, extracted_relationships = \
@@ -138,4 +146,37 @@ def parse_code_with_tree_sitter(code_content: str, language: str, file_path:str)
         "nodes": parsed_nodes, # 전체 AST 노드 (디버깅/세부 분석용)
         "extracted_entities": extracted_entities,
         "extracted_relationships": extracted_relationships
-    }
\ No newline at end of file
+    }
+
+
+def parse_file_for_analysis(file_path: Union[str, Path], relative_path: str) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    파일 하나를 읽어 파싱하고, 분석 요약용 정보와 추출 결과(엔티티/관계)만 반환합니다.
+    (전체 AST는 반환하지 않으므로 다른 프로세스로 결과를 넘기기에도 적합합니다)
+
+    Returns:
+        Tuple: ({'file_path', 'status', ...}, {'extracted_entities', 'extracted_relationships'} 또는 None)
+    """
+    file_path = Path(file_path)
+    language = detect_language_from_filename(str(file_path))
+    if not language:
+        return {"file_path": relative_path, "status": "skipped", "reason": "Unknown or unsupported file type for parsing"}, None
+    try:
+        with open_source(file_path) as source:
+            parsed_data = parse_code_with_tree_sitter(source, language, file_path)
+    except Exception as e:
+        print(f"Error processing file {file_path}: {e}")
+        return {"file_path": relative_path, "status": "error", "message": str(e)}, None
+    if not parsed_data:
+        return {"file_path": relative_path, "status": "failed_parsing",
+                "reason": f"No parser available or parsing failed for language: {language}"}, None
+    return {
+        "file_path": relative_path,
+        "status": "success",
+        "language": language,
+        "extracted_entities_count": len(parsed_data.get("extracted_entities", [])),
+        "extracted_relationships_count": len(parsed_data.get("extracted_relationships", []))
+    }, {
+        "extracted_entities": parsed_data["extracted_entities"],
+        "extracted_relationships": parsed_data["extracted_relationships"]
+    }
@@ -0,0 +1,392 @@
+# app/services/diff_analysis.py
+
+import os
+import time
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+from service.file_name_preprocessor import get_code_files_for_analysis
+from service.file_triage import SKIP
+from service.code_parser import parse_file_for_analysis
+from service.symbol_resolver import resolve_cross_file_calls, assign_shared_node_ids
+from service.git_diff import get_changed_files, resolve_revision, ensure_head_checked_out, ADDED, MODIFIED, DELETED, RENAMED
+from service.analysis_jobs import AnalysisJobStore, AnalysisCancelled
+
+logger = logging.getLogger(__name__)
+
+# 변경 분석 단계 (작업의 stage 컬럼에 기록됩니다. 변경분 적용은 여러 번 실행해도 결과가 같으므로 재개 시 처음부터 다시 실행합니다)
+DIFF_STAGES = ("diff", "parse", "resolve", "apply", "embed", "index", "done")
+# 변경으로 호출 해석 결과가 달라질 수 있어 함께 다시 추출하는 파일
+DEPENDENT = "dependent"
+
+# 한 트랜잭션으로 적용할 파일 수
+DIFF_APPLY_BATCH_FILES = int(os.getenv("DIFF_APPLY_BATCH_FILES", "16"))
+# 변경 분석 후 그래프 스냅샷/집계 그래프를 다시 만들지 여부.
+# 둘 다 그래프 전체를 읽으므로 기본값은 false이며, 세대 번호가 바뀌어 이전 스냅샷은 사용되지 않습니다.
+DIFF_REBUILD_INDEX = os.getenv("DIFF_ANALYSIS_REBUILD_INDEX", "false").lower() == "true"
+
+
+def carry_node_identity(entities: List[Dict[str, Any]], relationships: List[Dict[str, Any]],
+                        old_nodes: List[Dict[str, Any]], file_path: str
+                        ) -> Tuple[Dict[str, str], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    새로 추출한 파일의 엔티티가 그래프에 이미 있던 노드의 ID를 이어받도록 ID를 바꿉니다. (엔티티/관계를 제자리에서 수정)
+    다른 파일에서 들어오는 관계와 임베딩이 노드 ID 기준이므로, 수정/이름 변경된 파일에서도 같은 정의는 같은 노드로 유지됩니다.
+
+    - File 노드는 경로(이름)가 바뀌어도 파일당 하나이므로 그대로 이어받습니다.
+    - 그 외 정의는 (레이블, 이름)이 같은 노드끼리 시작 줄 순서대로 짝짓습니다. (같은 이름이 여러 번 정의된 경우)
+    - 새 경로에 이미 노드가 있으면(이전 실행에서 일부 적용된 경우) 그 노드만 이어받고 이전 경로의 노드는 삭제합니다.
+
+    Args:
+        old_nodes: load_file_nodes 결과 중 이 파일의 이전/새 경로 노드 ([{'id', 'label', 'name', 'start_line', 'file_path'}, ...])
+        file_path: 새 경로
+
+    Returns:
+        Tuple: ({새 ID: 이어받은 ID}, 삭제할 기존 노드 목록, ID를 이어받은 기존 노드 목록)
+    """
+    at_new_path = [node for node in old_nodes if node["file_path"] == file_path]
+    candidates = at_new_path if at_new_path else old_nodes
+    candidate_ids = {node["id"] for node in candidates}
+    removed = [node for node in old_nodes if node["id"] not in candidate_ids]
+
+    def line(item: Dict[str, Any]) -> int:
+        return item.get("start_line") or 0
+
+    old_by_key: Dict[Tuple[str, Optional[str]], List[Dict[str, Any]]] = {}
+    for node in sorted(candidates, key=line):
+        key = (node["label"], None if node["label"] == "File" else node["name"])
+        old_by_key.setdefault(key, []).append(node)
+
+    id_map: Dict[str, str] = {}
+    rewired: List[Dict[str, Any]] = []
+    for entity in sorted((e for e in entities if e.get("file_path") == file_path), key=line):
+        key = (entity.get("type"), None if entity.get("type") == "File" else entity.get("name"))
+        matches = old_by_key.get(key)
+        if matches:
+            node = matches.pop(0)
+            id_map[entity["id"]] = node["id"]
+            rewired.append(node)
+    for remaining in old_by_key.values():
+        removed.extend(remaining)
+
+    if id_map:
+        for entity in entities:
+            entity["id"] = id_map.get(entity["id"], entity["id"])
+        for rel in relationships:
+            rel["source_id"] = id_map.get(rel["source_id"], rel["source_id"])
+            rel["target_id"] = id_map.get(rel["target_id"], rel["target_id"])
+    return id_map, removed, rewired
+
+
+def _within_selection(rel_path: Optional[str], selected_paths: List[str]) -> bool:
+    if rel_path is None:
+        return False
+    for selected in selected_paths:
+        selected = os.path.normpath(selected).replace(os.sep, "/").strip("/")
+        if selected in ("", ".") or rel_path == selected or rel_path.startswith(selected + "/"):
+            return True
+    return False
+
+
+def _add_counts(total: Dict[str, int], counts: Dict[str, int]):
+    for key, count in counts.items():
+        total[key] = total.get(key, 0) + count
+
+
+def run_diff_analysis_job(
+    job: Dict[str, Any],
+    store: AnalysisJobStore,
+    emit: Callable[[Dict[str, Any]], None],
+    is_cancelled: Callable[[], bool],
+) -> Dict[str, Any]:
+    """
+    두 리비전 사이에서 바뀐 파일만 다시 분석해 그래프와 임베딩에 변경분을 반영합니다. (백그라운드 스레드에서 호출됨)
+
+    1. git diff로 추가/수정/삭제/이름 변경된 파일을 구하고, 작업의 선택 경로와 분석 대상 규칙(제외 패턴, 선별)을 적용합니다.
+    2. 바뀐 파일만 다시 추출하고, 기존 노드의 ID를 이어받습니다. (carry_node_identity)
+    3. 삭제되는 정의를 호출하던 파일 등 호출 해석 결과가 달라질 파일(의존 파일)도 함께 다시 추출합니다.
+    4. 호출된 이름의 정의만 그래프에서 읽어 교차 파일 호출을 해석하고, 파일 단위 트랜잭션으로 변경분을 적용합니다.
+    5. 삭제된 노드의 임베딩은 버리고, 바뀐 노드와 그 이웃만 다시 임베딩합니다.
+
+    모든 단계가 바뀐 파일(과 그 의존 파일) 수에 비례하며, 그래프 전체를 읽는 스냅샷 재구축은 DIFF_REBUILD_INDEX일 때만 실행합니다.
+    파일 내용은 작업 트리에서 읽으므로 head를 주면 그 커밋이 체크아웃되어 있어야 합니다. (head가 없으면 base와 작업 트리를 비교)
+
+    Returns:
+        Dict: 분석 요약
+    """
+    from db.graph_delta import (load_file_nodes, find_shared_node_ids, load_symbol_entities,
+                                find_dependent_files, apply_file_graph_delta)
+    from db.graph_compaction import COMPACTABLE_LABELS
+    from service.ai_data_pipeline import apply_embedding_delta
+
+    job_id = job["job_id"]
+    project_root = Path(job["project_root"])
+    root_str = str(project_root)
+    options = job.get("options") or {}
+    base = options["base_revision"]
+    head = options.get("head_revision")
+
+    def check_cancelled():
+        if is_cancelled():
+            raise AnalysisCancelled()
+
+    stage_seconds: Dict[str, float] = {}
+    current_stage = {"name": None, "started": 0.0}
+
+    def finish_stage():
+        if current_stage["name"] is not None:
+            stage_seconds[current_stage["name"]] = round(time.perf_counter() - current_stage["started"], 3)
+
+    def enter_stage(stage: str):
+        check_cancelled()
+        finish_stage()
+        current_stage["name"], current_stage["started"] = stage, time.perf_counter()
+        store.update_job(job_id, stage=stage)
+
+    # 1. 변경 파일 목록
+    enter_stage("diff")
+    emit({'status': 'info', 'message': f'변경 파일 확인 중: {base}..{head or "작업 트리"}', 'progress': 0})
+    head_commit = ensure_head_checked_out(project_root, head) if head else None
+    base_commit = resolve_revision(project_root, base)
+
+    items: List[Dict[str, Any]] = []
+    change_counts = {ADDED: 0, MODIFIED: 0, DELETED: 0, RENAMED: 0, DEPENDENT: 0}
+    for change in get_changed_files(project_root, base, head):
+        status, path, old_path = change["status"], change["path"], change["old_path"]
+        if status == RENAMED:
+            old_selected = _within_selection(old_path, job["selected_paths"])
+            new_selected = _within_selection(path, job["selected_paths"])
+            if not new_selected:
+                status, path, old_path = DELETED, old_path, None
+            elif not old_selected:
+                status, old_path = ADDED, None
+            if not (old_selected or new_selected):
+                continue
+        elif not _within_selection(path, job["selected_paths"]):
+            continue
+        change_counts[status] += 1
+        items.append({
+            "status": status,
+            "relative_path": path,
+            # 새 내용을 추출할 경로 (삭제면 None)와 기존 노드를 찾을 경로
+            "file_path": None if status == DELETED else str(project_root / path),
+            "lookup_paths": sorted({str(project_root / p) for p in (path, old_path) if p}),
+        })
+
+    # 분석 대상 규칙(제외 패턴, .gitignore, 선별)을 통과한 파일만 다시 추출합니다.
+    # 통과하지 못한 수정 파일은 새 추출 결과가 없으므로 기존 노드가 삭제됩니다.
+    triage_decisions: List[Dict[str, Any]] = []
+    candidate_paths = [item["relative_path"] for item in items if item["file_path"]]
+    analyzable = {
+        str(path) for path in
+        (get_code_files_for_analysis(project_root, candidate_paths, triage_decisions=triage_decisions) if candidate_paths else [])
+    }
+    total_changes = len(items)
+    emit({'status': 'info', 'message': f'변경된 파일 {total_changes}개: {change_counts}', 'progress': 0})
+
+    # 2. 바뀐 파일 다시 추출 + ID 이어받기
+    enter_stage("parse")
+    details: List[Dict[str, Any]] = []
+    identity_stats = {"carried": 0, "new": 0, "removed": 0}
+    removed_nodes: List[Dict[str, Any]] = []
+
+    def extract(batch_items: List[Dict[str, Any]]):
+        old_nodes_by_path = load_file_nodes([path for item in batch_items for path in item["lookup_paths"]])
+        for index, item in enumerate(batch_items):
+            check_cancelled()
+            item["old_nodes"] = [
+                {**node, "file_path": path}
+                for path in item["lookup_paths"] for node in old_nodes_by_path.get(path, [])
+            ]
+            item["payload"] = None
+            if item["file_path"] and item["file_path"] in analyzable:
+                detail, item["payload"] = parse_file_for_analysis(item["file_path"], item["relative_path"])
+            elif item["file_path"]:
+                detail = {"file_path": item["relative_path"], "status": "skipped", "reason": "Excluded from analysis"}
+            else:
+                detail = {"file_path": item["relative_path"], "status": "deleted"}
+            detail["change"] = item["status"]
+
+            if item["payload"] is not None:
+                id_map, removed, rewired = carry_node_identity(
+                    item["payload"]["extracted_entities"], item["payload"]["extracted_relationships"],
+                    item["old_nodes"], item["file_path"]
+                )
+                carried_ids = set(id_map.values())
+                detail["carried_nodes"] = len(id_map)
+                identity_stats["carried"] += len(id_map)
+                identity_stats["new"] += sum(
+                    1 for entity in item["payload"]["extracted_entities"]
+                    if entity.get("file_path") == item["file_path"] and entity["id"] not in carried_ids
+                )
+            else:
+                removed, rewired = item["old_nodes"], []
+            item["removed"] = removed
+            item["rewired"] = rewired
+            identity_stats["removed"] += len(removed)
+            removed_nodes.extend(removed)
+            details.append(detail)
+            emit({'status': 'in_progress', 'stage': '변경 파일 분석', 'detail': f'{len(details)}/{total_changes} 파일 처리 중',
+                  'progress': len(details) / max(1, total_changes) * 100})
+
+    extract(items)
+    store.update_job(job_id, total_files=len(items), processed_files=len(items))
+
+    # 3. 호출 해석 결과가 달라질 수 있는 파일을 함께 다시 추출합니다. (한 단계만, 내용은 그대로이므로 ID를 모두 이어받음)
+    changed_paths = sorted({path for item in items for path in item["lookup_paths"]})
+    moved_paths = sorted({
+        path for item in items for path in item["lookup_paths"] if path != item["file_path"]
+    })
+    new_symbol_names = set()
+    for item in items:
+        if item["payload"] is None:
+            continue
+        rewired_ids = {node["id"] for node in item["rewired"]}
+        new_symbol_names.update(
+            entity["name"] for entity in item["payload"]["extracted_entities"]
+            if entity.get("type") in ("Function", "Class") and entity.get("name") and entity["id"] not in rewired_ids
+        )
+    dependent_paths = find_dependent_files(removed_nodes, moved_paths, new_symbol_names, root_str, changed_paths)
+    dependents = []
+    for path in dependent_paths:
+        file_path = Path(path)
+        if not file_path.is_file():
+            continue
+        dependents.append({
+            "status": DEPENDENT,
+            "relative_path": os.path.relpath(path, root_str).replace(os.sep, "/"),
+            "file_path": path,
+            "lookup_paths": [path],
+        })
+    if dependents:
+        analyzable.update(item["file_path"] for item in dependents)
+        total_changes += len(dependents)
+        change_counts[DEPENDENT] = len(dependents)
+        extract(dependents)
+        items.extend(dependents)
+        store.update_job(job_id, total_files=len(items), processed_files=len(items))
+
+    # 4. 교차 파일 호출 해석: 호출된 이름과 같은 이름의 정의만 그래프에서 읽습니다.
+    enter_stage("resolve")
+    emit({'status': 'in_progress', 'stage': '심볼 해석', 'detail': '파일 간 호출 관계 해석 중', 'progress': 100})
+    parsed_files = [
+        {"file_path": item["file_path"], **item["payload"]}
+        for item in items if item["payload"] is not None
+    ]
+    called_names = {
+        entity["name"]
+        for parsed in parsed_files for entity in parsed["extracted_entities"]
+        if entity.get("type") == "ExternalCallTarget" and entity.get("name")
+    }
+    excluded_paths = sorted({path for item in items for path in item["lookup_paths"]})
+    known_entities = load_symbol_entities(called_names, root_str, excluded_paths)
+    resolution_stats = resolve_cross_file_calls(parsed_files, root_str, known_entities=known_entities)
+
+    # 공유 노드(Module / ImportedName / ExternalCallTarget)는 프로젝트에 이미 있는 노드를 사용합니다. (압축이 필요 없도록)
+    names_by_label: Dict[str, set] = {}
+    for parsed in parsed_files:
+        for entity in parsed["extracted_entities"]:
+            if entity.get("type") in COMPACTABLE_LABELS and entity.get("name"):
+                names_by_label.setdefault(entity["type"], set()).add(entity["name"])
+    existing_shared = find_shared_node_ids(names_by_label, root_str)
+    assign_shared_node_ids(parsed_files, root_str, COMPACTABLE_LABELS, existing_shared)
+
+    # 5. 변경분 적용: 파일 단위 트랜잭션으로 노드/관계를 먼저 반영하고,
+    # 다른 변경 파일의 새 노드를 가리킬 수 있는 CALLS 관계는 모든 노드가 저장된 뒤에 반영합니다.
+    enter_stage("apply")
+    payload_by_path = {parsed["file_path"]: parsed for parsed in parsed_files}
+    # 관계 양 끝 노드의 레이블 (레이블별 id 인덱스로 조회하기 위함)
+    labels_by_id = {
+        entity["id"]: entity["type"]
+        for entities in known_entities.values() for entity in entities
+    }
+    labels_by_id.update(
+        (entity["id"], entity["type"])
+        for parsed in parsed_files for entity in parsed["extracted_entities"] if entity.get("type")
+    )
+    graph_delta = {"deleted_nodes": {}, "deleted_relationships": {}, "created_nodes": {}, "created_relationships": {}}
+    neighbor_ids: set = set()
+    deferred_calls: List[Dict[str, Any]] = []
+    for batch_start in range(0, len(items), DIFF_APPLY_BATCH_FILES):
+        check_cancelled()
+        batch = items[batch_start:batch_start + DIFF_APPLY_BATCH_FILES]
+        entities, relationships = [], []
+        for item in batch:
+            parsed = payload_by_path.get(item["file_path"])
+            if parsed is None:
+                continue
+            entities.extend(parsed["extracted_entities"])
+            for rel in parsed["extracted_relationships"]:
+                (deferred_calls if rel.get("type") == "CALLS" else relationships).append(rel)
+        result = apply_file_graph_delta(
+            [node for item in batch for node in item["removed"]],
+            [node for item in batch for node in item["rewired"]],
+            entities, relationships, known_labels=labels_by_id
+        )
+        for key in graph_delta:
+            _add_counts(graph_delta[key], result[key])
+        neighbor_ids.update(result["neighbor_ids"])
+        emit({'status': 'in_progress', 'stage': '변경분 적용', 'detail': f'{min(batch_start + len(batch), len(items))}/{len(items)} 파일 적용',
+              'progress': min(batch_start + len(batch), len(items)) / max(1, len(items)) * 100})
+
+    shared_candidates = sorted({shared_id for node in removed_nodes + [n for item in items for n in item["rewired"]]
+                                for shared_id in node.get("shared_ids", [])})
+    call_batch_size = DIFF_APPLY_BATCH_FILES * 100
+    for batch_start in range(0, max(len(deferred_calls), 1), call_batch_size):
+        check_cancelled()
+        last = batch_start + call_batch_size >= len(deferred_calls)
+        result = apply_file_graph_delta(
+            [], [], [], deferred_calls[batch_start:batch_start + call_batch_size],
+            shared_candidate_ids=shared_candidates if last else (), known_labels=labels_by_id
+        )
+        for key in graph_delta:
+            _add_counts(graph_delta[key], result[key])
+
+    # 6. 임베딩 변경분: 삭제된 노드는 버리고, 바뀐 파일의 노드와 관계가 바뀐 이웃만 다시 계산합니다.
+    enter_stage("embed")
+    removed_ids = {node["id"] for node in removed_nodes}
+    refresh_ids = {entity["id"] for parsed in parsed_files for entity in parsed["extracted_entities"]}
+    refresh_ids.update(rel["target_id"] for rel in deferred_calls)
+    refresh_ids.update(neighbor_ids)
+    final_summary: Dict[str, Any] = {
+        "mode": "diff",
+        "base_revision": base,
+        "base_commit": base_commit,
+        "head_revision": head,
+        "head_commit": head_commit,
+        "changes": change_counts,
+        "total_files_for_analysis": len(items),
+        "analyzed_files_details": details,
+        "identity": identity_stats,
+        "symbol_resolution": resolution_stats,
+        "graph_delta": graph_delta,
+        "triage": {"skipped": sum(1 for decision in triage_decisions if decision["action"] == SKIP)},
+    }
+
+    def embedding_progress_callback(percent: float, message: str):
+        emit({'status': 'in_progress', 'stage': '임베딩', 'detail': message, 'progress': percent})
+
+    try:
+        final_summary["embedding"] = apply_embedding_delta(removed_ids, refresh_ids, embedding_progress_callback)
+    except Exception as e:
+        logger.error(f"임베딩 변경분 반영 중 오류 발생: {e}", exc_info=True)
+        embedding_progress_callback(100, f"오류 발생: {str(e)}")
+
+    if DIFF_REBUILD_INDEX:
+        from service.graph_lod_service import warm_lod_cache
+        from service.graph_snapshot import rebuild_graph_snapshot
+
+        enter_stage("index")
+        emit({'status': 'in_progress', 'stage': '인덱스 구축', 'detail': '그래프 스냅샷 생성 중', 'progress': 0})
+        try:
+            rebuild_graph_snapshot()
+            warm_lod_cache()
+        except Exception as e:
+            logger.warning(f"Failed to rebuild graph indexes: {e}")
+
+    finish_stage()
+    final_summary["stage_seconds"] = stage_seconds
+    emit({'status': 'in_progress', 'analysis_summary': final_summary, 'progress': 100})
+    emit({'status': 'completed', 'analysis_summary': '변경분 반영 완료.', 'progress': 100})
+    return final_summary
@@ -0,0 +1,25 @@
+# app/services/embedding_store.py
+
+import os
+import pickle
+from typing import Dict, List
+
+# 임베딩 결과 파일 경로 ({노드 ID: 벡터} 딕셔너리를 pickle로 저장)
+# 모델을 로드하지 않고도 읽고 쓸 수 있도록 임베딩 계산(ai_data_pipeline)과 분리되어 있습니다.
+EMBEDDING_DATA_PATH = "embedding_data.pkl"
+
+
+def load_embeddings(path: str = EMBEDDING_DATA_PATH) -> Dict[str, List[float]]:
+    """저장된 임베딩 파일을 읽습니다. 파일이 없으면 빈 딕셔너리를 반환합니다."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def save_embeddings(embeddings_with_ids: Dict[str, List[float]], path: str = EMBEDDING_DATA_PATH):
+    """임베딩 파일을 원자적으로 교체합니다. (검색 서비스가 쓰다 만 파일을 읽지 않도록)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(embeddings_with_ids, f)
+    os.replace(tmp_path, path)
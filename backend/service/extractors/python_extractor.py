@@ -3,9 +3,19 @@ from typing import Dict, List, Any, Tuple, Optional
 from pathlib import Path
 from tree_sitter import Language, Tree, Query, QueryCursor, Node # QueryCursor와 Node 임포트 확인
 
+from service.blob_store import get_blob_store, make_code_ref # 코드 텍스트는 blob 저장소에 한 번만 저장
+from service.source_reader import SourceBuffer, count_lines
+from service.symbol_resolver import SELF_RECEIVERS # 같은 클래스의 메서드를 가리키는 수신 객체 이름
+
 # 쿼리 파일 경로 설정 (extractors/queries/python/)
 QUERY_DIR = Path(__file__).parent / "queries" / "python"
 
+# 정의(엔티티) 캡처는 관계 캡처보다 먼저 처리해야 같은 파일 안의 호출 대상/호출 주체를 찾을 수 있습니다.
+DEFINITION_CAPTURES = ("function.name", "class.name", "variable.name")
+
+# 호출 주체(CALLS의 source)로 사용할 수 있는 정의 노드 타입
+_ENCLOSING_DEFINITION_TYPES = ("function_definition", "class_definition")
+
 def load_query_source(query_filename: str) -> Optional[str]:
     """지정된 쿼리 파일을 로드합니다."""
     query_path = QUERY_DIR / query_filename
@@ -15,13 +25,48 @@ def load_query_source(query_filename: str) -> Optional[str]:
     print(f"WARNING: Query file not found: {query_path}")
     return None
 
+def _find_enclosing_definition_id(node: Node, definition_ids: Dict[int, str]) -> Optional[str]:
+    """노드를 감싸고 있는 가장 가까운 함수/클래스 정의의 엔티티 ID를 찾습니다."""
+    current = node.parent
+    while current is not None:
+        if current.type in _ENCLOSING_DEFINITION_TYPES and current.id in definition_ids:
+            return definition_ids[current.id]
+        current = current.parent
+    return None
+
+def _enclosing_class_name(node: Node, direct: bool = False) -> Optional[str]:
+    """
+    노드를 감싸고 있는 가장 가까운 클래스의 이름을 찾습니다.
+    direct=True면 사이에 함수 정의가 없을 때만 (클래스 본문에 바로 정의된 메서드인지 확인할 때) 반환합니다.
+    """
+    current = node.parent
+    while current is not None:
+        if current.type == "class_definition":
+            name_node = current.child_by_field_name("name")
+            return name_node.text.decode('utf8', errors='ignore') if name_node is not None else None
+        if direct and current.type == "function_definition":
+            return None
+        current = current.parent
+    return None
+
+def _from_import_module(import_from_node: Node) -> Tuple[Optional[str], int]:
+    """from-import 문의 모듈 문자열과 상대 임포트 단계 (from ..a import b -> ('..a', 2), from . import b -> ('.', 1))"""
+    module_node = import_from_node.child_by_field_name("module_name")
+    if module_node is None:
+        return None, 0
+    module_name = module_node.text.decode('utf8', errors='ignore')
+    return module_name, len(module_name) - len(module_name.lstrip("."))
+
 def extract_python_entities_and_relationships(
     tree: Tree,
     language_parser: Language,
-    file_path: Path # 파일 경로를 인자로 받도록 유지합니다.
+    file_path: Path, # 파일 경로를 인자로 받도록 유지합니다.
+    source_bytes: Optional[SourceBuffer] = None # 파싱에 사용한 원본 버퍼 (bytes 또는 mmap, 바이트 오프셋 기준)
 ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
     """
     Python AST를 Tree-sitter 쿼리를 사용하여 핵심 엔티티와 관계를 추출합니다.
+    코드 텍스트(raw_text)는 복사하지 않고, 파일 내용을 blob 저장소에 한 번 저장한 뒤
+    각 엔티티/관계에는 (content_hash, byte_start, byte_end) 참조만 남깁니다.
     """
     extracted_entities = []
     extracted_relationships = []
@@ -29,14 +74,20 @@ def extract_python_entities_and_relationships(
     # 엔티티의 고유 ID를 매핑하기 위한 딕셔너리 (UUID 사용)
     # 키: (엔티티 타입, 이름, 파일 경로 또는 None), 값: UUID 문자열
     entity_id_map: Dict[Tuple[str, str, Optional[str]], str] = {}
-
-    try:
-        with open(file_path, 'rb') as f:
-            code_bytes = f.read()
-            total_lines = len(code_bytes.splitlines())
-    except Exception as e:
-        print(f"WARNING: Could not read file {file_path} to determine total lines: {e}")
-        total_lines = 0
+    # 정의 노드(tree-sitter Node.id) -> 엔티티 ID. 호출이 어느 함수/클래스 안에서 일어났는지 찾는 데 사용합니다.
+    definition_ids: Dict[int, str] = {}
+
+    # 파싱에 사용한 버퍼에서 줄 수를 계산합니다. (파일을 다시 읽지 않음)
+    code_bytes = source_bytes
+    if code_bytes is None:
+        try:
+            with open(file_path, 'rb') as f:
+                code_bytes = f.read()
+        except Exception as e:
+            print(f"WARNING: Could not read file {file_path} to determine total lines: {e}")
+            code_bytes = b""
+    total_lines = count_lines(code_bytes)
+    file_hash = get_blob_store().put(code_bytes)
 
     print(f"DEBUG(PythonExtractor): Starting entity/relationship extraction for {file_path}.")
 
@@ -68,13 +119,16 @@ def extract_python_entities_and_relationships(
             "name": file_path.name,
             "file_path": str(file_path),
             "start_line": 0,
-            "end_line": total_lines
+            "end_line": total_lines,
+            **make_code_ref(file_hash, 0, len(code_bytes))
         })
         entity_id_map[("File", str(file_path), None)] = file_id 
         print(f"DEBUG(PythonExtractor): Created File entity: {file_path.name} (ID: {file_id})")
 
         # 이제 딕셔너리의 key-value 쌍을 순회합니다. key는 캡처 이름, value는 노드 리스트입니다.
-        for name, nodes_list in captured_data.items():
+        # 정의 캡처를 먼저 처리하도록 정렬합니다.
+        ordered_captures = sorted(captured_data.items(), key=lambda item: 0 if item[0] in DEFINITION_CAPTURES else 1)
+        for name, nodes_list in ordered_captures:
             for node in nodes_list: # 각 캡처 이름에 해당하는 노드 리스트를 순회
                 node_text = node.text.decode('utf8', errors='ignore')
                 start_point = {"row": node.start_point[0], "column": node.start_point[1]}
@@ -84,18 +138,22 @@ def extract_python_entities_and_relationships(
                 if name == "function.name":
                     func_name = node_text
                     func_definition_node = node.parent 
+                    # 클래스 본문에 바로 정의된 메서드는 "클래스.메서드" 이름으로 매핑해, self.f() 호출만 이 메서드로 연결합니다.
+                    class_name = _enclosing_class_name(func_definition_node, direct=True)
                     
                     func_id = str(uuid.uuid4())
-                    entity_id_map[("Function", func_name, str(file_path))] = func_id
+                    entity_id_map[("Function", f"{class_name}.{func_name}" if class_name else func_name, str(file_path))] = func_id
+                    definition_ids[func_definition_node.id] = func_id
                     
                     extracted_entities.append({
                         "type": "Function",
                         "id": func_id,
                         "name": func_name,
+                        "class_name": class_name,
                         "file_path": str(file_path),
                         "start_line": start_point['row'],
                         "end_line": end_point['row'],
-                        "raw_text": func_definition_node.text.decode('utf8', errors='ignore')
+                        **make_code_ref(file_hash, func_definition_node.start_byte, func_definition_node.end_byte)
                     })
                     extracted_relationships.append({
                         "source_id": file_id,
@@ -113,6 +171,7 @@ def extract_python_entities_and_relationships(
                     
                     class_id = str(uuid.uuid4())
                     entity_id_map[("Class", class_name, str(file_path))] = class_id
+                    definition_ids[class_definition_node.id] = class_id
 
                     extracted_entities.append({
                         "type": "Class",
@@ -121,7 +180,7 @@ def extract_python_entities_and_relationships(
                         "file_path": str(file_path),
                         "start_line": start_point['row'],
                         "end_line": end_point['row'],
-                        "raw_text": class_definition_node.text.decode('utf8', errors='ignore')
+                        **make_code_ref(file_hash, class_definition_node.start_byte, class_definition_node.end_byte)
                     })
                     extracted_relationships.append({
                         "source_id": file_id,
@@ -147,7 +206,7 @@ def extract_python_entities_and_relationships(
                         "file_path": str(file_path),
                         "start_line": start_point['row'],
                         "end_line": end_point['row'],
-                        "raw_text": var_assignment_node.text.decode('utf8', errors='ignore')
+                        **make_code_ref(file_hash, var_assignment_node.start_byte, var_assignment_node.end_byte)
                     })
                     extracted_relationships.append({
                         "source_id": file_id,
@@ -162,11 +221,28 @@ def extract_python_entities_and_relationships(
                 # --- 관계 추출 (target_id 처리 포함) ---
                 elif name == "call.target.name":
                     called_name = node_text
-                    source_id = file_id 
-
-                    target_id = entity_id_map.get(("Function", called_name, str(file_path)))
-                    if not target_id:
-                        target_id = entity_id_map.get(("Class", called_name, str(file_path)))
+                    # 호출을 감싸는 함수/클래스가 호출 주체이며, 모듈 최상위 호출이면 파일이 주체입니다.
+                    source_id = _find_enclosing_definition_id(node, definition_ids) or file_id
+
+                    # obj.method() 형태의 호출이면 수신 객체 표현식(obj)을 기록합니다. (교차 파일 해석에 사용)
+                    receiver = None
+                    if node.parent is not None and node.parent.type == "attribute":
+                        receiver_node = node.parent.child_by_field_name("object")
+                        if receiver_node is not None:
+                            receiver = receiver_node.text.decode('utf8', errors='ignore')
+
+                    # self.f() / cls.f() 는 호출을 감싸는 클래스의 메서드로, 수신 객체가 없는 f() 는 모듈 최상위 정의로 연결합니다.
+                    # 그 외 obj.f() 는 임포트를 보고 교차 파일 해석에서 연결합니다. (service/symbol_resolver.py)
+                    receiver_class = None
+                    target_id = None
+                    if receiver in SELF_RECEIVERS:
+                        receiver_class = _enclosing_class_name(node)
+                        if receiver_class:
+                            target_id = entity_id_map.get(("Function", f"{receiver_class}.{called_name}", str(file_path)))
+                    elif receiver is None:
+                        target_id = entity_id_map.get(("Function", called_name, str(file_path)))
+                        if not target_id:
+                            target_id = entity_id_map.get(("Class", called_name, str(file_path)))
                     
                     if not target_id:
                         target_id = entity_id_map.get(("ExternalCallTarget", called_name, None))
@@ -186,15 +262,23 @@ def extract_python_entities_and_relationships(
                         "type": "CALLS",
                         "properties": {
                             "file_location": f"{start_point['row']}:{start_point['column']}",
-                            "raw_text": node.parent.text.decode('utf8', errors='ignore'),
-                            "called_name_str": called_name
+                            **make_code_ref(file_hash, node.parent.start_byte, node.parent.end_byte),
+                            "called_name_str": called_name,
+                            "receiver_str": receiver,
+                            "receiver_class_str": receiver_class
                         }
                     })
-                    print(f"DEBUG(PythonExtractor): Extracted CALLS from {file_path.name} to {called_name} (ID: {target_id}) at {start_point['row']}")
+                    print(f"DEBUG(PythonExtractor): Extracted CALLS from {source_id} ({file_path.name}) to {called_name} (ID: {target_id}) at {start_point['row']}")
 
                 elif name == "import.module":
                     module_name = node_text
                     source_id = file_id 
+                    # import numpy as np 의 np (교차 파일 해석에서 np.f() 를 numpy 모듈로 연결하는 데 사용)
+                    alias_name = None
+                    if node.parent is not None and node.parent.type == "aliased_import":
+                        alias_node = node.parent.child_by_field_name("alias")
+                        if alias_node is not None:
+                            alias_name = alias_node.text.decode('utf8', errors='ignore')
 
                     target_id = entity_id_map.get(("Module", module_name, None))
                     if not target_id:
@@ -213,7 +297,9 @@ def extract_python_entities_and_relationships(
                         "type": "IMPORTS_MODULE",
                         "properties": {
                             "file_location": f"{start_point['row']}:{start_point['column']}",
-                            "raw_text": node.parent.text.decode('utf8', errors='ignore')
+                            **make_code_ref(file_hash, node.parent.start_byte, node.parent.end_byte),
+                            "module_name_str": module_name,
+                            "alias_str": alias_name
                         }
                     })
                     print(f"DEBUG(PythonExtractor): Extracted IMPORTS_MODULE from {file_path.name} to {module_name} (ID: {target_id})")
@@ -233,13 +319,17 @@ def extract_python_entities_and_relationships(
                         entity_id_map[("ImportedName", imported_name, None)] = target_id
                         print(f"DEBUG(PythonExtractor): Created new ImportedName entity: {imported_name} (ID: {target_id})")
 
+                    # from X import name 에서 X와 상대 임포트 단계 (교차 파일 해석에 사용)
+                    module_name, relative_level = _from_import_module(node.parent)
                     extracted_relationships.append({
                         "source_id": source_id,
                         "target_id": target_id,
                         "type": "IMPORTS_NAME",
                         "properties": {
                             "file_location": f"{start_point['row']}:{start_point['column']}",
-                            "raw_text": node.parent.text.decode('utf8', errors='ignore')
+                            **make_code_ref(file_hash, node.parent.start_byte, node.parent.end_byte),
+                            "module_name_str": module_name,
+                            "relative_level": relative_level
                         }
                     })
                     print(f"DEBUG(PythonExtractor): Extracted IMPORTS_NAME from {file_path.name} to {imported_name} (ID: {target_id})")
@@ -247,6 +337,9 @@ def extract_python_entities_and_relationships(
                 elif name == "import.name_original":
                     original_name = node_text
                     source_id = file_id
+                    # from X import name as alias 에서 X와 alias (교차 파일 해석에서 alias() 를 X의 name으로 연결)
+                    module_name, relative_level = _from_import_module(node.parent.parent)
+                    alias_node = node.parent.child_by_field_name("alias")
 
                     target_id = entity_id_map.get(("ImportedName", original_name, None))
                     if not target_id:
@@ -265,8 +358,11 @@ def extract_python_entities_and_relationships(
                         "type": "IMPORTS_ALIASED_ORIGINAL",
                         "properties": {
                             "file_location": f"{start_point['row']}:{start_point['column']}",
-                            "raw_text": node.parent.text.decode('utf8', errors='ignore'),
-                            "original_name_str": original_name
+                            **make_code_ref(file_hash, node.parent.start_byte, node.parent.end_byte),
+                            "original_name_str": original_name,
+                            "alias_name_str": alias_node.text.decode('utf8', errors='ignore') if alias_node is not None else None,
+                            "module_name_str": module_name,
+                            "relative_level": relative_level
                         }
                     })
                     print(f"DEBUG(PythonExtractor): Extracted IMPORTS_ALIASED_ORIGINAL from {file_path.name} to {original_name} (ID: {target_id})")
@@ -293,7 +389,7 @@ def extract_python_entities_and_relationships(
                         "type": "IMPORTS_ALIAS",
                         "properties": {
                             "file_location": f"{start_point['row']}:{start_point['column']}",
-                            "raw_text": node.parent.text.decode('utf8', errors='ignore'),
+                            **make_code_ref(file_hash, node.parent.start_byte, node.parent.end_byte),
                             "alias_name_str": alias_name
                         }
                     })
@@ -319,7 +415,7 @@ def extract_python_entities_and_relationships(
                         "type": "IMPORTS_WILDCARD",
                         "properties": {
                             "file_location": f"{start_point['row']}:{start_point['column']}",
-                            "raw_text": node.parent.text.decode('utf8', errors='ignore')
+                            **make_code_ref(file_hash, node.parent.start_byte, node.parent.end_byte)
                         }
                     })
                     print(f"DEBUG(PythonExtractor): Extracted wildcard import from {file_path.name} (ID: {target_id})")
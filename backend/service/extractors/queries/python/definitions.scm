@@ -18,12 +18,25 @@
 
 ; Imports
 (import_statement
-  (dotted_name) @import.module)
+  name: (dotted_name) @import.module)
+; import numpy as np (별칭은 처리 시 aliased_import 노드에서 읽음)
+(import_statement
+  name: (aliased_import
+    name: (dotted_name) @import.module))
+(import_from_statement
+  module_name: (dotted_name) @import.module)
+; from X import name / from .X import name / from . import name
 (import_from_statement
-  module_name: (dotted_name) @import.module
+  module_name: [(dotted_name) (relative_import)]
   name: (dotted_name) @import.name)
+; from X import name as alias
+(import_from_statement
+  module_name: [(dotted_name) (relative_import)]
+  name: (aliased_import
+    name: (dotted_name) @import.name_original
+    alias: (identifier) @import.alias))
 (import_from_statement
-  module_name: (dotted_name) @import.module
+  module_name: (dotted_name)
   (wildcard_import) @import.wildcard)
 
 ; Variable Assignments
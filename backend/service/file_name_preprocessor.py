@@ -2,76 +2,136 @@
 
 import os
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 
 # code_parser 서비스에서 언어 감지 함수 임포트
 from .code_parser import detect_language_from_filename
+from .path_matcher import PathMatcher
+from .file_triage import triage_file, TRIAGE_ENABLED, ANALYZE, SKIP, DOWNRANK
 
-# 기본적으로 분석에서 제외할 파일/디렉토리 패턴
+# 기본적으로 분석에서 제외할 파일/디렉토리 패턴 (.gitignore 형식)
 # Git 저장소, 파이썬 캐시, Node.js 모듈, macOS 메타데이터 파일 등
+# 이름 전체와 비교하므로 '.env'는 '.environment/'를, 'venv/'는 'my_venv_tools/'를 제외하지 않습니다.
 DEFAULT_EXCLUDE_PATTERNS = [
-    ".git",
-    "__pycache__",
-    "node_modules",
+    ".git/",
+    "__pycache__/",
+    "node_modules/",
     ".DS_Store",
-    ".vscode", # IDE 설정 파일
-    "venv",    # Python 가상 환경
-    ".env",    # 환경 변수 파일
+    ".vscode/", # IDE 설정 파일
+    "venv/",    # Python 가상 환경
+    ".env",     # 환경 변수 파일
     "*.min.js", # 압축된 JS 파일
     "*.map",    # 소스 맵 파일
 ]
 
-def get_code_files_for_analysis(project_root: Path, selected_items: List[str]) -> List[Path]:
+# 추가 제외/포함 패턴 (쉼표로 구분된 .gitignore 형식 glob). 포함 패턴이 있으면 일치하는 파일만 분석합니다.
+ANALYSIS_EXCLUDE_GLOBS = [p.strip() for p in os.getenv("ANALYSIS_EXCLUDE_GLOBS", "").split(",") if p.strip()]
+ANALYSIS_INCLUDE_GLOBS = [p.strip() for p in os.getenv("ANALYSIS_INCLUDE_GLOBS", "").split(",") if p.strip()]
+# 프로젝트의 .gitignore 규칙을 적용할지 여부
+ANALYSIS_RESPECT_GITIGNORE = os.getenv("ANALYSIS_RESPECT_GITIGNORE", "true").lower() == "true"
+
+
+def _normalize_selection(project_root: Path, selected_items: List[str]) -> List[Tuple[str, Path]]:
     """
-    프론트엔드에서 선택된 경로 목록을 기반으로 실제 분석 대상 코드 파일 목록을 반환합니다.
-    디렉토리가 선택되면 해당 디렉토리의 모든 분석 가능한 하위 파일을 포함합니다.
+    선택된 경로를 프로젝트 기준 상대 경로로 정리하고, 이미 선택된 디렉토리 아래에 있는 항목은 제거합니다.
+    (부모 디렉토리와 그 안의 파일이 함께 선택되어도 각 파일은 한 번만 순회되므로, 전체 경로 집합을 만들 필요가 없습니다)
     """
-    files_to_analyze: List[Path] = []
-
+    candidates = []
     for item_path_str in selected_items:
         # print(f'Project root : {project_root}      item_path_str : {item_path_str}  ')
         full_item_path = project_root / item_path_str # pathlib.Path 객체로 경로 결합
-
         if not full_item_path.exists():
             print(f"Warning: Selected path does not exist: {full_item_path}")
             continue
+        rel_path = os.path.normpath(item_path_str).replace(os.sep, "/").strip("/")
+        if rel_path == ".":
+            rel_path = ""
+        candidates.append((rel_path, full_item_path))
+
+    # 얕은 경로부터 처리해야 상위 디렉토리가 먼저 선택됩니다.
+    candidates.sort(key=lambda item: (item[0].count("/") if item[0] else -1, item[0]))
+    selected_dirs = set()
+    selected = []
+    seen_files = set()
+    for rel_path, full_item_path in candidates:
+        parts = rel_path.split("/") if rel_path else []
+        if "" in selected_dirs or any("/".join(parts[:depth]) in selected_dirs for depth in range(1, len(parts))):
+            continue  # 이미 선택된 디렉토리 아래에 있음
+        if full_item_path.is_dir():
+            if rel_path in selected_dirs:
+                continue
+            selected_dirs.add(rel_path)
+        elif rel_path in seen_files:
+            continue
+        else:
+            seen_files.add(rel_path)
+        selected.append((rel_path, full_item_path))
+    return selected
+
 
+def get_code_files_for_analysis(project_root: Path, selected_items: List[str],
+                                include_globs: Optional[List[str]] = None,
+                                exclude_globs: Optional[List[str]] = None,
+                                triage_decisions: Optional[List[Dict[str, Any]]] = None,
+                                triage: bool = TRIAGE_ENABLED) -> List[Path]:
+    """
+    프론트엔드에서 선택된 경로 목록을 기반으로 실제 분석 대상 코드 파일 목록을 반환합니다.
+    디렉토리가 선택되면 해당 디렉토리의 모든 분석 가능한 하위 파일을 포함합니다.
+    제외 패턴과 .gitignore에 해당하는 디렉토리는 탐색 중에 건너뛰므로 하위를 읽지 않습니다.
+
+    triage가 켜져 있으면 파싱 전에 크기/바이너리/생성 코드/압축 코드 여부를 확인해(service/file_triage.py)
+    건너뛸 파일은 빼고, 우선순위를 낮출 파일은 목록의 맨 뒤로 보냅니다.
+
+    Args:
+        include_globs: 포함 패턴 (기본값: ANALYSIS_INCLUDE_GLOBS)
+        exclude_globs: 기본 제외 패턴에 더할 제외 패턴 (기본값: ANALYSIS_EXCLUDE_GLOBS)
+        triage_decisions: 주어지면 건너뛰거나 우선순위를 낮춘 파일의 판단 결과
+                          ({'file_path', 'action', 'reasons', 'size_bytes'})를 여기에 추가합니다.
+        triage: 파싱 전 선별 사용 여부 (기본값: ANALYSIS_TRIAGE_ENABLED)
+    """
+    matcher = PathMatcher(
+        project_root,
+        include_globs=include_globs if include_globs is not None else ANALYSIS_INCLUDE_GLOBS,
+        exclude_globs=DEFAULT_EXCLUDE_PATTERNS + (exclude_globs if exclude_globs is not None else ANALYSIS_EXCLUDE_GLOBS),
+        use_gitignore=ANALYSIS_RESPECT_GITIGNORE
+    )
+    files_to_analyze: List[Path] = []
+    downranked_files: List[Path] = []
+
+    def add_file(file_path: Path, rel_path: str):
+        if not triage:
+            files_to_analyze.append(file_path)
+            return
+        decision = triage_file(file_path)
+        if decision["action"] == SKIP:
+            print(f"Skipping file by triage: {file_path} ({'; '.join(decision['reasons'])})")
+        elif decision["action"] == DOWNRANK:
+            downranked_files.append(file_path)
+        else:
+            files_to_analyze.append(file_path)
+        if decision["action"] != ANALYZE and triage_decisions is not None:
+            triage_decisions.append({"file_path": rel_path, **decision})
+
+    for rel_path, full_item_path in _normalize_selection(project_root, selected_items):
         if full_item_path.is_file():
             # 파일이 직접 선택된 경우
-            if _is_analyzable_code_file(full_item_path):
-                files_to_analyze.append(full_item_path)
+            if matcher.is_file_selected(rel_path) and _is_analyzable_code_file(full_item_path):
+                add_file(full_item_path, rel_path)
             else:
                 print(f"Skipping non-analyzable file: {full_item_path}")
         elif full_item_path.is_dir():
-            # 디렉토리가 선택된 경우, 그 안의 모든 코드를 분석 대상으로 추가 (재귀 탐색)
-            # rglob('*')은 모든 하위 파일과 디렉토리를 포함합니다.
-            for file_path in full_item_path.rglob('*'):
-                if file_path.is_file() and _is_analyzable_code_file(file_path):
-                    files_to_analyze.append(file_path)
-    
-    # 중복 제거 (만약 부모 디렉토리와 특정 파일이 동시에 선택된 경우)
-    return list(set(files_to_analyze))
+            # 디렉토리가 선택된 경우, 그 안의 모든 코드를 분석 대상으로 추가 (제외된 디렉토리는 내려가지 않음)
+            for file_path, file_rel_path in matcher.walk_files(rel_path):
+                if _is_analyzable_code_file(file_path):
+                    add_file(file_path, file_rel_path)
+
+    return files_to_analyze + downranked_files
 
 
 def _is_analyzable_code_file(file_path: Path) -> bool:
     """
-    주어진 파일이 분석 가능한 코드 파일인지 확인합니다.
+    주어진 파일이 분석 가능한 코드 파일인지 확인합니다. (제외 패턴은 PathMatcher가 확인)
     - 파일 확장자를 통해 언어를 감지할 수 있는지 확인합니다.
-    - 제외 패턴에 해당하는지 확인합니다.
     """
-    if not file_path.is_file():
-        return False
-
-    # 1. 언어 감지 가능한 파일인지 확인
-    if detect_language_from_filename(str(file_path)) is None:
-        return False # 지원하지 않는 언어 또는 코드가 아닌 파일
-
-    # 2. 제외 패턴에 해당하는지 확인
-    for pattern in DEFAULT_EXCLUDE_PATTERNS:
-        if pattern.startswith('*'): # *.js 같은 와일드카드 패턴 처리
-            if file_path.name.endswith(pattern[1:]):
-                return False
-        elif pattern in str(file_path): # 경로 내에 패턴이 포함된 경우
-            return False
-            
-    return True
\ No newline at end of file
+    # 언어 감지 가능한 파일인지 확인
+    return detect_language_from_filename(str(file_path)) is not None
@@ -1,7 +1,10 @@
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Literal
-from schemas.file_node import FileNode
+from typing import Dict, List, Any, Optional, Tuple
 
 EXCLUDE_DIRS = {
     ".git",
@@ -27,54 +30,220 @@ INCLUDE_EXTENSIONS = {
     ".toml", ".md", ".txt", ".css"
 }
 
+# 한 깊이에서 읽어야 할 디렉토리가 이 수 이상이면 스레드 풀로 동시에 읽습니다. (네트워크 파일 시스템에서 효과가 큼)
+SCAN_PARALLEL_MIN_DIRS = int(os.getenv("SCAN_PARALLEL_MIN_DIRS", "32"))
+SCAN_WORKERS = int(os.getenv("SCAN_WORKERS", "8"))
 
-def scan_directory_recursive(
-    base_path: Path, current_path: Path, exclude_dirs: set = EXCLUDE_DIRS,
-    include_extensions: set = INCLUDE_EXTENSIONS
-) -> Optional[FileNode]:
-    if not current_path.exists():
-        return None
-
-    is_dir = current_path.is_dir()
-    node_type = "directory" if is_dir else "file"
-    name = current_path.name
-    relative_path = str(current_path.relative_to(base_path))
-    # print(f'base_path : {base_path}   current_path : {current_path}    relative_path : {relative_path}')
-    node = FileNode(
-        name=name,
-        type=node_type,
-        path=relative_path,
-        is_excluded_by_default=False
-    )
-
-    if is_dir and name in exclude_dirs:
-        node.is_excluded_by_default = True
-        node.children = [] # 하위 탐색 안함
-        return node
-    
-    # include_extensions를 사용시
-    # if not is_dir and current_path.suffix.lower() not in include_extensions:
-    #     return None
-
-
-    if is_dir:
-        children = []
+# 지연 로딩(부분 스캔)에서 사용하는 디렉토리 목록 캐시: 유지 시간(초)과 최대 디렉토리 수
+SCAN_CACHE_TTL = float(os.getenv("SCAN_CACHE_TTL", "30"))
+SCAN_CACHE_MAX_DIRS = int(os.getenv("SCAN_CACHE_MAX_DIRS", "20000"))
+
+# (이름, 디렉토리 여부, 심볼릭 링크 여부)
+_DirListing = Tuple[List[Tuple[str, bool, bool]], Optional[str]]
+
+
+def _list_directory(path: str) -> _DirListing:
+    """
+    디렉토리 하나를 읽습니다. DirEntry가 디렉토리 목록과 함께 받아 둔 파일 유형 정보를 그대로 사용하므로
+    항목마다 stat()을 다시 호출하지 않습니다.
+
+    Returns:
+        ([(이름, 디렉토리 여부, 심볼릭 링크 여부), ...], 오류 표시 문자열 또는 None)
+    """
+    entries = []
+    try:
+        with os.scandir(path) as iterator:
+            for entry in iterator:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                entries.append((entry.name, is_dir, is_dir and entry.is_symlink()))
+    except PermissionError:
+        print(f"Permission denied for directory: {path}")
+        return [], "Permission Denied"
+    except Exception as e:
+        print(f"Error scanning directory {path}: {e}")
+        return [], "Error"
+    return entries, None
+
+
+class DirectoryListingCache:
+    """
+    디렉토리 목록 캐시. 디렉토리의 mtime은 바로 아래 항목이 추가/삭제/이름 변경될 때 바뀌므로,
+    캐시된 mtime과 현재 mtime이 같고 유지 시간이 지나지 않았으면 다시 읽지 않습니다.
+    (mtime 해상도가 낮은 파일 시스템을 고려해 유지 시간으로 오래된 정도를 제한합니다)
+    """
+
+    def __init__(self, ttl: float = SCAN_CACHE_TTL, max_dirs: int = SCAN_CACHE_MAX_DIRS):
+        self.ttl = ttl
+        self.max_dirs = max_dirs
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[int, float, List[Tuple[str, bool, bool]]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def list_directory(self, path: str) -> _DirListing:
         try:
-            for item in os.scandir(current_path):
-                # 재귀 호출로 하위 노드 생성
-                child_node = scan_directory_recursive(base_path, Path(item.path), exclude_dirs, include_extensions)
-                if child_node:
-                    children.append(child_node)
-
-            node.children = children
-        except PermissionError:
-            print(f"Permission denied for directory: {current_path}")
-            node.children = []
-            node.name += " (Permission Denied)"
-        except Exception as e:
-            print(f"Error scanning directory {current_path}: {e}")
-            node.children = []
-            node.name += " (Error)"
-
-
-    return node
\ No newline at end of file
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return _list_directory(path)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached and cached[0] == mtime_ns and now - cached[1] < self.ttl:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return cached[2], None
+            self.misses += 1
+
+        entries, error = _list_directory(path)
+        if error is None:
+            with self._lock:
+                self._entries[path] = (mtime_ns, now, entries)
+                self._entries.move_to_end(path)
+                while len(self._entries) > self.max_dirs:
+                    self._entries.popitem(last=False)
+        return entries, error
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"directories": len(self._entries), "hits": self.hits, "misses": self.misses, "ttl_seconds": self.ttl}
+
+
+_listing_cache = DirectoryListingCache()
+
+
+def get_directory_listing_cache() -> DirectoryListingCache:
+    return _listing_cache
+
+
+def scan_directory_flat(
+    root_path: Path, exclude_dirs: set = EXCLUDE_DIRS, workers: int = SCAN_WORKERS,
+    max_depth: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    디렉토리 트리를 깊이 순서(BFS)로 반복 탐색해 평탄한 열 단위 배열로 반환합니다.
+    재귀 호출이나 노드별 Pydantic 모델을 만들지 않으므로 수십만 개 파일에서도 빠르고 메모리를 적게 씁니다.
+
+    - 기본 제외 디렉토리(exclude_dirs)는 표시만 하고 하위를 탐색하지 않습니다.
+    - 심볼릭 링크로 연결된 디렉토리는 순환을 막기 위해 하위를 탐색하지 않습니다.
+    - 같은 깊이의 디렉토리가 많으면 스레드 풀로 동시에 읽습니다.
+    - max_depth를 주면 그 깊이까지만 노드를 만들고(지연 로딩), 디렉토리 목록은 mtime 기반 캐시를 사용합니다.
+      이때 펼치지 않은 디렉토리(깊이 제한, 제외 대상, 심볼릭 링크)도 자식 수를 알 수 있도록 목록만 읽습니다.
+
+    Returns:
+        Dict: {
+            'name': [노드 이름], 'parent': [부모 노드 인덱스 (루트는 -1)],
+            'is_dir': [0/1], 'excluded': [0/1], 'errors': {노드 인덱스: 오류 표시}
+        }
+        max_depth를 주면 'child_count'(파일은 None)와 'loaded'(자식 노드 포함 여부 0/1) 열이 추가됩니다.
+        0번 노드가 루트이며, 같은 부모의 자식들은 연속된 인덱스를 가집니다.
+    """
+    lazy = max_depth is not None
+    list_directory = _listing_cache.list_directory if lazy else _list_directory
+
+    names: List[str] = [root_path.name]
+    parents: List[int] = [-1]
+    is_dirs: List[int] = [1]
+    excluded: List[int] = [0]
+    errors: Dict[int, str] = {}
+    child_counts: List[Optional[int]] = [None]
+    loaded: List[int] = [0]
+
+    executor: Optional[ThreadPoolExecutor] = None
+    # (노드 인덱스, 경로, 자식 노드를 만들지 여부)
+    frontier: List[Tuple[int, str, bool]] = [(0, str(root_path), not lazy or max_depth > 0)]
+    depth = 0
+    try:
+        while frontier:
+            paths = [path for _, path, _ in frontier]
+            if workers > 1 and len(frontier) >= SCAN_PARALLEL_MIN_DIRS:
+                if executor is None:
+                    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan")
+                listings = executor.map(list_directory, paths)
+            else:
+                listings = map(list_directory, paths)
+
+            depth += 1
+            expand_children = not lazy or depth < max_depth
+            next_frontier: List[Tuple[int, str, bool]] = []
+            for (parent_index, parent_path, expand), (entries, error) in zip(frontier, listings):
+                if error:
+                    errors[parent_index] = error
+                    continue
+                if lazy:
+                    child_counts[parent_index] = len(entries)
+                if not expand:
+                    continue
+                loaded[parent_index] = 1
+                for name, is_dir, is_symlink in entries:
+                    index = len(names)
+                    names.append(name)
+                    parents.append(parent_index)
+                    is_dirs.append(1 if is_dir else 0)
+                    is_excluded = is_dir and name in exclude_dirs
+                    excluded.append(1 if is_excluded else 0)
+                    child_counts.append(None)
+                    loaded.append(0)
+                    if not is_dir:
+                        continue
+                    if not is_excluded and not is_symlink:
+                        next_frontier.append((index, os.path.join(parent_path, name), expand_children))
+                    elif lazy:
+                        next_frontier.append((index, os.path.join(parent_path, name), False))
+            frontier = next_frontier
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    flat = {"name": names, "parent": parents, "is_dir": is_dirs, "excluded": excluded, "errors": errors}
+    if lazy:
+        flat["child_count"] = child_counts
+        flat["loaded"] = loaded
+    return flat
+
+
+def flat_to_tree(flat: Dict[str, Any], root_relative_path: str = ".") -> Dict[str, Any]:
+    """
+    scan_directory_flat 결과를 FileNode와 같은 모양의 중첩 딕셔너리로 바꿉니다.
+    (모델 검증 없이 바로 JSON으로 직렬화하기 위함)
+
+    Args:
+        root_relative_path: 루트 노드의 프로젝트 기준 상대 경로 (하위 디렉토리를 펼칠 때 사용)
+    """
+    names = flat["name"]
+    parents = flat["parent"]
+    errors = flat["errors"]
+    child_counts = flat.get("child_count")
+    loaded = flat.get("loaded")
+    nodes: List[Dict[str, Any]] = []
+    paths: List[str] = []
+    for index, name in enumerate(names):
+        parent = parents[index]
+        if parent < 0:
+            path = root_relative_path
+        elif parent == 0:
+            path = name if root_relative_path == "." else os.path.join(root_relative_path, name)
+        else:
+            path = os.path.join(paths[parent], name)
+        paths.append(path)
+
+        is_dir = flat["is_dir"][index]
+        node = {
+            "name": f"{name} ({errors[index]})" if index in errors else name,
+            "type": "directory" if is_dir else "file",
+            "path": path,
+            "children": [] if is_dir else None,
+            "is_excluded_by_default": bool(flat["excluded"][index]),
+        }
+        if child_counts is not None and is_dir:
+            # 지연 로딩: 펼치지 않은 디렉토리는 children을 None으로 두고 자식 수만 알려 줍니다.
+            if not loaded[index]:
+                node["children"] = None
+            node["child_count"] = child_counts[index]
+            node["has_children"] = bool(child_counts[index]) if child_counts[index] is not None else None
+        nodes.append(node)
+        if parent >= 0:
+            nodes[parent]["children"].append(node)
+    return nodes[0]
@@ -0,0 +1,153 @@
+# app/services/file_triage.py
+
+import os
+import fnmatch
+from pathlib import Path
+from typing import Dict, List, Any
+
+# 파싱 전 파일 선별(triage) 설정. stat과 파일 앞부분만 읽어서 판단하므로 파싱보다 훨씬 저렴합니다.
+TRIAGE_ENABLED = os.getenv("ANALYSIS_TRIAGE_ENABLED", "true").lower() == "true"
+# 이 크기를 넘는 파일은 건너뜁니다. (대용량 픽스처, 번들 등)
+TRIAGE_MAX_FILE_BYTES = int(os.getenv("TRIAGE_MAX_FILE_BYTES", str(2 * 1024 * 1024)))
+# 이 크기를 넘는 파일은 분석은 하되 우선순위를 낮춥니다. (다른 파일을 모두 처리한 뒤 처리)
+TRIAGE_DOWNRANK_FILE_BYTES = int(os.getenv("TRIAGE_DOWNRANK_FILE_BYTES", str(256 * 1024)))
+# 바이너리/생성 코드/평균 줄 길이 판단에 읽는 앞부분 크기
+TRIAGE_HEAD_BYTES = int(os.getenv("TRIAGE_HEAD_BYTES", "8192"))
+# 앞부분의 평균 줄 길이가 이 값을 넘으면 압축(minified) 코드로 보고 건너뜁니다.
+TRIAGE_MAX_AVG_LINE_LENGTH = int(os.getenv("TRIAGE_MAX_AVG_LINE_LENGTH", "300"))
+# 평균 줄 길이 검사를 적용할 최소 파일 크기 (한 줄짜리 작은 파일은 제외)
+TRIAGE_MIN_BYTES_FOR_LINE_CHECK = int(os.getenv("TRIAGE_MIN_BYTES_FOR_LINE_CHECK", "2048"))
+# 제어 문자 비율이 이 값을 넘으면 바이너리로 봅니다.
+TRIAGE_MAX_CONTROL_CHAR_RATIO = float(os.getenv("TRIAGE_MAX_CONTROL_CHAR_RATIO", "0.3"))
+# 생성 코드 처리 방식: skip(건너뜀) 또는 downrank(나중에 분석)
+TRIAGE_GENERATED_ACTION = os.getenv("TRIAGE_GENERATED_ACTION", "skip")
+
+# 파일 맨 앞 주석/docstring에 있으면 생성 코드로 보는 표시 (소문자로 비교)
+# "do not edit", "autogenerated"처럼 일반 주석에도 흔한 문구는 오탐이 많아 생성기가 쓰는 관례적인 문구만 사용합니다.
+DEFAULT_GENERATED_MARKERS = [
+    "@generated",
+    "code generated by",
+    "generated by the protocol buffer compiler",
+    "automatically generated by",
+]
+TRIAGE_GENERATED_MARKERS = [
+    marker.strip().lower()
+    for marker in os.getenv("TRIAGE_GENERATED_MARKERS", ",".join(DEFAULT_GENERATED_MARKERS)).split(",")
+    if marker.strip()
+]
+# 이름만으로 생성 코드로 보는 파일 패턴
+TRIAGE_GENERATED_FILE_PATTERNS = [
+    pattern.strip()
+    for pattern in os.getenv(
+        "TRIAGE_GENERATED_FILE_PATTERNS", "*_pb2.py,*_pb2_grpc.py,*.pb.go,*.pb.cc,*.pb.h,*.g.dart,*.generated.*"
+    ).split(",")
+    if pattern.strip()
+]
+
+ANALYZE = "analyze"
+DOWNRANK = "downrank"
+SKIP = "skip"
+
+# 탭, 줄바꿈, 폼피드 등 텍스트에 흔한 제어 문자
+_TEXT_CONTROL_BYTES = {8, 9, 10, 12, 13, 27}
+# 생성 코드 표시는 파일 맨 앞 주석에 있으므로 앞부분 일부만 확인합니다.
+_GENERATED_MARKER_SCAN_BYTES = 2048
+# 한 줄 주석 시작 표시 (#, //, --, ;, 블록 주석 안의 *)
+_LINE_COMMENT_PREFIXES = (b"#", b"//", b"--", b";", b"*")
+# 여러 줄 주석/docstring의 (시작, 끝) 표시
+_BLOCK_COMMENT_DELIMITERS = ((b'"""', b'"""'), (b"'''", b"'''"), (b"/*", b"*/"), (b"<!--", b"-->"))
+
+
+def _control_char_ratio(head: bytes) -> float:
+    if not head:
+        return 0.0
+    control = sum(1 for byte in head if byte < 32 and byte not in _TEXT_CONTROL_BYTES)
+    return control / len(head)
+
+
+def _leading_comment_block(head: bytes) -> bytes:
+    """
+    파일 맨 앞의 주석/docstring 줄만 모읍니다. (빈 줄은 건너뛰고, 첫 코드 줄에서 멈춤)
+    본문 코드나 문자열 안의 "generated" 같은 문구로 생성 코드로 오판하지 않기 위함입니다.
+    """
+    lines: List[bytes] = []
+    closing = None
+    for raw_line in head[:_GENERATED_MARKER_SCAN_BYTES].splitlines():
+        line = raw_line.strip()
+        if closing is not None:
+            lines.append(line)
+            if closing in line:
+                closing = None
+            continue
+        if not line:
+            continue
+        block = next(((start, end) for start, end in _BLOCK_COMMENT_DELIMITERS if line.startswith(start)), None)
+        if block is not None:
+            lines.append(line)
+            start, end = block
+            if end not in line[len(start):]:
+                closing = end
+            continue
+        if line.startswith(_LINE_COMMENT_PREFIXES):
+            lines.append(line)
+            continue
+        break
+    return b"\n".join(lines)
+
+
+def triage_file(file_path: Path) -> Dict[str, Any]:
+    """
+    파일 하나를 파싱 전에 선별합니다.
+
+    Returns:
+        Dict: {'action': 'analyze' | 'downrank' | 'skip', 'reasons': [사유], 'size_bytes': 크기}
+    """
+    reasons: List[str] = []
+    try:
+        size = os.stat(file_path).st_size
+    except OSError as e:
+        return {"action": SKIP, "reasons": [f"stat failed: {e}"], "size_bytes": None}
+
+    if size > TRIAGE_MAX_FILE_BYTES:
+        return {"action": SKIP, "reasons": [f"file too large ({size} bytes > {TRIAGE_MAX_FILE_BYTES})"], "size_bytes": size}
+
+    action = ANALYZE
+    if size > TRIAGE_DOWNRANK_FILE_BYTES:
+        action = DOWNRANK
+        reasons.append(f"large file ({size} bytes > {TRIAGE_DOWNRANK_FILE_BYTES})")
+
+    if any(fnmatch.fnmatch(file_path.name, pattern) for pattern in TRIAGE_GENERATED_FILE_PATTERNS):
+        reasons.append("generated file name")
+        return {"action": TRIAGE_GENERATED_ACTION if TRIAGE_GENERATED_ACTION in (SKIP, DOWNRANK) else SKIP,
+                "reasons": reasons, "size_bytes": size}
+
+    try:
+        with open(file_path, "rb") as f:
+            head = f.read(TRIAGE_HEAD_BYTES)
+    except OSError as e:
+        return {"action": SKIP, "reasons": [f"read failed: {e}"], "size_bytes": size}
+
+    # 1. 바이너리 (NUL 바이트 또는 제어 문자 비율)
+    if b"\0" in head:
+        return {"action": SKIP, "reasons": ["binary content (NUL byte)"], "size_bytes": size}
+    ratio = _control_char_ratio(head)
+    if ratio > TRIAGE_MAX_CONTROL_CHAR_RATIO:
+        return {"action": SKIP, "reasons": [f"binary content (control char ratio {ratio:.2f})"], "size_bytes": size}
+
+    # 2. 생성 코드 표시 (맨 앞 주석/docstring에서만 확인)
+    marker_area = _leading_comment_block(head).lower()
+    for marker in TRIAGE_GENERATED_MARKERS:
+        if marker.encode("utf-8") in marker_area:
+            reasons.append(f"generated code marker '{marker}'")
+            generated_action = TRIAGE_GENERATED_ACTION if TRIAGE_GENERATED_ACTION in (SKIP, DOWNRANK) else SKIP
+            return {"action": generated_action, "reasons": reasons, "size_bytes": size}
+
+    # 3. 압축(minified) 코드: 평균 줄 길이
+    if size >= TRIAGE_MIN_BYTES_FOR_LINE_CHECK:
+        average_line_length = len(head) / (head.count(b"\n") + 1)
+        if average_line_length > TRIAGE_MAX_AVG_LINE_LENGTH:
+            return {"action": SKIP,
+                    "reasons": [f"minified code (average line length {int(average_line_length)} > {TRIAGE_MAX_AVG_LINE_LENGTH})"],
+                    "size_bytes": size}
+
+    return {"action": action, "reasons": reasons, "size_bytes": size}
@@ -0,0 +1,100 @@
+# app/services/git_diff.py
+
+import os
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+# git 명령 제한 시간(초)
+GIT_COMMAND_TIMEOUT = float(os.getenv("GIT_COMMAND_TIMEOUT", "60"))
+# 이름 변경으로 판단할 최소 유사도(%) (git diff -M)
+GIT_RENAME_SIMILARITY = int(os.getenv("GIT_RENAME_SIMILARITY", "50"))
+
+# 파일 변경 유형
+ADDED, MODIFIED, DELETED, RENAMED = "added", "modified", "deleted", "renamed"
+
+
+class GitDiffError(Exception):
+    """git 명령이 실패했거나 요청한 리비전을 사용할 수 없을 때 발생합니다."""
+
+
+def _run_git(cwd: Union[str, Path], args: List[str]) -> bytes:
+    try:
+        completed = subprocess.run(
+            ["git", *args], cwd=str(cwd), capture_output=True, timeout=GIT_COMMAND_TIMEOUT, check=False
+        )
+    except FileNotFoundError:
+        raise GitDiffError("git executable not found")
+    except subprocess.TimeoutExpired:
+        raise GitDiffError(f"git {' '.join(args)} timed out after {GIT_COMMAND_TIMEOUT}s")
+    if completed.returncode != 0:
+        message = completed.stderr.decode("utf-8", errors="replace").strip()
+        raise GitDiffError(f"git {' '.join(args)} failed: {message}")
+    return completed.stdout
+
+
+def resolve_revision(project_root: Union[str, Path], revision: str) -> str:
+    """리비전(브랜치, 태그, 커밋 등)을 커밋 해시로 바꿉니다."""
+    try:
+        output = _run_git(project_root, ["rev-parse", "--verify", "--quiet", f"{revision}^{{commit}}"])
+    except GitDiffError:
+        raise GitDiffError(f"unknown revision: {revision}")
+    return output.decode("ascii").strip()
+
+
+def ensure_head_checked_out(project_root: Union[str, Path], head: str) -> str:
+    """
+    분석은 작업 트리의 파일을 읽으므로, head가 현재 체크아웃된 커밋과 같은지 확인합니다.
+
+    Returns:
+        str: head 커밋 해시
+    """
+    head_commit = resolve_revision(project_root, head)
+    checked_out = resolve_revision(project_root, "HEAD")
+    if head_commit != checked_out:
+        raise GitDiffError(
+            f"head revision {head} ({head_commit[:12]}) is not checked out (HEAD is {checked_out[:12]})"
+        )
+    return head_commit
+
+
+def get_changed_files(project_root: Union[str, Path], base: str, head: Optional[str] = None) -> List[Dict[str, Optional[str]]]:
+    """
+    두 리비전 사이(head가 없으면 base와 작업 트리 사이)에서 바뀐 파일 목록을 반환합니다.
+    경로는 project_root 기준 상대 경로이며, project_root가 저장소의 하위 디렉토리면 그 아래의 변경만 포함됩니다.
+    추적되지 않는(untracked) 파일은 포함되지 않습니다.
+
+    - 복사(C)는 새 경로의 추가로, 유형 변경(T)과 충돌(U)은 수정으로 봅니다.
+
+    Returns:
+        List[Dict]: [{'status': added | modified | deleted | renamed, 'path': 새 경로, 'old_path': 이전 경로 또는 None}, ...]
+                    삭제된 파일은 path가 삭제된 경로입니다.
+    """
+    args = ["diff", "--name-status", "-z", f"-M{GIT_RENAME_SIMILARITY}%", "--relative", "--no-ext-diff", base]
+    if head:
+        args.append(head)
+    args.append("--")
+    tokens = _run_git(project_root, args).split(b"\0")
+
+    changes: List[Dict[str, Optional[str]]] = []
+    i = 0
+    while i < len(tokens) and tokens[i]:
+        status = tokens[i].decode("ascii")
+        kind = status[0]
+        if kind in ("R", "C"):
+            old_path, new_path = os.fsdecode(tokens[i + 1]), os.fsdecode(tokens[i + 2])
+            i += 3
+            if kind == "R":
+                changes.append({"status": RENAMED, "path": new_path, "old_path": old_path})
+            else:
+                changes.append({"status": ADDED, "path": new_path, "old_path": None})
+            continue
+        path = os.fsdecode(tokens[i + 1])
+        i += 2
+        if kind == "A":
+            changes.append({"status": ADDED, "path": path, "old_path": None})
+        elif kind == "D":
+            changes.append({"status": DELETED, "path": path, "old_path": None})
+        else:  # M, T, U
+            changes.append({"status": MODIFIED, "path": path, "old_path": None})
+    return changes
@@ -0,0 +1,209 @@
+# app/services/graph_artifact.py
+
+import os
+import gzip
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:  # pyarrow가 없으면 gzip으로 압축한 JSON Lines로 저장합니다.
+    pyarrow = None
+    parquet = None
+
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 표준 json 사용
+    orjson = None
+
+# 결과물 형식 버전 (읽는 쪽과 형식이 달라지면 올립니다)
+ARTIFACT_FORMAT_VERSION = 1
+# 저장 형식: auto(pyarrow가 있으면 parquet) | parquet | jsonl
+ARTIFACT_FORMAT = os.getenv("GRAPH_ARTIFACT_FORMAT", "auto").lower()
+# Parquet row group 크기 (읽을 때 이 단위로 나눠 읽습니다)
+ARTIFACT_ROW_GROUP_SIZE = int(os.getenv("GRAPH_ARTIFACT_ROW_GROUP_SIZE", "100000"))
+
+MANIFEST_FILE = "manifest.json"
+EMBEDDING_MATRIX_FILE = "embeddings.npy"
+EMBEDDING_IDS_FILE = "embedding_ids.json"
+BLOB_DIR = "blobs"
+
+PARQUET, JSONL = "parquet", "jsonl"
+ENTITIES, RELATIONSHIPS = "entities", "relationships"
+
+# 엔티티 컬럼 (Neo4j에 저장되는 노드 속성과 같음, db/ingestor_python.py 참고)
+ENTITY_COLUMNS = (
+    ("id", "string"), ("type", "string"), ("name", "string"), ("file_path", "string"),
+    ("start_line", "int64"), ("end_line", "int64"),
+    ("content_hash", "string"), ("byte_start", "int64"), ("byte_end", "int64"),
+    ("entity_count", "int64"), ("class_name", "string"),
+)
+# 관계 속성은 유형마다 키가 달라 JSON 문자열 하나로 저장합니다.
+RELATIONSHIP_COLUMNS = (("source_id", "string"), ("target_id", "string"), ("type", "string"), ("properties", "string"))
+
+
+def _dumps(value: Any) -> str:
+    if orjson is not None:
+        return orjson.dumps(value).decode("utf-8")
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _resolve_format(artifact_format: str) -> str:
+    if artifact_format == "auto":
+        return PARQUET if pyarrow is not None else JSONL
+    if artifact_format == PARQUET and pyarrow is None:
+        raise RuntimeError("pyarrow가 설치되어 있지 않아 parquet 형식으로 저장할 수 없습니다.")
+    if artifact_format not in (PARQUET, JSONL):
+        raise ValueError(f"Unknown artifact format: {artifact_format}")
+    return artifact_format
+
+
+def _file_name(kind: str, artifact_format: str) -> str:
+    return f"{kind}.parquet" if artifact_format == PARQUET else f"{kind}.jsonl.gz"
+
+
+def _entity_row(entity: Dict[str, Any]) -> Dict[str, Any]:
+    return {column: entity.get(column) for column, _ in ENTITY_COLUMNS}
+
+
+def _relationship_row(rel: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "source_id": rel["source_id"],
+        "target_id": rel["target_id"],
+        "type": rel.get("type"),
+        "properties": _dumps(rel.get("properties") or {}),
+    }
+
+
+def _write_rows(path: Path, rows: List[Dict[str, Any]], columns, artifact_format: str):
+    if artifact_format == PARQUET:
+        schema = pyarrow.schema([(name, getattr(pyarrow, type_name)()) for name, type_name in columns])
+        with parquet.ParquetWriter(str(path), schema, compression="zstd") as writer:
+            for start in range(0, len(rows), ARTIFACT_ROW_GROUP_SIZE):
+                writer.write_table(pyarrow.Table.from_pylist(rows[start:start + ARTIFACT_ROW_GROUP_SIZE], schema=schema))
+    else:
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as f:
+            for row in rows:
+                f.write(_dumps(row))
+                f.write("\n")
+
+
+def write_graph_artifact(artifact_dir: Union[str, Path], entities: List[Dict[str, Any]], relationships: List[Dict[str, Any]],
+                         manifest: Dict[str, Any], embeddings: Optional[Dict[str, List[float]]] = None,
+                         artifact_format: str = ARTIFACT_FORMAT) -> Dict[str, Any]:
+    """
+    추출 결과를 Neo4j 없이 옮길 수 있는 결과물 디렉토리로 저장합니다.
+
+    {artifact_dir}/
+        manifest.json                       형식, 프로젝트 정보, 개수, 분석 요약
+        entities.parquet | .jsonl.gz        노드 (ENTITY_COLUMNS)
+        relationships.parquet | .jsonl.gz   관계 (RELATIONSHIP_COLUMNS)
+        embeddings.npy, embedding_ids.json  임베딩 행렬 (float32, 행 순서 = ID 목록 순서)
+        blobs/                              코드 blob (service/blob_store.py와 같은 구조)
+
+    Returns:
+        Dict: 저장한 manifest
+    """
+    artifact_dir = Path(artifact_dir)
+    artifact_dir.mkdir(parents=True, exist_ok=True)
+    artifact_format = _resolve_format(artifact_format)
+
+    _write_rows(artifact_dir / _file_name(ENTITIES, artifact_format), [_entity_row(e) for e in entities],
+                ENTITY_COLUMNS, artifact_format)
+    _write_rows(artifact_dir / _file_name(RELATIONSHIPS, artifact_format), [_relationship_row(r) for r in relationships],
+                RELATIONSHIP_COLUMNS, artifact_format)
+
+    embedding_dimension = None
+    if embeddings:
+        ids = list(embeddings)
+        matrix = np.asarray([embeddings[node_id] for node_id in ids], dtype=np.float32)
+        np.save(artifact_dir / EMBEDDING_MATRIX_FILE, matrix)
+        (artifact_dir / EMBEDDING_IDS_FILE).write_text(json.dumps(ids), encoding="utf-8")
+        embedding_dimension = int(matrix.shape[1])
+
+    manifest = {
+        **manifest,
+        "format_version": ARTIFACT_FORMAT_VERSION,
+        "format": artifact_format,
+        "created_at": time.time(),
+        "counts": {
+            ENTITIES: len(entities),
+            RELATIONSHIPS: len(relationships),
+            "embeddings": len(embeddings) if embeddings else 0,
+        },
+        "embedding_dimension": embedding_dimension,
+    }
+    save_artifact_manifest(artifact_dir, manifest)
+    return manifest
+
+
+def save_artifact_manifest(artifact_dir: Union[str, Path], manifest: Dict[str, Any]):
+    (Path(artifact_dir) / MANIFEST_FILE).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def read_artifact_manifest(artifact_dir: Union[str, Path]) -> Dict[str, Any]:
+    path = Path(artifact_dir) / MANIFEST_FILE
+    if not path.is_file():
+        raise FileNotFoundError(f"Not a graph artifact (missing {MANIFEST_FILE}): {artifact_dir}")
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get("format_version") != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version: {manifest.get('format_version')}")
+    return manifest
+
+
+def iter_artifact_rows(artifact_dir: Union[str, Path], kind: str, batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    """
+    결과물의 엔티티/관계를 batch_size개씩 읽습니다. 전체를 메모리에 올리지 않습니다.
+    엔티티의 빈 컬럼은 키를 빼고, 관계 속성은 딕셔너리로 되돌려 추출 결과와 같은 형태로 반환합니다.
+    """
+    artifact_format = read_artifact_manifest(artifact_dir)["format"]
+    path = Path(artifact_dir) / _file_name(kind, artifact_format)
+
+    def convert(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if kind == RELATIONSHIPS:
+            for row in rows:
+                row["properties"] = json.loads(row["properties"]) if row.get("properties") else {}
+            return rows
+        return [{key: value for key, value in row.items() if value is not None} for row in rows]
+
+    if artifact_format == PARQUET:
+        if parquet is None:
+            raise RuntimeError("pyarrow가 설치되어 있지 않아 parquet 결과물을 읽을 수 없습니다.")
+        for record_batch in parquet.ParquetFile(str(path)).iter_batches(batch_size=batch_size):
+            yield convert(record_batch.to_pylist())
+        return
+
+    batch: List[Dict[str, Any]] = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                yield convert(batch)
+                batch = []
+    if batch:
+        yield convert(batch)
+
+
+def read_artifact_embeddings(artifact_dir: Union[str, Path]) -> Optional[Tuple[List[str], np.ndarray]]:
+    """결과물의 (ID 목록, 임베딩 행렬)을 반환합니다. 행렬은 메모리 매핑으로 엽니다. 임베딩이 없으면 None."""
+    artifact_dir = Path(artifact_dir)
+    ids_path = artifact_dir / EMBEDDING_IDS_FILE
+    if not ids_path.is_file():
+        return None
+    ids = json.loads(ids_path.read_text(encoding="utf-8"))
+    return ids, np.load(artifact_dir / EMBEDDING_MATRIX_FILE, mmap_mode="r")
+
+
+def dedupe_entities(entity_lists: Iterable[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """여러 파일의 엔티티를 ID 기준으로 합칩니다. (공유 노드가 여러 파일에 나오므로, 저장 시 MERGE처럼 마지막 값을 남깁니다)"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for entities in entity_lists:
+        for entity in entities:
+            merged.pop(entity["id"], None)
+            merged[entity["id"]] = entity
+    return list(merged.values())
@@ -0,0 +1,299 @@
+# app/services/graph_lod_service.py
+
+import os
+import threading
+import logging
+from collections import deque
+from typing import Dict, List, Any, Optional, Tuple
+
+from db.driver_neo4j import run_cypher_query, stream_cypher_query
+from db.graph_generation import get_graph_generation
+from service.graph_snapshot import get_fresh_graph_snapshot
+
+logger = logging.getLogger(__name__)
+
+# 시각화 상세 수준 (LOD: Level Of Detail)
+# directory: 디렉토리 단위로 집계 / file: 파일 단위로 집계 / entity: 실제 노드(함수, 클래스 등)
+LOD_LEVELS = ("directory", "file", "entity")
+
+# 파일 경로가 없는 노드(Module, ExternalCallTarget 등)를 집계할 때의 그룹 키 표현식
+_GROUP_KEY = (
+    "CASE WHEN {var}.file_path IS NOT NULL THEN 'file:' + {var}.file_path "
+    "ELSE 'ext:' + labels({var})[0] + ':' + coalesce({var}.name, {var}.id) END"
+)
+
+_AGGREGATE_EDGES_QUERY = f"""
+    MATCH (s)-[r]->(t)
+    WHERE s.id IS NOT NULL AND t.id IS NOT NULL
+    WITH {_GROUP_KEY.format(var="s")} AS source_key,
+         {_GROUP_KEY.format(var="t")} AS target_key,
+         type(r) AS type
+    WHERE source_key <> target_key
+    RETURN source_key, target_key, type, count(*) AS count
+"""
+
+_AGGREGATE_NODES_QUERY = f"""
+    MATCH (n)
+    WHERE n.id IS NOT NULL
+    RETURN {_GROUP_KEY.format(var="n")} AS key, labels(n)[0] AS label, count(*) AS count
+"""
+
+
+class AggregatedGraph:
+    """
+    파일 또는 디렉토리 단위로 집계된 그래프.
+    nodes: {그룹 키: 노드 정보}, edges: {(소스 키, 대상 키): {관계 유형: 개수}}
+    """
+
+    def __init__(self, level: str):
+        self.level = level
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.edges: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self.neighbors: Dict[str, Dict[str, int]] = {}
+
+    def add_entities(self, key: str, label: str, count: int):
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = _describe_group(key)
+        node["entity_counts"][label] = node["entity_counts"].get(label, 0) + count
+        node["total_entities"] += count
+
+    def add_edge(self, source_key: str, target_key: str, rel_type: str, count: int):
+        if source_key == target_key:
+            return
+        for key in (source_key, target_key):
+            if key not in self.nodes:
+                self.nodes[key] = _describe_group(key)
+        counts = self.edges.setdefault((source_key, target_key), {})
+        counts[rel_type] = counts.get(rel_type, 0) + count
+        # 이웃 탐색용 무방향 가중치 (관계 수 합계)
+        self.neighbors.setdefault(source_key, {})
+        self.neighbors.setdefault(target_key, {})
+        self.neighbors[source_key][target_key] = self.neighbors[source_key].get(target_key, 0) + count
+        self.neighbors[target_key][source_key] = self.neighbors[target_key].get(source_key, 0) + count
+
+
+def _describe_group(key: str) -> Dict[str, Any]:
+    kind, _, rest = key.partition(":")
+    if kind == "ext":
+        label, _, name = rest.partition(":")
+        return {"id": key, "kind": "external", "label": label, "name": name,
+                "entity_counts": {}, "total_entities": 0}
+    return {"id": key, "kind": "directory" if kind == "dir" else "file",
+            "path": rest, "name": os.path.basename(rest) or rest,
+            "entity_counts": {}, "total_entities": 0}
+
+
+def _to_directory_key(key: str) -> str:
+    if key.startswith("file:"):
+        return "dir:" + os.path.dirname(key[len("file:"):])
+    return key
+
+
+def _build_file_level() -> AggregatedGraph:
+    graph = AggregatedGraph("file")
+    for record in stream_cypher_query(_AGGREGATE_NODES_QUERY):
+        graph.add_entities(record["key"], record["label"], record["count"])
+    for record in stream_cypher_query(_AGGREGATE_EDGES_QUERY):
+        graph.add_edge(record["source_key"], record["target_key"], record["type"], record["count"])
+    return graph
+
+
+def _build_directory_level(file_graph: AggregatedGraph) -> AggregatedGraph:
+    graph = AggregatedGraph("directory")
+    for key, node in file_graph.nodes.items():
+        for label, count in node["entity_counts"].items():
+            graph.add_entities(_to_directory_key(key), label, count)
+    for (source_key, target_key), counts in file_graph.edges.items():
+        for rel_type, count in counts.items():
+            graph.add_edge(_to_directory_key(source_key), _to_directory_key(target_key), rel_type, count)
+    return graph
+
+
+# 그래프 세대별 집계 결과 캐시 (최신 세대 하나만 유지)
+_cache_lock = threading.Lock()
+_cache_generation: Optional[int] = None
+_cache: Dict[str, AggregatedGraph] = {}
+
+
+def get_aggregated_graph(level: str) -> AggregatedGraph:
+    """
+    주어진 수준(file/directory)의 집계 그래프를 반환합니다.
+    그래프 세대가 바뀌지 않았다면 캐시된 결과를 재사용합니다.
+    """
+    global _cache_generation, _cache
+    generation = get_graph_generation()
+    with _cache_lock:
+        if _cache_generation != generation:
+            _cache = {}
+            _cache_generation = generation
+        if "file" not in _cache:
+            logger.info(f"LOD 집계 그래프 생성 중 (generation={generation})...")
+            _cache["file"] = _build_file_level()
+        if level == "directory" and "directory" not in _cache:
+            _cache["directory"] = _build_directory_level(_cache["file"])
+        return _cache[level]
+
+
+def warm_lod_cache():
+    """인제스트 직후 호출하여 집계 그래프를 미리 계산해 둡니다."""
+    get_aggregated_graph("directory")
+
+
+def _resolve_group_seeds(seed: str, level: str, graph: AggregatedGraph) -> List[str]:
+    """
+    seed(그룹 키, 파일/디렉토리 경로 또는 엔티티 ID)를 집계 그래프의 그룹 키 목록으로 변환합니다.
+    파일 수준에서 디렉토리 경로가 주어지면(디렉토리 -> 파일 드릴다운) 그 디렉토리의 모든 파일이 seed가 됩니다.
+    """
+    if seed in graph.nodes:
+        return [seed]
+    prefix = "dir:" if level == "directory" else "file:"
+    if prefix + seed in graph.nodes:
+        return [prefix + seed]
+    if level == "directory" and "file:" + seed in get_aggregated_graph("file").nodes:
+        return [_to_directory_key("file:" + seed)]
+    if level == "file":
+        directory_files = [key for key in graph.nodes if _to_directory_key(key) == "dir:" + seed]
+        if directory_files:
+            return directory_files
+
+    # 엔티티 ID인 경우 해당 엔티티의 파일을 찾아 그룹 키로 변환합니다.
+    records = run_cypher_query(
+        f"MATCH (n {{id: $seed}}) RETURN {_GROUP_KEY.format(var='n')} AS key LIMIT 1",
+        parameters={"seed": seed}, write=False
+    )
+    if not records:
+        return []
+    key = records[0]["key"]
+    key = _to_directory_key(key) if level == "directory" else key
+    return [key] if key in graph.nodes else []
+
+
+def _aggregated_subgraph(seed: str, depth: int, node_budget: int, level: str) -> Optional[Dict[str, Any]]:
+    graph = get_aggregated_graph(level)
+    seed_keys = _resolve_group_seeds(seed, level, graph)
+    if not seed_keys:
+        return None
+
+    visited = {key: 0 for key in seed_keys[:node_budget]}
+    truncated = len(seed_keys) > node_budget
+    queue = deque(visited.keys())
+    while queue:
+        key = queue.popleft()
+        if visited[key] >= depth:
+            continue
+        # 연결이 많은(관계 수가 큰) 이웃부터 포함합니다.
+        for neighbor, _ in sorted(graph.neighbors.get(key, {}).items(), key=lambda item: -item[1]):
+            if neighbor in visited:
+                continue
+            if len(visited) >= node_budget:
+                truncated = True
+                break
+            visited[neighbor] = visited[key] + 1
+            queue.append(neighbor)
+
+    drilldown_level = "file" if level == "directory" else "entity"
+    nodes = []
+    for key, distance in visited.items():
+        node = dict(graph.nodes[key])
+        node["distance"] = distance
+        if node["kind"] != "external":
+            node["drilldown"] = {"level": drilldown_level, "seed": node.get("path")}
+        nodes.append(node)
+
+    edges = []
+    for source_key in visited:
+        for target_key in graph.neighbors.get(source_key, {}):
+            counts = graph.edges.get((source_key, target_key))
+            if counts and target_key in visited:
+                edges.append({"source": source_key, "target": target_key,
+                              "counts": counts, "total": sum(counts.values())})
+
+    return {"level": level, "seeds": seed_keys, "nodes": nodes, "edges": edges, "truncated": truncated}
+
+
+def _entity_subgraph_from_snapshot(snapshot, seed: str, depth: int, node_budget: int) -> Optional[Dict[str, Any]]:
+    """최신 인메모리 스냅샷이 있으면 Neo4j 왕복 없이 k-hop 확장을 수행합니다."""
+    seed_idx = snapshot.index(seed)
+    if seed_idx is not None:
+        seeds = [seed_idx]
+    else:
+        seeds = snapshot.find_nodes(label="File", file_path=seed)[:node_budget]
+        if not seeds:
+            return None
+
+    distances = snapshot.k_hop(seeds, depth, direction="both", max_nodes=node_budget)
+    truncated = len(distances) >= node_budget
+    nodes = [dict(snapshot.node(idx), distance=distance) for idx, distance in distances.items()]
+    edges = [{"source": snapshot.node_ids[source], "target": snapshot.node_ids[target], "type": rel_type}
+             for source, target, rel_type in snapshot.edges_between(distances.keys())]
+    return {"level": "entity", "seeds": [snapshot.node_ids[idx] for idx in seeds], "nodes": nodes,
+            "edges": edges, "truncated": truncated}
+
+
+def _entity_subgraph(seed: str, depth: int, node_budget: int) -> Optional[Dict[str, Any]]:
+    """엔티티 수준: seed 노드(또는 파일 경로에 속한 노드들)에서 depth 홉까지 실제 노드를 확장합니다."""
+    snapshot = get_fresh_graph_snapshot()
+    if snapshot is not None:
+        return _entity_subgraph_from_snapshot(snapshot, seed, depth, node_budget)
+
+    seed_records = run_cypher_query("""
+        MATCH (n) WHERE n.id = $seed OR (n:File AND n.file_path = $seed)
+        RETURN n.id AS id, labels(n)[0] AS label, n.name AS name, n.file_path AS file_path
+        LIMIT $limit
+    """, parameters={"seed": seed, "limit": node_budget}, write=False)
+    if not seed_records:
+        return None
+
+    nodes = {record["id"]: dict(record, distance=0) for record in seed_records}
+    seed_ids = list(nodes.keys())
+    edges = {}
+    frontier = list(nodes.keys())
+    truncated = False
+    for hop in range(1, depth + 1):
+        if not frontier or truncated:
+            break
+        records = run_cypher_query("""
+            UNWIND $frontier AS node_id
+            MATCH (n {id: node_id})-[r]-(m)
+            WHERE m.id IS NOT NULL
+            RETURN n.id AS from_id, m.id AS id, labels(m)[0] AS label, m.name AS name,
+                   m.file_path AS file_path, type(r) AS type, startNode(r) = n AS outgoing
+            LIMIT $limit
+        """, parameters={"frontier": frontier, "limit": node_budget * 10}, write=False)
+
+        next_frontier = []
+        for record in records:
+            if record["id"] not in nodes:
+                if len(nodes) >= node_budget:
+                    truncated = True
+                    continue
+                nodes[record["id"]] = {"id": record["id"], "label": record["label"], "name": record["name"],
+                                       "file_path": record["file_path"], "distance": hop}
+                next_frontier.append(record["id"])
+            source, target = (record["from_id"], record["id"]) if record["outgoing"] else (record["id"], record["from_id"])
+            edges[(source, target, record["type"])] = {"source": source, "target": target, "type": record["type"]}
+        frontier = next_frontier
+
+    return {"level": "entity", "seeds": seed_ids, "nodes": list(nodes.values()),
+            "edges": list(edges.values()), "truncated": truncated}
+
+
+def get_subgraph(seed: str, depth: int = 1, node_budget: int = 200, level: str = "file") -> Optional[Dict[str, Any]]:
+    """
+    seed를 중심으로 depth 홉까지의 이웃 서브그래프를 node_budget 개수 이내로 반환합니다.
+
+    Args:
+        seed: 엔티티 ID, 파일 경로, 디렉토리 경로 또는 집계 그룹 키('file:...', 'dir:...')
+        depth: 확장할 홉 수
+        node_budget: 반환할 최대 노드 수
+        level: 'directory' | 'file' | 'entity'
+
+    Returns:
+        Optional[Dict]: {'level', 'seeds', 'nodes', 'edges', 'truncated'} 또는 seed를 찾지 못하면 None
+    """
+    if level not in LOD_LEVELS:
+        raise ValueError(f"Unknown level of detail: {level}")
+    if level == "entity":
+        return _entity_subgraph(seed, depth, node_budget)
+    return _aggregated_subgraph(seed, depth, node_budget, level)
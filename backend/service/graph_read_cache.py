@@ -0,0 +1,365 @@
+# app/services/graph_read_cache.py
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from db.graph_generation import get_graph_generation, graph_changes_since
+
+logger = logging.getLogger(__name__)
+
+# 메모리에 보관할 최대 항목 수 (초과 시 가장 오래 사용되지 않은 항목부터 제거)
+GRAPH_READ_CACHE_MAX_ENTRIES = int(os.getenv("GRAPH_READ_CACHE_MAX_ENTRIES", "5000"))
+# 여러 서버 프로세스가 함께 쓰는 디스크 캐시(SQLite) 경로. 비우면 메모리 캐시만 사용합니다.
+GRAPH_READ_CACHE_DISK_PATH = os.getenv("GRAPH_READ_CACHE_DISK_PATH", "")
+# 디스크 캐시에 보관할 최대 항목 수
+GRAPH_READ_CACHE_DISK_MAX_ENTRIES = int(os.getenv("GRAPH_READ_CACHE_DISK_MAX_ENTRIES", "50000"))
+# 캐시 사용 여부
+GRAPH_READ_CACHE_ENABLED = os.getenv("GRAPH_READ_CACHE_ENABLED", "true").lower() == "true"
+
+NODE_DETAILS = "node_details"
+CODE_CONTEXT = "code_context"
+
+
+class _Entry:
+    __slots__ = ("value", "generation", "files", "node_ids")
+
+    def __init__(self, value: Any, generation: int, files: frozenset, node_ids: frozenset):
+        self.value = value
+        self.generation = generation
+        self.files = files
+        self.node_ids = node_ids
+
+
+class _KindStats:
+    __slots__ = ("hits", "disk_hits", "misses", "stale", "load_ms", "hit_ms", "saved_ms")
+
+    def __init__(self):
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.load_ms = 0.0
+        self.hit_ms = 0.0
+        self.saved_ms = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "stale_evictions": self.stale,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "avg_load_ms": round(self.load_ms / self.misses, 3) if self.misses else None,
+            "avg_hit_ms": round(self.hit_ms / self.hits, 3) if self.hits else None,
+            "saved_ms": round(self.saved_ms, 3),
+        }
+
+
+class GraphReadCache:
+    """
+    노드 상세, 코드 컨텍스트 같은 그래프 읽기 결과의 read-through 캐시.
+
+    항목은 (종류, 키)로 저장되고, 만든 시점의 그래프 세대와 의존하는 파일/노드 ID를 함께 기억합니다.
+    세대가 바뀐 뒤 조회되면 graph_changes_since로 그 사이 변경 범위를 확인해,
+    의존 파일/노드가 바뀌었거나 범위를 모르는 변경(전체 인제스트 등)이 있었으면 버리고 다시 읽습니다.
+    따라서 증분 적용(diff)은 건드린 파일/노드의 항목만 무효화합니다.
+
+    메모리 LRU 뒤에 선택적으로 SQLite 디스크 캐시를 두어 여러 서버 프로세스가 결과를 함께 씁니다.
+    변경 범위 기록은 프로세스마다 따로 있으므로, 다른 프로세스가 쓴 디스크 항목은 세대가 같을 때만 사용합니다.
+    적중률과 절약한 시간(미스 평균 적재 시간 - 적중 조회 시간)을 종류별로 집계합니다.
+    """
+
+    def __init__(self, max_entries: int = GRAPH_READ_CACHE_MAX_ENTRIES, disk_path: str = GRAPH_READ_CACHE_DISK_PATH,
+                 disk_max_entries: int = GRAPH_READ_CACHE_DISK_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.disk_max_entries = disk_max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], _Entry]" = OrderedDict()
+        self._stats: Dict[str, _KindStats] = {}
+        self._conn = None
+        # 디스크 항목을 쓴 프로세스를 구분하는 값 (PID 재사용에 대비해 임의 값을 덧붙임)
+        self._writer_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        if disk_path:
+            self._conn = sqlite3.connect(disk_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    kind TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    generation INTEGER NOT NULL,
+                    files TEXT NOT NULL,
+                    node_ids TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    last_used REAL NOT NULL,
+                    writer TEXT NOT NULL DEFAULT '',
+                    PRIMARY KEY (kind, key)
+                )
+            """)
+            # writer 컬럼이 없던 기존 캐시 파일 마이그레이션 (기존 항목은 다른 프로세스가 쓴 것으로 취급)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)").fetchall()}
+            if "writer" not in columns:
+                self._conn.execute("ALTER TABLE entries ADD COLUMN writer TEXT NOT NULL DEFAULT ''")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries(last_used)")
+            self._conn.commit()
+
+    def _kind_stats(self, kind: str) -> _KindStats:
+        stats = self._stats.get(kind)
+        if stats is None:
+            stats = self._stats[kind] = _KindStats()
+        return stats
+
+    @staticmethod
+    def _is_current(entry: _Entry, generation: int) -> bool:
+        """항목을 만든 세대 이후의 변경이 항목의 의존 범위에 걸리지 않으면 True"""
+        if entry.generation == generation:
+            return True
+        changes = graph_changes_since(entry.generation)
+        if changes is None:
+            return False
+        changed_files, changed_node_ids = changes
+        return entry.files.isdisjoint(changed_files) and entry.node_ids.isdisjoint(changed_node_ids)
+
+    def _disk_get(self, kind: str, key: str) -> Tuple[Optional[_Entry], Optional[str]]:
+        """디스크 항목과 그 항목을 쓴 프로세스의 writer ID를 반환합니다."""
+        row = self._conn.execute(
+            "SELECT generation, files, node_ids, value, writer FROM entries WHERE kind = ? AND key = ?", (kind, key)
+        ).fetchone()
+        if row is None:
+            return None, None
+        generation, files, node_ids, value, writer = row
+        entry = _Entry(json.loads(value), generation, frozenset(json.loads(files)), frozenset(json.loads(node_ids)))
+        return entry, writer
+
+    def _disk_put(self, kind: str, key: str, entry: _Entry):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries (kind, key, generation, files, node_ids, value, last_used, writer) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, key, entry.generation, json.dumps(sorted(entry.files)), json.dumps(sorted(entry.node_ids)),
+             json.dumps(entry.value, ensure_ascii=False, default=str), time.time(), self._writer_id)
+        )
+        self._conn.execute("""
+            DELETE FROM entries WHERE rowid IN (
+                SELECT rowid FROM entries ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.disk_max_entries,))
+        self._conn.commit()
+
+    def _lookup(self, kind: str, key: str, generation: int) -> Tuple[bool, Any]:
+        cache_key = (kind, key)
+        stats = self._kind_stats(kind)
+        entry = self._entries.get(cache_key)
+        from_disk = False
+        writer = self._writer_id
+        if entry is None and self._conn is not None:
+            try:
+                entry, writer = self._disk_get(kind, key)
+                from_disk = entry is not None
+            except Exception as e:
+                logger.error(f"Failed to read graph read cache: {e}")
+        if entry is None:
+            return False, None
+        if writer != self._writer_id:
+            # 다른 프로세스가 쓴 항목: 그 프로세스가 올린 세대의 변경 범위는 여기서 알 수 없으므로 세대가 같을 때만 유효
+            current = entry.generation == generation
+        else:
+            current = self._is_current(entry, generation)
+        if not current:
+            stats.stale += 1
+            self._entries.pop(cache_key, None)
+            return False, None
+        # 변경 범위에 걸리지 않았으므로 현재 세대에서도 유효한 항목으로 갱신합니다.
+        entry.generation = generation
+        self._entries[cache_key] = entry
+        self._entries.move_to_end(cache_key)
+        if from_disk:
+            stats.disk_hits += 1
+            try:
+                self._conn.execute("UPDATE entries SET last_used = ? WHERE kind = ? AND key = ?", (time.time(), kind, key))
+                self._conn.commit()
+            except Exception as e:
+                logger.error(f"Failed to update graph read cache: {e}")
+            self._evict()
+        return True, entry.value
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_load(self, kind: str, key: str, loader: Callable[[], Any],
+                    dependencies: Callable[[Any], Tuple[Iterable[str], Iterable[str]]]) -> Any:
+        """
+        캐시에 유효한 값이 있으면 반환하고, 없으면 loader()로 읽어 저장한 뒤 반환합니다.
+        반환값은 캐시에 보관된 객체 그대로이므로 수정하지 마세요.
+
+        Args:
+            loader: 값을 읽는 함수. None을 반환하면 저장하지 않습니다. (없는 노드 등)
+            dependencies: 값 -> (의존 파일 경로, 의존 노드 ID). 이 범위가 바뀌면 항목이 무효화됩니다.
+        """
+        if not GRAPH_READ_CACHE_ENABLED:
+            return loader()
+        generation, found, missing = self._lookup_many(kind, [key])
+        if not missing:
+            return found[key]
+        started = time.perf_counter()
+        value = loader()
+        self._store_loaded(kind, generation, missing, {} if value is None else {key: value}, dependencies, started)
+        return value
+
+    async def get_or_load_async(self, kind: str, key: str, loader: Callable[[], Awaitable[Any]],
+                                dependencies: Callable[[Any], Tuple[Iterable[str], Iterable[str]]]) -> Any:
+        """get_or_load의 비동기 버전 (loader는 코루틴 함수)"""
+        if not GRAPH_READ_CACHE_ENABLED:
+            return await loader()
+        generation, found, missing = self._lookup_many(kind, [key])
+        if not missing:
+            return found[key]
+        started = time.perf_counter()
+        value = await loader()
+        self._store_loaded(kind, generation, missing, {} if value is None else {key: value}, dependencies, started)
+        return value
+
+    def get_or_load_many(self, kind: str, keys: Iterable[str], loader: Callable[[List[str]], Dict[str, Any]],
+                         dependencies: Callable[[Any], Tuple[Iterable[str], Iterable[str]]]) -> Dict[str, Any]:
+        """
+        여러 키를 한 번에 조회합니다. 캐시에 없는 키만 모아 loader(키 목록) -> {키: 값}으로 한 번에 읽습니다.
+        loader 결과에 없는 키는 저장하지 않고 반환 값에서도 빠집니다.
+
+        Returns:
+            Dict: {키: 값} (찾은 키만)
+        """
+        keys = list(dict.fromkeys(keys))
+        if not GRAPH_READ_CACHE_ENABLED:
+            return loader(keys) if keys else {}
+        generation, found, missing = self._lookup_many(kind, keys)
+        if not missing:
+            return found
+        started = time.perf_counter()
+        loaded = loader(missing)
+        self._store_loaded(kind, generation, missing, loaded, dependencies, started)
+        found.update((key, loaded[key]) for key in missing if loaded.get(key) is not None)
+        return found
+
+    def _lookup_many(self, kind: str, keys: List[str]) -> Tuple[int, Dict[str, Any], List[str]]:
+        started = time.perf_counter()
+        # 적재 전에 세대를 읽어 두어, 적재 중에 일어난 변경도 다음 조회 때 확인되도록 합니다.
+        generation = get_graph_generation()
+        found: Dict[str, Any] = {}
+        missing: List[str] = []
+        with self._lock:
+            stats = self._kind_stats(kind)
+            for key in keys:
+                hit, value = self._lookup(kind, key, generation)
+                if hit:
+                    found[key] = value
+                else:
+                    missing.append(key)
+            if found:
+                elapsed = (time.perf_counter() - started) * 1000 / len(keys)
+                stats.hits += len(found)
+                stats.hit_ms += elapsed * len(found)
+                # 적중 한 번이 아낀 시간 = 지금까지 미스의 키당 평균 적재 시간 - 적중 조회 시간
+                if stats.misses:
+                    stats.saved_ms += max(0.0, stats.load_ms / stats.misses - elapsed) * len(found)
+        return generation, found, missing
+
+    def _store_loaded(self, kind: str, generation: int, missing: List[str], loaded: Dict[str, Any],
+                      dependencies: Callable[[Any], Tuple[Iterable[str], Iterable[str]]], started: float):
+        # 한 번의 적재 비용을 읽은 키 수로 나눠 키당 평균 적재 시간으로 집계합니다.
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            stats = self._kind_stats(kind)
+            stats.misses += len(missing)
+            stats.load_ms += elapsed
+            for key in missing:
+                value = loaded.get(key)
+                if value is None:
+                    continue
+                files, node_ids = dependencies(value)
+                entry = _Entry(value, generation, frozenset(f for f in files if f), frozenset(n for n in node_ids if n))
+                self._entries[(kind, key)] = entry
+                self._entries.move_to_end((kind, key))
+                if self._conn is not None:
+                    try:
+                        self._disk_put(kind, key, entry)
+                    except Exception as e:
+                        logger.error(f"Failed to write graph read cache: {e}")
+            self._evict()
+
+    def invalidate_files(self, file_paths: Iterable[str]) -> int:
+        """파일에 의존하는 항목을 즉시 제거합니다. (그래프 세대를 올리지 않고 파일 내용만 바뀐 경우 등)"""
+        file_paths = set(file_paths)
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if not entry.files.isdisjoint(file_paths)]
+            for key in keys:
+                del self._entries[key]
+            if self._conn is not None and file_paths:
+                # 디스크 항목은 파일 목록을 JSON으로 저장하므로 전체를 훑어 확인합니다.
+                rows = self._conn.execute("SELECT kind, key, files FROM entries").fetchall()
+                disk_keys = [(kind, key) for kind, key, files in rows if not file_paths.isdisjoint(json.loads(files))]
+                self._conn.executemany("DELETE FROM entries WHERE kind = ? AND key = ?", disk_keys)
+                self._conn.commit()
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM entries")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            kinds = {kind: stats.to_dict() for kind, stats in self._stats.items()}
+            hits = sum(stats.hits for stats in self._stats.values())
+            lookups = hits + sum(stats.misses for stats in self._stats.values())
+            return {
+                "enabled": GRAPH_READ_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_tier": self._conn is not None,
+                "graph_generation": get_graph_generation(),
+                "hit_ratio": round(hits / lookups, 4) if lookups else None,
+                "saved_ms": round(sum(stats.saved_ms for stats in self._stats.values()), 3),
+                "kinds": kinds,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+
+_graph_read_cache: Optional[GraphReadCache] = None
+_graph_read_cache_lock = threading.Lock()
+
+
+def get_graph_read_cache() -> GraphReadCache:
+    """프로세스 전역 그래프 읽기 캐시 인스턴스를 반환합니다."""
+    global _graph_read_cache
+    with _graph_read_cache_lock:
+        if _graph_read_cache is None:
+            _graph_read_cache = GraphReadCache()
+        return _graph_read_cache
+
+
+def node_details_dependencies(details: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """/graph/nodes/{id} 결과(node, connections)가 의존하는 파일과 노드 ID"""
+    nodes = [details.get("node") or {}] + [
+        connection.get("connected_node") or {} for connection in details.get("connections") or []
+    ]
+    return [node.get("file_path") for node in nodes], [node.get("id") for node in nodes]
+
+
+def code_context_dependencies(context: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """get_rich_code_contexts_from_neo4j의 노드 하나 결과가 의존하는 파일과 노드 ID"""
+    relations = context.get("relations") or []
+    files = [context.get("file_path")] + [relation.get("target_file_path") for relation in relations]
+    node_ids = [context.get("node_id")] + [relation.get("target_node_id") for relation in relations]
+    return files, node_ids
@@ -0,0 +1,326 @@
+# app/services/graph_snapshot.py
+
+import threading
+import time
+import logging
+from array import array
+from collections import deque
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+import numpy as np
+
+from db.driver_neo4j import stream_cypher_query
+from db.graph_generation import get_graph_generation
+
+logger = logging.getLogger(__name__)
+
+_SNAPSHOT_NODES_QUERY = """
+    MATCH (n)
+    WHERE n.id IS NOT NULL
+    RETURN n.id AS id, labels(n)[0] AS label, n.name AS name, n.file_path AS file_path
+"""
+
+_SNAPSHOT_EDGES_QUERY = """
+    MATCH (s)-[r]->(t)
+    WHERE s.id IS NOT NULL AND t.id IS NOT NULL
+    RETURN s.id AS source_id, t.id AS target_id, type(r) AS type
+"""
+
+DIRECTIONS = ("out", "in", "both")
+
+
+class _Interner:
+    """문자열을 정수 인덱스로 바꿔 한 번만 저장하는 테이블 (레이블, 이름, 파일 경로용)."""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        idx = self._index.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self._index[value] = idx
+            self.values.append(value)
+        return idx
+
+    def lookup(self, idx: int) -> Optional[str]:
+        return self.values[idx] if idx >= 0 else None
+
+    def find(self, value: str) -> Optional[int]:
+        return self._index.get(value)
+
+
+def _build_csr(num_nodes: int, sources: np.ndarray, targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(source, target) 간선 배열로 CSR(indptr, indices)을 만듭니다."""
+    order = np.argsort(sources, kind="stable")
+    indices = targets[order].astype(np.int32)
+    counts = np.bincount(sources, minlength=num_nodes)
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, indices
+
+
+class GraphSnapshot:
+    """
+    코드 그래프의 읽기 전용 인메모리 스냅샷.
+
+    노드는 0부터 시작하는 정수 인덱스로 표현하고, 관계 유형별로 나가는/들어오는 간선을
+    NumPy CSR 배열(indptr, indices)로 보관합니다. 레이블/이름/파일 경로는 인터닝된 테이블에 한 번만 저장합니다.
+    Neo4j가 원본(source of truth)이며, 이 스냅샷은 탐색(k-hop, BFS, 차수 조회) 전용입니다.
+    """
+
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.built_at = time.time()
+        self.build_seconds = 0.0
+        self.node_ids: List[str] = []
+        self.index_of: Dict[str, int] = {}
+        self.labels = _Interner()
+        self.names = _Interner()
+        self.file_paths = _Interner()
+        self.node_label = np.zeros(0, dtype=np.int32)
+        self.node_name = np.zeros(0, dtype=np.int32)
+        self.node_file = np.zeros(0, dtype=np.int32)
+        self.rel_types: List[str] = []
+        self.out_csr: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.in_csr: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self) -> int:
+        return int(sum(len(indices) for _, indices in self.out_csr.values()))
+
+    @classmethod
+    def build(cls, nodes: Iterable[Dict[str, Any]], edges: Iterable[Dict[str, Any]], generation: int) -> "GraphSnapshot":
+        """노드/관계 레코드 스트림으로부터 스냅샷을 만듭니다. 레코드는 한 건씩만 소비합니다."""
+        started = time.perf_counter()
+        snapshot = cls(generation)
+
+        labels = array("i")
+        names = array("i")
+        files = array("i")
+        for record in nodes:
+            node_id = record["id"]
+            if node_id in snapshot.index_of:
+                continue
+            snapshot.index_of[node_id] = len(snapshot.node_ids)
+            snapshot.node_ids.append(node_id)
+            labels.append(snapshot.labels.intern(record.get("label")))
+            names.append(snapshot.names.intern(record.get("name")))
+            files.append(snapshot.file_paths.intern(record.get("file_path")))
+        snapshot.node_label = np.frombuffer(labels, dtype=np.int32).copy()
+        snapshot.node_name = np.frombuffer(names, dtype=np.int32).copy()
+        snapshot.node_file = np.frombuffer(files, dtype=np.int32).copy()
+
+        # 관계 유형별로 (source, target) 인덱스를 압축 배열에 모읍니다.
+        edge_lists: Dict[str, Tuple[array, array]] = {}
+        for record in edges:
+            source = snapshot.index_of.get(record["source_id"])
+            target = snapshot.index_of.get(record["target_id"])
+            if source is None or target is None:
+                continue
+            sources, targets = edge_lists.setdefault(record["type"], (array("i"), array("i")))
+            sources.append(source)
+            targets.append(target)
+
+        num_nodes = snapshot.num_nodes
+        for rel_type, (sources, targets) in edge_lists.items():
+            source_array = np.frombuffer(sources, dtype=np.int32)
+            target_array = np.frombuffer(targets, dtype=np.int32)
+            snapshot.out_csr[rel_type] = _build_csr(num_nodes, source_array, target_array)
+            snapshot.in_csr[rel_type] = _build_csr(num_nodes, target_array, source_array)
+        snapshot.rel_types = sorted(edge_lists.keys())
+
+        snapshot.build_seconds = time.perf_counter() - started
+        return snapshot
+
+    # --- 조회 ---
+
+    def index(self, node_id: str) -> Optional[int]:
+        return self.index_of.get(node_id)
+
+    def node(self, idx: int) -> Dict[str, Any]:
+        return {
+            "id": self.node_ids[idx],
+            "label": self.labels.lookup(int(self.node_label[idx])),
+            "name": self.names.lookup(int(self.node_name[idx])),
+            "file_path": self.file_paths.lookup(int(self.node_file[idx])),
+        }
+
+    def find_nodes(self, label: Optional[str] = None, name: Optional[str] = None,
+                   file_path: Optional[str] = None) -> List[int]:
+        """레이블/이름/파일 경로 조건에 맞는 노드 인덱스 목록을 반환합니다. (지정한 조건만 적용)"""
+        mask = np.ones(self.num_nodes, dtype=bool)
+        for table, column, value in ((self.labels, self.node_label, label),
+                                     (self.names, self.node_name, name),
+                                     (self.file_paths, self.node_file, file_path)):
+            if value is None:
+                continue
+            idx = table.find(value)
+            if idx is None:
+                return []
+            mask &= column == idx
+        return [int(i) for i in mask.nonzero()[0]]
+
+    def _csr_tables(self, direction: str) -> List[Dict[str, Tuple[np.ndarray, np.ndarray]]]:
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown direction: {direction}")
+        if direction == "out":
+            return [self.out_csr]
+        if direction == "in":
+            return [self.in_csr]
+        return [self.out_csr, self.in_csr]
+
+    def neighbors(self, idx: int, rel_types: Optional[Iterable[str]] = None, direction: str = "out") -> np.ndarray:
+        """노드의 이웃 인덱스 배열을 반환합니다. (중복 가능)"""
+        types = self.rel_types if rel_types is None else rel_types
+        parts = []
+        for table in self._csr_tables(direction):
+            for rel_type in types:
+                csr = table.get(rel_type)
+                if csr is None:
+                    continue
+                indptr, indices = csr
+                parts.append(indices[indptr[idx]:indptr[idx + 1]])
+        if not parts:
+            return np.zeros(0, dtype=np.int32)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def degree(self, idx: int, rel_types: Optional[Iterable[str]] = None, direction: str = "out") -> int:
+        """노드의 차수(관계 수)를 반환합니다."""
+        types = self.rel_types if rel_types is None else rel_types
+        total = 0
+        for table in self._csr_tables(direction):
+            for rel_type in types:
+                csr = table.get(rel_type)
+                if csr is not None:
+                    total += int(csr[0][idx + 1] - csr[0][idx])
+        return total
+
+    def bfs(self, source: int, rel_types: Optional[Iterable[str]] = None, direction: str = "out",
+            max_depth: Optional[int] = None, max_nodes: Optional[int] = None) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """
+        source에서 시작하는 너비 우선 탐색.
+
+        Returns:
+            Tuple[Dict, Dict]: ({노드 인덱스: 거리}, {노드 인덱스: 부모 인덱스})
+        """
+        rel_types = list(self.rel_types if rel_types is None else rel_types)
+        distances = {source: 0}
+        parents: Dict[int, int] = {}
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            depth = distances[current]
+            if max_depth is not None and depth >= max_depth:
+                continue
+            for neighbor in self.neighbors(current, rel_types, direction).tolist():
+                if neighbor in distances:
+                    continue
+                if max_nodes is not None and len(distances) >= max_nodes:
+                    return distances, parents
+                distances[neighbor] = depth + 1
+                parents[neighbor] = current
+                queue.append(neighbor)
+        return distances, parents
+
+    def k_hop(self, seeds: Iterable[int], k: int, rel_types: Optional[Iterable[str]] = None,
+              direction: str = "both", max_nodes: Optional[int] = None) -> Dict[int, int]:
+        """seed 노드들에서 k 홉 이내의 노드를 {인덱스: 거리}로 반환합니다."""
+        rel_types = list(self.rel_types if rel_types is None else rel_types)
+        distances = {seed: 0 for seed in seeds}
+        frontier = list(distances.keys())
+        for hop in range(1, k + 1):
+            if not frontier:
+                break
+            next_frontier = []
+            for current in frontier:
+                for neighbor in self.neighbors(current, rel_types, direction).tolist():
+                    if neighbor in distances:
+                        continue
+                    if max_nodes is not None and len(distances) >= max_nodes:
+                        return distances
+                    distances[neighbor] = hop
+                    next_frontier.append(neighbor)
+            frontier = next_frontier
+        return distances
+
+    def edges_between(self, members: Iterable[int], rel_types: Optional[Iterable[str]] = None) -> List[Tuple[int, int, str]]:
+        """주어진 노드 집합 내부의 (source, target, 유형) 간선 목록을 반환합니다."""
+        member_set = set(members)
+        types = self.rel_types if rel_types is None else rel_types
+        result = []
+        for rel_type in types:
+            csr = self.out_csr.get(rel_type)
+            if csr is None:
+                continue
+            indptr, indices = csr
+            for source in member_set:
+                for target in indices[indptr[source]:indptr[source + 1]].tolist():
+                    if target in member_set:
+                        result.append((source, target, rel_type))
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        memory = sum(arr.nbytes for arr in (self.node_label, self.node_name, self.node_file))
+        for table in (self.out_csr, self.in_csr):
+            memory += sum(indptr.nbytes + indices.nbytes for indptr, indices in table.values())
+        return {
+            "generation": self.generation,
+            "built_at": self.built_at,
+            "build_seconds": round(self.build_seconds, 3),
+            "nodes": self.num_nodes,
+            "edges": self.num_edges,
+            "relationship_types": {rel_type: int(len(self.out_csr[rel_type][1])) for rel_type in self.rel_types},
+            "array_bytes": int(memory),
+        }
+
+
+# 현재 사용 중인 스냅샷. 새 스냅샷이 완성되면 참조만 교체하므로 조회 중인 요청은 영향을 받지 않습니다.
+_current_snapshot: Optional[GraphSnapshot] = None
+_build_lock = threading.Lock()
+
+
+def build_graph_snapshot() -> GraphSnapshot:
+    """Neo4j에서 노드/관계를 스트리밍으로 읽어 새 스냅샷을 만듭니다."""
+    generation = get_graph_generation()
+    return GraphSnapshot.build(
+        stream_cypher_query(_SNAPSHOT_NODES_QUERY),
+        stream_cypher_query(_SNAPSHOT_EDGES_QUERY),
+        generation
+    )
+
+
+def rebuild_graph_snapshot() -> GraphSnapshot:
+    """
+    스냅샷을 새로 만들고 원자적으로 교체합니다. 인제스트 완료 후 호출합니다.
+    동시에 여러 번 호출되면 한 번에 하나씩만 빌드합니다.
+    """
+    global _current_snapshot
+    with _build_lock:
+        snapshot = build_graph_snapshot()
+        _current_snapshot = snapshot
+    logger.info(f"그래프 스냅샷 교체 완료: {snapshot.stats()}")
+    return snapshot
+
+
+def get_graph_snapshot(build_if_missing: bool = False) -> Optional[GraphSnapshot]:
+    """현재 스냅샷을 반환합니다. 없으면 build_if_missing에 따라 새로 만들거나 None을 반환합니다."""
+    snapshot = _current_snapshot
+    if snapshot is None and build_if_missing:
+        snapshot = rebuild_graph_snapshot()
+    return snapshot
+
+
+def get_fresh_graph_snapshot() -> Optional[GraphSnapshot]:
+    """현재 그래프 세대와 일치하는(최신) 스냅샷만 반환합니다. 오래된 스냅샷이면 None."""
+    snapshot = _current_snapshot
+    if snapshot is not None and snapshot.generation == get_graph_generation():
+        return snapshot
+    return None
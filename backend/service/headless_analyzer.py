@@ -0,0 +1,139 @@
+# app/services/headless_analyzer.py
+
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+from service.file_name_preprocessor import get_code_files_for_analysis
+from service.file_triage import SKIP, DOWNRANK
+from service.code_parser import parse_file_for_analysis
+from service.symbol_resolver import resolve_cross_file_calls, assign_shared_node_ids
+from service.blob_store import configure_blob_store
+from service.graph_artifact import write_graph_artifact, save_artifact_manifest, dedupe_entities, BLOB_DIR
+from db.graph_compaction import COMPACTABLE_LABELS
+
+logger = logging.getLogger(__name__)
+
+# 파싱/추출 프로세스 수 (0이면 CPU 수)
+HEADLESS_WORKERS = int(os.getenv("HEADLESS_ANALYSIS_WORKERS", "0")) or (os.cpu_count() or 1)
+# 프로세스에 한 번에 넘길 파일 수 (작을수록 부하가 고르고, 클수록 프로세스 간 통신이 줄어듭니다)
+HEADLESS_CHUNK_FILES = int(os.getenv("HEADLESS_ANALYSIS_CHUNK_FILES", "8"))
+
+
+def _init_worker(blob_dir: str):
+    # 추출기는 코드 내용을 전역 blob 저장소에 저장하므로, 작업 프로세스마다 결과물 디렉토리를 가리키게 합니다.
+    configure_blob_store(blob_dir)
+
+
+def _parse_worker(task: Tuple[str, str]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    file_path, relative_path = task
+    return parse_file_for_analysis(file_path, relative_path)
+
+
+def _set_file_entity_counts(file_path: str, entities: List[Dict[str, Any]]):
+    """File 노드에 파일의 엔티티 수를 기록합니다. (결과물은 나눠서 적재하므로 적재 시점에 셀 수 없습니다)"""
+    count = sum(1 for entity in entities if entity.get("type") != "File" and entity.get("file_path") == file_path)
+    for entity in entities:
+        if entity.get("type") == "File" and entity.get("file_path") == file_path:
+            entity["entity_count"] = count
+
+
+def analyze_to_artifact(project_root: str, selected_paths: List[str], artifact_dir: str,
+                        workers: int = HEADLESS_WORKERS, embed: bool = False,
+                        progress: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    서버/Neo4j 없이 프로젝트를 분석해 그래프 결과물(service/graph_artifact.py)로 저장합니다.
+
+    분석 대상 선택(get_code_files_for_analysis)과 파일별 파싱/추출은 분석 작업과 같고, 파싱은 프로세스 풀에서 병렬로 실행합니다.
+    파일 간 호출 해석과 공유 노드 ID 부여(그래프 압축과 같은 결과)까지 마친 상태로 저장하므로,
+    적재(db/artifact_loader.py)는 행을 그대로 쓰기만 하면 됩니다.
+
+    Args:
+        embed: True면 임베딩도 계산해 결과물에 포함합니다. (모델을 로드하므로 느립니다)
+        progress: 진행 메시지를 받을 함수
+
+    Returns:
+        Dict: 저장한 manifest
+    """
+    report = progress or (lambda message: None)
+    started = time.perf_counter()
+    stage_seconds: Dict[str, float] = {}
+    root = Path(project_root).absolute()
+    root_str = str(root)
+    artifact_path = Path(artifact_dir)
+    blob_dir = artifact_path / BLOB_DIR
+    blob_dir.mkdir(parents=True, exist_ok=True)
+
+    # 1. 분석 대상 파일
+    stage_started = time.perf_counter()
+    triage_decisions: List[Dict[str, Any]] = []
+    files_to_analyze = get_code_files_for_analysis(root, selected_paths, triage_decisions=triage_decisions)
+    if not files_to_analyze:
+        raise ValueError("분석할 유효한 코드 파일이 선택되지 않았습니다.")
+    stage_seconds["scan"] = round(time.perf_counter() - stage_started, 3)
+    report(f"분석 대상 파일 {len(files_to_analyze)}개")
+
+    # 2. 파싱/추출 (프로세스 풀, 결과는 파일 순서대로)
+    stage_started = time.perf_counter()
+    tasks = [(str(file_path), str(file_path.relative_to(root))) for file_path in files_to_analyze]
+    details: List[Dict[str, Any]] = []
+    parsed_files: List[Dict[str, Any]] = []
+    with ProcessPoolExecutor(max_workers=max(1, workers), initializer=_init_worker, initargs=(str(blob_dir),)) as executor:
+        for (file_path, _), (detail, payload) in zip(
+            tasks, executor.map(_parse_worker, tasks, chunksize=HEADLESS_CHUNK_FILES)
+        ):
+            details.append(detail)
+            if payload is not None:
+                parsed_files.append({"file_path": file_path, **payload})
+            if len(details) % 500 == 0:
+                report(f"파싱 {len(details)}/{len(tasks)}")
+    stage_seconds["parse"] = round(time.perf_counter() - stage_started, 3)
+    report(f"파싱 완료: {len(parsed_files)}/{len(tasks)} 파일 ({stage_seconds['parse']}s)")
+
+    # 3. 파일 간 호출 해석 + 공유 노드 ID 부여
+    stage_started = time.perf_counter()
+    resolution_stats = resolve_cross_file_calls(parsed_files, root_str)
+    assign_shared_node_ids(parsed_files, root_str, COMPACTABLE_LABELS)
+    for parsed in parsed_files:
+        _set_file_entity_counts(parsed["file_path"], parsed["extracted_entities"])
+    entities = dedupe_entities(parsed["extracted_entities"] for parsed in parsed_files)
+    relationships = [rel for parsed in parsed_files for rel in parsed["extracted_relationships"]]
+    stage_seconds["resolve"] = round(time.perf_counter() - stage_started, 3)
+
+    # 4. 임베딩 (선택)
+    embeddings = None
+    if embed:
+        from service.ai_data_pipeline import build_enriched_texts, embed_texts
+
+        stage_started = time.perf_counter()
+        nodes = build_enriched_texts(entities, relationships)
+        report(f"임베딩 {len(nodes)}개 노드")
+        embeddings = embed_texts(nodes)
+        stage_seconds["embed"] = round(time.perf_counter() - stage_started, 3)
+
+    # 5. 결과물 저장
+    stage_started = time.perf_counter()
+    for decision in triage_decisions:
+        if decision["action"] == SKIP:
+            details.append({"file_path": decision["file_path"], "status": "skipped", "reason": "; ".join(decision["reasons"])})
+    manifest = write_graph_artifact(artifact_path, entities, relationships, {
+        "project_root": root_str,
+        "selected_paths": selected_paths,
+        "total_files_for_analysis": len(files_to_analyze),
+        "analyzed_files_details": details,
+        "symbol_resolution": resolution_stats,
+        "triage": {
+            "skipped": sum(1 for decision in triage_decisions if decision["action"] == SKIP),
+            "downranked": sum(1 for decision in triage_decisions if decision["action"] == DOWNRANK)
+        },
+        "workers": workers,
+    }, embeddings)
+    stage_seconds["write"] = round(time.perf_counter() - stage_started, 3)
+    stage_seconds["total"] = round(time.perf_counter() - started, 3)
+    manifest["stage_seconds"] = stage_seconds
+    save_artifact_manifest(artifact_path, manifest)
+    logger.info(f"그래프 결과물 저장 완료: {artifact_path} {manifest['counts']} {stage_seconds}")
+    return manifest
@@ -1,11 +1,13 @@
 # app/services/llm_service.py (Gemini API 버전)
 
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import requests
 import json
 import os
 
+from service.prompt_context_assembler import assemble_prompt_context, estimate_tokens
+
 # 로거 설정
 logger = logging.getLogger(__name__)
 
@@ -15,6 +17,9 @@ API_KEY = os.getenv("GEMINI_API_KEY")
 # API 호출 URL
 API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-pro:generateContent"
 
+# 프롬프트(시스템 프롬프트 + 컨텍스트)에 사용할 최대 토큰 수 (추정치 기준)
+PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "12000"))
+
 def load_prompt_template(file_path: str) -> str:
     """
     지정된 파일 경로에서 프롬프트 템플릿을 읽어와 문자열로 반환합니다.
@@ -31,20 +36,30 @@ def load_prompt_template(file_path: str) -> str:
 
 
 
-def generate_natural_language_response(query: str, contexts: List[Dict[str, Any]]) -> str:
+def generate_natural_language_response(query: str, contexts: List[Dict[str, Any]], token_budget: Optional[int] = None) -> str:
     """
     사용자 쿼리와 코드 컨텍스트(노드 및 릴레이션 정보)를 기반으로 Gemini API를 사용하여 자연어 답변을 생성합니다.
+    token_budget을 지정하지 않으면 PROMPT_TOKEN_BUDGET 환경 변수 값을 프롬프트 예산으로 사용합니다.
+    """
+    response, _ = generate_natural_language_response_with_status(query, contexts, token_budget)
+    return response
+
+
+def generate_natural_language_response_with_status(query: str, contexts: List[Dict[str, Any]], token_budget: Optional[int] = None) -> Tuple[Any, bool]:
+    """
+    generate_natural_language_response와 동일하지만, (답변, 성공 여부) 튜플을 반환합니다.
+    오류 안내 메시지와 실제 답변을 구분해야 하는 호출자(예: 답변 캐시)에서 사용합니다.
     """
     if not API_KEY:
         logger.error("GEMINI_API_KEY 환경 변수가 설정되지 않았습니다. 답변을 생성할 수 없습니다.")
-        return "API 키가 없어 답변을 생성할 수 없습니다. 시스템 관리자에게 문의해주세요."
+        return "API 키가 없어 답변을 생성할 수 없습니다. 시스템 관리자에게 문의해주세요.", False
     
     # 외부 파일에서 기본 프롬프트 템플릿을 불러옵니다.
     prompt_file_path = "./ai_instructions/LLM_prompt.txt"
     base_prompt = load_prompt_template(prompt_file_path)
 
     if not base_prompt:
-        return "프롬프트 템플릿을 불러오는 데 실패했습니다. 시스템 관리자에게 문의해주세요."
+        return "프롬프트 템플릿을 불러오는 데 실패했습니다. 시스템 관리자에게 문의해주세요.", False
 
     logger.info("Gemini API에 요청 전송 중...")
 
@@ -54,54 +69,24 @@ def generate_natural_language_response(query: str, contexts: List[Dict[str, Any]
     if is_code_present:
         # 코드 스니펫이 포함된 경우의 템플릿
         system_prompt = "너는 코드 스니펫과 코드 그래프의 관계 정보를 바탕으로 질문에 답변하는 유용한 코드 어시스턴트야. 주어진 정보와 질문을 바탕으로 완전하고 친절한 답변을 생성해줘."
-        user_content = f"다음은 쿼리와 관련 코드 컨텍스트(코드 스니펫 및 관계)입니다.\n\n**쿼리:**\n{query}\n\n**관련 코드 컨텍스트:**\n---"
-        
-        # 검색된 코드 컨텍스트를 프롬프트에 추가합니다.
-        for context in contexts:
-            user_content += f"\n\n**파일 경로:** {context.get('file_path', 'N/A')}"
-            user_content += f"\n**노드 유형:** {context.get('type', 'N/A')}"
-            
-            # 코드 스니펫 추가
-            snippet = context.get('code_snippet', '').strip()
-            if snippet:
-                user_content += f"\n**코드 스니펫:**\n```python\n{snippet}\n```"
-            else:
-                user_content += f"\n**코드 스니펫:** 없음"
-            
-            # 릴레이션 정보 추가
-            relations = context.get('relations', [])
-            if relations:
-                user_content += "\n**관련 관계 및 노드:**"
-                for rel in relations:
-                    user_content += (
-                        f"\n- **관계 유형:** {rel.get('rel_type', 'N/A')}, "
-                        f"**대상 노드:** {rel.get('target_node_name', 'N/A')}, "
-                        f"**대상 유형:** {rel.get('target_node_type', 'N/A')}"
-                    )
-            user_content += "\n---"
-
+        header = f"다음은 쿼리와 관련 코드 컨텍스트(코드 스니펫 및 관계)입니다.\n\n**쿼리:**\n{query}\n\n**관련 코드 컨텍스트:**\n---"
     else:
         # 코드 스니펫이 없는 경우의 템플릿 (구조적 정보만 존재)
         system_prompt = "너는 코드의 구조적 정보에 대한 질문에 답변하는 유용한 코드 어시스턴트야. 주어진 정보는 실제 코드가 아닌 그래프 구조적 정보이므로, 왜 스니펫을 제공할 수 없는지 설명하고 실제 코드가 필요함을 사용자에게 친절하게 안내해줘. 답변은 주어진 구조적 정보와 함께 제공되어야 해."
-        user_content = f"다음은 쿼리와 관련 구조적 정보입니다.\n\n**쿼리:**\n{query}\n\n**관련 구조적 정보:**\n---"
-        
-        # 검색된 구조적 컨텍스트를 프롬프트에 추가합니다.
-        for context in contexts:
-            user_content += f"\n\n**파일 경로:** {context.get('file_path', 'N/A')}"
-            user_content += f"\n**노드 유형:** {context.get('type', 'N/A')}"
-            
-            # 릴레이션 정보 추가
-            relations = context.get('relations', [])
-            if relations:
-                user_content += "\n**관련 관계 및 노드:**"
-                for rel in relations:
-                    user_content += (
-                        f"\n- **관계 유형:** {rel.get('rel_type', 'N/A')}, "
-                        f"**대상 노드:** {rel.get('target_node_name', 'N/A')}, "
-                        f"**대상 유형:** {rel.get('target_node_type', 'N/A')}"
-                    )
-            user_content += "\n---"
-            
+        header = f"다음은 쿼리와 관련 구조적 정보입니다.\n\n**쿼리:**\n{query}\n\n**관련 구조적 정보:**\n---"
+
+    # 토큰 예산 안에서 컨텍스트(스니펫 + 관계)를 조립합니다.
+    # 시스템 프롬프트도 같은 예산을 사용하므로 그만큼 제외하고 배정합니다.
+    budget = token_budget or PROMPT_TOKEN_BUDGET
+    assembled = assemble_prompt_context(
+        query,
+        contexts,
+        token_budget=max(0, budget - estimate_tokens(system_prompt)),
+        include_snippets=is_code_present,
+        header=header,
+    )
+    user_content = assembled["prompt"]
+    logger.info(f"프롬프트 토큰 사용량(추정): {assembled['token_usage']}")
 
     try:
         payload = {
@@ -118,7 +103,7 @@ def generate_natural_language_response(query: str, contexts: List[Dict[str, Any]
             result = response.json()
         except json.JSONDecodeError as e:
             logger.error(f"Gemini API 응답 JSON 디코딩 오류: {e}. 원본 텍스트: {response.text}")
-            return {"response": "API 응답 형식이 올바르지 않습니다. 다시 시도해 주세요.", "status": "error"}
+            return {"response": "API 응답 형식이 올바르지 않습니다. 다시 시도해 주세요.", "status": "error"}, False
 
         # API 응답 구조의 'KeyError'를 안전하게 처리
         if "candidates" in result and result["candidates"] and \
@@ -131,15 +116,15 @@ def generate_natural_language_response(query: str, contexts: List[Dict[str, Any]
             if "text" in part:
                 response_text = part["text"]
                 logger.info("API 답변 성공적으로 수신.")
-                return response_text
+                return response_text, True
 
         # 예상치 못한 응답 형식일 경우
         logger.error(f"예상치 못한 Gemini API 응답 형식: {json.dumps(result, indent=2)}")
-        return {"response": "알 수 없는 API 응답이 도착했습니다. 다시 시도해 주세요.", "status": "error"}
+        return {"response": "알 수 없는 API 응답이 도착했습니다. 다시 시도해 주세요.", "status": "error"}, False
 
     except requests.exceptions.HTTPError as err:
         logger.error(f"HTTP 오류 발생: {err}", exc_info=True)
-        return f"API 호출 중 HTTP 오류가 발생했습니다: {err.response.text}"
+        return f"API 호출 중 HTTP 오류가 발생했습니다: {err.response.text}", False
     except Exception as e:
         logger.error(f"Gemini API로 답변 생성 중 오류 발생: {e}", exc_info=True)
-        return "자연어 답변을 생성하는 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요."
+        return "자연어 답변을 생성하는 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.", False
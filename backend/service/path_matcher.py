@@ -0,0 +1,246 @@
+# app/services/path_matcher.py
+
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+GITIGNORE_FILE_NAME = ".gitignore"
+
+
+def _translate_glob(pattern: str) -> str:
+    """gitignore 형식의 glob 패턴을 정규식으로 바꿉니다. (*, ?, [...], ** 지원)"""
+    i, n = 0, len(pattern)
+    out = []
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i):
+                j = i + 2
+                if j < n and pattern[j] == "/":
+                    out.append("(?:.*/)?")  # '**/' : 0개 이상의 디렉토리
+                    i = j + 1
+                else:
+                    out.append(".*")  # 끝의 '**' : 하위 전체
+                    i = j
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = pattern.find("]", i + 2 if pattern.startswith("[!", i) else i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = j + 1
+                continue
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class _Rule:
+    __slots__ = ("regex", "negate", "dir_only")
+
+    def __init__(self, regex: str, negate: bool, dir_only: bool):
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+
+
+def _parse_rule(line: str) -> Optional[_Rule]:
+    """
+    .gitignore 한 줄을 규칙으로 바꿉니다.
+    - 빈 줄, '#' 주석은 무시하고 '!'는 다시 포함(부정) 규칙입니다.
+    - 끝의 '/'는 디렉토리에만 적용됩니다.
+    - 중간(또는 앞)에 '/'가 있으면 .gitignore가 있는 디렉토리 기준 경로, 없으면 모든 깊이의 이름과 비교합니다.
+    """
+    line = line.rstrip("\r\n")
+    if not line or line.startswith("#"):
+        return None
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "  # '\ '로 이스케이프된 끝 공백은 유지
+    line = stripped
+
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    elif line.startswith(("\\!", "\\#")):
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    anchored = "/" in line
+    regex = _translate_glob(line.lstrip("/"))
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    return _Rule(regex, negate, dir_only)
+
+
+class IgnoreRuleSet:
+    """
+    .gitignore 파일 하나(또는 설정된 glob 목록)의 컴파일된 규칙.
+    부정 규칙이 없으면 모든 패턴을 정규식 하나로 합쳐 경로당 한 번만 비교합니다.
+    """
+
+    def __init__(self, base: str, lines: List[str]):
+        self.base = base  # 규칙 기준 디렉토리 (프로젝트 기준 상대 경로, 루트는 "")
+        rules = [rule for rule in (_parse_rule(line) for line in lines) if rule is not None]
+        self.has_negation = any(rule.negate for rule in rules)
+        if self.has_negation:
+            self._rules = [(re.compile(rule.regex), rule.negate, rule.dir_only) for rule in rules]
+        else:
+            self._rules = []
+            any_patterns = [rule.regex for rule in rules if not rule.dir_only]
+            dir_patterns = [rule.regex for rule in rules if rule.dir_only]
+            self._any_regex = re.compile("|".join(f"(?:{p})" for p in any_patterns)) if any_patterns else None
+            self._dir_regex = re.compile("|".join(f"(?:{p})" for p in dir_patterns)) if dir_patterns else None
+        self.empty = not rules
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Returns:
+            True: 제외, False: 부정 규칙으로 다시 포함, None: 일치하는 규칙 없음
+        """
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return None
+            rel_path = rel_path[len(self.base) + 1:]
+        if self.has_negation:
+            # 마지막으로 일치한 규칙이 우선합니다.
+            for regex, negate, dir_only in reversed(self._rules):
+                if dir_only and not is_dir:
+                    continue
+                if regex.fullmatch(rel_path):
+                    return not negate
+            return None
+        if self._any_regex is not None and self._any_regex.fullmatch(rel_path):
+            return True
+        if is_dir and self._dir_regex is not None and self._dir_regex.fullmatch(rel_path):
+            return True
+        return None
+
+
+class PathMatcher:
+    """
+    분석 대상 파일 선택용 경로 매처.
+
+    - exclude_globs: 항상 제외할 gitignore 형식 패턴 (설정값)
+    - include_globs: 주어지면 파일은 이 중 하나와 일치해야 포함됩니다.
+    - use_gitignore: 프로젝트 루트부터 각 디렉토리의 .gitignore를 적용합니다. (하위 디렉토리의 규칙이 우선)
+
+    walk_files()는 제외된 디렉토리로 내려가지 않으므로 node_modules, .git 등을 읽지 않습니다.
+    """
+
+    def __init__(self, project_root: Path, include_globs: Optional[List[str]] = None,
+                 exclude_globs: Optional[List[str]] = None, use_gitignore: bool = True):
+        self.project_root = Path(project_root)
+        self.exclude = IgnoreRuleSet("", exclude_globs or [])
+        self.include = IgnoreRuleSet("", include_globs) if include_globs else None
+        self.use_gitignore = use_gitignore
+        self._gitignore_cache: Dict[str, Optional[IgnoreRuleSet]] = {}
+
+    def _load_gitignore(self, rel_dir: str) -> Optional[IgnoreRuleSet]:
+        if rel_dir in self._gitignore_cache:
+            return self._gitignore_cache[rel_dir]
+        rule_set = None
+        gitignore_path = self.project_root / rel_dir / GITIGNORE_FILE_NAME
+        try:
+            with open(gitignore_path, "r", encoding="utf-8", errors="replace") as f:
+                rule_set = IgnoreRuleSet(rel_dir, f.readlines())
+            if rule_set.empty:
+                rule_set = None
+        except OSError:
+            pass
+        self._gitignore_cache[rel_dir] = rule_set
+        return rule_set
+
+    def _ignored(self, rel_path: str, is_dir: bool, chain: List[IgnoreRuleSet]) -> bool:
+        if self.exclude.match(rel_path, is_dir):
+            return True
+        for rule_set in reversed(chain):
+            result = rule_set.match(rel_path, is_dir)
+            if result is not None:
+                return result
+        return False
+
+    def _included(self, rel_path: str) -> bool:
+        return self.include is None or self.include.match(rel_path, False) is True
+
+    def _chain_for(self, rel_dir: str) -> Tuple[List[IgnoreRuleSet], bool]:
+        """
+        루트부터 rel_dir까지의 .gitignore 규칙 목록을 만들고, 그 사이의 디렉토리 중 제외된 것이 있는지 확인합니다.
+
+        Returns:
+            (규칙 목록, rel_dir 또는 상위 디렉토리가 제외되었는지 여부)
+        """
+        chain: List[IgnoreRuleSet] = []
+        parts = [part for part in rel_dir.split("/") if part]
+        current = ""
+        for depth in range(len(parts) + 1):
+            if depth > 0:
+                current = "/".join(parts[:depth])
+                if self._ignored(current, True, chain):
+                    return chain, True
+            if self.use_gitignore:
+                rule_set = self._load_gitignore(current)
+                if rule_set is not None:
+                    chain.append(rule_set)
+        return chain, False
+
+    def is_file_selected(self, rel_path: str) -> bool:
+        """직접 선택된 파일 하나가 제외 규칙/포함 규칙을 통과하는지 확인합니다. (상위 디렉토리 제외 여부 포함)"""
+        parent = rel_path.rsplit("/", 1)[0] if "/" in rel_path else ""
+        chain, parent_ignored = self._chain_for(parent)
+        return not parent_ignored and not self._ignored(rel_path, False, chain) and self._included(rel_path)
+
+    def walk_files(self, rel_dir: str = "") -> Iterator[Tuple[Path, str]]:
+        """
+        rel_dir 아래의 포함 대상 파일을 (전체 경로, 프로젝트 기준 상대 경로)로 순회합니다.
+        제외된 디렉토리는 읽지 않으며, 심볼릭 링크로 연결된 디렉토리는 따라가지 않습니다.
+        """
+        chain, ignored = self._chain_for(rel_dir)
+        if ignored:
+            return
+        start = self.project_root / rel_dir if rel_dir else self.project_root
+        stack: List[Tuple[str, str, List[IgnoreRuleSet]]] = [(str(start), rel_dir, chain)]
+        while stack:
+            dir_path, dir_rel, dir_chain = stack.pop()
+            try:
+                with os.scandir(dir_path) as iterator:
+                    entries = sorted(iterator, key=lambda entry: entry.name)
+            except OSError as e:
+                print(f"Warning: Cannot read directory {dir_path}: {e}")
+                continue
+
+            if self.use_gitignore and dir_rel != rel_dir and any(e.name == GITIGNORE_FILE_NAME for e in entries):
+                rule_set = self._load_gitignore(dir_rel)
+                if rule_set is not None:
+                    dir_chain = dir_chain + [rule_set]
+
+            subdirs = []
+            for entry in entries:
+                entry_rel = f"{dir_rel}/{entry.name}" if dir_rel else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not self._ignored(entry_rel, True, dir_chain):
+                            subdirs.append((entry.path, entry_rel, dir_chain))
+                    elif entry.is_file():
+                        if not self._ignored(entry_rel, False, dir_chain) and self._included(entry_rel):
+                            yield Path(entry.path), entry_rel
+                except OSError:
+                    continue
+            # 이름 순서대로 방문하도록 역순으로 쌓습니다.
+            stack.extend(reversed(subdirs))
@@ -0,0 +1,119 @@
+# app/services/progress_bus.py
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Hashable
+
+# 같은 단계의 진행 이벤트를 구독자에게 전달하는 최소 간격(초). 그 사이의 이벤트는 마지막 것만 전달됩니다.
+PROGRESS_MIN_INTERVAL = float(os.getenv("PROGRESS_MIN_INTERVAL", "0.1"))
+# 구독자별 큐 최대 길이. 소비가 느린 구독자는 가장 오래된 이벤트부터 버립니다. (작업 스레드는 절대 막히지 않음)
+PROGRESS_QUEUE_SIZE = int(os.getenv("PROGRESS_QUEUE_SIZE", "1000"))
+
+
+class ProgressBus:
+    """
+    작업 스레드에서 이벤트 루프(SSE 스트림)로 진행 이벤트를 전달하는 스레드 안전 채널.
+
+    - publish()는 어느 스레드에서나 호출할 수 있으며, 락을 잠깐 잡고 call_soon_threadsafe로 전달만 예약하므로 블로킹되지 않습니다.
+    - coalesce_key가 같은 이벤트(예: 같은 단계의 진행률)는 min_interval 안에 여러 번 오면 마지막 것만 전달됩니다.
+    - coalesce_key가 없는 이벤트(상태 변화, 요약, 오류 등)는 버리지 않고 순서대로 전달됩니다.
+    """
+
+    def __init__(self, min_interval: float = PROGRESS_MIN_INTERVAL, queue_size: int = PROGRESS_QUEUE_SIZE):
+        self.min_interval = min_interval
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._pending: Dict[str, "OrderedDict[Hashable, Any]"] = {}
+        self._flush_scheduled = set()
+        self._last_flush: Dict[str, float] = {}
+        self._stats = {"published": 0, "coalesced": 0, "delivered": 0, "dropped": 0}
+
+    def subscribe(self, topic: str) -> asyncio.Queue:
+        """topic의 이벤트를 받을 큐를 등록합니다. 이벤트 루프 안에서 호출해야 합니다."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._subscribers.setdefault(topic, []).append(queue)
+        return queue
+
+    def unsubscribe(self, topic: str, queue: asyncio.Queue):
+        with self._lock:
+            queues = self._subscribers.get(topic, [])
+            if queue in queues:
+                queues.remove(queue)
+            if not queues:
+                self._subscribers.pop(topic, None)
+                self._pending.pop(topic, None)
+
+    def publish(self, topic: str, item: Any, coalesce_key: Optional[Hashable] = None):
+        """이벤트를 발행합니다. 구독자가 없으면 아무것도 하지 않습니다."""
+        with self._lock:
+            self._stats["published"] += 1
+            loop = self._loop
+            if loop is None or not self._subscribers.get(topic):
+                return
+            pending = self._pending.setdefault(topic, OrderedDict())
+            key = ("coalesce", coalesce_key) if coalesce_key is not None else ("event", self._stats["published"])
+            if key in pending:
+                # 이전 진행률은 버리고, 순서상 가장 최근 위치로 옮깁니다.
+                pending.pop(key)
+                self._stats["coalesced"] += 1
+            pending[key] = item
+            if topic in self._flush_scheduled:
+                return
+            self._flush_scheduled.add(topic)
+            elapsed = time.monotonic() - self._last_flush.get(topic, 0.0)
+            delay = 0.0 if coalesce_key is None else max(0.0, self.min_interval - elapsed)
+        try:
+            loop.call_soon_threadsafe(self._schedule_flush, topic, delay)
+        except RuntimeError:
+            # 이벤트 루프가 이미 닫힌 경우 (서버 종료 중)
+            with self._lock:
+                self._flush_scheduled.discard(topic)
+
+    def _schedule_flush(self, topic: str, delay: float):
+        if delay > 0:
+            self._loop.call_later(delay, self._flush, topic)
+        else:
+            self._flush(topic)
+
+    def _flush(self, topic: str):
+        """(이벤트 루프 스레드) 모아 둔 이벤트를 구독자 큐에 넣습니다."""
+        with self._lock:
+            pending = self._pending.get(topic)
+            items = list(pending.values()) if pending else []
+            if pending:
+                pending.clear()
+            self._flush_scheduled.discard(topic)
+            self._last_flush[topic] = time.monotonic()
+            queues = list(self._subscribers.get(topic, []))
+
+        for queue in queues:
+            for item in items:
+                if queue.full():
+                    queue.get_nowait()
+                    self._stats["dropped"] += 1
+                queue.put_nowait(item)
+                self._stats["delivered"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "topics": len(self._subscribers)}
+
+
+_progress_bus: Optional[ProgressBus] = None
+_progress_bus_lock = threading.Lock()
+
+
+def get_progress_bus() -> ProgressBus:
+    global _progress_bus
+    if _progress_bus is None:
+        with _progress_bus_lock:
+            if _progress_bus is None:
+                _progress_bus = ProgressBus()
+    return _progress_bus
@@ -0,0 +1,304 @@
+# app/services/prompt_context_assembler.py
+
+import math
+import re
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 토큰 수 추정 시 ASCII 문자 몇 개를 토큰 1개로 볼지 (영문/코드 기준 대략 4자)
+ASCII_CHARS_PER_TOKEN = 4
+
+# 하나의 컨텍스트 예산 중 코드 스니펫에 우선 배정할 비율 (나머지는 관계 정보)
+SNIPPET_BUDGET_RATIO = 0.6
+
+# 스니펫이 예산을 넘을 때 최소한으로 보여줄 라인 수
+MIN_SNIPPET_LINES = 3
+
+# 관계 유형별 우선순위 (값이 클수록 먼저 프롬프트에 포함)
+REL_TYPE_PRIORITY = {
+    "CALLS": 5,
+    "CONTAINS": 4,
+    "IMPORTS_NAME": 3,
+    "IMPORTS_MODULE": 3,
+    "IMPORTS_ALIAS": 2,
+    "IMPORTS_ALIASED_ORIGINAL": 2,
+    "IMPORTS_WILDCARD": 1,
+}
+
+# 대상 노드 유형별 우선순위 (프로젝트 내부 정의가 외부 호출 대상보다 유용함)
+TARGET_TYPE_PRIORITY = {
+    "Function": 3,
+    "Class": 3,
+    "File": 2,
+    "Variable": 1,
+}
+
+_QUERY_TERM_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+
+# 컨텍스트 구분선
+_SEPARATOR = "---"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    문자열의 토큰 수를 대략적으로 추정합니다.
+    ASCII 문자는 4자당 1토큰, 그 외 문자(한글 등)는 1자당 1토큰으로 계산합니다.
+    """
+    if not text:
+        return 0
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    ascii_count = len(text) - non_ascii
+    return math.ceil(ascii_count / ASCII_CHARS_PER_TOKEN) + non_ascii
+
+
+# 구분선과 스니펫을 감싸는 마크다운의 토큰 수 (섹션 예산에서 미리 뺍니다)
+_SEPARATOR_TOKENS = estimate_tokens(_SEPARATOR) + 1
+_SNIPPET_WRAPPER_TOKENS = estimate_tokens("**코드 스니펫:**\n```python\n\n```") + 1
+
+
+def _extract_query_terms(query: str) -> List[str]:
+    """쿼리에서 식별자 형태의 단어를 소문자로 추출합니다."""
+    return list({term.lower() for term in _QUERY_TERM_PATTERN.findall(query or "")})
+
+
+def _rank_and_collapse_relations(relations: List[Dict[str, Any]], query_terms: List[str]) -> List[Dict[str, Any]]:
+    """
+    릴레이션을 (관계 유형, 대상 노드) 기준으로 중복 제거하고,
+    같은 대상으로 반복되는 관계(예: print 로의 CALLS 50개)는 하나로 합쳐 개수만 남긴 뒤
+    쿼리 관련성 / 관계 유형 / 대상 유형 순으로 정렬합니다.
+    """
+    collapsed: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    for rel in relations:
+        rel_type = rel.get('rel_type') or 'N/A'
+        target_name = rel.get('target_node_name') or 'N/A'
+        target_type = rel.get('target_node_type') or 'N/A'
+        key = (rel_type, target_name, target_type)
+        if key in collapsed:
+            collapsed[key]["count"] += 1
+            continue
+        collapsed[key] = {
+            "rel_type": rel_type,
+            "target_node_name": target_name,
+            "target_node_type": target_type,
+            "count": 1,
+        }
+
+    def _score(item: Dict[str, Any]) -> Tuple[int, int, int, int]:
+        name = item["target_node_name"].lower()
+        query_hit = 1 if any(term in name or name in term for term in query_terms) else 0
+        return (
+            query_hit,
+            REL_TYPE_PRIORITY.get(item["rel_type"], 0),
+            TARGET_TYPE_PRIORITY.get(item["target_node_type"], 0),
+            item["count"],
+        )
+
+    return sorted(collapsed.values(), key=_score, reverse=True)
+
+
+def _format_relation(item: Dict[str, Any]) -> str:
+    line = (
+        f"- **관계 유형:** {item['rel_type']}, "
+        f"**대상 노드:** {item['target_node_name']}, "
+        f"**대상 유형:** {item['target_node_type']}"
+    )
+    if item["count"] > 1:
+        line += f" (x{item['count']})"
+    return line
+
+
+def _cut_line(line: str, query_terms: List[str], token_budget: int) -> str:
+    """
+    한 줄이 예산보다 길면(압축/생성 코드 등) 쿼리 단어가 처음 나오는 위치(없으면 줄 시작) 주변의
+    문자 구간만 남기고, 잘린 쪽에 ' ... '를 붙입니다. 예산 안에 한 글자도 못 넣으면 빈 문자열을 반환합니다.
+    """
+    lowered = line.lower()
+    positions = [lowered.find(term) for term in query_terms if term in lowered]
+    center = min(positions) if positions else 0
+
+    def window(width: int) -> str:
+        start = max(0, min(center - width // 2, len(line) - width))
+        end = start + width
+        return ("..." if start > 0 else "") + line[start:end] + (" ..." if end < len(line) else "")
+
+    # 예산 안에 들어가는 가장 넓은 구간을 이분 탐색으로 찾습니다.
+    low, high = 0, len(line)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(window(middle)) <= token_budget:
+            low = middle
+        else:
+            high = middle - 1
+    return window(low) if low else ""
+
+
+def _truncate_snippet(snippet: str, query_terms: List[str], token_budget: int) -> Tuple[str, bool]:
+    """
+    스니펫이 예산을 넘으면, 쿼리 단어가 가장 많이 등장하는 라인을 중심으로
+    예산 안에 들어가는 라인 구간만 잘라서 반환합니다.
+    예산보다 긴 라인은 문자 단위로 잘라 결과가 항상 token_budget 안에 들어갑니다.
+    반환값: (잘린 스니펫, 잘렸는지 여부) - 예산 안에 의미 있는 구간을 못 넣으면 ("", True)
+    """
+    if estimate_tokens(snippet) <= token_budget:
+        return snippet, False
+
+    lines = snippet.splitlines()
+    # 앞뒤 생략 표시 두 줄의 토큰은 미리 빼 둡니다.
+    marker_tokens = estimate_tokens(f"# ... ({len(lines)} lines omitted)") + 1
+    line_budget = token_budget - 2 * marker_tokens
+    if line_budget <= 1:
+        return "", True
+
+    # 관련 구간의 중심 라인: 쿼리 단어 적중 수가 가장 많은 라인 (없으면 정의부인 첫 라인)
+    center = 0
+    best_hits = 0
+    for idx, line in enumerate(lines):
+        lowered = line.lower()
+        hits = sum(1 for term in query_terms if term in lowered)
+        if hits > best_hits:
+            best_hits = hits
+            center = idx
+
+    line_tokens = [estimate_tokens(line) + 1 for line in lines]
+    center_cut = line_tokens[center] > line_budget
+    if center_cut:
+        lines[center] = _cut_line(lines[center], query_terms, line_budget - 1)
+        if not lines[center]:
+            return "", True
+        line_tokens[center] = estimate_tokens(lines[center]) + 1
+
+    start = end = center
+    used = line_tokens[center]
+    # 중심에서 양쪽으로 번갈아 가며 예산이 허락하는 만큼 라인을 확장합니다.
+    while True:
+        grew = False
+        if end + 1 < len(lines) and used + line_tokens[end + 1] <= line_budget:
+            end += 1
+            used += line_tokens[end]
+            grew = True
+        if start > 0 and used + line_tokens[start - 1] <= line_budget:
+            start -= 1
+            used += line_tokens[start]
+            grew = True
+        if not grew:
+            break
+
+    # 라인 몇 개만 남는 경우는 버리되, 긴 한 줄을 잘라낸 경우는 그 구간이 곧 관련 부분이므로 남깁니다.
+    if not center_cut and end - start + 1 < MIN_SNIPPET_LINES and len(lines) >= MIN_SNIPPET_LINES:
+        return "", True
+
+    parts = []
+    if start > 0:
+        parts.append(f"# ... ({start} lines omitted)")
+    parts.extend(lines[start:end + 1])
+    if end < len(lines) - 1:
+        parts.append(f"# ... ({len(lines) - 1 - end} lines omitted)")
+    return "\n".join(parts), True
+
+
+def assemble_prompt_context(
+    query: str,
+    contexts: List[Dict[str, Any]],
+    token_budget: int,
+    include_snippets: bool = True,
+    header: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    검색된 코드 컨텍스트를 토큰 예산 안에서 하나의 프롬프트 문자열로 조립합니다.
+
+    - 컨텍스트는 검색 순위(입력 순서)대로 포함하며, 남은 예산을 남은 컨텍스트 수로 나눠 배정합니다.
+    - 코드 스니펫은 쿼리와 관련된 구간을 중심으로 잘라냅니다.
+    - 릴레이션은 중복 제거 / 반복 이웃 병합 후 관련도 순으로 예산이 허락하는 만큼만 포함합니다.
+    - 최종 문자열은 리스트에 모아 한 번의 join으로 만듭니다.
+
+    Returns:
+        Dict: {'prompt': 조립된 문자열, 'token_usage': 섹션별 추정 토큰 수 리포트}
+    """
+    query_terms = _extract_query_terms(query)
+    parts: List[str] = []
+    usage = {
+        "budget": token_budget,
+        "header": 0,
+        "context_headers": 0,
+        "snippets": 0,
+        "relations": 0,
+        "total": 0,
+        "included_contexts": 0,
+        "dropped_contexts": 0,
+        "truncated_snippets": 0,
+        "omitted_snippets": 0,
+        "omitted_relations": 0,
+    }
+
+    if header:
+        parts.append(header)
+        usage["header"] = estimate_tokens(header)
+    remaining = token_budget - usage["header"]
+
+    for index, context in enumerate(contexts):
+        context_header = (
+            f"\n**파일 경로:** {context.get('file_path', 'N/A')}"
+            f"\n**노드 유형:** {context.get('type', 'N/A')}"
+        )
+        header_tokens = estimate_tokens(context_header) + _SEPARATOR_TOKENS
+        if header_tokens > remaining:
+            usage["dropped_contexts"] += len(contexts) - index
+            break
+
+        share = (remaining - header_tokens) // (len(contexts) - index)
+        context_parts = [context_header]
+        section_tokens = header_tokens
+        usage["context_headers"] += header_tokens
+
+        if include_snippets:
+            snippet = (context.get('code_snippet') or '').strip()
+            snippet_budget = int(share * SNIPPET_BUDGET_RATIO) if context.get('relations') else share
+            omitted = False
+            if snippet:
+                snippet, truncated = _truncate_snippet(snippet, query_terms, snippet_budget - _SNIPPET_WRAPPER_TOKENS)
+                omitted = not snippet
+                if omitted:
+                    usage["omitted_snippets"] += 1
+                elif truncated:
+                    usage["truncated_snippets"] += 1
+            if snippet:
+                snippet_text = f"**코드 스니펫:**\n```python\n{snippet}\n```"
+            elif omitted:
+                snippet_text = "**코드 스니펫:** 토큰 예산 초과로 생략"
+            else:
+                snippet_text = "**코드 스니펫:** 없음"
+            snippet_tokens = estimate_tokens(snippet_text)
+            context_parts.append(snippet_text)
+            section_tokens += snippet_tokens
+            usage["snippets"] += snippet_tokens
+
+        ranked_relations = _rank_and_collapse_relations(context.get('relations', []), query_terms)
+        if ranked_relations:
+            relation_budget = max(0, share - (section_tokens - header_tokens))
+            relation_title = "**관련 관계 및 노드:**"
+            relation_lines = []
+            relation_tokens = estimate_tokens(relation_title)
+            for item in ranked_relations:
+                line = _format_relation(item)
+                line_tokens = estimate_tokens(line)
+                if relation_tokens + line_tokens > relation_budget:
+                    break
+                relation_lines.append(line)
+                relation_tokens += line_tokens
+            usage["omitted_relations"] += len(ranked_relations) - len(relation_lines)
+            if relation_lines:
+                context_parts.append(relation_title)
+                context_parts.extend(relation_lines)
+                section_tokens += relation_tokens
+                usage["relations"] += relation_tokens
+
+        context_parts.append(_SEPARATOR)
+        parts.append("\n".join(context_parts))
+        remaining -= section_tokens
+        usage["included_contexts"] += 1
+
+    prompt = "\n".join(parts)
+    usage["total"] = estimate_tokens(prompt)
+    return {"prompt": prompt, "token_usage": usage}
@@ -1,12 +1,13 @@
 # app/services/semantic_search_service.py
 
 import torch
-import pickle
-import os
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from transformers import AutoTokenizer, AutoModel
 from db.driver_neo4j import Neo4jConnector, run_cypher_query
+from service.blob_store import get_blob_store
+from service.embedding_store import load_embeddings, EMBEDDING_DATA_PATH
+from service.graph_read_cache import get_graph_read_cache, code_context_dependencies, CODE_CONTEXT
 import sys
 
 # 로거 설정
@@ -35,27 +36,29 @@ except Exception as e:
 def search(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
     """
     자연어 쿼리와 가장 유사한 코드 노드 ID를 찾습니다.
-    (이 함수는 변경하지 않습니다.)
+    (search_with_query_embedding의 결과에서 쿼리 벡터를 뺀 래퍼입니다.)
+    """
+    results, _ = search_with_query_embedding(query, top_k=top_k)
+    return results
+
+def search_with_query_embedding(query: str, top_k: int = 5) -> Tuple[List[Dict[str, Any]], Optional[List[float]]]:
+    """
+    search와 동일하게 유사 노드를 찾되, 계산한 CodeBERT 쿼리 벡터도 함께 반환합니다.
+    (답변 캐시가 쿼리 벡터를 다시 계산하지 않고 재사용하기 위함)
     """
     if tokenizer is None or model is None:
         logger.error("CodeBERT 모델 또는 토크나이저가 로드되지 않았습니다. 검색을 수행할 수 없습니다.")
-        return []
-
-    embedding_file_path = "embedding_data.pkl"
-    if not os.path.exists(embedding_file_path):
-        logger.warning(f"임베딩 파일이 존재하지 않습니다: {embedding_file_path}")
-        return []
+        return [], None
 
     try:
-        with open(embedding_file_path, "rb") as f:
-            embedding_dict = pickle.load(f)
+        embedding_dict = load_embeddings()
     except Exception as e:
         logger.error(f"임베딩 파일 로드 실패: {e}", exc_info=True)
-        return []
+        return [], None
 
     if not embedding_dict:
-        logger.warning("임베딩 파일이 비어 있습니다. 검색을 수행하지 않습니다.")
-        return []
+        logger.warning(f"임베딩 파일이 없거나 비어 있습니다: {EMBEDDING_DATA_PATH}. 검색을 수행하지 않습니다.")
+        return [], None
     
     node_ids = list(embedding_dict.keys())
     tensor_values = [torch.tensor(val) for val in embedding_dict.values()]
@@ -75,7 +78,7 @@ def search(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
             "node_id": node_ids[idx],
             "score": score.item()
         })
-    return results
+    return results, query_embedding[0].tolist()
 
 def initialize_search_service():
     """애플리케이션 시작 시점에 Neo4j 드라이버를 로드하는 함수"""
@@ -103,10 +106,33 @@ def _get_snippet_from_file(file_path: str, start_line: int, end_line: int) -> st
         return f"ERROR: 파일을 읽는 중 오류 발생: {e}"
 
 
+def _get_code_snippet(data: Dict[str, Any]) -> Optional[str]:
+    """
+    노드의 코드 스니펫을 만듭니다. 분석 시점의 내용이 blob 저장소에 있으면 바이트 구간을 그대로 잘라 쓰고,
+    없으면(이전 버전으로 분석된 노드 등) 파일을 다시 읽어 라인 범위로 추출합니다.
+    """
+    snippet = get_blob_store().materialize(data)
+    if snippet is not None:
+        return snippet.strip()
+    if data.get("start_line") is not None and data.get("end_line") is not None and data.get("file_path") is not None:
+        return _get_snippet_from_file(data["file_path"], data["start_line"], data["end_line"])
+    return None
+
+
 def get_rich_code_contexts_from_neo4j(node_ids: List[str]) -> List[Dict[str, Any]]:
     """
     주어진 노드 ID에 대한 정보와, 해당 노드에 연결된 릴레이션 및 인접 노드를 함께 가져옵니다.
+    노드별 결과는 그래프 읽기 캐시에 보관되므로, 캐시에 없거나 그 사이 그래프 변경에 걸린 노드만 Neo4j에서 읽습니다.
+    결과는 node_ids 순서를 따릅니다.
     """
+    contexts = get_graph_read_cache().get_or_load_many(
+        CODE_CONTEXT, node_ids, _load_rich_code_contexts, code_context_dependencies
+    )
+    return [contexts[node_id] for node_id in dict.fromkeys(node_ids) if node_id in contexts]
+
+
+def _load_rich_code_contexts(node_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """get_rich_code_contexts_from_neo4j의 Neo4j 조회 부분. {노드 ID: 컨텍스트}를 반환합니다."""
     code_contexts = []
     
     # 노드 ID를 통해 해당 노드와 인접한 모든 관계 및 노드를 찾는 Cypher 쿼리
@@ -121,6 +147,9 @@ def get_rich_code_contexts_from_neo4j(node_ids: List[str]) -> List[Dict[str, Any
             n.file_path AS main_file_path,
             n.start_line AS main_start_line,
             n.end_line AS main_end_line,
+            n.content_hash AS main_content_hash,
+            n.byte_start AS main_byte_start,
+            n.byte_end AS main_byte_end,
             labels(n) AS main_labels,
             type(r) AS rel_type,
             r.id AS rel_id,
@@ -145,6 +174,9 @@ def get_rich_code_contexts_from_neo4j(node_ids: List[str]) -> List[Dict[str, Any
                     "file_path": record.get("main_file_path"),
                     "start_line": record.get("main_start_line"),
                     "end_line": record.get("main_end_line"),
+                    "content_hash": record.get("main_content_hash"),
+                    "byte_start": record.get("main_byte_start"),
+                    "byte_end": record.get("main_byte_end"),
                     "type": record["main_labels"][0] if record["main_labels"] else "Unknown",
                     "code_snippet": "",  # 나중에 채워질 값
                     "relations": []
@@ -162,8 +194,8 @@ def get_rich_code_contexts_from_neo4j(node_ids: List[str]) -> List[Dict[str, Any
 
         # 코드 스니펫 추출
         for node_id, data in grouped_results.items():
-            if data["start_line"] is not None and data["end_line"] is not None and data["file_path"] is not None:
-                snippet = _get_snippet_from_file(data["file_path"], data["start_line"], data["end_line"])
+            snippet = _get_code_snippet(data)
+            if snippet is not None:
                 data["code_snippet"] = snippet
             else:
                 data["code_snippet"] = f"No code snippet available. This is a {data['type']} node."
@@ -178,11 +210,12 @@ def get_rich_code_contexts_from_neo4j(node_ids: List[str]) -> List[Dict[str, Any
             isolated_query = """
                 UNWIND $ids AS node_id
                 MATCH (n) WHERE n.id = node_id
-                RETURN n.id AS node_id, labels(n) AS labels, n.file_path AS file_path, n.start_line AS start_line, n.end_line AS end_line
+                RETURN n.id AS node_id, labels(n) AS labels, n.file_path AS file_path, n.start_line AS start_line, n.end_line AS end_line,
+                       n.content_hash AS content_hash, n.byte_start AS byte_start, n.byte_end AS byte_end
             """
             isolated_results = run_cypher_query(isolated_query, parameters={"ids": not_found_ids}, write=False)
             for record in isolated_results:
-                snippet = _get_snippet_from_file(record['file_path'], record['start_line'], record['end_line'])
+                snippet = _get_code_snippet(record) or f"No code snippet available. This is a {record['labels'][0] if record['labels'] else 'Unknown'} node."
                 code_contexts.append({
                     "node_id": record['node_id'],
                     "file_path": record['file_path'],
@@ -195,7 +228,7 @@ def get_rich_code_contexts_from_neo4j(node_ids: List[str]) -> List[Dict[str, Any
         logger.error(f"Neo4j에서 풍부한 코드 컨텍스트를 가져오는 중 오류 발생: {e}", exc_info=True)
         raise RuntimeError("Neo4j 쿼리 실행 실패.")
         
-    return code_contexts
+    return {context["node_id"]: context for context in code_contexts}
 
 def close_neo4j_driver():
     """애플리케이션 종료 시 Neo4j 드라이버를 닫습니다."""
@@ -0,0 +1,53 @@
+# app/services/source_reader.py
+
+import os
+import mmap
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Union
+
+# 이 크기 이상인 파일은 통째로 읽지 않고 mmap으로 매핑합니다.
+MMAP_THRESHOLD_BYTES = int(os.getenv("SOURCE_MMAP_THRESHOLD_BYTES", str(1024 * 1024)))
+
+# mmap 버퍼의 줄 수를 셀 때 한 번에 살펴볼 크기
+_LINE_COUNT_CHUNK = 1024 * 1024
+
+SourceBuffer = Union[bytes, mmap.mmap]
+
+
+@contextmanager
+def open_source(file_path: Union[str, Path]) -> Iterator[SourceBuffer]:
+    """
+    소스 파일을 바이트 버퍼로 한 번만 읽습니다. (텍스트 디코딩 없음)
+    작은 파일은 bytes로 읽고, 큰 파일은 읽기 전용 mmap을 돌려줍니다.
+    mmap은 with 블록이 끝나면 닫히므로, 블록 밖에서는 버퍼나 그 슬라이스가 아닌 결과만 사용해야 합니다.
+
+    사용 예:
+        with open_source(path) as source:
+            parsed = parse_code_with_tree_sitter(source, language, path)
+    """
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_THRESHOLD_BYTES:
+            yield f.read()
+            return
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
+def count_lines(source: SourceBuffer) -> int:
+    """버퍼의 줄 수를 셉니다. (bytes.splitlines()의 개수와 같은 기준: 마지막 줄에 개행이 없어도 한 줄로 셈)"""
+    length = len(source)
+    if length == 0:
+        return 0
+    if isinstance(source, bytes):
+        newlines = source.count(b"\n")
+    else:
+        # mmap에는 count가 없으므로 일정 크기씩 잘라서 셉니다.
+        newlines = 0
+        for offset in range(0, length, _LINE_COUNT_CHUNK):
+            newlines += source[offset:offset + _LINE_COUNT_CHUNK].count(b"\n")
+    return newlines if source[length - 1:length] == b"\n" else newlines + 1
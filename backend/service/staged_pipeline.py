@@ -0,0 +1,256 @@
+# app/services/staged_pipeline.py
+
+import queue
+import threading
+import time
+import logging
+from typing import Dict, List, Any, Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# 큐 대기 중 중단 요청을 확인하는 주기(초)
+_POLL_INTERVAL = 0.2
+
+_SENTINEL = object()
+
+
+class PipelineStopped(Exception):
+    """중단 요청으로 파이프라인이 멈췄을 때 발생합니다."""
+
+
+class PipelineStage:
+    """
+    파이프라인의 한 단계. 입력 큐(크기 제한 = 역압)에서 항목을 꺼내 handler로 처리하고,
+    handler가 돌려준 결과를 다음 단계의 입력 큐에 넣습니다.
+
+    Args:
+        name: 단계 이름 (지표 표시용)
+        handler: 항목 하나(batch_size == 1) 또는 항목 리스트(batch_size > 1)를 받아
+                 다음 단계로 넘길 결과의 iterable(또는 None)을 반환하는 함수
+        workers: 이 단계를 동시에 처리할 스레드 수
+        queue_size: 입력 큐 최대 길이. 가득 차면 앞 단계가 기다립니다.
+        batch_size: 한 번에 모아서 처리할 최대 항목 수
+        batch_wait: 배치를 채우기 위해 다음 항목을 기다리는 최대 시간(초)
+    """
+
+    def __init__(self, name: str, handler: Callable[[Any], Optional[Iterable[Any]]], workers: int = 1,
+                 queue_size: int = 64, batch_size: int = 1, batch_wait: float = 0.05):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+        self.input: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_size))
+        self._lock = threading.Lock()
+        self._remaining_workers = self.workers
+        self.processed = 0
+        self.emitted = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def metrics(self, now: float) -> Dict[str, Any]:
+        with self._lock:
+            started = self.started_at or now
+            elapsed = max(1e-9, (self.finished_at or now) - started)
+            return {
+                "stage": self.name,
+                "workers": self.workers,
+                "processed": self.processed,
+                "emitted": self.emitted,
+                "queue_depth": self.input.qsize(),
+                "queue_capacity": self.input.maxsize,
+                "throughput_per_sec": round(self.processed / elapsed, 3) if self.started_at else 0.0,
+                # 처리 중인 시간 비율 (1에 가까우면 이 단계가 병목)
+                "utilization": round(self.busy_seconds / (elapsed * self.workers), 3) if self.started_at else 0.0,
+                # 다음 단계 큐가 가득 차서 기다린 시간 (역압)
+                "blocked_seconds": round(self.blocked_seconds, 3),
+                "finished": self.finished_at is not None,
+            }
+
+
+class StagedPipeline:
+    """
+    크기 제한 큐로 연결된 단계들을 각자의 스레드에서 동시에 실행합니다.
+    전체 소요 시간이 단계별 시간의 합이 아니라 가장 느린 단계에 가까워지도록 하는 것이 목적입니다.
+    중단 요청(should_stop)이나 handler의 예외가 발생하면 모든 단계를 멈추고 run()에서 예외를 다시 발생시킵니다.
+    """
+
+    def __init__(self, stages: List[PipelineStage], should_stop: Callable[[], bool] = lambda: False):
+        if not stages:
+            raise ValueError("파이프라인에는 최소 한 개의 단계가 필요합니다.")
+        self.stages = stages
+        self.should_stop = should_stop
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self._discovered = 0
+        self._discover_blocked = 0.0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def _stopped(self) -> bool:
+        if not self._stop.is_set() and self.should_stop():
+            self._stop.set()
+        return self._stop.is_set()
+
+    def _put(self, target: "queue.Queue[Any]", item: Any) -> float:
+        """역압을 반영해 큐에 넣습니다. 기다린 시간을 반환합니다."""
+        waited_from = time.perf_counter()
+        while True:
+            if self._stopped():
+                raise PipelineStopped()
+            try:
+                target.put(item, timeout=_POLL_INTERVAL)
+                return time.perf_counter() - waited_from
+            except queue.Full:
+                continue
+
+    def _get(self, source: "queue.Queue[Any]", timeout: Optional[float] = None) -> Any:
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            if self._stopped():
+                raise PipelineStopped()
+            wait = _POLL_INTERVAL if deadline is None else min(_POLL_INTERVAL, deadline - time.perf_counter())
+            if wait <= 0:
+                raise queue.Empty()
+            try:
+                return source.get(timeout=wait)
+            except queue.Empty:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    raise
+
+    def _forward(self, index: int, outputs: Optional[Iterable[Any]]):
+        stage = self.stages[index]
+        if outputs is None:
+            return
+        next_queue = self.stages[index + 1].input if index + 1 < len(self.stages) else None
+        for output in outputs:
+            blocked = self._put(next_queue, output) if next_queue is not None else 0.0
+            with stage._lock:
+                stage.emitted += 1
+                stage.blocked_seconds += blocked
+
+    def _run_handler(self, index: int, payload: Any, count: int):
+        stage = self.stages[index]
+        started = time.perf_counter()
+        outputs = stage.handler(payload)
+        # 제너레이터 결과도 처리 시간에 포함되도록 먼저 리스트로 만듭니다.
+        outputs = list(outputs) if outputs is not None else None
+        with stage._lock:
+            stage.busy_seconds += time.perf_counter() - started
+            stage.processed += count
+        self._forward(index, outputs)
+
+    def _worker(self, index: int):
+        stage = self.stages[index]
+        with stage._lock:
+            if stage.started_at is None:
+                stage.started_at = time.perf_counter()
+        try:
+            while True:
+                item = self._get(stage.input)
+                if item is _SENTINEL:
+                    break
+                if stage.batch_size == 1:
+                    self._run_handler(index, item, 1)
+                    continue
+                batch = [item]
+                reached_end = False
+                while len(batch) < stage.batch_size:
+                    try:
+                        next_item = self._get(stage.input, timeout=stage.batch_wait)
+                    except queue.Empty:
+                        break
+                    if next_item is _SENTINEL:
+                        reached_end = True
+                        break
+                    batch.append(next_item)
+                self._run_handler(index, batch, len(batch))
+                if reached_end:
+                    break
+            # 같은 단계의 다른 워커도 종료하도록 종료 신호를 되돌려 놓고,
+            # 마지막 워커가 다음 단계로 종료 신호를 전달합니다.
+            with stage._lock:
+                stage._remaining_workers -= 1
+                last_worker = stage._remaining_workers == 0
+                if last_worker:
+                    stage.finished_at = time.perf_counter()
+            if last_worker:
+                if index + 1 < len(self.stages):
+                    self._put(self.stages[index + 1].input, _SENTINEL)
+            else:
+                self._put(stage.input, _SENTINEL)
+        except PipelineStopped:
+            pass
+        except BaseException as e:
+            logger.error(f"파이프라인 단계 '{stage.name}' 실패: {e}", exc_info=True)
+            if self._error is None:
+                self._error = e
+            self._stop.set()
+
+    def run(self, source: Iterable[Any], on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+            progress_interval: float = 1.0):
+        """
+        source의 항목을 첫 단계에 넣고 모든 단계가 끝날 때까지 기다립니다. (호출한 스레드가 발견 단계 역할)
+
+        Args:
+            source: 첫 단계에 넣을 항목들
+            on_progress: progress_interval마다 지표(metrics())를 받아 호출할 함수
+        """
+        self.started_at = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._worker, args=(index,), name=f"pipeline-{stage.name}-{n}", daemon=True)
+            for index, stage in enumerate(self.stages)
+            for n in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        monitor_done = threading.Event()
+
+        def monitor():
+            while not monitor_done.wait(progress_interval):
+                try:
+                    on_progress(self.metrics())
+                except Exception as e:
+                    logger.warning(f"파이프라인 진행 보고 실패: {e}")
+
+        monitor_thread = None
+        if on_progress is not None:
+            monitor_thread = threading.Thread(target=monitor, name="pipeline-monitor", daemon=True)
+            monitor_thread.start()
+
+        try:
+            for item in source:
+                self._discover_blocked += self._put(self.stages[0].input, item)
+                self._discovered += 1
+            self._put(self.stages[0].input, _SENTINEL)
+        except PipelineStopped:
+            pass
+        except BaseException:
+            # 발견 단계(source)에서 예외가 나면 워커들이 종료 신호를 영원히 기다리지 않도록 멈춥니다.
+            self._stop.set()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+            self.finished_at = time.perf_counter()
+            monitor_done.set()
+            if monitor_thread is not None:
+                monitor_thread.join()
+
+        if self._error is not None:
+            raise self._error
+        if self._stop.is_set():
+            raise PipelineStopped()
+
+    def metrics(self) -> Dict[str, Any]:
+        now = time.perf_counter()
+        elapsed = ((self.finished_at or now) - self.started_at) if self.started_at else 0.0
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "discovered": self._discovered,
+            "discover_blocked_seconds": round(self._discover_blocked, 3),
+            "stages": [stage.metrics(now) for stage in self.stages],
+        }
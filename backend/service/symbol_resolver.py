@@ -0,0 +1,301 @@
+# app/services/symbol_resolver.py
+
+import uuid
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 프로젝트 전역에서 공유되는 외부 노드 ID 생성을 위한 네임스페이스
+# 같은 (유형, 이름, 프로젝트)는 항상 같은 ID가 되므로, 파일마다 새 노드가 생기지 않습니다.
+_SHARED_NODE_NAMESPACE = uuid.UUID("6f1c2d7e-3b7a-4f44-9c55-2a8a3f0f6a11")
+
+# 같은 클래스 안의 메서드를 가리키는 수신 객체 이름
+SELF_RECEIVERS = ("self", "cls")
+
+
+def shared_node_id(node_type: str, name: str, project_root: str) -> str:
+    """프로젝트 단위로 공유되는 외부 노드(ExternalCallTarget 등)의 결정적 ID를 만듭니다."""
+    return str(uuid.uuid5(_SHARED_NODE_NAMESPACE, f"{node_type}\0{project_root}\0{name}"))
+
+
+def module_path_for(file_path: str, project_root: str) -> Optional[str]:
+    """파일 경로를 프로젝트 루트 기준 파이썬 모듈 경로(a.b.c)로 변환합니다."""
+    try:
+        relative = Path(file_path).resolve().relative_to(Path(project_root).resolve())
+    except ValueError:
+        relative = Path(file_path)
+    parts = list(relative.with_suffix("").parts)
+    if parts and parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts) if parts else None
+
+
+class ProjectSymbolIndex:
+    """
+    프로젝트 전역 심볼 테이블.
+    모듈 경로 -> {심볼 이름: 엔티티 ID} 를 보관하며(메서드는 "클래스.메서드" 이름), 임포트 문자열이 프로젝트 루트가 아닌
+    하위 디렉토리(예: backend/) 기준이어도 찾을 수 있도록 모듈 경로의 접미사로도 조회합니다.
+    """
+
+    def __init__(self):
+        self.symbols: Dict[str, Dict[str, str]] = {}
+        self._suffix_index: Dict[str, List[str]] = {}
+
+    def add_module(self, module_path: str, entities: List[Dict[str, Any]]):
+        table = self.symbols.setdefault(module_path, {})
+        for entity in entities:
+            if entity.get("type") in ("Function", "Class") and entity.get("name"):
+                # 같은 이름이 여러 번 정의되면 처음 정의된 것을 사용합니다.
+                # 메서드는 모듈 최상위 이름으로 임포트할 수 없으므로 클래스 이름을 붙여 따로 둡니다.
+                name = f"{entity['class_name']}.{entity['name']}" if entity.get("class_name") else entity["name"]
+                table.setdefault(name, entity["id"])
+        parts = module_path.split(".")
+        for i in range(len(parts)):
+            self._suffix_index.setdefault(".".join(parts[i:]), []).append(module_path)
+
+    def find_module(self, import_path: str, importer_module: Optional[str] = None,
+                    importer_is_package: bool = False) -> Optional[str]:
+        """
+        임포트 문자열에 해당하는 프로젝트 모듈 경로를 찾습니다. 여러 개면 임포트한 모듈과 경로가 가까운 것을 고릅니다.
+
+        Args:
+            importer_is_package: 임포트한 파일이 패키지의 __init__.py 인지 여부
+                                 (pkg/__init__.py 의 모듈 경로는 pkg 이고, 상대 임포트 1단계는 pkg 자신을 가리킴)
+        """
+        if import_path.startswith("."):
+            # 상대 임포트 (from .x import y / from ..x import y)
+            if importer_module is None:
+                return None
+            level = len(import_path) - len(import_path.lstrip("."))
+            parts = importer_module.split(".")
+            package = parts if importer_is_package else parts[:-1]
+            if level - 1 > len(package):
+                return None  # 최상위 패키지 밖을 가리키는 상대 임포트
+            base = package[:len(package) - (level - 1)]
+            remainder = import_path[level:]
+            absolute = ".".join(base + ([remainder] if remainder else []))
+            return absolute if absolute in self.symbols else None
+        candidates = self._suffix_index.get(import_path)
+        if not candidates:
+            return None
+        if len(candidates) == 1 or importer_module is None:
+            return candidates[0]
+
+        def common_prefix(candidate: str) -> int:
+            count = 0
+            for a, b in zip(candidate.split("."), importer_module.split(".")):
+                if a != b:
+                    break
+                count += 1
+            return count
+
+        return max(candidates, key=common_prefix)
+
+    def lookup(self, module_path: str, name: str) -> Optional[str]:
+        return self.symbols.get(module_path, {}).get(name)
+
+
+def _join_module(module_string: str, name: str) -> str:
+    """모듈 문자열 뒤에 이름을 붙입니다. (from . import mod 의 '.' + 'mod' -> '.mod')"""
+    return f"{module_string}{name}" if module_string.endswith(".") else f"{module_string}.{name}"
+
+
+def _file_imports(relationships: List[Dict[str, Any]], names_by_id: Dict[str, str]
+                  ) -> Tuple[Dict[str, Tuple[str, str]], Dict[str, str]]:
+    """
+    한 파일의 임포트 관계에서 바인딩 정보를 만듭니다.
+
+    Returns:
+        Tuple[Dict, Dict]: ({파일 안에서 쓰는 이름: (모듈 문자열, 모듈 안의 원래 이름)},
+                            {import 문으로 가져온 모듈의 파일 안 이름(별칭 포함): 모듈 문자열})
+    """
+    imported_names: Dict[str, Tuple[str, str]] = {}
+    imported_modules: Dict[str, str] = {}
+    for rel in relationships:
+        properties = rel.get("properties", {})
+        module_string = properties.get("module_name_str")
+        if not module_string:
+            continue
+        if rel.get("type") == "IMPORTS_NAME":
+            name = names_by_id.get(rel["target_id"])
+            if name:
+                imported_names[name] = (module_string, name)
+        elif rel.get("type") == "IMPORTS_ALIASED_ORIGINAL" and properties.get("original_name_str"):
+            # from X import name as alias
+            original_name = properties["original_name_str"]
+            imported_names[properties.get("alias_name_str") or original_name] = (module_string, original_name)
+        elif rel.get("type") == "IMPORTS_MODULE":
+            # import X / import X as alias
+            imported_modules[properties.get("alias_str") or module_string] = module_string
+    return imported_names, imported_modules
+
+
+def resolve_cross_file_calls(parsed_files: List[Dict[str, Any]], project_root: str,
+                             known_entities: Optional[Dict[str, List[Dict[str, Any]]]] = None) -> Dict[str, int]:
+    """
+    파일별 추출 결과 전체를 보고 CALLS 관계의 대상을 실제 정의 노드로 다시 연결합니다.
+
+    - 같은 파일의 정의로 이미 연결된 호출은 그대로 둡니다.
+    - `from X import f` 후 `f()` 호출, `import X` 후 `X.f()` 호출은 프로젝트 모듈 X의 정의 f로 연결합니다.
+      별칭(`import X as y`, `from X import f as g`)과 상대 임포트(`from ..X import f`)도 같은 방식으로 따라갑니다.
+    - `self.f()` / `cls.f()` 는 호출을 감싸는 클래스의 메서드 f로 연결합니다.
+    - 그 외(내장 함수, 외부 라이브러리 등)는 프로젝트 전역에서 공유되는 ExternalCallTarget 노드로 연결합니다.
+
+    Args:
+        parsed_files: [{'file_path': 경로, 'extracted_entities': [...], 'extracted_relationships': [...]}, ...]
+                      (제자리에서 수정됩니다)
+        project_root: 프로젝트 루트 경로 (모듈 경로 계산 및 공유 노드 범위에 사용)
+        known_entities: 다시 추출하지 않은 파일의 정의 {파일 경로: [{'id', 'type', 'name', 'class_name'}, ...]}
+                        (변경된 파일만 분석할 때 그래프에서 읽은 심볼로, 심볼 테이블에만 추가되고 해석 대상은 아닙니다)
+
+    Returns:
+        Dict: 해석 통계 {'resolved_internal', 'shared_external', 'removed_external_nodes'}
+    """
+    stats = {"resolved_internal": 0, "shared_external": 0, "removed_external_nodes": 0}
+
+    # 1. 프로젝트 전역 심볼 인덱스 구축
+    index = ProjectSymbolIndex()
+    file_modules: List[Optional[str]] = []
+    for parsed in parsed_files:
+        module_path = module_path_for(str(parsed["file_path"]), project_root)
+        file_modules.append(module_path)
+        if module_path:
+            index.add_module(module_path, parsed["extracted_entities"])
+    for file_path, entities in (known_entities or {}).items():
+        module_path = module_path_for(file_path, project_root)
+        if module_path:
+            index.add_module(module_path, entities)
+
+    # 2. 파일별 CALLS 대상 재연결
+    for parsed, module_path in zip(parsed_files, file_modules):
+        is_package = Path(str(parsed["file_path"])).stem == "__init__"
+        entities = parsed["extracted_entities"]
+        relationships = parsed["extracted_relationships"]
+        entities_by_id = {entity["id"]: entity for entity in entities}
+        names_by_id = {entity["id"]: entity.get("name") for entity in entities}
+        imported_names, imported_modules = _file_imports(relationships, names_by_id)
+        shared_entities: Dict[str, Dict[str, Any]] = {}
+
+        for rel in relationships:
+            if rel.get("type") != "CALLS":
+                continue
+            target = entities_by_id.get(rel["target_id"])
+            if target is None or target.get("type") != "ExternalCallTarget":
+                continue  # 같은 파일의 정의로 이미 해석됨
+
+            properties = rel.get("properties", {})
+            called_name = properties.get("called_name_str") or target.get("name")
+            receiver = properties.get("receiver_str")
+
+            resolved_id = None
+            if receiver is None and called_name in imported_names:
+                module_string, original_name = imported_names[called_name]
+                target_module = index.find_module(module_string, module_path, is_package)
+                if target_module:
+                    resolved_id = index.lookup(target_module, original_name)
+            elif receiver in SELF_RECEIVERS and module_path:
+                # 클래스를 모르는 이전 추출 결과는 같은 파일의 정의 f로 연결합니다.
+                receiver_class = properties.get("receiver_class_str")
+                resolved_id = index.lookup(module_path, f"{receiver_class}.{called_name}" if receiver_class else called_name)
+            elif receiver is not None:
+                # import X 후 X.f(), 또는 from pkg import mod 후 mod.f()
+                module_string = imported_modules.get(receiver)
+                if module_string is None and receiver in imported_names:
+                    module_string = _join_module(*imported_names[receiver])
+                if module_string:
+                    target_module = index.find_module(module_string, module_path, is_package)
+                    if target_module:
+                        resolved_id = index.lookup(target_module, called_name)
+
+            if resolved_id:
+                rel["target_id"] = resolved_id
+                stats["resolved_internal"] += 1
+                continue
+
+            shared_id = shared_node_id("ExternalCallTarget", called_name, project_root)
+            if shared_id not in shared_entities:
+                shared_entities[shared_id] = {
+                    "id": shared_id,
+                    "type": "ExternalCallTarget",
+                    "name": called_name,
+                    "project_root": project_root
+                }
+            rel["target_id"] = shared_id
+            stats["shared_external"] += 1
+
+        # 3. 더 이상 참조되지 않는 파일별 ExternalCallTarget 노드를 제거하고 공유 노드로 교체
+        referenced = {rel["target_id"] for rel in relationships} | {rel["source_id"] for rel in relationships}
+        kept = []
+        for entity in entities:
+            if entity.get("type") == "ExternalCallTarget" and entity["id"] not in referenced:
+                stats["removed_external_nodes"] += 1
+                continue
+            kept.append(entity)
+        kept.extend(shared_entities.values())
+        parsed["extracted_entities"] = kept
+
+    logger.info(f"교차 파일 호출 해석 완료: {stats}")
+    return stats
+
+
+def assign_shared_node_ids(parsed_files: List[Dict[str, Any]], project_root: str, labels: Tuple[str, ...],
+                           existing_ids: Optional[Dict[Tuple[str, str], str]] = None) -> int:
+    """
+    파일마다 따로 생긴 공유 대상 노드(Module / ImportedName 등)에 (레이블, 이름)별로 같은 ID를 부여합니다.
+    그래프에 저장한 뒤 압축(compact_graph)하는 것과 같은 결과를 저장 전에 만듭니다.
+
+    Args:
+        parsed_files: [{'extracted_entities': [...], 'extracted_relationships': [...]}, ...] (제자리에서 수정됩니다)
+        labels: 공유 대상 레이블
+        existing_ids: 이미 저장된 노드의 {(레이블, 이름): ID} (없는 것은 shared_node_id로 만듭니다)
+
+    Returns:
+        int: ID가 바뀐 엔티티 수
+    """
+    existing_ids = existing_ids or {}
+    changed = 0
+    for parsed in parsed_files:
+        shared_map: Dict[str, str] = {}
+        unique_entities: Dict[str, Dict[str, Any]] = {}
+        for entity in parsed["extracted_entities"]:
+            if entity.get("type") in labels and entity.get("name"):
+                key = (entity["type"], entity["name"])
+                new_id = existing_ids.get(key) or shared_node_id(entity["type"], entity["name"], project_root)
+                if new_id != entity["id"]:
+                    shared_map[entity["id"]] = new_id
+                    entity["id"] = new_id
+                    changed += 1
+            unique_entities.setdefault(entity["id"], entity)
+        parsed["extracted_entities"] = list(unique_entities.values())
+        if shared_map:
+            for rel in parsed["extracted_relationships"]:
+                rel["source_id"] = shared_map.get(rel["source_id"], rel["source_id"])
+                rel["target_id"] = shared_map.get(rel["target_id"], rel["target_id"])
+    return changed
+
+
+def split_deferred_calls(entities: List[Dict[str, Any]], relationships: List[Dict[str, Any]]
+                         ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[int]]:
+    """
+    한 파일의 추출 결과를 바로 저장할 수 있는 부분과, 프로젝트 전체 파싱 후(resolve_cross_file_calls)에야
+    대상이 정해지는 부분으로 나눕니다. 파일을 파싱하는 대로 DB에 저장하는 분석 파이프라인에서 사용합니다.
+
+    - 파일별 ExternalCallTarget 노드와 이 노드에 연결된 관계(해석 전 CALLS)는 나중에 저장합니다.
+    - 나머지 엔티티/관계는 해석 결과와 무관하므로 바로 저장할 수 있습니다.
+
+    Returns:
+        Tuple: (바로 저장할 엔티티, 바로 저장할 관계, 나중에 저장할 관계의 인덱스 목록)
+               인덱스는 relationships 기준이며, resolve_cross_file_calls는 관계의 순서를 바꾸지 않습니다.
+    """
+    deferred_node_ids = {entity["id"] for entity in entities if entity.get("type") == "ExternalCallTarget"}
+    immediate_entities = [entity for entity in entities if entity["id"] not in deferred_node_ids]
+    immediate_relationships = []
+    deferred_indices = []
+    for index, rel in enumerate(relationships):
+        if rel.get("target_id") in deferred_node_ids or rel.get("source_id") in deferred_node_ids:
+            deferred_indices.append(index)
+        else:
+            immediate_relationships.append(rel)
+    return immediate_entities, immediate_relationships, deferred_indices
@@ -0,0 +1,124 @@
+# bulk_import_benchmark.py
+"""
+최초 적재 방식별 소요 시간 비교 (수동 실행용)
+
+합성 그래프 결과물(기본 엔티티 100만 개)을 만들고 아래 방식으로 적재한 시간을 비교합니다.
+    1. 트랜잭션 적재   (db/artifact_loader.py, cli.py load)
+    2. LOAD CSV       (db/bulk_import.py, cli.py load-csv) - CSV 디렉토리가 서버 import 디렉토리여야 합니다.
+    3. neo4j-admin    (db/bulk_import.py, cli.py export-csv) - --admin을 주면 출력된 명령을 실행합니다. (서버 중지 상태)
+
+각 방식은 같은 데이터를 적재하므로, 비교할 때는 매번 빈 데이터베이스에서 하나씩 실행하세요.
+
+    python test/bulk_import_benchmark.py --entities 1000000 --work-dir /var/lib/neo4j/import/bench --method csv
+"""
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import time
+import uuid
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+sys.path.append(project_root)
+
+from service.graph_artifact import write_graph_artifact, JSONL
+from db.bulk_import import export_import_csv
+
+
+def build_synthetic_artifact(artifact_dir: str, entity_count: int, functions_per_file: int = 20):
+    """파일 하나에 Class 1개, Function functions_per_file개가 있고, 함수가 같은 파일의 다음 함수와 다른 파일의 함수를 호출하는 그래프"""
+    per_file = functions_per_file + 2
+    file_count = max(1, entity_count // per_file)
+    entities, relationships = [], []
+    function_ids = []
+    for file_index in range(file_count):
+        file_path = f"/bench/project/pkg{file_index // 100}/module_{file_index}.py"
+        file_id = str(uuid.uuid4())
+        entities.append({"id": file_id, "type": "File", "name": os.path.basename(file_path), "file_path": file_path,
+                         "entity_count": per_file - 1})
+        class_id = str(uuid.uuid4())
+        entities.append({"id": class_id, "type": "Class", "name": f"Service{file_index}", "file_path": file_path,
+                         "start_line": 1, "end_line": 1, "content_hash": "0" * 64, "byte_start": 0, "byte_end": 40})
+        relationships.append({"source_id": file_id, "target_id": class_id, "type": "CONTAINS", "properties": {"line": 1}})
+        ids = []
+        for function_index in range(functions_per_file):
+            function_id = str(uuid.uuid4())
+            line = 10 * (function_index + 1)
+            entities.append({"id": function_id, "type": "Function", "name": f"func_{function_index}", "file_path": file_path,
+                             "start_line": line, "end_line": line, "content_hash": "0" * 64,
+                             "byte_start": line * 30, "byte_end": line * 30 + 250})
+            relationships.append({"source_id": file_id, "target_id": function_id, "type": "CONTAINS",
+                                  "properties": {"line": line}})
+            ids.append(function_id)
+        function_ids.append(ids)
+
+    for file_index, ids in enumerate(function_ids):
+        other = function_ids[(file_index + 1) % file_count]
+        for function_index, function_id in enumerate(ids):
+            targets = [ids[(function_index + 1) % len(ids)], other[function_index]]
+            for target_id in targets:
+                relationships.append({
+                    "source_id": function_id, "target_id": target_id, "type": "CALLS",
+                    "properties": {"file_location": f"{function_index}:4", "content_hash": "0" * 64,
+                                   "byte_start": 0, "byte_end": 10, "called_name_str": "func", "receiver_str": None},
+                })
+
+    return write_graph_artifact(artifact_dir, entities, relationships,
+                                {"project_root": "/bench/project", "selected_paths": ["."]}, artifact_format=JSONL)
+
+
+def _timed(label: str, results: dict, func, *args, **kwargs):
+    print(f"\n--- {label} ---")
+    started = time.perf_counter()
+    value = func(*args, **kwargs)
+    results[label] = time.perf_counter() - started
+    print(f"{label}: {results[label]:.1f}s")
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="최초 적재 방식별 소요 시간 비교")
+    parser.add_argument("--entities", type=int, default=1_000_000, help="합성 그래프의 엔티티 수")
+    parser.add_argument("--work-dir", default="bench_import", help="결과물과 CSV를 만들 디렉토리")
+    parser.add_argument("--method", choices=["none", "transactional", "csv", "admin"], default="none",
+                        help="적재 방식 (none이면 결과물/CSV 생성 시간만 측정)")
+    parser.add_argument("--url-prefix", help="LOAD CSV에서 CSV 디렉토리를 가리키는 URL 접두사")
+    args = parser.parse_args()
+
+    artifact_dir = os.path.join(args.work_dir, "artifact")
+    csv_dir = os.path.join(args.work_dir, "csv")
+    results = {}
+
+    manifest = _timed("synthetic artifact", results, build_synthetic_artifact, artifact_dir, args.entities)
+    print(f"엔티티 {manifest['counts']['entities']}개, 관계 {manifest['counts']['relationships']}개")
+    export = _timed("export csv", results, export_import_csv, artifact_dir, csv_dir)
+
+    if args.method != "none":
+        from db.driver_neo4j import Neo4jConnector
+        from db.artifact_loader import load_graph_artifact
+        from db.bulk_import import load_csv_import, finalize_admin_import, NEO4J_IMPORT_URL_PREFIX
+        try:
+            if args.method == "transactional":
+                _timed("transactional load", results, load_graph_artifact, artifact_dir, load_vectors=False)
+            elif args.method == "csv":
+                _timed("load csv", results, load_csv_import, csv_dir,
+                       url_prefix=args.url_prefix or NEO4J_IMPORT_URL_PREFIX, load_vectors=False)
+            else:
+                Neo4jConnector.close_driver()
+                input("Neo4j 서버를 중지한 뒤 Enter를 누르세요...")
+                _timed("neo4j-admin import", results, subprocess.run,
+                       shlex.split(export["neo4j_admin_command"]), check=True)
+                input("Neo4j 서버를 시작한 뒤 Enter를 누르세요...")
+                _timed("finalize import", results, finalize_admin_import, csv_dir, load_vectors=False)
+        finally:
+            Neo4jConnector.close_driver()
+
+    print("\n=== 결과 ===")
+    for label, seconds in results.items():
+        print(f"{label:<24}{seconds:>10.1f}s")
+
+
+if __name__ == "__main__":
+    main()
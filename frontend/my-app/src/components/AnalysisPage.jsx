@@ -79,8 +79,14 @@ function AnalysisPage({ projectRootPath, selectedPaths, onAnalysisComplete, onAn
                 const messageChunk = buffer.substring(0, lastNewlineIndex);
                 buffer = buffer.substring(lastNewlineIndex + 2);
 
-                if (messageChunk.startsWith('data: ')) {
-                  const message = messageChunk.substring(6);
+                // SSE 메시지는 여러 필드 줄(id:, data: 등)로 구성되므로 data 줄만 모아 JSON으로 해석합니다.
+                const dataLines = messageChunk
+                  .split('\n')
+                  .filter((line) => line.startsWith('data:'))
+                  .map((line) => line.replace(/^data: ?/, ''));
+
+                if (dataLines.length > 0) {
+                  const message = dataLines.join('\n');
                   try {
                     const data = JSON.parse(message);
                     